@@ -0,0 +1,321 @@
+"""Adaptive sampling of matchups, stopping each one once its win rate is known well enough.
+
+Usage:
+    python -m combatgame.adaptive --matchup Tank:Viperstrike --matchup Tank,Healer:Doomshroud \
+        --precision 0.01
+"""
+from __future__ import annotations
+import argparse
+import math
+import multiprocessing
+from typing import List, NamedTuple, Optional, Sequence
+
+from .balance import wilson_interval
+from .cache import results_cache
+from .characters import job_classes
+from .enemies import enemy_names
+from .simulation import Aggregate, Matchup, parse_matchup, simulate_matchup
+
+
+# the amount of battles of a task, fixed so cached tasks are found by later runs
+CHUNK_BATTLES = 100
+
+
+class SampledMatchup(NamedTuple):
+    """The state of a matchup during adaptive sampling.
+
+    Attributes
+    ----------
+    matchup : Matchup
+        The matchup.
+    aggregate : Aggregate
+        The totals of the battles so far.
+    stopped : Optional[str]
+        Why sampling stopped, "precision", "threshold" or "budget", None while sampling.
+    """
+
+    matchup: Matchup
+    aggregate: Aggregate = Aggregate()
+    stopped: Optional[str] = None
+
+
+def _simulate_chunk(task: tuple) -> Aggregate:
+    # simulate a chunk of battles, runs in the worker processes
+    matchup, seeds, cache = task
+
+    return simulate_matchup(matchup, seeds, results_cache if cache else None)
+
+
+class AdaptiveSampler:
+    """Simulates matchups until their win rate intervals are narrow enough.
+
+    After every round the Wilson interval of each matchup is checked. A matchup stops when
+    the half width of its interval is at most `precision`, when the interval lies entirely
+    on one side of `threshold`, or when it used `max_battles`. The next round gives every
+    matchup still sampling about the amount of battles its interval says it still needs,
+    so lopsided matchups stop after a few chunks and close ones get the battles.
+
+    Attributes
+    ----------
+    matchups : List[SampledMatchup]
+        The state of every matchup.
+    precision : float
+        The target half width of the win rate intervals.
+    threshold : Optional[float]
+        The win rate a matchup only has to be known to be above or below, None to only
+        stop on precision.
+    z : float
+        The z score of the intervals.
+    min_battles : int
+        The amount of battles of a matchup before it can stop.
+    max_battles : int
+        The max amount of battles of a matchup.
+    processes : int
+        The amount of worker processes, 1 to simulate in this process.
+    seed : int
+        The seed of the first battle of each matchup.
+    cache : bool
+        Whether to reuse the results in `results_cache`.
+    rounds : int
+        The amount of rounds played.
+    """
+
+    def __init__(
+        self,
+        matchups: Sequence[Matchup],
+        precision: float = 0.01,
+        threshold: Optional[float] = None,
+        z: float = 2.576,
+        min_battles: int = 200,
+        max_battles: int = 100_000,
+        processes: Optional[int] = None,
+        seed: int = 0,
+        cache: bool = True
+        ):
+        """Initializes an AdaptiveSampler instance.
+
+        Parameters
+        ----------
+        matchups : Sequence[Matchup]
+            The matchups to sample.
+        precision : float
+            The target half width of the win rate intervals. Defaults to 0.01.
+        threshold : float
+            The win rate to decide matchups against. Defaults to None, only precision.
+        z : float
+            The z score of the intervals. Defaults to 2.576, 99%, as looking at the
+            intervals after every round makes them a little optimistic.
+        min_battles : int
+            The amount of battles of a matchup before it can stop. Defaults to 200.
+        max_battles : int
+            The max amount of battles of a matchup. Defaults to 100,000.
+        processes : int
+            The amount of worker processes. Defaults to None, one for each CPU.
+        seed : int
+            The seed of the first battle of each matchup. Defaults to 0.
+        cache : bool
+            Whether to reuse the results in `results_cache`. Defaults to True.
+        """
+
+        self.matchups = [SampledMatchup(matchup) for matchup in matchups]
+        self.precision = precision
+        self.threshold = threshold
+        self.z = z
+        self.min_battles = min_battles
+        self.max_battles = max_battles
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+        self.cache = cache
+        self.rounds = 0
+
+    def interval(self, sampled: SampledMatchup):
+        """Get the win rate interval of a matchup.
+
+        Parameters
+        ----------
+        sampled : SampledMatchup
+            The matchup.
+
+        Returns
+        -------
+        Tuple[float, float] : The low and high bound of the win rate.
+        """
+
+        return wilson_interval(sampled.aggregate.wins, sampled.aggregate.battles, self.z)
+
+    def run(self) -> List[SampledMatchup]:
+        """Sample the matchups until every one of them stopped.
+
+        Returns
+        -------
+        List[SampledMatchup] : The state of every matchup.
+        """
+
+        pool = multiprocessing.Pool(self.processes) if self.processes > 1 else None
+
+        try:
+            while self._play_round(pool):
+                pass
+
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return self.matchups
+
+    def _play_round(self, pool) -> bool:
+        # give every sampling matchup the chunks it still needs, then check them
+        tasks = []
+        owners = []
+
+        for index, sampled in enumerate(self.matchups):
+            if sampled.stopped is not None:
+                continue
+
+            start = self.seed + sampled.aggregate.battles
+            stop = start + self._battles_needed(sampled)
+
+            # whole chunks, but the last one stops at the budget
+            for chunk_start in range(start, stop, CHUNK_BATTLES):
+                tasks.append((sampled.matchup,
+                              range(chunk_start, min(chunk_start + CHUNK_BATTLES, stop)),
+                              self.cache))
+                owners.append(index)
+
+        if not tasks:
+            return False
+
+        aggregates = pool.map(_simulate_chunk, tasks) if pool else map(_simulate_chunk, tasks)
+
+        for index, aggregate in zip(owners, aggregates):
+            sampled = self.matchups[index]
+            self.matchups[index] = sampled._replace(
+                aggregate=sampled.aggregate.combine(aggregate)
+                )
+
+        for index, sampled in enumerate(self.matchups):
+            if sampled.stopped is None:
+                self.matchups[index] = sampled._replace(stopped=self._stop_reason(sampled))
+
+        self.rounds += 1
+
+        return True
+
+    def _battles_needed(self, sampled: SampledMatchup) -> int:
+        # the battles the interval needs to reach the precision, rounded up to whole chunks
+        # and then cut to the budget
+        battles = sampled.aggregate.battles
+
+        if battles < self.min_battles:
+            needed = self.min_battles - battles
+
+        else:
+            # the normal approximation of the battles needed, with a floor on the variance
+            # so matchups that never lost or won still get sampled
+            win_rate = min(max(sampled.aggregate.win_rate, 0.02), 0.98)
+            needed = self.z ** 2 * win_rate * (1 - win_rate) / self.precision ** 2 - battles
+
+            # grow at most by doubling, so the estimate is checked along the way
+            needed = min(max(needed, CHUNK_BATTLES), max(battles, CHUNK_BATTLES))
+
+        return min(math.ceil(needed / CHUNK_BATTLES) * CHUNK_BATTLES, self.max_battles - battles)
+
+    def _stop_reason(self, sampled: SampledMatchup) -> Optional[str]:
+        # why a matchup stops sampling, None if it goes on
+        if sampled.aggregate.battles < min(self.min_battles, self.max_battles):
+            return None
+
+        low, high = self.interval(sampled)
+
+        if (high - low) / 2 <= self.precision:
+            return "precision"
+
+        if self.threshold is not None and (high < self.threshold or low > self.threshold):
+            return "threshold"
+
+        if sampled.aggregate.battles >= self.max_battles:
+            return "budget"
+
+        return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the adaptive sampler.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Simulate matchups until their win rates are known well enough."
+        )
+    parser.add_argument(
+        "--matchup", action="append", type=parse_matchup,
+        help="a matchup as team:enemies[:policy], defaults to every job class against every "
+        "enemy"
+        )
+    parser.add_argument(
+        "--precision", type=float, default=0.01,
+        help="the target half width of the win rate intervals"
+        )
+    parser.add_argument(
+        "--threshold", type=float, default=None,
+        help="stop a matchup once its win rate is known to be above or below this"
+        )
+    parser.add_argument("--z", type=float, default=2.576, help="the z score of the intervals")
+    parser.add_argument(
+        "--min-battles", type=int, default=200, help="the min battles of a matchup"
+        )
+    parser.add_argument(
+        "--max-battles", type=int, default=100_000, help="the max battles of a matchup"
+        )
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="simulate even if the results are cached"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the adaptive sampler from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    args = build_parser().parse_args(argv)
+    matchups = args.matchup or [
+        Matchup((job_class,), (enemy,)) for job_class in job_classes for enemy in enemy_names
+    ]
+    sampler = AdaptiveSampler(
+        matchups, args.precision, args.threshold, args.z, args.min_battles, args.max_battles,
+        args.processes, args.seed, not args.no_cache
+        )
+
+    for sampled in sampler.run():
+        low, high = sampler.interval(sampled)
+        print(
+            f"{str(sampled.matchup):<45}{sampled.aggregate.win_rate:7.1%} "
+            f"[{low:.1%}, {high:.1%}] after {sampled.aggregate.battles:>6} battles "
+            f"({sampled.stopped})"
+            )
+
+    battles = sum(sampled.aggregate.battles for sampled in sampler.matchups)
+    # the battles a fixed sample size needs to reach the precision at a 50% win rate
+    fixed_battles = len(matchups) * math.ceil(
+        min(args.z ** 2 * 0.25 / args.precision ** 2, args.max_battles)
+        )
+    print(
+        f"{battles} battles in {sampler.rounds} rounds, {battles / fixed_battles:.0%} of the "
+        f"{fixed_battles} a fixed sample size of the same precision needs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,642 @@
+"""Balance optimizer that tunes stat cells of the CSV tables towards target win rates.
+
+Usage:
+    python -m combatgame.balance --cell enemy:Viperstrike:HP --cell enemy:Doomshroud:AP=15:35 \
+        --target Viperstrike=0.9 --target Doomshroud=0.6 --target Mistwalker=0.5
+"""
+from __future__ import annotations
+import argparse
+import csv
+import difflib
+import io
+import math
+import multiprocessing
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import characters, enemies
+from .characters import job_classes
+from .policies import create_policy, policy_classes
+from .cache import results_cache
+from .simulation import MAX_TURNS, Matchup, simulate_matchup
+from .tables import set_cells
+
+
+# the table, path and template cache of each CSV table with stat cells
+stat_tables = {
+    "job": (characters.job_class_attributes, characters.job_class_attributes_path,
+            characters.job_class_templates, "job"),
+    "enemy": (enemies.enemy_attributes, enemies.enemy_attributes_path,
+              enemies.enemy_templates, "name"),
+}
+
+# the enemies of each combat scene
+scene_enemies: Dict[str, Tuple[str, ...]] = {
+    "Viperstrike": ("Viperstrike",),
+    "Doomshroud": ("Doomshroud",),
+    "Mistwalker": ("Mistwalker",),
+}
+
+# the amount of battles of a task, fixed so cached tasks are found for any amount of processes
+CHUNK_BATTLES = 100
+
+# the default win rate targets of the scenes, the fights get harder as the story goes on
+default_targets: Dict[str, float] = {
+    "Viperstrike": 0.9,
+    "Doomshroud": 0.6,
+    "Mistwalker": 0.5,
+}
+
+
+class StatCell(NamedTuple):
+    """A stat cell of a CSV table tuned by the optimizer.
+
+    Attributes
+    ----------
+    table : str
+        The table in `stat_tables`, "job" or "enemy".
+    row : str
+        The job class or enemy name.
+    column : str
+        The stat column, e.g. "HP".
+    low : int
+        The min value of the cell.
+    high : int
+        The max value of the cell.
+    """
+
+    table: str
+    row: str
+    column: str
+    low: int
+    high: int
+
+    def __str__(self):
+        return f"{self.table}:{self.row}:{self.column}"
+
+    def value(self) -> int:
+        """Get the current value of the cell.
+
+        Returns
+        -------
+        int : The value in the loaded table.
+        """
+
+        return int(stat_tables[self.table][0][self.row][self.column])
+
+
+def parse_cell(spec: str) -> StatCell:
+    """Parse a stat cell given on the command line.
+
+    Parameters
+    ----------
+    spec : str
+        The cell as "table:row:column", optionally with bounds as "=low:high". Without
+        bounds the cell can change by half its current value.
+
+    Returns
+    -------
+    StatCell : The parsed cell.
+    """
+
+    name, _, bounds = spec.partition("=")
+    parts = name.split(":")
+
+    if len(parts) != 3:
+        raise ValueError(f"A stat cell is written as table:row:column, got '{spec}'.")
+
+    table, row, column = parts
+    rows = stat_tables.get(table, ({},))[0]
+
+    if row not in rows or column not in rows[row]:
+        raise ValueError(f"Unknown stat cell '{name}', the tables are {', '.join(stat_tables)}.")
+
+    value = int(rows[row][column])
+
+    if bounds:
+        low, high = (int(bound) for bound in bounds.split(":"))
+
+    else:
+        low, high = max(value - abs(value) // 2, 0), value + max(abs(value) // 2, 1)
+
+    if not low <= high:
+        raise ValueError(f"The bounds of '{name}' are reversed.")
+
+    return StatCell(table, row, column, low, high)
+
+
+@contextmanager
+def override_stats(cells: Sequence[StatCell], values: Sequence[int]) -> Iterator[None]:
+    """Set stat cells of the loaded tables, and put the old values back afterwards.
+
+    The converted templates and the data fingerprint are dropped so characters are built
+    with the new values and their results are cached under new keys.
+
+    Parameters
+    ----------
+    cells : Sequence[StatCell]
+        The cells to set.
+    values : Sequence[int]
+        The value of each cell.
+    """
+
+    old_values = [stat_tables[cell.table][0][cell.row][cell.column] for cell in cells]
+
+    def assign(cell_values):
+        set_cells(
+            (cell.table, cell.row, cell.column, str(value))
+            for cell, value in zip(cells, cell_values)
+            )
+
+    assign(values)
+
+    try:
+        yield
+
+    finally:
+        assign(old_values)
+
+
+def wilson_interval(wins: int, battles: int, z: float = 1.96) -> Tuple[float, float]:
+    """Get the confidence interval of a win rate.
+
+    Parameters
+    ----------
+    wins : int
+        The amount of battles won.
+    battles : int
+        The amount of battles.
+    z : float
+        The z score of the confidence level. Defaults to 1.96, 95%.
+
+    Returns
+    -------
+    Tuple[float, float] : The low and high bound of the win rate.
+    """
+
+    if not battles:
+        return 0.0, 1.0
+
+    rate = wins / battles
+    denominator = 1 + z * z / battles
+    center = (rate + z * z / (2 * battles)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / battles + z * z / (4 * battles * battles))
+
+    return max(center - margin / denominator, 0.0), min(center + margin / denominator, 1.0)
+
+
+def _count_wins(task: tuple) -> int:
+    # simulate a chunk of battles with overridden stats, runs in the worker processes
+    cells, values, matchup, seeds, cache = task
+
+    with override_stats(cells, values):
+        return simulate_matchup(matchup, seeds, results_cache if cache else None).wins
+
+
+class Evaluation(NamedTuple):
+    """The simulated win rates of a set of stat cell values.
+
+    Attributes
+    ----------
+    values : Tuple[int, ...]
+        The value of each stat cell.
+    wins : Dict[str, int]
+        The amount of battles won in each scene.
+    battles : int
+        The amount of battles of each scene.
+    loss : float
+        The sum of the squared differences between the win rates and their targets.
+    """
+
+    values: Tuple[int, ...]
+    wins: Dict[str, int]
+    battles: int
+    loss: float
+
+    def win_rate(self, scene: str) -> float:
+        """Get the win rate of a scene.
+
+        Parameters
+        ----------
+        scene : str
+            The name of the scene.
+
+        Returns
+        -------
+        float : The win rate.
+        """
+
+        return self.wins[scene] / self.battles
+
+
+class BalanceOptimizer:
+    """Searches stat cell values whose simulated win rates are closest to their targets.
+
+    The search is a coordinate search: every cell is moved up and down by a step in turn,
+    keeping moves that lower the loss, and the steps are halved when no move helps. Every
+    evaluation simulates the same seeds (common random numbers), so the difference between
+    two evaluations comes from the stats rather than the rolls, and evaluated values are
+    kept so they are never simulated twice. The battles are split between processes.
+
+    Each scene is simulated on its own from full stats, unlike the story where the team
+    carries its health from one scene to the next.
+
+    Attributes
+    ----------
+    cells : Tuple[StatCell, ...]
+        The tuned stat cells.
+    targets : Dict[str, float]
+        The target win rate of each scene in `scene_enemies`.
+    team : Tuple[str, ...]
+        The job class of each player character.
+    policy : str
+        The player policy, as given to `create_policy`.
+    battles : int
+        The amount of battles simulated for each scene in an evaluation.
+    budget : int
+        The max amount of evaluations of an optimization.
+    processes : int
+        The amount of worker processes, 1 to simulate in this process.
+    seed : int
+        The seed of the first battle.
+    max_turns : int
+        The amount of turns before a battle is stopped as a loss.
+    cache : bool
+        Whether to reuse the results in `results_cache`, including those of earlier runs.
+    evaluations : Dict[Tuple[int, ...], Evaluation]
+        The evaluation of every set of values simulated so far.
+    """
+
+    def __init__(
+        self,
+        cells: Sequence[StatCell],
+        targets: Dict[str, float] = None,
+        team: Sequence[str] = ("Tank", "MirrorMage", "Healer"),
+        policy: str = "greedy",
+        battles: int = 400,
+        budget: int = 40,
+        processes: Optional[int] = None,
+        seed: int = 0,
+        max_turns: int = MAX_TURNS,
+        cache: bool = True
+        ):
+        """Initializes a BalanceOptimizer instance.
+
+        Parameters
+        ----------
+        cells : Sequence[StatCell]
+            The tuned stat cells.
+        targets : Dict[str, float]
+            The target win rate of each scene. Defaults to `default_targets`.
+        team : Sequence[str]
+            The job class of each player character. Defaults to Tank, MirrorMage, Healer.
+        policy : str
+            The player policy. Defaults to "greedy".
+        battles : int
+            The amount of battles simulated for each scene in an evaluation. Defaults to 400.
+        budget : int
+            The max amount of evaluations of an optimization. Defaults to 40.
+        processes : int
+            The amount of worker processes. Defaults to None, one for each CPU.
+        seed : int
+            The seed of the first battle. Defaults to 0.
+        max_turns : int
+            The amount of turns before a battle is stopped as a loss. Defaults to MAX_TURNS.
+        cache : bool
+            Whether to reuse the results in `results_cache`. Defaults to True.
+        """
+
+        unknown_scenes = set(targets or ()) - set(scene_enemies)
+
+        if unknown_scenes:
+            raise ValueError(
+                f"Unknown scenes {', '.join(sorted(unknown_scenes))}, "
+                f"choose from {', '.join(scene_enemies)}."
+                )
+
+        self.cells = tuple(cells)
+        self.targets = dict(targets or default_targets)
+        self.team = tuple(team)
+        self.policy = policy
+        self.battles = battles
+        self.budget = budget
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+        self.max_turns = max_turns
+        self.cache = cache
+        self.evaluations: Dict[Tuple[int, ...], Evaluation] = {}
+
+        self._pool = None
+
+    def evaluate(self, values: Sequence[int]) -> Evaluation:
+        """Simulate every scene with a set of stat cell values.
+
+        Parameters
+        ----------
+        values : Sequence[int]
+            The value of each stat cell.
+
+        Returns
+        -------
+        Evaluation : The win rates, reused if the values were simulated before.
+        """
+
+        values = tuple(values)
+        evaluation = self.evaluations.get(values)
+
+        if evaluation is not None:
+            return evaluation
+
+        # split the seeds of each scene into chunks
+        seeds = range(self.seed, self.seed + self.battles)
+        tasks = [
+            (self.cells, values,
+             Matchup(self.team, scene_enemies[scene], self.policy, self.max_turns),
+             seeds[start:start + CHUNK_BATTLES], self.cache)
+            for scene in self.targets
+            for start in range(0, self.battles, CHUNK_BATTLES)
+            ]
+
+        if self._pool is not None:
+            chunk_wins = self._pool.map(_count_wins, tasks)
+
+        else:
+            chunk_wins = [_count_wins(task) for task in tasks]
+
+        wins = dict.fromkeys(self.targets, 0)
+
+        # the tasks are grouped by scene in the order of the targets
+        chunks = len(tasks) // len(self.targets)
+
+        for index, task_wins in enumerate(chunk_wins):
+            wins[list(self.targets)[index // chunks]] += task_wins
+
+        loss = sum(
+            (wins[scene] / self.battles - target) ** 2 for scene, target in self.targets.items()
+            )
+        evaluation = self.evaluations[values] = Evaluation(values, wins, self.battles, loss)
+
+        return evaluation
+
+    def optimize(self) -> Tuple[Evaluation, Evaluation]:
+        """Search the stat cell values closest to the targets within the budget.
+
+        Returns
+        -------
+        Tuple[Evaluation, Evaluation] : The evaluation of the current values and of the best
+            values found.
+        """
+
+        if self.processes > 1:
+            self._pool = multiprocessing.Pool(self.processes)
+
+        try:
+            return self._coordinate_search()
+
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+    def _coordinate_search(self) -> Tuple[Evaluation, Evaluation]:
+        # move one cell at a time, halving the steps when no move lowers the loss
+        cells = self.cells
+        start = self.evaluate([cell.value() for cell in cells])
+        best = start
+        spent = 1
+
+        # start with a quarter of the range of each cell
+        steps = [max((cell.high - cell.low) // 4, 1) for cell in cells]
+
+        while spent < self.budget:
+            improved = False
+
+            for index, cell in enumerate(cells):
+                for direction in (1, -1):
+                    if spent >= self.budget:
+                        break
+
+                    value = min(max(best.values[index] + direction * steps[index], cell.low),
+                                cell.high)
+
+                    if value == best.values[index]:
+                        continue
+
+                    values = best.values[:index] + (value,) + best.values[index + 1:]
+                    spent += values not in self.evaluations
+                    evaluation = self.evaluate(values)
+
+                    if evaluation.loss < best.loss:
+                        best = evaluation
+                        improved = True
+                        break
+
+            if improved:
+                continue
+
+            # every step is already as small as it gets
+            if all(step == 1 for step in steps):
+                break
+
+            steps = [max(step // 2, 1) for step in steps]
+
+        return start, best
+
+
+def csv_diff(cells: Sequence[StatCell], values: Sequence[int]) -> str:
+    """Get the unified diff of the CSV tables with new stat cell values.
+
+    Parameters
+    ----------
+    cells : Sequence[StatCell]
+        The stat cells.
+    values : Sequence[int]
+        The new value of each stat cell.
+
+    Returns
+    -------
+    str : The diff, empty if no value changed.
+    """
+
+    diff = []
+
+    for table_name, (_, path, _, key_column) in stat_tables.items():
+        changes = {
+            (cell.row, cell.column): value
+            for cell, value in zip(cells, values) if cell.table == table_name
+            }
+
+        if not changes:
+            continue
+
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            old_text = file.read()
+
+        rows = list(csv.DictReader(io.StringIO(old_text)))
+        new_file = io.StringIO()
+        writer = csv.DictWriter(new_file, fieldnames=list(rows[0]), lineterminator="\n")
+        writer.writeheader()
+
+        for row in rows:
+            for (row_name, column), value in changes.items():
+                if row[key_column] == row_name:
+                    row[column] = str(value)
+
+            writer.writerow(row)
+
+        diff.extend(difflib.unified_diff(
+            old_text.splitlines(keepends=True), new_file.getvalue().splitlines(keepends=True),
+            f"a/{os.path.relpath(path)}", f"b/{os.path.relpath(path)}"
+            ))
+
+    return "".join(diff)
+
+
+def format_report(optimizer: BalanceOptimizer, start: Evaluation, best: Evaluation) -> str:
+    """Describe the win rates before and after the optimization.
+
+    Parameters
+    ----------
+    optimizer : BalanceOptimizer
+        The optimizer that found the values.
+    start : Evaluation
+        The evaluation of the current values.
+    best : Evaluation
+        The evaluation of the best values.
+
+    Returns
+    -------
+    str : One line per stat cell and per scene, with 95% confidence intervals.
+    """
+
+    lines = []
+
+    for cell, old_value, new_value in zip(optimizer.cells, start.values, best.values):
+        lines.append(f"{str(cell):<28}{old_value:>6} -> {new_value:<6}")
+
+    for scene, target in optimizer.targets.items():
+        rates = []
+
+        for evaluation in (start, best):
+            low, high = wilson_interval(evaluation.wins[scene], evaluation.battles)
+            rates.append(f"{evaluation.win_rate(scene):6.1%} [{low:.1%}, {high:.1%}]")
+
+        lines.append(f"{scene:<14}target {target:6.1%}  {rates[0]} -> {rates[1]}")
+
+    lines.append(
+        f"loss {start.loss:.4f} -> {best.loss:.4f} after {len(optimizer.evaluations)} "
+        f"evaluations of {optimizer.battles} battles per scene"
+        )
+
+    return "\n".join(lines)
+
+
+def parse_target(spec: str) -> Tuple[str, float]:
+    """Parse a win rate target given on the command line, the type of `--target`.
+
+    Parameters
+    ----------
+    spec : str
+        The target as "scene=rate", e.g. "Doomshroud=0.6".
+
+    Returns
+    -------
+    Tuple[str, float] : The scene and its target win rate.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the target isn't written as scene=rate or the rate isn't between 0 and 1.
+    """
+
+    scene, _, rate = spec.partition("=")
+
+    try:
+        win_rate = float(rate)
+
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"A target is written as scene=rate, got '{spec}'."
+            ) from None
+
+    if not 0 <= win_rate <= 1:
+        raise argparse.ArgumentTypeError(f"A target win rate is between 0 and 1, got '{spec}'.")
+
+    return scene, win_rate
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the optimizer.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Tune stat cells of the CSV tables towards target win rates."
+        )
+    parser.add_argument(
+        "--cell", action="append", required=True,
+        help="a tuned stat cell as table:row:column[=low:high], e.g. enemy:Doomshroud:AP=15:35"
+        )
+    parser.add_argument(
+        "--target", action="append", default=[], type=parse_target,
+        help=f"a target win rate as scene=rate, scenes: {', '.join(scene_enemies)}"
+        )
+    parser.add_argument(
+        "--team", nargs="+", default=["Tank", "MirrorMage", "Healer"],
+        choices=sorted(job_classes), help="the job class of each player character"
+        )
+    parser.add_argument(
+        "--policy", default="greedy", help=f"the player policy: {', '.join(policy_classes)}"
+        )
+    parser.add_argument(
+        "--battles", type=int, default=400, help="the battles per scene in an evaluation"
+        )
+    parser.add_argument("--budget", type=int, default=40, help="the max amount of evaluations")
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="simulate even if the results are cached"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the optimizer from the command line and print the proposed CSV diff.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        cells: List[StatCell] = [parse_cell(spec) for spec in args.cell]
+        targets = dict(args.target) or None
+        create_policy(args.policy)
+
+        optimizer = BalanceOptimizer(
+            cells, targets, args.team, args.policy, args.battles, args.budget,
+            args.processes, args.seed, cache=not args.no_cache
+            )
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    start, best = optimizer.optimize()
+
+    print(format_report(optimizer, start, best))
+    print()
+    print(csv_diff(optimizer.cells, best.values) or "No changes proposed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,614 @@
+"""Headless rules of a combat, shared by the GameManager and automated players."""
+from __future__ import annotations
+import random
+from collections import deque
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from .characters import BaseCharacter, Tank, MirrorMage, Healer, Assassin
+from .enemies import EnemyCharacter
+from .scheduler import AliveRoster
+from .skills import BaseSkill
+
+
+# bump when the rules of a battle change, so cached simulation results are simulated again
+ENGINE_VERSION = 2
+
+
+class Action:
+    """Container class for the actions a player character can take on its turn.
+
+    Attributes
+    ----------
+    ATTACK : int
+        Basic attack on the active enemy.
+    HEAL : int
+        Heal the active player character.
+    SKILL : int
+        Use the first skill, `SKILL + index` uses the skill at that index.
+    SWITCH : int
+        Switch to the first player character, `SWITCH + index` switches to the player
+        character at that index.
+    """
+
+    ATTACK = 0
+    HEAL = 1
+    SKILL = 2
+    SWITCH = 4
+
+    # amount of skills of every job class
+    SKILL_COUNT = SWITCH - SKILL
+
+    @staticmethod
+    def count(team_size: int) -> int:
+        """Get the amount of actions for a team.
+
+        Parameters
+        ----------
+        team_size : int
+            The amount of player characters.
+
+        Returns
+        -------
+        int : The amount of actions.
+        """
+
+        return Action.SWITCH + team_size
+
+
+class CharacterView(NamedTuple):
+    """A read only copy of the stats of a character."""
+
+    health_points: int
+    max_health_points: int
+    defense_points: int
+    max_defense_points: int
+    attack_points: int
+    speed_points: int
+    magic_points: int
+    luck: int
+    alive: bool
+
+    @classmethod
+    def of(cls, character: BaseCharacter) -> "CharacterView":
+        """Copy the stats of a character.
+
+        Parameters
+        ----------
+        character : BaseCharacter
+            The character to copy, enemies have 0 magic points.
+
+        Returns
+        -------
+        CharacterView : The copied stats.
+        """
+
+        return cls(
+            character.health_points, character.max_health_points,
+            character.defense_points, character.max_defense_points,
+            character.attack_points, character.speed_points,
+            getattr(character, "magic_points", 0), character.luck, character.is_alive()
+            )
+
+
+class StateView(NamedTuple):
+    """A read only copy of the state of a battle on a player turn, used by policies.
+
+    Attributes
+    ----------
+    player : CharacterView
+        The active player character.
+    enemy : CharacterView
+        The active enemy.
+    team : Tuple[CharacterView, ...]
+        Every player character, in team order.
+    active_index : int
+        The index of the active player character in the team.
+    skills : Tuple[BaseSkill, ...]
+        The shared skills of the active player character.
+    legal_actions : Tuple[int, ...]
+        The `Action` values the active player character can take.
+    turn : int
+        The amount of turns taken.
+    """
+
+    player: CharacterView
+    enemy: CharacterView
+    team: Tuple[CharacterView, ...]
+    active_index: int
+    skills: Tuple[BaseSkill, ...]
+    legal_actions: Tuple[int, ...]
+    turn: int
+
+
+class BattleSnapshot(NamedTuple):
+    """An immutable copy of the state of a battle that changes in combat, taken with
+    `Battle.snapshot` and restored with `Battle.restore`.
+
+    Only the changing stats of the characters are copied, their names, skills and ASCII
+    art are shared with the battle, and so are the battle log and the effect and stat
+    modifier objects. A snapshot can only be restored on the battle it was taken of.
+
+    Attributes
+    ----------
+    characters : Tuple[tuple, ...]
+        The snapshot of every player character, then every enemy.
+    player_alive : Tuple[bool, ...]
+        The alive flag of each player character.
+    enemy_alive : Tuple[bool, ...]
+        The alive flag of each enemy.
+    active_player_character : BaseCharacter
+        The active player character.
+    active_enemy_character : BaseCharacter
+        The active enemy.
+    turn_character : BaseCharacter
+        The character whose turn it is.
+    turn_count : int
+        The amount of turns taken.
+    rng_state : tuple
+        The state of the random number generator, None if it wasn't captured.
+    """
+
+    characters: Tuple[tuple, ...]
+    player_alive: Tuple[bool, ...]
+    enemy_alive: Tuple[bool, ...]
+    active_player_character: BaseCharacter
+    active_enemy_character: BaseCharacter
+    turn_character: BaseCharacter
+    turn_count: int
+    rng_state: Optional[tuple]
+
+
+class Battle:
+    """The rules of a combat between player characters and enemies, without any UI.
+
+    A turn starts with `start_turn`, the turn character then acts with `take_player_turn`
+    or `take_enemy_turn`, and `end_turn` finishes it.
+
+    Attributes
+    ----------
+    player_characters : List[Union[Tank, MirrorMage, Healer, Assassin]]
+        A list of player characters participating in the game.
+
+    enemies : List[EnemyCharacter]
+        A list of enemy characters participating in the game.
+
+    active_player_character : BaseCharacter
+        The active player character that the player selected.
+
+    active_enemy_character : BaseCharacter
+        The active enemy character.
+
+    player_roster : AliveRoster
+        Alive bookkeeping of the player characters.
+
+    enemy_roster : AliveRoster
+        Alive bookkeeping of the enemies.
+
+    turn_character : BaseCharacter
+        The character whose turn it is.
+
+    turn_count : int
+        The amount of turns taken.
+
+    rng : random.Random
+        The random number generator shared by every character in the battle.
+
+    battle_log : deque
+        The latest logs of the battle.
+    """
+
+    def __init__(
+        self,
+        player_characters: List[Union[Tank, MirrorMage, Healer, Assassin]],
+        enemies: List[EnemyCharacter],
+        rng: random.Random = None
+    ):
+        """Initializes a Battle instance.
+
+        Parameters
+        ----------
+        player_characters : List[Union[Tank, MirrorMage, Healer, Assassin]]
+            A list of player characters participating in the game.
+
+        enemies : List[EnemyCharacter]
+            A list of enemy characters participating in the game.
+
+        rng : random.Random
+            The random number generator for the battle. Defaults to the random module.
+        """
+
+        # battle log (limits to 5 items only)
+        self.battle_log = deque(maxlen=5)
+
+        self.reset(player_characters, enemies, rng)
+
+    def reset(
+        self,
+        player_characters: List[Union[Tank, MirrorMage, Healer, Assassin]],
+        enemies: List[EnemyCharacter],
+        rng: random.Random = None
+    ):
+        """Reset the battle for a new combat, so it can be reused.
+
+        Parameters
+        ----------
+        player_characters : List[Union[Tank, MirrorMage, Healer, Assassin]]
+            A list of player characters participating in the game.
+
+        enemies : List[EnemyCharacter]
+            A list of enemy characters participating in the game.
+
+        rng : random.Random
+            The random number generator for the battle. Defaults to the random module.
+        """
+
+        self.player_characters = player_characters
+        self.enemies = enemies
+        self.rng = rng or random
+
+        # every player character, then every enemy
+        self._characters = (*player_characters, *enemies)
+
+        # every character rolls with the battle's random number generator
+        for character in self._characters:
+            character.rng = self.rng
+
+        # keep count of the alive characters of both teams
+        self.player_roster = AliveRoster(player_characters)
+        self.enemy_roster = AliveRoster(enemies)
+
+        # assign first alive character in player_characters as the active character
+        self.active_player_character = self.player_roster.first_alive() or player_characters[0]
+
+        # assign first alive character in enemies as the active character
+        self.active_enemy_character = self.enemy_roster.first_alive() or enemies[0]
+
+        # assign turn character
+        self.turn_character = self.determine_turn_order()
+        self.turn_count = 0
+
+        self.battle_log.clear()
+
+    def snapshot(self, include_rng: bool = False) -> BattleSnapshot:
+        """Capture the state of the battle, so it can be restored after trying out turns.
+
+        Parameters
+        ----------
+        include_rng : bool
+            Whether to capture the state of the random number generator, so the restored
+            battle rolls the same numbers again. Capturing it takes most of the time of a
+            snapshot, and searches that roll new numbers for every try don't need it.
+            Defaults to False.
+
+        Returns
+        -------
+        BattleSnapshot : The captured state.
+        """
+
+        return BattleSnapshot(
+            tuple([character.snapshot() for character in self._characters]),
+            self.player_roster.snapshot(), self.enemy_roster.snapshot(),
+            self.active_player_character, self.active_enemy_character, self.turn_character,
+            self.turn_count, self.rng.getstate() if include_rng else None
+            )
+
+    def restore(self, snapshot: BattleSnapshot):
+        """Restore the state captured by `snapshot` in place.
+
+        Parameters
+        ----------
+        snapshot : BattleSnapshot
+            A snapshot taken of this battle.
+        """
+
+        for character, character_snapshot in zip(self._characters, snapshot.characters):
+            character.restore_snapshot(character_snapshot)
+
+        self.player_roster.restore(snapshot.player_alive)
+        self.enemy_roster.restore(snapshot.enemy_alive)
+
+        self.active_player_character = snapshot.active_player_character
+        self.active_enemy_character = snapshot.active_enemy_character
+        self.turn_character = snapshot.turn_character
+        self.turn_count = snapshot.turn_count
+
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+
+    def log(self, log: str):
+        """Add a log to the battle log.
+
+        Parameters
+        ----------
+        log : str
+            The log to add.
+        """
+
+        self.battle_log.append(log)
+
+    def start_turn(self) -> BaseCharacter:
+        """Start a new turn.
+
+        Returns
+        -------
+        BaseCharacter : The character whose turn it is.
+        """
+
+        self.turn_character = self.determine_turn_order()
+        return self.turn_character
+
+    def is_player_turn(self) -> bool:
+        """Check if it's the active player character's turn.
+
+        Returns
+        -------
+        bool : True if it's the player's turn, False otherwise.
+        """
+
+        return self.turn_character is self.active_player_character
+
+    def take_player_turn(self, action: int) -> Tuple[bool, str]:
+        """The active player character takes an action.
+
+        Parameters
+        ----------
+        action : int
+            One of the `Action` values.
+
+        Returns
+        -------
+        turn_taken : bool
+            False if the action couldn't be taken (not enough points for a skill), in which
+            case the player has to choose another action, True otherwise.
+        log : str
+            The log of the action.
+        """
+
+        player = self.active_player_character
+        enemy = self.active_enemy_character
+
+        if action >= Action.SWITCH:
+            log = self.switch_active_player_character(action - Action.SWITCH)
+            self.log(log)
+            return True, log
+
+        if action == Action.ATTACK:
+            log = player.basic_attack(enemy)
+
+        elif action == Action.HEAL:
+            log = player.heal()
+
+        else:
+            log = player.use_skill(action - Action.SKILL, enemy)
+
+            # tuple is returned only when there's an error using skill
+            if isinstance(log, tuple):
+                self.battle_log.append(log[1])
+                return False, log[1]
+
+        self.log(log)
+
+        # update idle character's stat (enemy)
+        self.update_idle_character_stats(enemy)
+
+        return True, log
+
+    def take_enemy_turn(self) -> str:
+        """The active enemy takes the action it selects.
+
+        Returns
+        -------
+        log : str
+            The log of the action.
+        """
+
+        player = self.active_player_character
+        enemy = self.active_enemy_character
+
+        enemy_action = enemy.select_action(player, self.player_characters)
+        log = enemy_action()
+        self.log(log)
+
+        # update idle character's stat (player)
+        self.update_idle_character_stats(player)
+
+        return log
+
+    def end_turn(self, player: BaseCharacter, enemy: BaseCharacter):
+        """Finish a turn.
+
+        Parameters
+        ----------
+        player : BaseCharacter
+            The active player character when the turn started.
+        enemy : BaseCharacter
+            The active enemy when the turn started.
+        """
+
+        self.turn_count += 1
+
+        # count down the timed effects of both active characters
+        player.tick_active_effects()
+        enemy.tick_active_effects()
+
+        if not player.is_alive():
+            self.handle_defeated_character(player, enemy)
+
+        elif not enemy.is_alive():
+            self.handle_defeated_character(enemy, player)
+
+    def available_actions(self) -> List[int]:
+        """Get the actions the active player character can take.
+
+        Returns
+        -------
+        List[int] : The `Action` values that would take a turn.
+        """
+
+        player = self.active_player_character
+        actions = [Action.ATTACK, Action.HEAL]
+
+        # skills the character has enough points for
+        for index, skill in enumerate(player.skills):
+            if player.check_skill_cost(skill)[0]:
+                actions.append(Action.SKILL + index)
+
+        # alive characters that can be switched to
+        for index, character in enumerate(self.player_characters):
+            if character is not player and self.player_roster.is_alive(index):
+                actions.append(Action.SWITCH + index)
+
+        return actions
+
+    def state_view(self) -> StateView:
+        """Get a read only copy of the state of the battle for the active player character.
+
+        Returns
+        -------
+        StateView : The copied state.
+        """
+
+        player = self.active_player_character
+        team = tuple(CharacterView.of(character) for character in self.player_characters)
+        active_index = self.player_roster.index(player)
+
+        return StateView(
+            team[active_index], CharacterView.of(self.active_enemy_character), team,
+            active_index, player.skills, tuple(self.available_actions()), self.turn_count
+            )
+
+    def switch_active_player_character(self, index: int) -> str:
+        """Switch the active player character.
+
+        Parameters
+        ----------
+        index : int
+            The index of the player character to switch to.
+
+        Returns
+        -------
+        log : str
+            The log to display.
+        """
+
+        old_active_character = self.active_player_character
+        chosen_character = self.player_characters[index]
+
+        # makes sure selected character is alive
+        if chosen_character.is_alive():
+            self.active_player_character = chosen_character
+            return f"Active character switched from {old_active_character.name} to " \
+                f"{self.active_player_character.name}."
+
+        return f"{chosen_character.name} is defeated and can't be chosen!"
+
+    def handle_defeated_character(self, character: BaseCharacter, opponent: BaseCharacter):
+        """Handles the logic when a character is defeated.
+
+        Parameters
+        ----------
+        character : BaseCharacter
+            The character that is defeated.
+        opponent : BaseCharacter
+            The defeated character's opponent.
+        """
+
+        character.health_points = 0
+        self.log(f"{character.name} has been defeated by {opponent.name}!")
+
+        # checks if its a player or enemy character that is defeated
+        is_enemy = isinstance(character, EnemyCharacter)
+        roster = self.enemy_roster if is_enemy else self.player_roster
+        roster.mark_defeated(character)
+
+        if not self.is_game_over():
+            # the next alive character becomes the active character
+            if is_enemy:
+                self.active_enemy_character = roster.first_alive()
+                return
+
+            self.active_player_character = roster.first_alive()
+
+    @staticmethod
+    def update_idle_character_stats(idle_character: BaseCharacter):
+        """Update the stats for characters when its not their turn.
+
+        Parameters
+        ----------
+        idle_character : BaseCharacter
+            The character that is idle.
+        """
+
+        idle_character.speed_points += 1
+
+        idle_character.defense_points = max(idle_character.defense_points, 0)
+
+        if not isinstance(idle_character, EnemyCharacter):
+            idle_character.magic_points += 1
+
+    def determine_turn_order(self) -> BaseCharacter:
+        """Determine who's turn it is based on speed points.
+
+        Returns
+        -------
+        BaseCharacter : The BaseCharacter with higher speed points.
+
+        Notes
+        -----
+        The function returns a random active character if both active
+        characters have same speed points.
+
+        Only the two active characters take turns, so the order is one comparison rather
+        than an `InitiativeScheduler`, which orders the turns of raids where everyone acts.
+        """
+
+        player = self.active_player_character
+        enemy = self.active_enemy_character
+
+        # the faster character goes first
+        if enemy.speed_points != player.speed_points:
+            return enemy if enemy.speed_points > player.speed_points else player
+
+        # if both active characters have the same speed_points, randomize the order
+        return enemy if self.rng.random() >= self.rng.random() else player
+
+    def is_game_over(self) -> bool:
+        """Check the win/lose conditions of the game.
+
+        Returns
+        -------
+        game_ended : bool
+            True if the game has been won or lost, False otherwise.
+        """
+
+        # returns True if all player or enemy characters are defeated, False otherwise.
+        return not self.player_roster.any_alive() or not self.enemy_roster.any_alive()
+
+    def player_won(self) -> bool:
+        """Returns True if game ended and player won, False otherwise.
+
+        Returns
+        -------
+        bool
+            Returns True if game ended and player won, False otherwise.
+
+        Notes
+        -----
+        If game is not over, False would be returned.
+        """
+
+        # checks if all enemies are dead and at least one character is alive
+        return self.player_roster.any_alive() and not self.enemy_roster.any_alive()
+
+    def winner(self) -> Optional[str]:
+        """Get the team that won.
+
+        Returns
+        -------
+        str : "player" or "enemy" if the game is over, None otherwise.
+        """
+
+        if not self.is_game_over():
+            return None
+
+        return "player" if self.player_won() else "enemy"
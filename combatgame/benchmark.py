@@ -0,0 +1,220 @@
+"""Benchmarks of the headless battle engine.
+
+Usage:
+    python -m combatgame.benchmark --team Tank MirrorMage Healer --enemies Viperstrike
+    python -m combatgame.benchmark --team Tank Assassin --enemies Doomshroud --raid 500
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+import timeit
+from typing import Dict, Sequence
+
+from .battle import Battle
+from .characters import job_classes
+from .enemies import EnemyCharacter, enemy_names
+from .policies import GreedyPolicy
+from .raid import RaidBattle
+from .simulation import play_battle
+
+
+def benchmark_snapshots(
+    team: Sequence[str],
+    enemies: Sequence[str],
+    turns: int = 10,
+    number: int = 100_000,
+    seed: int = 0
+    ) -> Dict[str, float]:
+    """Time taking and restoring snapshots of a battle.
+
+    The battle is played for some turns first, so the characters have effects and stat
+    modifiers to capture. Restoring is checked to replay the same battle before timing.
+
+    Parameters
+    ----------
+    team : Sequence[str]
+        The job class of each player character.
+    enemies : Sequence[str]
+        The name of each enemy.
+    turns : int
+        The amount of turns played before the snapshot. Defaults to 10.
+    number : int
+        The amount of snapshots and restores timed. Defaults to 100,000.
+    seed : int
+        The seed of the battle. Defaults to 0.
+
+    Returns
+    -------
+    Dict[str, float] : The microseconds a snapshot and a restore take, without and with the
+        state of the random number generator.
+    """
+
+    battle = Battle(
+        [job_classes[job_class](job_class) for job_class in team],
+        [EnemyCharacter(name) for name in enemies],
+        random.Random(seed)
+        )
+    policy = GreedyPolicy(random.Random(seed))
+
+    play_battle(battle, policy, turns)
+    snapshot = battle.snapshot(include_rng=True)
+
+    # a restored battle plays out the same way again
+    policy_state = policy.rng.getstate()
+    outcome = play_battle(battle, policy), battle.turn_count
+    battle.restore(snapshot)
+    policy.rng.setstate(policy_state)
+
+    if (play_battle(battle, policy), battle.turn_count) != outcome:
+        raise RuntimeError("The restored battle played out differently.")
+
+    battle.restore(snapshot)
+    snapshot_without_rng = battle.snapshot()
+
+    # microseconds per call
+    def time_call(statement) -> float:
+        return timeit.timeit(statement, number=number) / number * 1e6
+
+    return {
+        "snapshot": time_call(battle.snapshot),
+        "restore": time_call(lambda: battle.restore(snapshot_without_rng)),
+        "snapshot_with_rng": time_call(lambda: battle.snapshot(include_rng=True)),
+        "restore_with_rng": time_call(lambda: battle.restore(snapshot)),
+    }
+
+
+def benchmark_raid(
+    team: Sequence[str],
+    enemies: Sequence[str],
+    copies: int,
+    player_action: str = "attack",
+    turns: int = 10,
+    repeats: int = 5,
+    seed: int = 0
+    ) -> Dict[str, float]:
+    """Time setting up raids and running their turns.
+
+    Parameters
+    ----------
+    team : Sequence[str]
+        The job class of each player character, repeated `copies` times.
+    enemies : Sequence[str]
+        The name of each enemy, repeated `copies` times.
+    copies : int
+        The amount of copies of the team and of the enemies in the raid.
+    player_action : str
+        The action of the player characters every turn. Defaults to "attack".
+    turns : int
+        The max amount of turns timed in each raid. Defaults to 10.
+    repeats : int
+        The amount of raids timed, the fastest one is kept. Defaults to 5.
+    seed : int
+        The seed of the first raid, every raid uses the next seed. Defaults to 0.
+
+    Returns
+    -------
+    Dict[str, float] : The milliseconds the setup of a raid, its first turn and its
+        slowest turn take.
+    """
+
+    timings = {"setup": float("inf"), "first_turn": float("inf"), "slowest_turn": float("inf")}
+
+    for repeat in range(repeats):
+        player_characters = [
+            job_classes[job_class](job_class) for _ in range(copies) for job_class in team
+            ]
+        enemy_characters = [EnemyCharacter(name) for _ in range(copies) for name in enemies]
+
+        start = time.perf_counter()
+        raid = RaidBattle(player_characters, enemy_characters, random.Random(seed + repeat))
+        setup = time.perf_counter() - start
+        turn_seconds = []
+
+        while not raid.is_over() and len(turn_seconds) < turns:
+            start = time.perf_counter()
+            raid.run_turn(player_action)
+            turn_seconds.append(time.perf_counter() - start)
+
+        # the fastest repeat is the least disturbed by the rest of the machine
+        timings["setup"] = min(timings["setup"], setup * 1e3)
+        timings["first_turn"] = min(timings["first_turn"], turn_seconds[0] * 1e3)
+        timings["slowest_turn"] = min(timings["slowest_turn"], max(turn_seconds) * 1e3)
+
+    return timings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the benchmarks.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark the battle snapshots and raids.")
+    parser.add_argument(
+        "--team", nargs="+", default=["Tank", "MirrorMage", "Healer"],
+        choices=sorted(job_classes), help="the job class of each player character"
+        )
+    parser.add_argument(
+        "--enemies", nargs="+", default=["Viperstrike"], choices=sorted(enemy_names),
+        help="the name of each enemy"
+        )
+    parser.add_argument(
+        "--turns", type=int, default=10, help="the amount of turns played before the snapshot"
+        )
+    parser.add_argument(
+        "--number", type=int, default=100_000, help="the amount of timed calls"
+        )
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the battle")
+    parser.add_argument(
+        "--raid", type=int, metavar="COPIES",
+        help="time the turns of raids of COPIES copies of the team against COPIES copies of "
+        "the enemies instead"
+        )
+    parser.add_argument(
+        "--raid-action", choices=("attack", "area attack"), default="attack",
+        help="the action of the player characters in raids"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the benchmarks from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    args = build_parser().parse_args(argv)
+
+    if args.raid is not None:
+        timings = benchmark_raid(
+            args.team, args.enemies, args.raid, args.raid_action, args.turns, seed=args.seed
+            )
+        combatants = args.raid * (len(args.team) + len(args.enemies))
+
+        print(
+            f"{args.raid}x {' '.join(args.team)} vs {args.raid}x {' '.join(args.enemies)} "
+            f"({combatants} combatants, {args.raid_action})"
+            )
+
+        for name, milliseconds in timings.items():
+            print(f"{name:<22}{milliseconds:8.2f} ms")
+
+        return
+
+    timings = benchmark_snapshots(args.team, args.enemies, args.turns, args.number, args.seed)
+
+    print(f"{' '.join(args.team)} vs {' '.join(args.enemies)}")
+
+    for name, microseconds in timings.items():
+        print(f"{name:<22}{microseconds:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Content addressed on-disk cache of simulation results.
+
+A result is stored under the hash of everything it depends on: the matchup, the seeds,
+the loaded job class, enemy and skill tables and the engine version. Changing any of them
+gives a new key, so stale results are never read, they are only evicted.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Sequence
+
+from .battle import ENGINE_VERSION
+from .characters import job_class_attributes
+from .enemies import enemy_attributes
+from .skills import skill_attributes
+from .utils.utils import write_json_atomic
+
+
+# the directory of the cached results, COMBATGAME_CACHE overrides the parent directory
+results_cache_dir = os.path.join(
+    os.environ.get(
+        "COMBATGAME_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "combatgame")
+        ),
+    "results"
+    )
+
+# the default max size of the cached results on disk
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# the memoized fingerprint of the loaded data tables, emptied when the tables change
+_fingerprint: Dict[str, str] = {}
+
+
+def data_fingerprint() -> str:
+    """Get the hash of the loaded data tables.
+
+    The loaded tables are hashed rather than the CSV files, so stats changed in memory,
+    like the candidates of the balance optimizer, get their own keys. The hash is memoized
+    until `clear_data_fingerprint` is called, which the helpers of `combatgame.tables` do
+    after every change of the tables.
+
+    Returns
+    -------
+    str : The hex digest of the job class, enemy and skill tables.
+    """
+
+    if "tables" not in _fingerprint:
+        tables = (job_class_attributes, enemy_attributes, skill_attributes)
+        _fingerprint["tables"] = hashlib.sha256(
+            json.dumps(tables, sort_keys=True).encode()
+            ).hexdigest()
+
+    return _fingerprint["tables"]
+
+
+def clear_data_fingerprint():
+    """Forget the memoized fingerprint, so the next one is hashed from the changed tables.
+
+    Called by `combatgame.tables.clear_built_data`, changes of the tables go through it.
+    """
+
+    _fingerprint.clear()
+
+
+class ResultsCache:
+    """Size bounded LRU store of simulation results, one small file per result.
+
+    The modification time of a file is its last use, lookups touch it and the least
+    recently used files are removed when the store outgrows `max_bytes`.
+
+    Attributes
+    ----------
+    directory : str
+        The directory of the result files.
+    max_bytes : int
+        The max total size of the result files.
+    enabled : bool
+        Whether results are read and written, lookups miss while disabled.
+    hits : int
+        The amount of lookups that found a result.
+    misses : int
+        The amount of lookups that found no result.
+    """
+
+    def __init__(
+        self, directory: str = results_cache_dir, max_bytes: int = MAX_CACHE_BYTES
+        ):
+        """Initializes a ResultsCache instance.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the result files. Defaults to `results_cache_dir`.
+        max_bytes : int
+            The max total size of the result files. Defaults to MAX_CACHE_BYTES.
+        """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+        # the size of every result file, read from the directory on first write, and their sum
+        self._sizes: Optional[Dict[str, int]] = None
+        self._total_bytes = 0
+
+    def key(self, *inputs) -> str:
+        """Get the key of a result.
+
+        Parameters
+        ----------
+        *inputs
+            The JSON serializable inputs of the result, besides the data tables and the
+            engine version which are always part of the key.
+
+        Returns
+        -------
+        str : The hex digest of the inputs.
+        """
+
+        return hashlib.sha256(
+            json.dumps([ENGINE_VERSION, data_fingerprint(), *inputs]).encode()
+            ).hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        """Get a cached result.
+
+        Parameters
+        ----------
+        key : str
+            The key of the result.
+
+        Returns
+        -------
+        list : The result, None if it isn't cached.
+        """
+
+        if not self.enabled:
+            return None
+
+        path = os.path.join(self.directory, f"{key}.json")
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                result = json.load(file)
+
+            # mark the result as recently used
+            os.utime(path)
+
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return result
+
+    def put(self, key: str, result: Sequence):
+        """Cache a result, evicting the least recently used results if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            The key of the result.
+        result : Sequence
+            The JSON serializable result.
+        """
+
+        if not self.enabled:
+            return
+
+        path = os.path.join(self.directory, f"{key}.json")
+        write_json_atomic(path, result)
+
+        sizes = self._load_sizes()
+        size = os.path.getsize(path)
+
+        # a result written again replaces its old file
+        self._total_bytes += size - sizes.get(f"{key}.json", 0)
+        sizes[f"{key}.json"] = size
+
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def clear(self):
+        """Remove every cached result."""
+
+        for name in self._load_sizes():
+            try:
+                os.remove(os.path.join(self.directory, name))
+
+            except OSError:
+                pass
+
+        self._sizes = {}
+        self._total_bytes = 0
+
+    def _load_sizes(self) -> Dict[str, int]:
+        # read the size of every result file once, then keep track of them
+        if self._sizes is None:
+            self._sizes = {}
+
+            if os.path.isdir(self.directory):
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(".json"):
+                        self._sizes[entry.name] = entry.stat().st_size
+
+            self._total_bytes = sum(self._sizes.values())
+
+        return self._sizes
+
+    def _evict(self):
+        # remove the least recently used files until the cache is below 90% of its size
+        entries = []
+
+        for name in self._sizes:
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+
+            except OSError:
+                pass
+
+        # files removed by another process are forgotten
+        self._sizes = {name: self._sizes[name] for _, name in entries}
+        self._total_bytes = sum(self._sizes.values())
+
+        for _, name in sorted(entries):
+            if self._total_bytes <= self.max_bytes * 0.9:
+                break
+
+            try:
+                os.remove(os.path.join(self.directory, name))
+
+            except OSError:
+                pass
+
+            self._total_bytes -= self._sizes.pop(name)
+
+
+# shared cache of the simulation results
+results_cache = ResultsCache()
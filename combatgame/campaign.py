@@ -0,0 +1,601 @@
+"""The story as a graph of scenes, and a Monte Carlo simulator of whole campaigns.
+
+`walk_story` plays the steps of the graph for a `StoryPlayer`, which fights the combats
+and picks the branches. The game and the simulator are both players, so they play the
+same story.
+
+Usage:
+    python -m combatgame.campaign --team Tank MirrorMage Healer --campaigns 2000
+"""
+from __future__ import annotations
+import argparse
+import math
+import multiprocessing
+import random
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .battle import Battle
+from .cache import results_cache
+from .characters import BaseCharacter, job_classes
+from .enemies import EnemyCharacter
+from .policies import Policy, create_policy, policy_classes
+from .pooling import character_pool
+from .simulation import MAX_TURNS, add_points, play_battle, policy_rng
+
+
+class SceneNode(NamedTuple):
+    """A scene of the story graph.
+
+    Attributes
+    ----------
+    title : str
+        The title of the scene, as shown in the path menu.
+    steps : Tuple[tuple, ...]
+        The steps of the scene in order, each a step kind of `step_kinds` and its arguments:
+        ("restore",) restores the stats of the alive characters, ("boost", stat, amount)
+        adds points to a stat of the alive characters and ("combat", enemies) fights the
+        named enemies, ending the campaign if the player loses.
+    branches : Tuple[str, ...]
+        The scenes the player can go to next, empty if the story ends with the scene.
+    """
+
+    title: str
+    steps: Tuple[tuple, ...] = ()
+    branches: Tuple[str, ...] = ()
+
+
+# the scenes of the story, played by `SceneManager.run_scenes`
+story_graph: Dict[str, SceneNode] = {
+    "scene_one": SceneNode(
+        "The Forest", (("combat", ("Viperstrike",)),), ("scene_two",)
+        ),
+    "scene_two": SceneNode(
+        "The Crossroads", (),
+        ("scene_two_option_one", "scene_two_option_two", "scene_two_option_three")
+        ),
+    "scene_two_option_one": SceneNode(
+        "The Whispering Caverns", (("restore",), ("combat", ("Doomshroud",))),
+        ("scene_two_option_two",)
+        ),
+    "scene_two_option_two": SceneNode(
+        "The Misty Peaks", (("combat", ("Mistwalker",)),)
+        ),
+    "scene_two_option_three": SceneNode(
+        "The Enchanted Meadows", (("boost", "magic_points", 10), ("combat", ("Doomshroud",))),
+        ("scene_two_option_two",)
+        ),
+}
+
+# the first scene of the story
+STORY_START = "scene_one"
+
+# the step kinds a scene can have
+step_kinds = ("restore", "boost", "combat")
+
+
+def story_paths(
+    graph: Dict[str, SceneNode] = None, start: str = STORY_START
+    ) -> List[Tuple[str, ...]]:
+    """Get every path through the story graph.
+
+    Parameters
+    ----------
+    graph : Dict[str, SceneNode]
+        The story graph. Defaults to None, `story_graph`.
+    start : str
+        The first scene. Defaults to STORY_START.
+
+    Returns
+    -------
+    List[Tuple[str, ...]] : The scenes of every path, in the order they are played.
+    """
+
+    graph = graph or story_graph
+    paths = []
+
+    # depth first, the story graph has no cycles
+    pending = [(start,)]
+
+    while pending:
+        path = pending.pop()
+        node = graph[path[-1]]
+
+        if not node.branches:
+            paths.append(path)
+
+        for branch in reversed(node.branches):
+            if branch in path:
+                raise ValueError(f"The story graph loops back to '{branch}'.")
+
+            pending.append(path + (branch,))
+
+    return paths
+
+
+def path_name(path: Sequence[str], graph: Dict[str, SceneNode] = None) -> str:
+    """Name a path after the scenes the player picked.
+
+    Parameters
+    ----------
+    path : Sequence[str]
+        The scenes of the path.
+    graph : Dict[str, SceneNode]
+        The story graph. Defaults to None, `story_graph`.
+
+    Returns
+    -------
+    str : The titles of the scenes picked at a branch, joined with " > ".
+    """
+
+    graph = graph or story_graph
+
+    return " > ".join(
+        graph[scene].title for previous, scene in zip(path, path[1:])
+        if len(graph[previous].branches) > 1
+        ) or graph[path[0]].title
+
+
+class StoryPlayer:
+    """Plays the story graph with `walk_story`, fighting its combats and picking its branches.
+
+    The hooks do nothing by default, the game overrides them to show the lore of the steps.
+    """
+
+    def fight(self, scene: str, enemy_names: Tuple[str, ...]) -> bool:
+        """Fight a combat of a scene.
+
+        Parameters
+        ----------
+        scene : str
+            The scene of the combat.
+        enemy_names : Tuple[str, ...]
+            The name of each enemy.
+
+        Returns
+        -------
+        bool : True if the player won, False otherwise.
+        """
+
+        raise NotImplementedError("Subclasses must implement the fight method")
+
+    def choose_branch(self, scene: str, branches: Tuple[str, ...]) -> Optional[str]:
+        """Pick the scene played after a scene with more than one branch.
+
+        Parameters
+        ----------
+        scene : str
+            The scene just played.
+        branches : Tuple[str, ...]
+            The scenes that can be played next.
+
+        Returns
+        -------
+        Optional[str] : One of the branches, None to stop the story there.
+        """
+
+        raise NotImplementedError("Subclasses must implement the choose_branch method")
+
+    def enter_scene(self, scene: str):
+        """Called before the steps of a scene are played.
+
+        Parameters
+        ----------
+        scene : str
+            The scene.
+        """
+
+    def after_step(self, scene: str, index: int, step: tuple):
+        """Called after a step of a scene was played, unless it was a lost combat.
+
+        Parameters
+        ----------
+        scene : str
+            The scene.
+        index : int
+            The index of the step in the steps of the scene.
+        step : tuple
+            The step, see `SceneNode`.
+        """
+
+
+def walk_story(
+    player: StoryPlayer,
+    player_characters: Sequence[BaseCharacter],
+    graph: Dict[str, SceneNode] = None,
+    start: str = STORY_START
+    ) -> Optional[str]:
+    """Play the scenes of the story graph until it ends or a combat is lost.
+
+    Parameters
+    ----------
+    player : StoryPlayer
+        Fights the combats, picks the branches and gets the hooks of the scenes.
+    player_characters : Sequence[BaseCharacter]
+        The player characters, restored and boosted by the steps.
+    graph : Dict[str, SceneNode]
+        The story graph. Defaults to None, `story_graph`.
+    start : str
+        The first scene. Defaults to STORY_START.
+
+    Returns
+    -------
+    Optional[str] : The scene of the lost combat, None if the story was completed.
+    """
+
+    graph = graph or story_graph
+    scene = start
+
+    while scene is not None:
+        player.enter_scene(scene)
+        node = graph[scene]
+
+        for index, (kind, *arguments) in enumerate(node.steps):
+            if kind == "restore":
+                for character in player_characters:
+                    if character.is_alive():
+                        character.restore_stats()
+
+            elif kind == "boost":
+                add_points(player_characters, *arguments)
+
+            elif kind == "combat":
+                if not player.fight(scene, tuple(arguments[0])):
+                    return scene
+
+            else:
+                raise ValueError(f"Unknown step '{kind}', the steps are {step_kinds}.")
+
+            player.after_step(scene, index, node.steps[index])
+
+        # a single branch is followed without asking
+        if len(node.branches) > 1:
+            scene = player.choose_branch(scene, node.branches)
+
+        else:
+            scene = node.branches[0] if node.branches else None
+
+    return None
+
+
+class CampaignResult(NamedTuple):
+    """The result of a simulated campaign.
+
+    Attributes
+    ----------
+    seed : int
+        The seed of the campaign.
+    completed : bool
+        Whether the player won every combat of the path.
+    lost_at : Optional[str]
+        The scene of the lost combat, None if the campaign was completed.
+    turns : int
+        The amount of combat turns played.
+    """
+
+    seed: int
+    completed: bool
+    lost_at: Optional[str]
+    turns: int
+
+
+class CampaignSimulator(StoryPlayer):
+    """Plays paths of the story graph headlessly.
+
+    The player characters carry their stats from one combat to the next, like in the story,
+    and only the scene steps restore or boost them. Every combat of a campaign rolls with
+    the same random number generator, seeded by the campaign seed.
+
+    Attributes
+    ----------
+    graph : Dict[str, SceneNode]
+        The story graph.
+    max_turns : int
+        The amount of turns before a combat is stopped as a loss.
+    """
+
+    def __init__(self, graph: Dict[str, SceneNode] = None, max_turns: int = MAX_TURNS):
+        """Initializes a CampaignSimulator instance.
+
+        Parameters
+        ----------
+        graph : Dict[str, SceneNode]
+            The story graph. Defaults to None, `story_graph`.
+        max_turns : int
+            The amount of turns before a combat is stopped as a loss. Defaults to MAX_TURNS.
+        """
+
+        self.graph = graph or story_graph
+        self.max_turns = max_turns
+
+        self._battle: Optional[Battle] = None
+
+        # the campaign being played
+        self._path: Sequence[str] = ()
+        self._player_characters: List[BaseCharacter] = []
+        self._policy: Optional[Policy] = None
+        self._rng: Optional[random.Random] = None
+        self._turns = 0
+
+    def play(
+        self, team: Sequence[str], path: Sequence[str], policy: Policy, seeds: Sequence[int]
+        ) -> List[CampaignResult]:
+        """Play a campaign along a path for every seed.
+
+        Parameters
+        ----------
+        team : Sequence[str]
+            The job class of each player character.
+        path : Sequence[str]
+            The scenes of the path, see `story_paths`.
+        policy : Policy
+            The policy of the player.
+        seeds : Sequence[int]
+            The seed of each campaign.
+
+        Returns
+        -------
+        List[CampaignResult] : The result of each campaign.
+        """
+
+        results = []
+        self._path = path
+        self._policy = policy
+
+        for seed in seeds:
+            # characters start from their templates, named after their job class
+            self._player_characters = [
+                character_pool.acquire(job_classes[job_class], job_class) for job_class in team
+                ]
+            self._rng = random.Random(seed)
+            self._turns = 0
+            policy.reset(policy_rng(seed))
+
+            lost_at = walk_story(self, self._player_characters, self.graph, path[0])
+            results.append(CampaignResult(seed, lost_at is None, lost_at, self._turns))
+
+            character_pool.release(*self._player_characters)
+
+        return results
+
+    def choose_branch(self, scene: str, branches: Tuple[str, ...]) -> Optional[str]:
+        """Follow the path, see `StoryPlayer.choose_branch`."""
+
+        index = self._path.index(scene) + 1
+
+        return self._path[index] if index < len(self._path) else None
+
+    def fight(self, scene: str, enemy_names: Tuple[str, ...]) -> bool:
+        """Fight with the carried over player characters, see `StoryPlayer.fight`."""
+
+        enemy_characters = [character_pool.acquire(EnemyCharacter, name) for name in enemy_names]
+
+        if self._battle is None:
+            self._battle = Battle(self._player_characters, enemy_characters, self._rng)
+
+        else:
+            self._battle.reset(self._player_characters, enemy_characters, self._rng)
+
+        player_won = play_battle(self._battle, self._policy, self.max_turns)
+        character_pool.release(*enemy_characters)
+        self._turns += self._battle.turn_count
+
+        return player_won
+
+
+def _play_campaigns(task: tuple) -> List[CampaignResult]:
+    # play a chunk of campaigns, runs in the worker processes
+    team, path, policy_spec, seeds, max_turns, cache = task
+    key = None
+
+    if cache:
+        # keyed by the steps of the scenes too, so changing the story gives new keys
+        key = results_cache.key(
+            "campaign", list(team), list(path), [story_graph[scene].steps for scene in path],
+            policy_spec, [seeds.start, seeds.stop, seeds.step], max_turns
+            )
+        cached = results_cache.get(key)
+
+        if cached is not None:
+            return [CampaignResult(*result) for result in cached]
+
+    results = CampaignSimulator(max_turns=max_turns).play(
+        team, path, create_policy(policy_spec), seeds
+        )
+
+    if key is not None:
+        results_cache.put(key, results)
+
+    return results
+
+
+class PathSummary(NamedTuple):
+    """The completion rate of a team along a path.
+
+    Attributes
+    ----------
+    campaigns : int
+        The amount of campaigns played.
+    completed : int
+        The amount of campaigns completed.
+    losses : Dict[str, int]
+        The amount of campaigns lost at each scene.
+    mean_turns : float
+        The mean amount of combat turns of a campaign.
+    """
+
+    campaigns: int
+    completed: int
+    losses: Dict[str, int]
+    mean_turns: float
+
+    @property
+    def completion_rate(self) -> float:
+        """The share of the campaigns that were completed."""
+
+        return self.completed / self.campaigns if self.campaigns else 0.0
+
+
+def summarize_campaigns(results: Sequence[CampaignResult]) -> PathSummary:
+    """Get the completion rate and losses of simulated campaigns.
+
+    Parameters
+    ----------
+    results : Sequence[CampaignResult]
+        The results of the campaigns.
+
+    Returns
+    -------
+    PathSummary : The summary of the campaigns.
+    """
+
+    losses: Dict[str, int] = {}
+
+    for result in results:
+        if result.lost_at is not None:
+            losses[result.lost_at] = losses.get(result.lost_at, 0) + 1
+
+    return PathSummary(
+        len(results),
+        sum(result.completed for result in results),
+        losses,
+        sum(result.turns for result in results) / len(results) if results else 0.0
+        )
+
+
+def simulate_campaigns(
+    teams: Sequence[Sequence[str]],
+    policy: str = "greedy",
+    campaigns: int = 1000,
+    processes: Optional[int] = None,
+    seed: int = 0,
+    max_turns: int = MAX_TURNS,
+    cache: bool = True
+    ) -> Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], PathSummary]:
+    """Simulate campaigns of every team along every path of the story graph.
+
+    Parameters
+    ----------
+    teams : Sequence[Sequence[str]]
+        The job class of each player character of every team.
+    policy : str
+        The player policy, as given to `create_policy`. Defaults to "greedy".
+    campaigns : int
+        The amount of campaigns of each team and path. Defaults to 1000.
+    processes : int
+        The amount of worker processes, 1 to simulate in this process. Defaults to None,
+        one for each CPU.
+    seed : int
+        The seed of the first campaign. Defaults to 0.
+    max_turns : int
+        The amount of turns before a combat is stopped as a loss. Defaults to MAX_TURNS.
+    cache : bool
+        Whether to reuse the results in `results_cache`, including those of earlier runs.
+        Defaults to True.
+
+    Returns
+    -------
+    Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], PathSummary] : The summary of every team
+        and path.
+    """
+
+    processes = processes or multiprocessing.cpu_count()
+    paths = story_paths()
+    keys = [(tuple(team), path) for team in teams for path in paths]
+
+    # split the seeds so every process has a few tasks
+    chunks = max(math.ceil(processes * 4 / len(keys)), 1)
+    chunk_size = max(math.ceil(campaigns / chunks), 1)
+    seeds = range(seed, seed + campaigns)
+    tasks = [
+        (team, path, policy, seeds[start:start + chunk_size], max_turns, cache)
+        for team, path in keys
+        for start in range(0, campaigns, chunk_size)
+    ]
+
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            task_results = pool.map(_play_campaigns, tasks)
+
+    else:
+        task_results = [_play_campaigns(task) for task in tasks]
+
+    results: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[CampaignResult]] = {
+        key: [] for key in keys
+    }
+
+    for (team, path, *_), chunk_results in zip(tasks, task_results):
+        results[team, path].extend(chunk_results)
+
+    return {key: summarize_campaigns(key_results) for key, key_results in results.items()}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the campaign simulator.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Simulate whole campaigns of the story.")
+    parser.add_argument(
+        "--team", nargs="+", action="append", choices=sorted(job_classes),
+        help="the job class of each player character, repeat for more teams"
+        )
+    parser.add_argument(
+        "--policy", default="greedy", help=f"the player policy: {', '.join(policy_classes)}"
+        )
+    parser.add_argument(
+        "--campaigns", type=int, default=1000, help="the campaigns of each team and path"
+        )
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first campaign")
+    parser.add_argument(
+        "--max-turns", type=int, default=MAX_TURNS,
+        help="the amount of turns before a combat is stopped as a loss"
+        )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="simulate even if the results are cached"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the campaign simulator from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        create_policy(args.policy)
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    teams = args.team or [["Tank", "MirrorMage", "Healer"]]
+    summaries = simulate_campaigns(
+        teams, args.policy, args.campaigns, args.processes, args.seed, args.max_turns,
+        not args.no_cache
+        )
+
+    for (team, path), summary in summaries.items():
+        losses = ", ".join(
+            f"{story_graph[scene].title} {count / summary.campaigns:.1%}"
+            for scene, count in summary.losses.items()
+            )
+        print(
+            f"{' '.join(team):<30}{path_name(path):<40}completed "
+            f"{summary.completion_rate:6.1%}, {summary.mean_turns:5.1f} turns"
+            + (f", lost at {losses}" if losses else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
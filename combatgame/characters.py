@@ -3,9 +3,11 @@
 from __future__ import annotations
 import random
 import os
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Type
 
-from .skills import Skills, BaseSkill, SkillEffects
+from .effects import ActiveEffects, BaseEffect
+from .skills import BaseSkill, skill_registry
+from .stats import StatModifiers, critical_chance
 from .utils.utils import csv_to_dict
 from .resources.ascii_art import ascii_arts
 
@@ -21,6 +23,45 @@ job_class_attributes_path = f"{this_file_dir}/data/job_class_attributes.csv"
 # convert job_classes_attributes.csv file to python dictionary
 job_class_attributes = csv_to_dict(job_class_attributes_path, "job")
 
+# precompiled attributes of each job class, built on first use
+job_class_templates: Dict[str, dict] = {}
+
+
+def get_job_class_template(job_class_name: str) -> dict:
+    """Get the attributes of a job class converted from job_class_attributes.csv.
+
+    The attributes are converted once per job class and copied onto characters.
+
+    Parameters
+    ----------
+    job_class_name : str
+        The name of the job class.
+
+    Returns
+    -------
+    dict : The attribute names and values of the job class.
+    """
+
+    template = job_class_templates.get(job_class_name)
+
+    if template is None:
+        attr = job_class_attributes[job_class_name]
+        template = job_class_templates[job_class_name] = {
+            "job_class": job_class_name,
+            "max_health_points": int(attr["HP"]),
+            "max_defense_points": int(attr["DP"]),
+            "attack_points": int(attr["AP"]),
+            "speed_points": int(attr["SP"]),
+            "magic_points": int(attr["MP"]),
+            "luck": int(attr["Luck"]),
+            "critical_chance": critical_chance(int(attr["Luck"])),
+            "ascii_art": ascii_arts[job_class_name],
+            "health_points": int(attr["HP"]),
+            "defense_points": int(attr["DP"]),
+        }
+
+    return template
+
 
 class BaseCharacter:
     """Represents a character.
@@ -41,16 +82,22 @@ class BaseCharacter:
         The magic points of the character.
     luck : int
         The luck attribute of the character.
-    skills : list[Skill]
-        The skills of the character.
-    active_effects : dict
-        Dictionary of active effects on character.
+    critical_chance : int
+        The chance of landing a critical hit in percent, derived from luck.
+    skills : tuple[Skill]
+        The shared skills of the character.
+    active_effects : ActiveEffects
+        The active effects on character, one slot per effect type.
+    stat_modifiers : StatModifiers
+        The temporary modifiers on top of the character's base stats.
     character_image : str
         The path to the character's image.
     ascii_art : List
         The ASCII Art for the job class.
     starting_column_position : int
         The starting column position in combat screen.
+    rng : random.Random
+        The random number generator for the character's rolls, the random module by default.
 
     Notes
     -----
@@ -81,12 +128,16 @@ class BaseCharacter:
 
         # how lucky the character is (max - 100)
         self.luck = 0
+        self.critical_chance = 0
 
         # character's job class skills
-        self.skills = []
+        self.skills = ()
 
         # active effects from using skills
-        self.active_effects = []
+        self.active_effects = ActiveEffects()
+
+        # temporary stat changes from buffs
+        self.stat_modifiers = StatModifiers(self)
 
         # character's image
         self.character_image = ""
@@ -98,6 +149,9 @@ class BaseCharacter:
         # note: this value will only be set when in combat screen
         self.starting_column_position = 0
 
+        # random number generator, battles can share their own seeded generator
+        self.rng = random
+
         if job_class:
             self._assign_job_class_attributes(job_class)
 
@@ -110,43 +164,87 @@ class BaseCharacter:
             The name of the job class.
         """
 
-        attr = job_class_attributes[job_class_name]
-        self.job_class = job_class_name
-        self.max_health_points: int = int(attr["HP"])
-        self.max_defense_points: int = int(attr["DP"])
-        self.attack_points: int = int(attr["AP"])
-        self.speed_points: int = int(attr["SP"])
-        self.magic_points: int = int(attr["MP"])
-        self.luck: int = int(attr["Luck"])
-        self.ascii_art = ascii_arts[job_class_name]
-
-        self.health_points: int = self.max_health_points
-        self.defense_points: int = self.max_defense_points
+        # copy the precompiled attributes of the job class
+        self.__dict__.update(get_job_class_template(job_class_name))
 
     def restore_stats(self):
         """Restore the statistics of the character back to its default values."""
 
+        # drop buffs since the attributes are reassigned to their base values
+        self.stat_modifiers.reset()
         self._assign_job_class_attributes(self.job_class)
 
-    def get_active_effect(self, effect: SkillEffects):
+    def reset(self):
+        """Reset the character to the state it was created in, so it can be reused."""
+
+        self.restore_stats()
+
+        if hasattr(self, "active_effects"):
+            self.active_effects.clear()
+
+        self.starting_column_position = 0
+        self.rng = random
+
+    def snapshot(self) -> tuple:
+        """Capture the stats that change in combat, see `restore_snapshot`.
+
+        Returns
+        -------
+        tuple : The health, defense, speed, magic and attack points, luck, active effects
+            and stat modifiers of the character.
+        """
+
+        return (
+            self.health_points, self.defense_points, self.speed_points, self.magic_points,
+            self.attack_points, self.luck, self.active_effects.snapshot(),
+            self.stat_modifiers.snapshot()
+            )
+
+    def restore_snapshot(self, snapshot: tuple):
+        """Restore the stats captured by `snapshot` in place.
+
+        Parameters
+        ----------
+        snapshot : tuple
+            The snapshot of the character.
+        """
+
+        self.health_points, self.defense_points, self.speed_points, self.magic_points, \
+            self.attack_points, self.luck, effects, modifiers = snapshot
+
+        self.critical_chance = critical_chance(self.luck)
+        self.active_effects.restore(effects)
+        self.stat_modifiers.restore(modifiers)
+
+    def get_active_effect(self, effect: Type[BaseEffect]):
         """Get the effect object that matches the effect given.
 
         Parameters
         ----------
-        effect : SkillEffects
+        effect : Type[BaseEffect]
             The effect class to look for.
 
         Returns
         -------
-        SkillEffects : The effect object if effect is in self.active_effects, None otherwise.
+        BaseEffect : The effect object if effect is in self.active_effects, None otherwise.
         """
 
         # checks if there is an active_effects attribute
         if hasattr(self, "active_effects"):
-            return next((item for item in self.active_effects if isinstance(item, effect)), None)
+            return self.active_effects.get(effect)
 
         return None
 
+    def tick_active_effects(self):
+        """Count down the duration of the character's timed effects and stat modifiers by a
+        turn."""
+
+        # checks if there is an active_effects attribute
+        if hasattr(self, "active_effects"):
+            self.active_effects.tick()
+
+        self.stat_modifiers.tick()
+
     def basic_attack(self, target: BaseCharacter) -> str:
         """Deals basic attack to target.
 
@@ -167,39 +265,16 @@ class BaseCharacter:
         # reduce speed points by 1
         self.speed_points -= 1
 
-        # checks if target has invincible effect and assigns effect to the return value
-        if effect := target.get_active_effect(SkillEffects.Invincible):
-
-            # the log to return
-            log = f"{self.name}'s attack was REJECTED due to {target.name}'s" + \
-                f" {effect.belongs_to}."
-
-            # reduce the use count of the effect
-            effect.use_count -= 1
-
-            # remove effect if its used up
-            if effect.use_count <= 0:
-                target.active_effects.remove(effect)
-
-            return log
-
-        # checks if target has reflective shield effect and assigns effect to the return value
-        if effect := target.get_active_effect(SkillEffects.ReflectiveShield):
-            log = effect.take_effect(self, self.attack_points)
-
-            # reduce the use count of the effect
-            effect.use_count -= 1
-
-            # remove effect if its used up
-            if effect.use_count == 0:
-                target.active_effects.remove(effect)
+        # let the target's on hit effects (Invincible, ReflectiveShield) intercept the attack
+        target_effects = getattr(target, "active_effects", None)
 
+        if target_effects and (log := target_effects.resolve_hit(self, target)) is not None:
             return log
 
         # calculates chances of critical hit based on job class's luck
         # critical hits ignores target's defense points and reduces their HP
         # by the amount of attacker's AP
-        critical_hit = (random.randint(1, 100)) <= self.luck
+        critical_hit = (self.rng.randint(1, 100)) <= self.critical_chance
 
         # critical hits ignores target's defense points and reduces their HP
         # by double the amount of attacker's AP
@@ -237,7 +312,7 @@ class BaseCharacter:
         self.speed_points -= 1
 
         # health points increase
-        hp_increase = random.randint(1, 10)
+        hp_increase = self.rng.randint(1, 10)
 
         # raise speed points by 1 to 10
         self.health_points += hp_increase
@@ -347,8 +422,8 @@ class Tank(BaseCharacter):
         # initialize attributes of BaseCharacter class
         super().__init__(name, job_class)
 
-        # initialize skills to job class
-        self.skills = [Skills.WhiskerGuard(), Skills.ClawSwipe()]
+        # share the job class skills from the skill registry
+        self.skills = skill_registry.get_job_class_skills(job_class)
 
     def __str__(self):
         return "Tank"
@@ -375,8 +450,8 @@ class MirrorMage(BaseCharacter):
         # initialize attributes of BaseCharacter class
         super().__init__(name, job_class)
 
-        # initialize skills to job class
-        self.skills = [Skills.IllusionaryAura(), Skills.ReflectiveShield()]
+        # share the job class skills from the skill registry
+        self.skills = skill_registry.get_job_class_skills(job_class)
 
     def __str__(self):
         return "Mirror Mage"
@@ -403,8 +478,8 @@ class Healer(BaseCharacter):
         # initialize attributes of BaseCharacter class
         super().__init__(name, job_class)
 
-        # initialize skills to job class
-        self.skills = [Skills.HealingPurr(), Skills.LuckyCharm()]
+        # share the job class skills from the skill registry
+        self.skills = skill_registry.get_job_class_skills(job_class)
 
     def __str__(self):
         return "Healer"
@@ -431,11 +506,20 @@ class Assassin(BaseCharacter):
         # initialize attributes of BaseCharacter class
         super().__init__(name, job_class)
 
-        # initialize skills to job class
-        self.skills = [Skills.PurrfectStrike(), Skills.CripplingStrike()]
+        # share the job class skills from the skill registry
+        self.skills = skill_registry.get_job_class_skills(job_class)
 
     def __str__(self):
         return "Assassin"
 
     def __repr__(self):
         return f"{self.__class__.__name__}(\'{self.name}\')"
+
+
+# the player character class of each job class
+job_classes = {
+    "Tank": Tank,
+    "MirrorMage": MirrorMage,
+    "Healer": Healer,
+    "Assassin": Assassin,
+}
@@ -0,0 +1,277 @@
+"""Simulation jobs that save their progress, so an interrupted job can be resumed.
+
+Usage:
+    python -m combatgame.checkpoint --matchup Tank:Doomshroud --battles 1000000 \
+        --checkpoint doomshroud.json
+    python -m combatgame.checkpoint --matchup Tank:Doomshroud --battles 1000000 \
+        --checkpoint doomshroud.json --resume
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional, Sequence
+
+from .battle import ENGINE_VERSION
+from .cache import data_fingerprint
+from .simulation import Aggregate, Matchup, parse_matchup, simulate_matchup
+from .utils.utils import write_json_atomic
+
+
+# the version of the checkpoint files, checkpoints of other versions can't be resumed
+CHECKPOINT_VERSION = 1
+
+
+class SimulationJob:
+    """Simulates matchups in chunks of seeds, saving the progress to a checkpoint file.
+
+    Every battle is seeded by its own seed, so the progress of a matchup is only the next
+    seed to simulate and the totals so far. A resumed job continues from there and ends
+    with the same totals as an uninterrupted one.
+
+    The checkpoint is saved at most once every `interval` seconds, when the job finishes
+    and when it's interrupted, so saving takes a negligible share of the runtime.
+
+    Attributes
+    ----------
+    matchups : List[Matchup]
+        The simulated matchups.
+    battles : int
+        The amount of battles of each matchup.
+    seed : int
+        The seed of the first battle of each matchup.
+    chunk_battles : int
+        The amount of battles simulated between checks of the checkpoint interval.
+    path : Optional[str]
+        The path of the checkpoint file, None to not save checkpoints.
+    interval : float
+        The min seconds between saved checkpoints.
+    key : str
+        The hash of the job definition, the loaded data tables and the engine version, a
+        checkpoint can only resume the same job on the same data and engine.
+    next_seeds : List[int]
+        The next seed to simulate of each matchup.
+    aggregates : List[Aggregate]
+        The totals of each matchup so far.
+    checkpoints : int
+        The amount of checkpoints saved.
+    checkpoint_seconds : float
+        The seconds spent saving checkpoints.
+    """
+
+    def __init__(
+        self,
+        matchups: Sequence[Matchup],
+        battles: int,
+        seed: int = 0,
+        chunk_battles: int = 100,
+        path: Optional[str] = None,
+        interval: float = 10.0
+        ):
+        """Initializes a SimulationJob instance.
+
+        Parameters
+        ----------
+        matchups : Sequence[Matchup]
+            The matchups to simulate.
+        battles : int
+            The amount of battles of each matchup.
+        seed : int
+            The seed of the first battle of each matchup. Defaults to 0.
+        chunk_battles : int
+            The amount of battles between checks of the interval. Defaults to 100.
+        path : str
+            The path of the checkpoint file. Defaults to None, no checkpoints.
+        interval : float
+            The min seconds between saved checkpoints. Defaults to 10.
+        """
+
+        self.matchups = list(matchups)
+        self.battles = battles
+        self.seed = seed
+        self.chunk_battles = chunk_battles
+        self.path = path
+        self.interval = interval
+        self.key = hashlib.sha256(
+            json.dumps([
+                CHECKPOINT_VERSION, ENGINE_VERSION, data_fingerprint(), self.matchups,
+                battles, seed
+                ]).encode()
+            ).hexdigest()
+        self.next_seeds = [seed] * len(self.matchups)
+        self.aggregates = [Aggregate() for _ in self.matchups]
+        self.checkpoints = 0
+        self.checkpoint_seconds = 0.0
+
+    def is_done(self) -> bool:
+        """Check whether every battle of the job was simulated.
+
+        Returns
+        -------
+        bool : True if every battle was simulated.
+        """
+
+        return all(next_seed >= self.seed + self.battles for next_seed in self.next_seeds)
+
+    def save(self):
+        """Save the progress of the job to the checkpoint file."""
+
+        if self.path is None:
+            return
+
+        started = time.perf_counter()
+        write_json_atomic(self.path, {
+            "version": CHECKPOINT_VERSION,
+            "key": self.key,
+            "next_seeds": self.next_seeds,
+            "aggregates": self.aggregates,
+        })
+        self.checkpoints += 1
+        self.checkpoint_seconds += time.perf_counter() - started
+
+    def load(self) -> bool:
+        """Continue from the progress saved in the checkpoint file.
+
+        Returns
+        -------
+        bool : True if a checkpoint was loaded, False if there is no checkpoint file.
+        """
+
+        if self.path is None or not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            checkpoint = json.load(file)
+
+        if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("key") != self.key:
+            raise ValueError(
+                f"The checkpoint '{self.path}' is of a different job, data set or engine."
+                )
+
+        self.next_seeds = checkpoint["next_seeds"]
+        self.aggregates = [Aggregate(*aggregate) for aggregate in checkpoint["aggregates"]]
+
+        return True
+
+    def run(self, resume: bool = False) -> List[Aggregate]:
+        """Simulate the remaining battles of the job.
+
+        Parameters
+        ----------
+        resume : bool
+            Whether to continue from the checkpoint file. Defaults to False, start over.
+
+        Returns
+        -------
+        List[Aggregate] : The totals of each matchup.
+        """
+
+        if resume:
+            self.load()
+
+        last_save = time.perf_counter()
+
+        try:
+            for index, matchup in enumerate(self.matchups):
+                stop = self.seed + self.battles
+
+                while self.next_seeds[index] < stop:
+                    start = self.next_seeds[index]
+                    seeds = range(start, min(start + self.chunk_battles, stop))
+                    aggregate = simulate_matchup(matchup, seeds)
+
+                    # the totals and next seed change together, so a checkpoint is consistent
+                    self.aggregates[index] = self.aggregates[index].combine(aggregate)
+                    self.next_seeds[index] = seeds.stop
+
+                    if time.perf_counter() - last_save >= self.interval:
+                        self.save()
+                        last_save = time.perf_counter()
+
+        finally:
+            # also save the progress when the job is interrupted
+            self.save()
+
+        return self.aggregates
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the checkpointed jobs.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Simulate matchups with resumable checkpoints.")
+    parser.add_argument(
+        "--matchup", action="append", type=parse_matchup,
+        help="a matchup as team:enemies[:policy], e.g. Tank,Healer:Viperstrike:greedy"
+        )
+    parser.add_argument(
+        "--battles", type=int, default=10_000, help="the amount of battles of each matchup"
+        )
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument("--checkpoint", help="the path of the checkpoint file")
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=10.0,
+        help="the min seconds between saved checkpoints"
+        )
+    parser.add_argument(
+        "--resume", action="store_true", help="continue from the checkpoint file"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run a checkpointed job from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs a --checkpoint file.")
+
+    matchups = args.matchup or [Matchup(("Tank", "MirrorMage", "Healer"), ("Viperstrike",))]
+    job = SimulationJob(
+        matchups, args.battles, args.seed, path=args.checkpoint,
+        interval=args.checkpoint_interval
+        )
+    started = time.perf_counter()
+
+    try:
+        aggregates = job.run(args.resume)
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    except KeyboardInterrupt:
+        if args.checkpoint:
+            print(f"Interrupted, resume with --checkpoint {args.checkpoint} --resume")
+
+        return
+
+    for matchup, aggregate in zip(job.matchups, aggregates):
+        print(
+            f"{matchup}: won {aggregate.wins}/{aggregate.battles} battles "
+            f"({aggregate.win_rate:.1%}), {aggregate.mean_turns:.1f} turns on average."
+            )
+
+    if job.checkpoints:
+        print(
+            f"{job.checkpoints} checkpoints took {job.checkpoint_seconds * 1000:.1f} ms, "
+            f"{job.checkpoint_seconds / (time.perf_counter() - started):.3%} of the runtime."
+            )
+
+
+if __name__ == "__main__":
+    main()
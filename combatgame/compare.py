@@ -0,0 +1,553 @@
+"""A/B comparison of two data sets on common random numbers.
+
+Both data sets play the same seeds, so every battle of the new data set rolls the same
+numbers as its twin of the old one and the win rate difference is measured on paired
+battles, without most of the noise of the rolls.
+
+Usage:
+    python -m combatgame.compare --change enemy:Doomshroud:AP=24 \
+        --matchup Tank,Healer:Doomshroud --battles 2000 --antithetic
+    python -m combatgame.compare --csv new_enemy_attributes.csv --stratified
+"""
+from __future__ import annotations
+import argparse
+import math
+import multiprocessing
+import random
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .balance import StatCell, override_stats, parse_cell
+from .characters import job_classes
+from .enemies import enemy_names
+from .policies import create_policy
+from .simulation import Matchup, parse_matchup, simulate
+from .tables import data_tables, replace_rows
+from .utils.utils import csv_to_dict
+
+
+# the name of the table of each data file, found by the key column of a CSV file
+key_column_tables = {key_column: name for name, (_, _, key_column) in data_tables.items()}
+
+
+class AntitheticRandom(random.Random):
+    """A random number generator that mirrors the numbers of `random.Random`.
+
+    Every number is the complement of the number of a `random.Random` with the same seed,
+    so a high roll of one is a low roll of the other. Averaging a battle with its
+    antithetic twin cancels part of the noise of the rolls, while every single battle
+    still rolls uniformly distributed numbers.
+    """
+
+    def random(self) -> float:
+        return (1.0 - super().random()) % 1.0
+
+    def getrandbits(self, k: int) -> int:
+        return ((1 << k) - 1) ^ super().getrandbits(k)
+
+
+def parse_change(spec: str) -> Tuple[StatCell, int]:
+    """Parse a stat change given on the command line.
+
+    Parameters
+    ----------
+    spec : str
+        The change as "table:row:column=value", e.g. "enemy:Doomshroud:AP=24".
+
+    Returns
+    -------
+    Tuple[StatCell, int] : The changed cell and its new value.
+    """
+
+    name, _, value = spec.partition("=")
+
+    try:
+        return parse_cell(name), int(value)
+
+    except ValueError as error:
+        raise ValueError(f"A change is written as table:row:column=value, {error}") from None
+
+
+def read_data_file(path: str) -> Tuple[str, dict]:
+    """Read a data CSV file, finding its table by its key column.
+
+    Parameters
+    ----------
+    path : str
+        The path of the CSV file.
+
+    Returns
+    -------
+    Tuple[str, dict] : The key column and the rows of the file.
+    """
+
+    with open(path, "r", encoding="utf-8") as file:
+        key_column = file.readline().split(",")[0].strip()
+
+    if key_column not in key_column_tables:
+        raise ValueError(
+            f"'{path}' isn't a data file, its first column must be one of "
+            f"{', '.join(key_column_tables)}."
+            )
+
+    return key_column, csv_to_dict(path, key_column)
+
+
+@contextmanager
+def data_set(
+    files: Dict[str, dict], changes: Sequence[Tuple[StatCell, int]] = ()
+    ) -> Iterator[None]:
+    """Use another data set, and put the loaded one back afterwards.
+
+    Parameters
+    ----------
+    files : Dict[str, dict]
+        The rows replacing each table, by the key column of the table.
+    changes : Sequence[Tuple[StatCell, int]]
+        The stat cells changed on top of the tables.
+    """
+
+    names = {key_column: key_column_tables[key_column] for key_column in files}
+    old_tables = {name: dict(data_tables[name][0]) for name in names.values()}
+
+    for key_column, rows in files.items():
+        replace_rows(names[key_column], rows)
+
+    try:
+        with override_stats([cell for cell, _ in changes], [value for _, value in changes]):
+            yield
+
+    finally:
+        for name, rows in old_tables.items():
+            replace_rows(name, rows)
+
+
+class PairedStats(NamedTuple):
+    """Sums of the paired results of a stratum, which can be combined across chunks.
+
+    A unit is a battle of both data sets on the same seed, or the mean of such a battle
+    and its antithetic twin.
+
+    Attributes
+    ----------
+    units : int
+        The amount of units.
+    sum_a : float
+        The sum of the wins of the old data set.
+    sum_b : float
+        The sum of the wins of the new data set.
+    sum_aa : float
+        The sum of the squared wins of the old data set.
+    sum_bb : float
+        The sum of the squared wins of the new data set.
+    sum_dd : float
+        The sum of the squared differences between the new and old wins.
+    """
+
+    units: int = 0
+    sum_a: float = 0.0
+    sum_b: float = 0.0
+    sum_aa: float = 0.0
+    sum_bb: float = 0.0
+    sum_dd: float = 0.0
+
+    def add(self, a: float, b: float) -> "PairedStats":
+        """Add a unit.
+
+        Parameters
+        ----------
+        a : float
+            The wins of the old data set.
+        b : float
+            The wins of the new data set.
+
+        Returns
+        -------
+        PairedStats : The sums with the unit.
+        """
+
+        return PairedStats(
+            self.units + 1, self.sum_a + a, self.sum_b + b, self.sum_aa + a * a,
+            self.sum_bb + b * b, self.sum_dd + (b - a) ** 2
+            )
+
+    def combine(self, other: "PairedStats") -> "PairedStats":
+        """Add the sums of another chunk.
+
+        Parameters
+        ----------
+        other : PairedStats
+            The sums of the other chunk.
+
+        Returns
+        -------
+        PairedStats : The sums of both chunks.
+        """
+
+        return PairedStats(*(mine + theirs for mine, theirs in zip(self, other)))
+
+    def variance(self, total: float, total_of_squares: float) -> float:
+        """Get the sample variance of a value from its sums.
+
+        Parameters
+        ----------
+        total : float
+            The sum of the value.
+        total_of_squares : float
+            The sum of the squared value.
+
+        Returns
+        -------
+        float : The sample variance, 0 with fewer than 2 units.
+        """
+
+        if self.units < 2:
+            return 0.0
+
+        return max(total_of_squares - total * total / self.units, 0.0) / (self.units - 1)
+
+    @property
+    def mean_difference(self) -> float:
+        """The mean win rate difference of the new data set."""
+
+        return (self.sum_b - self.sum_a) / self.units if self.units else 0.0
+
+    @property
+    def paired_variance(self) -> float:
+        """The variance of the difference of a unit."""
+
+        return self.variance(self.sum_b - self.sum_a, self.sum_dd)
+
+    @property
+    def unpaired_variance(self) -> float:
+        """The variance of the difference of a unit if both data sets rolled on their own."""
+
+        return self.variance(self.sum_a, self.sum_aa) + self.variance(self.sum_b, self.sum_bb)
+
+
+class Comparison(NamedTuple):
+    """The result of an A/B comparison.
+
+    Attributes
+    ----------
+    win_rate_a : float
+        The win rate of the old data set.
+    win_rate_b : float
+        The win rate of the new data set.
+    difference : float
+        The estimated win rate difference of the new data set.
+    standard_error : float
+        The standard error of the paired difference.
+    unpaired_standard_error : float
+        The standard error the difference would have with independent battles.
+    battles : int
+        The amount of battles played, of both data sets.
+    """
+
+    win_rate_a: float
+    win_rate_b: float
+    difference: float
+    standard_error: float
+    unpaired_standard_error: float
+    battles: int
+
+    @property
+    def variance_reduction(self) -> float:
+        """How many times fewer battles the pairing needs for the same standard error."""
+
+        if not self.standard_error:
+            return math.inf
+
+        return (self.unpaired_standard_error / self.standard_error) ** 2
+
+
+def _compare_chunk(task: tuple) -> List[PairedStats]:
+    # play the seeds of every stratum with both data sets, runs in the worker processes
+    strata_seeds, files, changes, antithetic = task
+    rng_classes = (random.Random, AntitheticRandom) if antithetic else (random.Random,)
+
+    def play(matchup, seeds, rng_class) -> List[bool]:
+        results = simulate(
+            matchup.team, matchup.enemies, create_policy(matchup.policy), seeds,
+            matchup.max_turns, rng_class=rng_class
+            )
+
+        return [result.player_won for result in results]
+
+    wins_a = [[play(matchup, seeds, rng_class) for rng_class in rng_classes]
+              for matchup, seeds in strata_seeds]
+
+    with data_set(files, changes):
+        wins_b = [[play(matchup, seeds, rng_class) for rng_class in rng_classes]
+                  for matchup, seeds in strata_seeds]
+
+    strata_stats = []
+
+    for stratum_a, stratum_b in zip(wins_a, wins_b):
+        stats = PairedStats()
+
+        # a unit is the mean of a battle and its antithetic twin
+        for a, b in zip(zip(*stratum_a), zip(*stratum_b)):
+            stats = stats.add(sum(a) / len(a), sum(b) / len(b))
+
+        strata_stats.append(stats)
+
+    return strata_stats
+
+
+class ABComparison:
+    """Compares the win rates of the loaded data set and a changed one on the same seeds.
+
+    Without stratification every seed plays a matchup drawn at random from the matchups,
+    with stratification every matchup plays an equal share of the seeds, give or take one,
+    and the differences of the matchups are averaged, which removes the noise of the draw.
+
+    Attributes
+    ----------
+    matchups : List[Matchup]
+        The compared matchups.
+    files : Dict[str, dict]
+        The rows of the new data set's tables, by key column.
+    changes : List[Tuple[StatCell, int]]
+        The stat cells the new data set changes.
+    battles : int
+        The amount of units of each data set.
+    antithetic : bool
+        Whether every seed is also played with antithetic rolls.
+    stratified : bool
+        Whether the battles are stratified by matchup.
+    processes : int
+        The amount of worker processes, 1 to simulate in this process.
+    seed : int
+        The seed of the first battle.
+    """
+
+    def __init__(
+        self,
+        matchups: Sequence[Matchup],
+        files: Dict[str, dict] = None,
+        changes: Sequence[Tuple[StatCell, int]] = (),
+        battles: int = 2000,
+        antithetic: bool = False,
+        stratified: bool = False,
+        processes: Optional[int] = None,
+        seed: int = 0
+        ):
+        """Initializes an ABComparison instance.
+
+        Parameters
+        ----------
+        matchups : Sequence[Matchup]
+            The compared matchups.
+        files : Dict[str, dict]
+            The rows of the new data set's tables, by key column. Defaults to None.
+        changes : Sequence[Tuple[StatCell, int]]
+            The stat cells the new data set changes. Defaults to none.
+        battles : int
+            The amount of units of each data set. Defaults to 2000.
+        antithetic : bool
+            Whether every seed is also played with antithetic rolls. Defaults to False.
+        stratified : bool
+            Whether the battles are stratified by matchup. Defaults to False.
+        processes : int
+            The amount of worker processes. Defaults to None, one for each CPU.
+        seed : int
+            The seed of the first battle. Defaults to 0.
+
+        Raises
+        ------
+        ValueError
+            If there are no battles, or fewer battles than matchups to stratify.
+        """
+
+        if battles < 1:
+            raise ValueError(f"A comparison needs at least 1 battle, got {battles}.")
+
+        if stratified and battles < len(matchups):
+            raise ValueError(
+                f"A stratified comparison needs a battle for each of the {len(matchups)} "
+                f"matchups, got {battles}."
+                )
+
+        self.matchups = list(matchups)
+        self.files = dict(files or {})
+        self.changes = list(changes)
+        self.battles = battles
+        self.antithetic = antithetic
+        self.stratified = stratified
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+
+    def strata_seeds(self) -> List[List[int]]:
+        """Get the seeds of every matchup.
+
+        Returns
+        -------
+        List[List[int]] : The seeds played by each matchup.
+        """
+
+        seeds = range(self.seed, self.seed + self.battles)
+
+        if self.stratified:
+            # the seeds that don't divide evenly go one each to some of the matchups
+            strata = len(self.matchups)
+            return [list(seeds[len(seeds) * index // strata:len(seeds) * (index + 1) // strata])
+                    for index in range(strata)]
+
+        # every seed draws its matchup
+        strata: List[List[int]] = [[] for _ in self.matchups]
+
+        for seed in seeds:
+            strata[random.Random(f"matchup-{seed}").randrange(len(self.matchups))].append(seed)
+
+        return strata
+
+    def run(self) -> Comparison:
+        """Play the battles and estimate the difference.
+
+        Returns
+        -------
+        Comparison : The win rates and their difference.
+        """
+
+        strata = self.strata_seeds()
+
+        # chunk every stratum so the processes share the work
+        chunks = max(self.processes * 4, 1)
+        tasks = [
+            ([(matchup, seeds[index::chunks]) for matchup, seeds in zip(self.matchups, strata)],
+             self.files, self.changes, self.antithetic)
+            for index in range(chunks)
+        ]
+
+        if self.processes > 1:
+            with multiprocessing.Pool(self.processes) as pool:
+                chunk_stats = pool.map(_compare_chunk, tasks)
+
+        else:
+            chunk_stats = [_compare_chunk(task) for task in tasks]
+
+        strata_stats = [PairedStats() for _ in self.matchups]
+
+        for stats in chunk_stats:
+            strata_stats = [total.combine(chunk) for total, chunk in zip(strata_stats, stats)]
+
+        units = sum(stats.units for stats in strata_stats)
+        battles = units * (2 if self.antithetic else 1)
+
+        if not self.stratified:
+            total = PairedStats()
+
+            for stats in strata_stats:
+                total = total.combine(stats)
+
+            return Comparison(
+                total.sum_a / units, total.sum_b / units, total.mean_difference,
+                math.sqrt(total.paired_variance / units),
+                math.sqrt(total.unpaired_variance / units), battles
+                )
+
+        # every matchup weighs the same
+        weight = 1 / len(self.matchups)
+
+        return Comparison(
+            sum(weight * stats.sum_a / stats.units for stats in strata_stats),
+            sum(weight * stats.sum_b / stats.units for stats in strata_stats),
+            sum(weight * stats.mean_difference for stats in strata_stats),
+            math.sqrt(sum(
+                weight ** 2 * stats.paired_variance / stats.units for stats in strata_stats
+                )),
+            math.sqrt(sum(
+                weight ** 2 * stats.unpaired_variance / stats.units for stats in strata_stats
+                )),
+            battles
+            )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the A/B comparison.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Compare the win rates of the data files and a changed data set."
+        )
+    parser.add_argument(
+        "--change", action="append", default=[], type=parse_change,
+        help="a stat change of the new data set as table:row:column=value, e.g. "
+        "enemy:Doomshroud:AP=24"
+        )
+    parser.add_argument(
+        "--csv", action="append", default=[],
+        help="a data file of the new data set, replacing the table with the same first column"
+        )
+    parser.add_argument(
+        "--matchup", action="append", type=parse_matchup,
+        help="a matchup as team:enemies[:policy], defaults to every job class against every "
+        "enemy"
+        )
+    parser.add_argument("--battles", type=int, default=2000, help="the battles of each data set")
+    parser.add_argument(
+        "--antithetic", action="store_true", help="also play every seed with antithetic rolls"
+        )
+    parser.add_argument(
+        "--stratified", action="store_true", help="split the battles evenly between matchups"
+        )
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the A/B comparison from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        files = dict(read_data_file(path) for path in args.csv)
+
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    if not files and not args.change:
+        parser.error("The new data set needs a --change or a --csv file.")
+
+    matchups = args.matchup or [
+        Matchup((job_class,), (enemy,)) for job_class in job_classes for enemy in enemy_names
+    ]
+
+    try:
+        ab_comparison = ABComparison(
+            matchups, files, args.change, args.battles, args.antithetic, args.stratified,
+            args.processes, args.seed
+            )
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    comparison = ab_comparison.run()
+
+    print(
+        f"old win rate {comparison.win_rate_a:.2%}, new win rate {comparison.win_rate_b:.2%} "
+        f"over {comparison.battles} battles of each data set"
+        )
+    print(
+        f"difference {comparison.difference:+.2%} +- {comparison.standard_error:.2%} (SE), "
+        f"{comparison.unpaired_standard_error:.2%} without common random numbers, "
+        f"{comparison.variance_reduction:.1f}x fewer battles for the same precision"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+"""Differential testing of battle engines against the reference rules of `Battle`.
+
+Both engines play the same seeds and the same player choices, their states are compared
+after every turn, and a divergence is shrunk to the shortest list of choices that still
+reproduces it.
+
+Usage:
+    python -m combatgame.differential --team Tank Healer --enemies Doomshroud --seeds 5000
+    python -m combatgame.differential --candidate my_package.fast:FastEngine
+"""
+from __future__ import annotations
+import argparse
+import importlib
+import random
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from .battle import Action, Battle, CharacterView
+from .characters import job_classes
+from .enemies import EnemyCharacter, enemy_names
+from .pooling import character_pool
+from .simulation import MAX_TURNS
+
+
+# a state is a tuple of named values, so a divergence can name what differs
+State = Tuple[Tuple[str, object], ...]
+
+
+def battle_state(battle: Battle) -> State:
+    """Capture the state of a battle that engines have to agree on.
+
+    Parameters
+    ----------
+    battle : Battle
+        The battle.
+
+    Returns
+    -------
+    State : The turn, the active characters and the stats and effects of every character.
+    """
+
+    state = [
+        ("turn_count", battle.turn_count),
+        ("active_player", battle.active_player_character.name),
+        ("active_enemy", battle.active_enemy_character.name),
+        ("game_over", battle.is_game_over()),
+    ]
+
+    for character in (*battle.player_characters, *battle.enemies):
+        state.append((f"{character.name}.stats", tuple(CharacterView.of(character))))
+
+        effects = getattr(character, "active_effects", None)
+
+        if effects is not None:
+            state.append((f"{character.name}.effects", tuple(
+                (effect.name, uses, duration) for effect, uses, duration in effects.snapshot()
+                )))
+
+    return tuple(state)
+
+
+class Engine:
+    """Interface of an engine compared by the harness.
+
+    A turn asks `choose` for a choice when it's a player turn. The choice is an index into
+    the legal actions, taken modulo their amount, so any list of choices is a valid game.
+    """
+
+    name = "engine"
+
+    def reset(self, team: Sequence[str], enemies: Sequence[str], seed: int):
+        """Start a battle.
+
+        Parameters
+        ----------
+        team : Sequence[str]
+            The job class of each player character.
+        enemies : Sequence[str]
+            The name of each enemy.
+        seed : int
+            The seed of the battle.
+        """
+
+        raise NotImplementedError
+
+    def play_turn(self, choose: Callable[[], int]):
+        """Play a turn.
+
+        Parameters
+        ----------
+        choose : Callable[[], int]
+            Gets the next choice of the player, called once on a player turn.
+        """
+
+        raise NotImplementedError
+
+    def is_over(self) -> bool:
+        """Check whether the battle is over.
+
+        Returns
+        -------
+        bool : True if a team was defeated.
+        """
+
+        raise NotImplementedError
+
+    def state(self) -> State:
+        """Capture the state to compare, see `battle_state`.
+
+        Returns
+        -------
+        State : The state.
+        """
+
+        raise NotImplementedError
+
+
+class ReferenceEngine(Engine):
+    """The rules of `Battle`, played like `play_battle` plays them."""
+
+    name = "reference"
+
+    def __init__(self):
+        self.battle: Optional[Battle] = None
+        self._characters: List = []
+
+    def reset(self, team: Sequence[str], enemies: Sequence[str], seed: int):
+        character_pool.release(*self._characters)
+
+        player_characters = [
+            character_pool.acquire(job_classes[job_class], job_class) for job_class in team
+            ]
+        enemy_characters = [character_pool.acquire(EnemyCharacter, name) for name in enemies]
+        self._characters = [*player_characters, *enemy_characters]
+
+        if self.battle is None:
+            self.battle = Battle(player_characters, enemy_characters, random.Random(seed))
+
+        else:
+            self.battle.reset(player_characters, enemy_characters, random.Random(seed))
+
+    def play_turn(self, choose: Callable[[], int]):
+        battle = self.battle
+        player = battle.active_player_character
+        enemy = battle.active_enemy_character
+
+        if battle.start_turn() is player:
+            actions = battle.available_actions()
+            turn_taken, _ = battle.take_player_turn(actions[choose() % len(actions)])
+
+            # an action that can't be taken is replaced by a basic attack
+            if not turn_taken:
+                battle.take_player_turn(Action.ATTACK)
+
+        else:
+            battle.take_enemy_turn()
+
+        battle.end_turn(player, enemy)
+
+    def is_over(self) -> bool:
+        return self.battle.is_game_over()
+
+    def state(self) -> State:
+        return battle_state(self.battle)
+
+
+class SnapshotEngine(ReferenceEngine):
+    """The reference rules, with every turn played twice around a snapshot.
+
+    The turn is played, the battle is restored from the snapshot taken before it and the
+    turn is played again, so the battle only agrees with the reference if restoring a
+    snapshot brings back everything a turn depends on.
+    """
+
+    name = "snapshot"
+
+    def play_turn(self, choose: Callable[[], int]):
+        snapshot = self.battle.snapshot(include_rng=True)
+        choices = []
+
+        def remember():
+            choices.append(choose())
+            return choices[-1]
+
+        super().play_turn(remember)
+        self.battle.restore(snapshot)
+        super().play_turn(lambda: choices[0])
+
+
+# the engines that can be compared without importing them, by name
+engine_classes = {
+    engine_class.name: engine_class for engine_class in (ReferenceEngine, SnapshotEngine)
+}
+
+
+def load_engine_class(spec: str) -> Type[Engine]:
+    """Get an engine class by name, or import it.
+
+    Parameters
+    ----------
+    spec : str
+        The name of an engine in `engine_classes`, or "module:Class" to import one.
+
+    Returns
+    -------
+    Type[Engine] : The engine class.
+    """
+
+    if spec in engine_classes:
+        return engine_classes[spec]
+
+    module_name, _, class_name = spec.partition(":")
+
+    if not class_name:
+        raise ValueError(
+            f"Unknown engine '{spec}', choose from {', '.join(engine_classes)} or give "
+            "module:Class."
+            )
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class Divergence(NamedTuple):
+    """A turn where the engines disagree.
+
+    Attributes
+    ----------
+    seed : int
+        The seed of the battle.
+    choices : Tuple[int, ...]
+        The choices of the player up to the divergence.
+    turn : int
+        The turn after which the states differ.
+    fields : Tuple[Tuple[str, object, object], ...]
+        Every differing value, with the reference and the candidate value.
+    """
+
+    seed: int
+    choices: Tuple[int, ...]
+    turn: int
+    fields: Tuple[Tuple[str, object, object], ...]
+
+
+class DifferentialHarness:
+    """Plays a reference and a candidate engine side by side and compares every turn.
+
+    Attributes
+    ----------
+    reference : Engine
+        The engine with the rules to match.
+    candidate : Engine
+        The engine checked against the reference.
+    team : Tuple[str, ...]
+        The job class of each player character.
+    enemies : Tuple[str, ...]
+        The name of each enemy.
+    max_turns : int
+        The amount of turns before a battle is stopped.
+    turns : int
+        The amount of turns compared.
+    """
+
+    def __init__(
+        self,
+        reference: Engine,
+        candidate: Engine,
+        team: Sequence[str],
+        enemies: Sequence[str],
+        max_turns: int = MAX_TURNS
+        ):
+        """Initializes a DifferentialHarness instance.
+
+        Parameters
+        ----------
+        reference : Engine
+            The engine with the rules to match.
+        candidate : Engine
+            The engine checked against the reference.
+        team : Sequence[str]
+            The job class of each player character.
+        enemies : Sequence[str]
+            The name of each enemy.
+        max_turns : int
+            The amount of turns before a battle is stopped. Defaults to MAX_TURNS.
+        """
+
+        self.reference = reference
+        self.candidate = candidate
+        self.team = tuple(team)
+        self.enemies = tuple(enemies)
+        self.max_turns = max_turns
+        self.turns = 0
+
+    @staticmethod
+    def random_choices(seed: int, length: int) -> Tuple[int, ...]:
+        """Get random player choices for a battle.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the battle.
+        length : int
+            The amount of choices.
+
+        Returns
+        -------
+        Tuple[int, ...] : The choices.
+        """
+
+        rng = random.Random(f"choices-{seed}")
+
+        return tuple(rng.randrange(16) for _ in range(length))
+
+    def compare(self, seed: int, choices: Sequence[int]) -> Optional[Divergence]:
+        """Play a battle with both engines and find the first turn they disagree on.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the battle.
+        choices : Sequence[int]
+            The choices of the player, attacks once they run out.
+
+        Returns
+        -------
+        Divergence : The first divergence, None if the engines agree on every turn.
+        """
+
+        engines = (self.reference, self.candidate)
+        positions = [0, 0]
+
+        def chooser(index: int) -> Callable[[], int]:
+            # each engine reads the choices at its own pace
+            def choose() -> int:
+                position = positions[index]
+                positions[index] += 1
+
+                return choices[position] if position < len(choices) else 0
+
+            return choose
+
+        choosers = [chooser(index) for index in range(len(engines))]
+
+        for engine in engines:
+            engine.reset(self.team, self.enemies, seed)
+
+        for turn in range(self.max_turns + 1):
+            states = [engine.state() for engine in engines]
+            self.turns += 1
+
+            if states[0] != states[1]:
+                fields = tuple(
+                    (name, value, candidate_value)
+                    for (name, value), (_, candidate_value) in zip(*states)
+                    if value != candidate_value
+                    ) or (("state", states[0], states[1]),)
+
+                return Divergence(seed, tuple(choices[:max(positions)]), turn, fields)
+
+            if any(engine.is_over() for engine in engines) or turn == self.max_turns:
+                return None
+
+            for engine, choose in zip(engines, choosers):
+                engine.play_turn(choose)
+
+        return None
+
+    def minimize(self, divergence: Divergence) -> Divergence:
+        """Shrink the choices of a divergence to the shortest list that reproduces it.
+
+        The choices are cut after the divergence, then chunks of them are removed while
+        the engines still diverge (delta debugging), then the remaining choices are
+        lowered towards 0, the basic attack.
+
+        Parameters
+        ----------
+        divergence : Divergence
+            The divergence.
+
+        Returns
+        -------
+        Divergence : The divergence of the shortest reproducing choices.
+        """
+
+        seed = divergence.seed
+        best = divergence
+        choices = list(divergence.choices)
+
+        def diverges(candidate: List[int]) -> Optional[Divergence]:
+            return self.compare(seed, candidate)
+
+        # remove chunks, from halves down to single choices
+        chunk = max(len(choices) // 2, 1)
+
+        while choices and chunk >= 1:
+            removed = False
+
+            for start in range(0, len(choices), chunk):
+                candidate = choices[:start] + choices[start + chunk:]
+                result = diverges(candidate)
+
+                if result is not None:
+                    choices, best, removed = list(result.choices), result, True
+                    break
+
+            if not removed:
+                if chunk == 1:
+                    break
+
+                chunk //= 2
+
+        # lower every remaining choice, a lower choice can also end the choices earlier
+        index = 0
+
+        while index < len(choices):
+            for value in range(choices[index]):
+                result = diverges(choices[:index] + [value] + choices[index + 1:])
+
+                if result is not None:
+                    choices, best = list(result.choices), result
+                    break
+
+            index += 1
+
+        return best
+
+    def run(self, seeds: Sequence[int]) -> List[Divergence]:
+        """Compare the engines on every seed with random choices.
+
+        Parameters
+        ----------
+        seeds : Sequence[int]
+            The seeds of the battles.
+
+        Returns
+        -------
+        List[Divergence] : The minimized divergence of every seed the engines disagree on.
+        """
+
+        divergences = []
+
+        for seed in seeds:
+            divergence = self.compare(seed, self.random_choices(seed, self.max_turns))
+
+            if divergence is not None:
+                divergences.append(self.minimize(divergence))
+
+        return divergences
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the harness.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Compare a battle engine with the reference.")
+    parser.add_argument(
+        "--candidate", default="snapshot",
+        help=f"the compared engine: {', '.join(engine_classes)} or module:Class"
+        )
+    parser.add_argument(
+        "--reference", default="reference", help="the engine with the rules to match"
+        )
+    parser.add_argument(
+        "--team", nargs="+", default=["Tank", "MirrorMage", "Healer"],
+        choices=sorted(job_classes), help="the job class of each player character"
+        )
+    parser.add_argument(
+        "--enemies", nargs="+", default=["Viperstrike"], choices=sorted(enemy_names),
+        help="the name of each enemy"
+        )
+    parser.add_argument("--seeds", type=int, default=1000, help="the amount of battles")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument(
+        "--max-turns", type=int, default=MAX_TURNS, help="the turns before a battle is stopped"
+        )
+    parser.add_argument(
+        "--show", type=int, default=5, help="the amount of divergences to print"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the harness from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        reference = load_engine_class(args.reference)()
+        candidate = load_engine_class(args.candidate)()
+
+    except (ImportError, AttributeError, ValueError) as error:
+        parser.error(str(error))
+
+    harness = DifferentialHarness(reference, candidate, args.team, args.enemies, args.max_turns)
+    started = time.perf_counter()
+    divergences = harness.run(range(args.seed, args.seed + args.seeds))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{candidate.name} vs {reference.name}: {args.seeds} battles, {harness.turns} turns "
+        f"compared in {elapsed:.1f}s, {len(divergences)} diverged"
+        )
+
+    for divergence in sorted(divergences, key=lambda item: len(item.choices))[:args.show]:
+        print(
+            f"seed {divergence.seed}, choices {list(divergence.choices)}, after turn "
+            f"{divergence.turn}:"
+            )
+
+        for name, value, candidate_value in divergence.fields:
+            print(f"    {name}: {reference.name} {value!r}, {candidate.name} {candidate_value!r}")
+
+    if divergences:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
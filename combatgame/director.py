@@ -0,0 +1,497 @@
+"""Difficulty director that nudges the enemies between turns towards a target win probability.
+
+After every turn the director estimates the chance of the player winning with a logistic
+model of a few stats of the battle, and when it's outside the band around the target it
+raises or lowers the attack points of the active enemy a step, within a max change of
+its base attack points. The model costs a few microseconds a turn.
+
+Usage:
+    python -m combatgame.director fit --battles 400
+    python -m combatgame.director evaluate --target 0.6 --battles 400
+"""
+from __future__ import annotations
+import argparse
+import math
+import time
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .enemies import enemy_names
+from .policies import create_policy
+from .simulation import Matchup, simulate
+from .tournament import all_teams
+
+if TYPE_CHECKING:
+    from .battle import Battle
+    from .enemies import EnemyCharacter
+
+
+# the weights of the win model features, fitted with `python -m combatgame.director fit`
+# on teams of up to two characters against the story enemies
+DEFAULT_WEIGHTS = (-0.28, 2.19, 0.93)
+
+# the source of the stat modifiers of the director
+MODIFIER_SOURCE = "director"
+
+
+def win_features(battle: "Battle") -> Tuple[float, float, float]:
+    """Get the features of the win model from the state of a battle.
+
+    Parameters
+    ----------
+    battle : Battle
+        The battle.
+
+    Returns
+    -------
+    Tuple[float, float, float] : A constant 1, the log of how many more turns the enemies
+        need to defeat the team than the active player character needs to defeat them,
+        and the speed lead of the active player character.
+    """
+
+    player = battle.active_player_character
+    enemy = battle.active_enemy_character
+
+    # the health and defense of every alive character is what the other side has to get
+    # through, at the attack points of its active character a turn
+    team_points = sum(
+        character.health_points + character.defense_points
+        for character in battle.player_characters if character.is_alive()
+        )
+    enemy_points = sum(
+        character.health_points + character.defense_points
+        for character in battle.enemies if character.is_alive()
+        )
+    team_turns = max(team_points, 1) / max(enemy.attack_points, 1)
+    enemy_turns = max(enemy_points, 1) / max(player.attack_points, 1)
+
+    return 1.0, math.log(team_turns / enemy_turns), math.tanh(
+        (player.speed_points - enemy.speed_points) / 4
+        )
+
+
+class WinModel:
+    """Logistic model of the chance of the player winning a battle from its current state.
+
+    Attributes
+    ----------
+    weights : Tuple[float, ...]
+        The weight of each feature of `win_features`.
+    """
+
+    def __init__(self, weights: Sequence[float] = DEFAULT_WEIGHTS):
+        """Initializes a WinModel instance.
+
+        Parameters
+        ----------
+        weights : Sequence[float]
+            The weight of each feature. Defaults to DEFAULT_WEIGHTS.
+        """
+
+        self.weights = tuple(weights)
+
+    def predict_features(self, features: Sequence[float]) -> float:
+        """Get the win probability of features.
+
+        Parameters
+        ----------
+        features : Sequence[float]
+            The features, see `win_features`.
+
+        Returns
+        -------
+        float : The win probability.
+        """
+
+        logit = sum(weight * feature for weight, feature in zip(self.weights, features))
+
+        # the logit is clamped so hopeless states don't overflow
+        return 1 / (1 + math.exp(-min(max(logit, -30.0), 30.0)))
+
+    def predict(self, battle: "Battle") -> float:
+        """Get the win probability of the player in a battle.
+
+        Parameters
+        ----------
+        battle : Battle
+            The battle.
+
+        Returns
+        -------
+        float : The win probability.
+        """
+
+        return self.predict_features(win_features(battle))
+
+    @classmethod
+    def fit(
+        cls, samples: Sequence[Tuple[Sequence[float], bool]], iterations: int = 25
+        ) -> "WinModel":
+        """Fit a model to the features of turns and the outcome of their battles.
+
+        Newton's method on the log likelihood, every iteration solving the small linear
+        system of the features.
+
+        Parameters
+        ----------
+        samples : Sequence[Tuple[Sequence[float], bool]]
+            The features of a turn and whether the player won its battle.
+        iterations : int
+            The max amount of Newton iterations. Defaults to 25.
+
+        Returns
+        -------
+        WinModel : The fitted model.
+        """
+
+        size = len(samples[0][0])
+        weights = [0.0] * size
+
+        for _ in range(iterations):
+            gradient = [0.0] * size
+            # a small ridge keeps the system solvable when the samples are separable
+            hessian = [[1e-6 if row == column else 0.0 for column in range(size)]
+                       for row in range(size)]
+
+            for features, player_won in samples:
+                logit = sum(weight * feature for weight, feature in zip(weights, features))
+                probability = 1 / (1 + math.exp(-min(max(logit, -30.0), 30.0)))
+                error = player_won - probability
+                curvature = probability * (1 - probability)
+
+                for row in range(size):
+                    gradient[row] += error * features[row]
+
+                    for column in range(size):
+                        hessian[row][column] += curvature * features[row] * features[column]
+
+            step = _solve(hessian, gradient)
+            weights = [weight + delta for weight, delta in zip(weights, step)]
+
+            if max(abs(delta) for delta in step) < 1e-6:
+                break
+
+        return cls(weights)
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    # solve a small linear system by Gaussian elimination with partial pivoting
+    size = len(vector)
+    rows = [list(matrix[row]) + [vector[row]] for row in range(size)]
+
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+
+        for row in range(column + 1, size):
+            factor = rows[row][column] / rows[column][column]
+
+            for index in range(column, size + 1):
+                rows[row][index] -= factor * rows[column][index]
+
+    solution = [0.0] * size
+
+    for row in reversed(range(size)):
+        solution[row] = (
+            rows[row][size] - sum(rows[row][index] * solution[index]
+                                  for index in range(row + 1, size))
+            ) / rows[row][row]
+
+    return solution
+
+
+class DirectorSettings(NamedTuple):
+    """The bounds of the difficulty director.
+
+    Attributes
+    ----------
+    target : float
+        The win probability the director steers towards.
+    band : float
+        How far the win probability can be from the target before the enemy is changed.
+    step : float
+        The change of a nudge, as a fraction of the base attack points of the enemy.
+    max_change : float
+        The max total change, as a fraction of the base attack points of the enemy.
+    """
+
+    target: float = 0.6
+    band: float = 0.15
+    step: float = 0.05
+    max_change: float = 0.3
+
+
+class DifficultyDirector:
+    """Nudges the active enemy between turns so battles stay close to a target win rate.
+
+    One director serves one battle at a time, `reset` is called when a battle starts. The
+    changes are stat modifiers, so they're dropped when the enemy restores its stats.
+
+    Attributes
+    ----------
+    settings : DirectorSettings
+        The bounds of the director.
+    model : WinModel
+        Estimates the win probability of the player.
+    nudges : int
+        The amount of nudges of every battle.
+    seconds : float
+        The time spent adjusting in every battle.
+    turns : int
+        The amount of turns adjusted in every battle.
+    """
+
+    def __init__(
+        self, settings: DirectorSettings = DirectorSettings(), model: Optional[WinModel] = None
+        ):
+        """Initializes a DifficultyDirector instance.
+
+        Parameters
+        ----------
+        settings : DirectorSettings
+            The bounds of the director. Defaults to the default settings.
+        model : WinModel
+            Estimates the win probability. Defaults to a model with DEFAULT_WEIGHTS.
+        """
+
+        self.settings = settings
+        self.model = model or WinModel()
+        self.nudges = 0
+        self.seconds = 0.0
+        self.turns = 0
+
+        # the attack points added to each enemy of the battle, by its id
+        self._changes: Dict[int, int] = {}
+
+    def reset(self):
+        """Forget the changes of the last battle."""
+
+        self._changes.clear()
+
+    def adjust(self, battle: "Battle"):
+        """Nudge the active enemy if the win probability strayed from the target.
+
+        Called between turns.
+
+        Parameters
+        ----------
+        battle : Battle
+            The battle.
+        """
+
+        start = time.perf_counter()
+        self.turns += 1
+
+        if not battle.is_game_over():
+            probability = self.model.predict(battle)
+            settings = self.settings
+
+            # the player is losing, weaken the enemy, or winning, strengthen it
+            if probability < settings.target - settings.band:
+                self._nudge(battle.active_enemy_character, -1)
+
+            elif probability > settings.target + settings.band:
+                self._nudge(battle.active_enemy_character, 1)
+
+        self.seconds += time.perf_counter() - start
+
+    def _nudge(self, enemy: "EnemyCharacter", direction: int):
+        # move the attack points change of the enemy a step, within the max change
+        change = self._changes.get(id(enemy), 0)
+        base = enemy.attack_points - change
+        step = max(round(base * self.settings.step), 1)
+        limit = round(base * self.settings.max_change)
+        new_change = min(max(change + direction * step, -limit), limit)
+
+        if new_change == change:
+            return
+
+        enemy.stat_modifiers.remove(MODIFIER_SOURCE)
+
+        if new_change:
+            enemy.stat_modifiers.add("attack_points", new_change, MODIFIER_SOURCE)
+
+        self._changes[id(enemy)] = new_change
+        self.nudges += 1
+
+
+class FeatureRecorder:
+    """Records the win model features of every turn, used as a director by `simulate`.
+
+    Attributes
+    ----------
+    battles : List[List[Tuple[float, ...]]]
+        The features of every turn of every battle.
+    """
+
+    def __init__(self):
+        """Initializes a FeatureRecorder instance."""
+
+        self.battles: List[List[Tuple[float, ...]]] = []
+
+    def reset(self):
+        """Start recording a battle."""
+
+        self.battles.append([])
+
+    def adjust(self, battle: "Battle"):
+        """Record the features of a turn.
+
+        Parameters
+        ----------
+        battle : Battle
+            The battle.
+        """
+
+        if not battle.is_game_over():
+            self.battles[-1].append(win_features(battle))
+
+
+def _default_matchups(max_size: int) -> List[Matchup]:
+    # every team up to a size against every story enemy
+    return [
+        Matchup(team, (enemy,)) for team in all_teams(max_size=max_size) for enemy in enemy_names
+    ]
+
+
+def collect_samples(
+    battles: int, seed: int = 0, max_size: int = 1
+    ) -> List[Tuple[Tuple[float, ...], bool]]:
+    """Simulate battles and pair the features of their turns with their outcome.
+
+    Parameters
+    ----------
+    battles : int
+        The amount of battles of every matchup.
+    seed : int
+        The seed of the first battle. Defaults to 0.
+    max_size : int
+        The max amount of characters in a team. Defaults to 1.
+
+    Returns
+    -------
+    List[Tuple[Tuple[float, ...], bool]] : The features of every turn and whether the
+        player won its battle.
+    """
+
+    samples = []
+
+    for matchup in _default_matchups(max_size):
+        recorder = FeatureRecorder()
+        results = simulate(
+            matchup.team, matchup.enemies, create_policy(matchup.policy),
+            range(seed, seed + battles), matchup.max_turns, director=recorder
+            )
+
+        for turns, result in zip(recorder.battles, results):
+            samples.extend((features, result.player_won) for features in turns)
+
+    return samples
+
+
+def log_loss(model: WinModel, samples: Sequence[Tuple[Sequence[float], bool]]) -> float:
+    """Get the mean log loss of a model.
+
+    Parameters
+    ----------
+    model : WinModel
+        The model.
+    samples : Sequence[Tuple[Sequence[float], bool]]
+        The features of a turn and whether the player won its battle.
+
+    Returns
+    -------
+    float : The mean negative log likelihood of the outcomes.
+    """
+
+    total = 0.0
+
+    for features, player_won in samples:
+        probability = min(max(model.predict_features(features), 1e-9), 1 - 1e-9)
+        total -= math.log(probability if player_won else 1 - probability)
+
+    return total / len(samples)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the difficulty director.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Fit the win model of the difficulty director or evaluate the director."
+        )
+    parser.add_argument(
+        "command", choices=("fit", "evaluate"),
+        help="fit the weights of the win model, or compare win rates with and without the "
+        "director"
+        )
+    parser.add_argument("--battles", type=int, default=400, help="the battles of a matchup")
+    parser.add_argument(
+        "--max-size", type=int, default=2, help="the max amount of characters in a team"
+        )
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument("--target", type=float, default=0.6, help="the target win rate")
+    parser.add_argument("--band", type=float, default=0.15, help="the band around the target")
+    parser.add_argument("--step", type=float, default=0.05, help="the change of a nudge")
+    parser.add_argument(
+        "--max-change", type=float, default=0.3, help="the max change of the attack points"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the difficulty director tools from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    args = build_parser().parse_args(argv)
+
+    if args.command == "fit":
+        samples = collect_samples(args.battles, args.seed, args.max_size)
+        # the battles after the fitted ones check the model
+        held_out = collect_samples(args.battles, args.seed + args.battles, args.max_size)
+        model = WinModel.fit(samples)
+
+        print(f"weights: ({', '.join(f'{weight:.2f}' for weight in model.weights)})")
+        print(
+            f"log loss on {len(held_out)} held out turns: {log_loss(model, held_out):.3f}, "
+            f"default weights {log_loss(WinModel(), held_out):.3f}"
+            )
+        return
+
+    director = DifficultyDirector(
+        DirectorSettings(args.target, args.band, args.step, args.max_change)
+        )
+    seeds = range(args.seed, args.seed + args.battles)
+
+    print(f"{'matchup':<45}{'without':>9}{'with':>9}")
+
+    for matchup in _default_matchups(args.max_size):
+        policy = create_policy(matchup.policy)
+        without = simulate(matchup.team, matchup.enemies, policy, seeds, matchup.max_turns)
+        with_director = simulate(
+            matchup.team, matchup.enemies, policy, seeds, matchup.max_turns, director=director
+            )
+
+        print(
+            f"{str(matchup):<45}"
+            f"{sum(result.player_won for result in without) / len(seeds):>9.1%}"
+            f"{sum(result.player_won for result in with_director) / len(seeds):>9.1%}"
+        )
+
+    print(
+        f"{director.nudges} nudges in {director.turns} turns, "
+        f"{director.seconds / max(director.turns, 1) * 1e6:.1f} microseconds a turn"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,597 @@
+"""Distributes battle simulations to workers over plain TCP sockets.
+
+The coordinator splits the seeds of every matchup into work units and hands them to the
+workers that connect to it. Workers send back the totals of each unit, so only a few
+numbers cross the network per unit. Units of workers that disconnect or stop answering
+are handed out again.
+
+Messages are JSON objects, one per line:
+    worker -> coordinator: {"type": "ready"}
+                           {"type": "result", "unit": 3, "battles": 500, "wins": 250, ...}
+    coordinator -> worker: {"type": "work", "unit": 3, "matchup": [...], "seeds": [0, 500]}
+                           {"type": "wait", "seconds": 0.2}
+                           {"type": "done"}
+
+Usage:
+    python -m combatgame.distributed coordinator --port 5555 --matchup Tank:Viperstrike
+    python -m combatgame.distributed worker --host 10.0.0.2 --port 5555
+    python -m combatgame.distributed local --workers 4 --matchup Tank,Healer:Doomshroud
+"""
+from __future__ import annotations
+import argparse
+import collections
+import json
+import multiprocessing
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .simulation import Aggregate, Matchup, parse_matchup, simulate_matchup
+
+
+# the default port of the coordinator
+DEFAULT_PORT = 5555
+
+
+class WorkUnit(NamedTuple):
+    """A range of seeds of a matchup handed to a worker.
+
+    Attributes
+    ----------
+    matchup : int
+        The index of the matchup.
+    start : int
+        The first seed.
+    stop : int
+        The seed after the last seed.
+    """
+
+    matchup: int
+    start: int
+    stop: int
+
+
+class Progress(NamedTuple):
+    """The progress of the coordinator.
+
+    Attributes
+    ----------
+    done_units : int
+        The amount of units whose results were collected.
+    total_units : int
+        The amount of units.
+    battles : int
+        The amount of battles whose results were collected.
+    workers : int
+        The amount of connected workers.
+    reissued : int
+        The amount of units handed out again after their worker died or timed out.
+    elapsed : float
+        The seconds since the coordinator started.
+    """
+
+    done_units: int
+    total_units: int
+    battles: int
+    workers: int
+    reissued: int
+    elapsed: float
+
+
+def send_message(stream, message: dict):
+    """Write a message as a line of JSON.
+
+    Parameters
+    ----------
+    stream : file object
+        The writable binary stream of the socket.
+    message : dict
+        The message.
+    """
+
+    stream.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    stream.flush()
+
+
+def receive_message(stream) -> Optional[dict]:
+    """Read a message written by `send_message`.
+
+    Parameters
+    ----------
+    stream : file object
+        The readable binary stream of the socket.
+
+    Returns
+    -------
+    dict : The message, None if the connection was closed.
+    """
+
+    line = stream.readline()
+
+    return json.loads(line) if line else None
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    # serves the messages of one worker connection
+
+    def handle(self):
+        coordinator: Coordinator = self.server.coordinator
+        coordinator.connect(self)
+
+        try:
+            while True:
+                message = receive_message(self.rfile)
+
+                if message is None:
+                    return
+
+                if message["type"] == "result":
+                    coordinator.collect(self, message)
+
+                send_message(self.wfile, coordinator.assign(self))
+
+        except (ConnectionError, ValueError):
+            # a broken connection or message is handled like a dead worker
+            return
+
+        finally:
+            coordinator.disconnect(self)
+
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    # one thread per worker connection, all sharing the coordinator
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], coordinator: "Coordinator"):
+        self.coordinator = coordinator
+        super().__init__(address, _WorkerHandler)
+
+
+class Coordinator:
+    """Hands out the seed ranges of matchups to workers and totals their results.
+
+    A unit is leased to one worker at a time. The lease ends when the worker sends the
+    result, disconnects, or doesn't answer within `lease_timeout`, after which the unit is
+    handed out again. The first result of a unit is kept, so the totals are the same as a
+    simulation in one process however the units were distributed.
+
+    Attributes
+    ----------
+    matchups : List[Matchup]
+        The simulated matchups.
+    units : List[WorkUnit]
+        Every unit of work.
+    lease_timeout : float
+        The seconds a worker has to send the result of a unit.
+    aggregates : List[Aggregate]
+        The totals of the collected results of each matchup.
+    """
+
+    def __init__(
+        self,
+        matchups: Sequence[Matchup],
+        battles: int,
+        unit_battles: int = 500,
+        seed: int = 0,
+        lease_timeout: float = 60.0,
+        progress: Optional[Callable[[Progress], None]] = None
+        ):
+        """Initializes a Coordinator instance.
+
+        Parameters
+        ----------
+        matchups : Sequence[Matchup]
+            The matchups to simulate.
+        battles : int
+            The amount of battles of each matchup.
+        unit_battles : int
+            The amount of battles of a unit. Defaults to 500.
+        seed : int
+            The seed of the first battle of each matchup. Defaults to 0.
+        lease_timeout : float
+            The seconds a worker has to send the result of a unit. Defaults to 60.
+        progress : Callable[[Progress], None]
+            Called with the progress after every collected result. Defaults to None.
+        """
+
+        self.matchups = list(matchups)
+        self.units = [
+            WorkUnit(index, start, min(start + unit_battles, seed + battles))
+            for index in range(len(self.matchups))
+            for start in range(seed, seed + battles, unit_battles)
+        ]
+        self.lease_timeout = lease_timeout
+        self.aggregates = [Aggregate() for _ in self.matchups]
+
+        self._progress = progress
+        self._lock = threading.Condition()
+        self._pending: Deque[int] = collections.deque(range(len(self.units)))
+
+        # the connection and deadline of every leased unit
+        self._leases: Dict[int, Tuple[_WorkerHandler, float]] = {}
+        self._done = [False] * len(self.units)
+        self._done_units = 0
+        self._battles = 0
+        self._workers = 0
+        self._reissued = 0
+        self._started = time.perf_counter()
+        self._server: Optional[_CoordinatorServer] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The host and port the coordinator listens on."""
+
+        return self._server.server_address[:2]
+
+    def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        """Listen for workers in a background thread.
+
+        Parameters
+        ----------
+        host : str
+            The interface to listen on. Defaults to "127.0.0.1", "0.0.0.0" for every one.
+        port : int
+            The port to listen on, 0 for any free port. Defaults to DEFAULT_PORT.
+        """
+
+        self._started = time.perf_counter()
+        self._server = _CoordinatorServer((host, port), self)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the results of every unit are collected.
+
+        Parameters
+        ----------
+        timeout : float
+            The max seconds to wait. Defaults to None, no limit.
+
+        Returns
+        -------
+        bool : True if every result was collected.
+        """
+
+        with self._lock:
+            return self._lock.wait_for(self.is_done, timeout)
+
+    def stop(self):
+        """Stop listening for workers."""
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def is_done(self) -> bool:
+        """Check whether the results of every unit were collected.
+
+        Returns
+        -------
+        bool : True if every result was collected.
+        """
+
+        return self._done_units == len(self.units)
+
+    def progress(self) -> Progress:
+        """Get the progress of the coordinator.
+
+        Returns
+        -------
+        Progress : The progress.
+        """
+
+        return Progress(
+            self._done_units, len(self.units), self._battles, self._workers, self._reissued,
+            time.perf_counter() - self._started
+            )
+
+    def connect(self, worker: _WorkerHandler):
+        """Count a connected worker.
+
+        Parameters
+        ----------
+        worker : _WorkerHandler
+            The connection of the worker.
+        """
+
+        with self._lock:
+            self._workers += 1
+
+    def disconnect(self, worker: _WorkerHandler):
+        """Hand out the units of a disconnected worker again.
+
+        Parameters
+        ----------
+        worker : _WorkerHandler
+            The connection of the worker.
+        """
+
+        with self._lock:
+            self._workers -= 1
+
+            for unit, (holder, _) in list(self._leases.items()):
+                if holder is worker:
+                    self._reissue(unit)
+
+    def assign(self, worker: _WorkerHandler) -> dict:
+        """Lease the next unit to a worker.
+
+        Parameters
+        ----------
+        worker : _WorkerHandler
+            The connection of the worker.
+
+        Returns
+        -------
+        dict : The work message, or a wait or done message if there is no unit to hand out.
+        """
+
+        with self._lock:
+            if self.is_done():
+                return {"type": "done"}
+
+            # units of workers that stopped answering are handed out again
+            now = time.perf_counter()
+
+            for unit, (_, deadline) in list(self._leases.items()):
+                if deadline < now:
+                    self._reissue(unit)
+
+            while self._pending and self._done[self._pending[0]]:
+                self._pending.popleft()
+
+            if not self._pending:
+                return {"type": "wait", "seconds": 0.2}
+
+            unit = self._pending.popleft()
+            self._leases[unit] = (worker, now + self.lease_timeout)
+
+        matchup_index, start, stop = self.units[unit]
+
+        return {
+            "type": "work",
+            "unit": unit,
+            "matchup": list(self.matchups[matchup_index]),
+            "seeds": [start, stop],
+        }
+
+    def collect(self, worker: _WorkerHandler, message: dict):
+        """Add the result of a unit to the totals of its matchup.
+
+        Parameters
+        ----------
+        worker : _WorkerHandler
+            The connection of the worker.
+        message : dict
+            The result message.
+        """
+
+        unit = message["unit"]
+
+        with self._lock:
+            self._leases.pop(unit, None)
+
+            # a unit handed out again can come back twice, the first result is kept
+            if self._done[unit]:
+                return
+
+            aggregate = Aggregate(message["battles"], message["wins"], message["turns"])
+            matchup_index = self.units[unit].matchup
+
+            self.aggregates[matchup_index] = self.aggregates[matchup_index].combine(aggregate)
+            self._done[unit] = True
+            self._done_units += 1
+            self._battles += aggregate.battles
+            progress = self.progress()
+
+            self._lock.notify_all()
+
+        if self._progress is not None:
+            self._progress(progress)
+
+    def _reissue(self, unit: int):
+        # put a leased unit back at the front of the queue, the lock must be held
+        del self._leases[unit]
+
+        if not self._done[unit]:
+            self._pending.appendleft(unit)
+            self._reissued += 1
+
+
+def run_worker(
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    retry_seconds: float = 10.0
+    ) -> int:
+    """Simulate the units of a coordinator until it has no more work.
+
+    Parameters
+    ----------
+    host : str
+        The host of the coordinator. Defaults to "127.0.0.1".
+    port : int
+        The port of the coordinator. Defaults to DEFAULT_PORT.
+    retry_seconds : float
+        The seconds to keep trying to connect, for workers started before the coordinator.
+        Defaults to 10.
+
+    Returns
+    -------
+    int : The amount of units simulated.
+    """
+
+    deadline = time.perf_counter() + retry_seconds
+
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+
+        except ConnectionRefusedError:
+            if time.perf_counter() > deadline:
+                raise
+
+            time.sleep(0.1)
+
+    units = 0
+
+    with connection, connection.makefile("rwb") as stream:
+        send_message(stream, {"type": "ready"})
+
+        while True:
+            message = receive_message(stream)
+
+            if message is None or message["type"] == "done":
+                return units
+
+            if message["type"] == "wait":
+                time.sleep(message["seconds"])
+                send_message(stream, {"type": "ready"})
+                continue
+
+            team, enemies, policy, max_turns = message["matchup"]
+            aggregate = simulate_matchup(
+                Matchup(tuple(team), tuple(enemies), policy, max_turns),
+                range(*message["seeds"])
+                )
+            send_message(stream, {"type": "result", "unit": message["unit"], **aggregate._asdict()})
+            units += 1
+
+
+def print_progress(progress: Progress):
+    """Print the progress of a coordinator, at most once a second.
+
+    Parameters
+    ----------
+    progress : Progress
+        The progress.
+    """
+
+    now = time.perf_counter()
+
+    if now - print_progress.last < 1 and progress.done_units < progress.total_units:
+        return
+
+    print_progress.last = now
+    print(
+        f"{progress.done_units}/{progress.total_units} units, {progress.battles} battles "
+        f"({progress.battles / max(progress.elapsed, 1e-9):.0f}/s), {progress.workers} "
+        f"workers, {progress.reissued} reissued",
+        flush=True
+        )
+
+
+print_progress.last = 0.0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the coordinator and workers.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Distribute battle simulations over TCP.")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator_parser = argparse.ArgumentParser(add_help=False)
+    coordinator_parser.add_argument(
+        "--matchup", action="append", type=parse_matchup,
+        help="a matchup as team:enemies[:policy], e.g. Tank,Healer:Viperstrike:greedy"
+        )
+    coordinator_parser.add_argument(
+        "--battles", type=int, default=10_000, help="the amount of battles of each matchup"
+        )
+    coordinator_parser.add_argument(
+        "--unit-battles", type=int, default=500, help="the amount of battles of a work unit"
+        )
+    coordinator_parser.add_argument(
+        "--seed", type=int, default=0, help="the seed of the first battle"
+        )
+    coordinator_parser.add_argument(
+        "--lease-timeout", type=float, default=60.0,
+        help="the seconds a worker has to send a result before the unit is handed out again"
+        )
+
+    coordinator_mode = modes.add_parser(
+        "coordinator", parents=[coordinator_parser], help="hand out work to workers"
+        )
+    coordinator_mode.add_argument("--host", default="0.0.0.0", help="the interface to listen on")
+    coordinator_mode.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port")
+
+    worker_mode = modes.add_parser("worker", help="simulate the work of a coordinator")
+    worker_mode.add_argument("--host", default="127.0.0.1", help="the host of the coordinator")
+    worker_mode.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port")
+
+    local_mode = modes.add_parser(
+        "local", parents=[coordinator_parser],
+        help="run a coordinator and worker processes on this machine"
+        )
+    local_mode.add_argument(
+        "--workers", type=int, default=multiprocessing.cpu_count(),
+        help="the amount of worker processes"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run a coordinator, a worker or both from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    args = build_parser().parse_args(argv)
+
+    if args.mode == "worker":
+        units = run_worker(args.host, args.port)
+        print(f"Simulated {units} units.")
+        return
+
+    matchups = args.matchup or [Matchup(("Tank", "MirrorMage", "Healer"), ("Viperstrike",))]
+    coordinator = Coordinator(
+        matchups, args.battles, args.unit_battles, args.seed, args.lease_timeout,
+        print_progress
+        )
+    workers: List[multiprocessing.Process] = []
+
+    if args.mode == "local":
+        coordinator.start("127.0.0.1", 0)
+        workers = [
+            multiprocessing.Process(target=run_worker, args=coordinator.address, daemon=True)
+            for _ in range(args.workers)
+            ]
+
+        for worker in workers:
+            worker.start()
+
+    else:
+        coordinator.start(args.host, args.port)
+        print(f"Listening on {args.host}:{args.port}")
+
+    try:
+        coordinator.wait()
+
+    finally:
+        coordinator.stop()
+
+        for worker in workers:
+            worker.join(1)
+
+    for matchup, aggregate in zip(coordinator.matchups, coordinator.aggregates):
+        print(
+            f"{matchup}: won {aggregate.wins}/{aggregate.battles} battles "
+            f"({aggregate.win_rate:.1%}), {aggregate.mean_turns:.1f} turns on average."
+            )
+
+
+if __name__ == "__main__":
+    main()
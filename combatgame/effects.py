@@ -0,0 +1,346 @@
+"""Engine for storing and resolving the active effects on characters."""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple, Type
+
+if TYPE_CHECKING:
+    from .characters import BaseCharacter
+
+
+class Stacking:
+    """Container class for the stacking rules of effects.
+
+    Attributes
+    ----------
+    REPLACE : str
+        A new effect replaces the active effect of the same type.
+    REFRESH : str
+        The active effect keeps its slot but has its uses and duration refreshed.
+    STACK : str
+        The uses of the new effect are added to the active effect, up to `max_stacks`.
+    IGNORE : str
+        The new effect is ignored while an effect of the same type is active.
+    """
+
+    REPLACE = "replace"
+    REFRESH = "refresh"
+    STACK = "stack"
+    IGNORE = "ignore"
+
+
+class BaseEffect:
+    """Represents an effect that can be active on a character.
+
+    Every subclass gets its own bit `flag`, so an `ActiveEffects` can check whether
+    an effect type is active with a single bitwise and.
+
+    Attributes
+    ----------
+    name : str
+        The name of the effect.
+    description : str
+        The description of the effect.
+    belongs_to : str
+        The skill the effect belong to.
+    use_count : int
+        The amount of uses allowed.
+    duration : int
+        The amount of turns before the effect expires, None if it only expires when used up.
+    flag : int
+        The bit flag of the effect type.
+    priority : int
+        The order the effect is resolved on hit, lower goes first.
+    stacking : str
+        The stacking rule of the effect, one of the `Stacking` values.
+    max_stacks : int
+        The max amount of uses the effect can stack up to.
+    """
+
+    flag: int = 0
+    priority: int = 0
+    stacking: str = Stacking.REFRESH
+    max_stacks: int = 99
+
+    # the next bit flag to assign to a subclass
+    _next_flag = 1
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # assign a unique bit flag to every effect type
+        cls.flag = BaseEffect._next_flag
+        BaseEffect._next_flag <<= 1
+
+    def __init__(self, use_count: int = 1, duration: Optional[int] = None):
+        """Initializes an effect instance.
+
+        Parameters
+        ----------
+        use_count : int
+            The amount of uses allowed. Defaults to 1.
+        duration : int
+            The amount of turns before the effect expires. Defaults to None.
+        """
+
+        self.name = ""
+        self.description = ""
+        self.belongs_to = ""
+        self.use_count = use_count
+        self.duration = duration
+
+    def on_hit(self, attacker: "BaseCharacter", target: "BaseCharacter") -> Optional[str]:
+        """Hook that runs when the character with this effect is hit by a basic attack.
+
+        Parameters
+        ----------
+        attacker : BaseCharacter
+            The character that is attacking.
+        target : BaseCharacter
+            The character with this effect.
+
+        Returns
+        -------
+        log : str
+            The battle log if the effect intercepted the attack, None otherwise.
+        """
+
+        return None
+
+    def stack(self, other: "BaseEffect"):
+        """Combine another effect of the same type into this effect.
+
+        Parameters
+        ----------
+        other : BaseEffect
+            The newly applied effect.
+        """
+
+        if self.stacking == Stacking.STACK:
+            self.use_count = min(self.use_count + other.use_count, self.max_stacks)
+
+        # Stacking.REFRESH
+        else:
+            self.use_count = max(self.use_count, other.use_count)
+
+        # the newest duration always wins
+        self.duration = other.duration
+
+    def __str__(self):
+        if self.use_count > 1:
+            return f"{self.name} x{self.use_count}"
+
+        return self.name
+
+
+# checks if an effect type has its own on_hit hook
+def _has_hit_hook(effect_type: Type[BaseEffect]) -> bool:
+    return effect_type.on_hit is not BaseEffect.on_hit
+
+
+class ActiveEffects:
+    """The active effects of a character, stored in one slot per effect type.
+
+    Looking up an effect is a single dictionary or bit flag check, and attacks only
+    go through the effects with an on hit hook, ordered by priority.
+
+    Attributes
+    ----------
+    flags : int
+        The bit flags of every active effect type.
+    """
+
+    __slots__ = ("flags", "_slots", "_hit_effects")
+
+    def __init__(self):
+        self.flags = 0
+
+        # one active effect for each effect type
+        self._slots: Dict[Type[BaseEffect], BaseEffect] = {}
+
+        # active effects with an on hit hook, sorted by priority
+        self._hit_effects: Tuple[BaseEffect, ...] = ()
+
+    def __iter__(self) -> Iterator[BaseEffect]:
+        return iter(self._slots.values())
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, effect_type: Type[BaseEffect]):
+        return effect_type.flag & self.flags != 0
+
+    def get(self, effect_type: Type[BaseEffect]) -> Optional[BaseEffect]:
+        """Get the active effect of an effect type.
+
+        Parameters
+        ----------
+        effect_type : Type[BaseEffect]
+            The effect class to look for.
+
+        Returns
+        -------
+        BaseEffect : The active effect if there is one, None otherwise.
+        """
+
+        return self._slots.get(effect_type)
+
+    def add(self, effect: BaseEffect) -> BaseEffect:
+        """Activate an effect following its stacking rule.
+
+        Parameters
+        ----------
+        effect : BaseEffect
+            The effect to activate.
+
+        Returns
+        -------
+        BaseEffect : The effect that is active in the slot after adding.
+        """
+
+        effect_type = type(effect)
+        active_effect = self._slots.get(effect_type)
+
+        # first effect of its type
+        if active_effect is None or effect.stacking == Stacking.REPLACE:
+            self._slots[effect_type] = effect
+            self._update_index()
+            return effect
+
+        if effect.stacking != Stacking.IGNORE:
+            active_effect.stack(effect)
+
+        return active_effect
+
+    def remove(self, effect_type: Type[BaseEffect]):
+        """Remove the active effect of an effect type if there is one.
+
+        Parameters
+        ----------
+        effect_type : Type[BaseEffect]
+            The effect class to remove.
+        """
+
+        if self._slots.pop(effect_type, None) is not None:
+            self._update_index()
+
+    def clear(self):
+        """Remove every active effect."""
+
+        self._slots.clear()
+        self._update_index()
+
+    def tick(self):
+        """Count down the duration of timed effects and remove the expired ones.
+
+        Should be called once per turn.
+        """
+
+        expired = []
+
+        for effect_type, effect in self._slots.items():
+            if effect.duration is None:
+                continue
+
+            effect.duration -= 1
+
+            if effect.duration <= 0:
+                expired.append(effect_type)
+
+        # remove expired effects after the sweep
+        for effect_type in expired:
+            del self._slots[effect_type]
+
+        if expired:
+            self._update_index()
+
+    def snapshot(self) -> Tuple[Tuple[BaseEffect, int, Optional[int]], ...]:
+        """Capture the active effects, see `restore`.
+
+        The effect objects are shared with the snapshot, only their use count and duration
+        change while they are active, so only those are copied.
+
+        Returns
+        -------
+        Tuple[Tuple[BaseEffect, int, Optional[int]], ...] : The effect, use count and
+            duration of every active effect.
+        """
+
+        if not self._slots:
+            return ()
+
+        return tuple([
+            (effect, effect.use_count, effect.duration) for effect in self._slots.values()
+            ])
+
+    def restore(self, snapshot: Tuple[Tuple[BaseEffect, int, Optional[int]], ...]):
+        """Restore the active effects captured by `snapshot` in place.
+
+        Parameters
+        ----------
+        snapshot : Tuple[Tuple[BaseEffect, int, Optional[int]], ...]
+            The snapshot of the active effects.
+        """
+
+        slots = self._slots
+
+        if not snapshot and not slots:
+            return
+
+        # the slots only have to be rebuilt if effects were added or removed since
+        rebuild = len(slots) != len(snapshot)
+
+        for effect, use_count, duration in snapshot:
+            effect.use_count = use_count
+            effect.duration = duration
+
+            if not rebuild and slots.get(type(effect)) is not effect:
+                rebuild = True
+
+        if rebuild:
+            self._slots = {type(effect): effect for effect, _, _ in snapshot}
+            self._update_index()
+
+    def resolve_hit(self, attacker: "BaseCharacter", target: "BaseCharacter") -> Optional[str]:
+        """Let the on hit effects intercept an incoming basic attack.
+
+        The first effect that intercepts the attack uses up one of its uses.
+
+        Parameters
+        ----------
+        attacker : BaseCharacter
+            The character that is attacking.
+        target : BaseCharacter
+            The character with these active effects.
+
+        Returns
+        -------
+        log : str
+            The battle log if an effect intercepted the attack, None otherwise.
+        """
+
+        for effect in self._hit_effects:
+            log = effect.on_hit(attacker, target)
+
+            if log is None:
+                continue
+
+            # reduce the use count of the effect and remove it if its used up
+            effect.use_count -= 1
+
+            if effect.use_count <= 0:
+                self.remove(type(effect))
+
+            return log
+
+        return None
+
+    def _update_index(self):
+        # rebuild the bit flags and on hit order, only runs when effects are added or removed
+        self.flags = 0
+
+        for effect_type in self._slots:
+            self.flags |= effect_type.flag
+
+        self._hit_effects = tuple(sorted(
+            (effect for effect_type, effect in self._slots.items() if _has_hit_hook(effect_type)),
+            key=lambda effect: effect.priority
+            ))
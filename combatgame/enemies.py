@@ -1,11 +1,18 @@
 """Classes implementation for enemies with their attributes."""
+import bisect
+import heapq
 import os
 from functools import partial
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 
 from .characters import BaseCharacter
-from .resources.ascii_art import ascii_arts
+from .resources.ascii_art import ascii_arts, fallback_enemy_art
+from .stats import critical_chance
 from .utils.utils import csv_to_dict
 
+if TYPE_CHECKING:
+    from .search import MonteCarloAI
+
 
 # get directory of this file
 this_file_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +26,72 @@ enemy_attributes = csv_to_dict(enemy_attributes_path, "name")
 # gets all available enemy names
 enemy_names = enemy_attributes.keys()
 
+# precompiled attributes of each enemy, built on first use
+enemy_templates: Dict[str, dict] = {}
+
+
+def get_enemy_template(name: str) -> dict:
+    """Get the attributes of an enemy converted from enemy_attributes.csv.
+
+    The attributes are converted once per enemy and copied onto enemy characters.
+
+    Parameters
+    ----------
+    name : str
+        The name of the enemy.
+
+    Returns
+    -------
+    dict : The attribute names and values of the enemy.
+    """
+
+    template = enemy_templates.get(name)
+
+    if template is None:
+        attr = enemy_attributes[name]
+        template = enemy_templates[name] = {
+            "max_health_points": int(attr["HP"]),
+            "max_defense_points": int(attr["DP"]),
+            "attack_points": int(attr["AP"]),
+            "speed_points": int(attr["SP"]),
+            "luck": int(attr["Luck"]),
+            "critical_chance": critical_chance(int(attr["Luck"])),
+            "ascii_art": enemy_ascii_art(name),
+            "health_points": int(attr["HP"]),
+            "defense_points": int(attr["DP"]),
+        }
+
+    return template
+
+
+def enemy_ascii_art(name: str) -> List[str]:
+    """Get the ASCII art of an enemy.
+
+    Enemies without their own art, like generated ones, use the art of the hand-made enemy
+    in their name, "Frost Mistwalker" looks like Mistwalker, or else a generic art.
+
+    Parameters
+    ----------
+    name : str
+        The name of the enemy.
+
+    Returns
+    -------
+    List[str] : The lines of the art.
+    """
+
+    art = ascii_arts.get(name)
+
+    if art is not None:
+        return art
+
+    # the last word is usually the enemy, the others describe it
+    for word in reversed(name.split()):
+        if word in ascii_arts:
+            return ascii_arts[word]
+
+    return fallback_enemy_art
+
 
 class EnemyCharacter(BaseCharacter):
     """Represents an enemy character.
@@ -35,8 +108,12 @@ class EnemyCharacter(BaseCharacter):
     defense_points : int
     speed_points : int
     luck : int
+    ai : MonteCarloAI
+        Selects the actions of the enemy instead of the rules, None to use the rules.
     """
 
+    ai: Optional["MonteCarloAI"] = None
+
     def __init__(self, name):
         # initialize parent class attributes
         super().__init__(name)
@@ -47,16 +124,54 @@ class EnemyCharacter(BaseCharacter):
         del self.active_effects
 
         # initialize attributes
-        attr = enemy_attributes[name]
-        self.max_health_points: int = int(attr["HP"])
-        self.max_defense_points: int = int(attr["DP"])
-        self.attack_points: int = int(attr["AP"])
-        self.speed_points: int = int(attr["SP"])
-        self.luck: int = int(attr["Luck"])
-        self.ascii_art = ascii_arts[name]
+        self.restore_stats()
+
+    def restore_stats(self):
+        """Restore the statistics of the enemy back to its default values."""
+
+        # drop buffs since the attributes are reassigned to their base values
+        self.stat_modifiers.reset()
+
+        # copy the precompiled attributes of the enemy
+        self.__dict__.update(get_enemy_template(self.name))
+
+    def reset(self):
+        """Reset the enemy to the state it was created in, so it can be reused.
+
+        The AI is dropped too, the next user of a pooled enemy gives it its own.
+        """
+
+        super().reset()
+        self.ai = None
+
+    def snapshot(self) -> tuple:
+        """Capture the stats that change in combat, see `restore_snapshot`.
+
+        Returns
+        -------
+        tuple : The health, defense, speed and attack points, luck and stat modifiers of
+            the enemy.
+        """
+
+        return (
+            self.health_points, self.defense_points, self.speed_points, self.attack_points,
+            self.luck, self.stat_modifiers.snapshot()
+            )
+
+    def restore_snapshot(self, snapshot: tuple):
+        """Restore the stats captured by `snapshot` in place.
 
-        self.health_points: int = self.max_health_points
-        self.defense_points: int = self.max_defense_points
+        Parameters
+        ----------
+        snapshot : tuple
+            The snapshot of the enemy.
+        """
+
+        self.health_points, self.defense_points, self.speed_points, self.attack_points, \
+            self.luck, modifiers = snapshot
+
+        self.critical_chance = critical_chance(self.luck)
+        self.stat_modifiers.restore(modifiers)
 
     def defend(self):
         """Special method defend for enemy characters only.
@@ -72,7 +187,28 @@ class EnemyCharacter(BaseCharacter):
 
         return f"{self.name} restored its defense points!"
 
-    def select_action(self, active_player: BaseCharacter):
+    def select_action(
+        self,
+        active_player: BaseCharacter,
+        player_characters: Sequence[BaseCharacter] = ()
+        ):
+        """Select the best action, with the enemy's AI if it has one or else the rules.
+
+        Parameters
+        ----------
+        active_player : BaseCharacter
+            The active player character.
+        player_characters : Sequence[BaseCharacter]
+            Every player character, for the AI to plan the rest of the battle. Defaults to
+            only the active player character.
+        """
+
+        if self.ai is not None:
+            return self.ai.select_action(self, active_player, player_characters)
+
+        return self.select_rule_action(active_player)
+
+    def select_rule_action(self, active_player: BaseCharacter):
         """Select the best action based on a rule-based approach.
 
         Parameters
@@ -91,3 +227,338 @@ class EnemyCharacter(BaseCharacter):
             return self.defend
 
         return partial(self.basic_attack, active_player)
+
+
+class EnemyRoster:
+    """Index of the enemies of enemy_attributes.csv for selecting encounters by stats and tags.
+
+    Every stat has the enemies sorted by its value, so range and nearest queries bisect
+    rather than scan, and every tag has the set of its enemies. The tags of an enemy are
+    those of an optional "tags" column, separated by ";", and its tier as "tier:N", from
+    an optional "tier" column or else the quartile of its power, (HP + DP) * AP, in the
+    roster.
+
+    The index is built on the first query and dropped by `clear`, so it follows the
+    table when it's reloaded.
+
+    Attributes
+    ----------
+    STATS : tuple of str
+        The stat columns that are indexed.
+    TIERS : int
+        The amount of tiers of enemies without a "tier" column.
+    """
+
+    STATS = ("HP", "AP", "DP", "SP", "Luck")
+    TIERS = 4
+
+    # nearest queries with at most this many candidates rank them rather than walking out
+    # from the value
+    SMALL_SELECTION = 256
+
+    def __init__(self, attributes: Dict[str, dict] = enemy_attributes):
+        """Initializes an EnemyRoster instance.
+
+        Parameters
+        ----------
+        attributes : Dict[str, dict]
+            The rows of the enemies by name. Defaults to enemy_attributes.
+        """
+
+        self.attributes = attributes
+
+        # the stats of every enemy, the value of every enemy by stat, the sorted values and
+        # names of every stat and the enemies of every tag, None until the first query
+        self._stats: Optional[Dict[str, Dict[str, int]]] = None
+        self._columns: Dict[str, Dict[str, int]] = {}
+        self._values: Dict[str, List[int]] = {}
+        self._names: Dict[str, List[str]] = {}
+        self._tags: Dict[str, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def clear(self):
+        """Drop the index, it's built again from the table on the next query."""
+
+        self._stats = None
+        self._columns = {}
+        self._values = {}
+        self._names = {}
+        self._tags = {}
+
+    def _index(self) -> Dict[str, Dict[str, int]]:
+        # build the index on first use
+        if self._stats is None:
+            self._build()
+
+        return self._stats
+
+    def _build(self):
+        stats = {
+            name: {stat: int(attr[stat]) for stat in self.STATS}
+            for name, attr in self.attributes.items()
+        }
+
+        for stat in self.STATS:
+            self._columns[stat] = {name: enemy_stats[stat] for name, enemy_stats in stats.items()}
+            pairs = sorted((enemy_stats[stat], name) for name, enemy_stats in stats.items())
+            self._values[stat] = [value for value, _ in pairs]
+            self._names[stat] = [name for _, name in pairs]
+
+        # the power rank of every enemy, for the tiers of enemies without a tier column
+        ranked = sorted(
+            stats, key=lambda name: (stats[name]["HP"] + stats[name]["DP"]) * stats[name]["AP"]
+            )
+        tags: Dict[str, set] = {}
+
+        for rank, name in enumerate(ranked):
+            attr = self.attributes[name]
+            tier = attr.get("tier") or rank * self.TIERS // len(ranked) + 1
+            enemy_tags = [f"tier:{tier}"]
+            enemy_tags.extend(tag.strip() for tag in (attr.get("tags") or "").split(";"))
+
+            for tag in enemy_tags:
+                if tag:
+                    tags.setdefault(tag, set()).add(name)
+
+        self._tags = {tag: frozenset(names) for tag, names in tags.items()}
+        self._stats = stats
+
+    def stat(self, name: str, stat: str) -> int:
+        """Get a stat of an enemy.
+
+        Parameters
+        ----------
+        name : str
+            The name of the enemy.
+        stat : str
+            The stat column, e.g. "HP".
+
+        Returns
+        -------
+        int : The value of the stat.
+        """
+
+        return self._index()[name][stat]
+
+    def tagged(self, tag: str) -> FrozenSet[str]:
+        """Get the enemies with a tag.
+
+        Parameters
+        ----------
+        tag : str
+            The tag, e.g. "tier:2".
+
+        Returns
+        -------
+        FrozenSet[str] : The names of the enemies.
+        """
+
+        self._index()
+
+        return self._tags.get(tag, frozenset())
+
+    def tags(self) -> List[str]:
+        """Get every tag of the roster.
+
+        Returns
+        -------
+        List[str] : The tags, sorted.
+        """
+
+        self._index()
+
+        return sorted(self._tags)
+
+    def _bounds(self, stat: str, low: float, high: float) -> Tuple[int, int]:
+        # the slice of the sorted values of a stat within low and high
+        values = self._values[stat]
+
+        return bisect.bisect_left(values, low), bisect.bisect_right(values, high)
+
+    def in_range(self, stat: str, low: float, high: float) -> List[str]:
+        """Get the enemies with a stat within a range.
+
+        Parameters
+        ----------
+        stat : str
+            The stat column, e.g. "SP".
+        low : float
+            The min value, included.
+        high : float
+            The max value, included.
+
+        Returns
+        -------
+        List[str] : The names of the enemies, by the value of the stat.
+        """
+
+        self._index()
+        start, stop = self._bounds(stat, low, high)
+
+        return self._names[stat][start:stop]
+
+    def _filters(
+        self, ranges: Dict[str, Tuple[float, float]], tags: Iterable[str]
+        ) -> Tuple[List[FrozenSet[str]], Dict[str, Tuple[int, int]]]:
+        # the enemies of every tag and the slice of the sorted values within every range
+        self._index()
+        tag_sets = [self.tagged(tag) for tag in tags]
+        bounds = {stat: self._bounds(stat, low, high) for stat, (low, high) in ranges.items()}
+
+        return tag_sets, bounds
+
+    def _candidates(
+        self,
+        ranges: Dict[str, Tuple[float, float]],
+        tag_sets: List[FrozenSet[str]],
+        bounds: Dict[str, Tuple[int, int]]
+        ) -> set:
+        # the enemies within every range with every tag, starting from the most selective
+        # filter so the others check the fewest enemies
+        sizes = [(len(tag_set), index, "") for index, tag_set in enumerate(tag_sets)]
+        sizes.extend((stop - start, 0, stat) for stat, (start, stop) in bounds.items())
+        _, index, stat = min(sizes)
+
+        if stat:
+            start, stop = bounds[stat]
+            candidates = set(self._names[stat][start:stop])
+
+        else:
+            candidates = set(tag_sets[index])
+
+        for tag_set in tag_sets:
+            candidates.intersection_update(tag_set)
+
+        for stat, (low, high) in ranges.items():
+            column = self._columns[stat]
+            candidates = {name for name in candidates if low <= column[name] <= high}
+
+        return candidates
+
+    def select(
+        self, ranges: Optional[Dict[str, Tuple[float, float]]] = None, tags: Iterable[str] = ()
+        ) -> List[str]:
+        """Get the enemies with stats within ranges and every tag.
+
+        Only the enemies of the most selective filter are checked against the others.
+
+        Parameters
+        ----------
+        ranges : Dict[str, Tuple[float, float]]
+            The min and max value of stats, included. Defaults to None, any stats.
+        tags : Iterable[str]
+            The tags the enemies must have. Defaults to none.
+
+        Returns
+        -------
+        List[str] : The names of the enemies, sorted.
+        """
+
+        ranges = ranges or {}
+        tag_sets, bounds = self._filters(ranges, tags)
+
+        if not tag_sets and not bounds:
+            return sorted(self._index())
+
+        return sorted(self._candidates(ranges, tag_sets, bounds))
+
+    def nearest(
+        self,
+        stat: str,
+        value: float,
+        count: int = 1,
+        ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+        tags: Iterable[str] = ()
+        ) -> List[str]:
+        """Get the enemies with a stat nearest to a value, like HP near the damage of a team.
+
+        Parameters
+        ----------
+        stat : str
+            The stat column, e.g. "HP".
+        value : float
+            The value the stat should be near.
+        count : int
+            The max amount of enemies. Defaults to 1.
+        ranges : Dict[str, Tuple[float, float]]
+            The min and max value of other stats, included. Defaults to None, any stats.
+        tags : Iterable[str]
+            The tags the enemies must have. Defaults to none.
+
+        Returns
+        -------
+        List[str] : The names of the enemies, nearest first.
+        """
+
+        ranges = ranges or {}
+        tag_sets, bounds = self._filters(ranges, tags)
+        size = len(self._index())
+        matches = None
+
+        if tag_sets or bounds:
+            sizes = [len(tag_set) for tag_set in tag_sets]
+            sizes.extend(stop - start for start, stop in bounds.values())
+
+            # the matching enemies if the filters are independent, walking out from the
+            # value checks about size / matching enemies of them for each one found,
+            # collecting the candidates costs about the smallest filter
+            expected = size
+            for filter_size in sizes:
+                expected *= filter_size / size
+
+            if count * size / max(expected, 1e-9) > min(sizes) / 4:
+                candidates = self._candidates(ranges, tag_sets, bounds)
+
+                # few candidates are ranked directly
+                if len(candidates) <= self.SMALL_SELECTION:
+                    column = self._columns[stat]
+
+                    return heapq.nsmallest(
+                        count, candidates, key=lambda name: (abs(column[name] - value), name)
+                        )
+
+                matches = candidates.__contains__
+
+            else:
+                columns = self._columns
+
+                def matches(name: str) -> bool:
+                    return all(
+                        low <= columns[range_stat][name] <= high
+                        for range_stat, (low, high) in ranges.items()
+                        ) and all(name in tag_set for tag_set in tag_sets)
+
+        # the sorted values are walked out from the value in both directions until enough
+        # enemies match, and on past the enemies as far as the last one so its ties are
+        # broken by name like the ranked candidates
+        values = self._values[stat]
+        names = self._names[stat]
+        below = bisect.bisect_left(values, value) - 1
+        above = below + 1
+        found: List[Tuple[float, str]] = []
+
+        while below >= 0 or above < size:
+            if above >= size or (below >= 0 and value - values[below] <= values[above] - value):
+                distance = abs(values[below] - value)
+                name = names[below]
+                below -= 1
+
+            else:
+                distance = abs(values[above] - value)
+                name = names[above]
+                above += 1
+
+            if len(found) >= count and (not found or distance > found[count - 1][0]):
+                break
+
+            if matches is None or matches(name):
+                found.append((distance, name))
+
+        return [name for _, name in sorted(found)[:count]]
+
+
+# lazily built index of the enemies of enemy_attributes.csv, unrelated to the alive
+# rosters of the battles
+enemy_index = EnemyRoster()
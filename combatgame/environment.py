@@ -0,0 +1,500 @@
+"""Step based environments for training and evaluating automated players."""
+from __future__ import annotations
+import random
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from .battle import Action, Battle
+from .characters import BaseCharacter, job_classes
+from .enemies import EnemyCharacter
+from .pooling import character_pool
+from .skills import SkillEffects
+
+
+class CombatEnv:
+    """A combat that is played one player action at a time.
+
+    `reset` starts a combat and `step` applies an action of the active player character,
+    then plays the enemy turns until it's the player's turn again or the combat is over.
+    Every environment has its own random number generator, so environments are
+    independent of each other and a seed always replays the same combat.
+
+    Actions are the `Action` values, up to `ACTION_COUNT`. Actions the active player
+    character can't take (see `legal_actions`) are rejected without taking a turn.
+
+    Observations are flat arrays of `OBSERVATION_SIZE` floats:
+
+    - `MAX_PLAYERS` player slots of `PLAYER_FEATURES` followed by the use count of
+      every type in `EFFECT_TYPES`
+    - `MAX_ENEMIES` enemy slots of `ENEMY_FEATURES`
+    - the turn count
+
+    Unused slots are zero.
+
+    Attributes
+    ----------
+    MAX_PLAYERS : int
+        The max amount of player characters in a team.
+    MAX_ENEMIES : int
+        The max amount of enemies in a combat.
+    MAX_TURNS : int
+        The amount of turns before a combat is stopped as a loss.
+    INVALID_ACTION_REWARD : float
+        The reward for an action that can't be taken.
+    battle : Battle
+        The current combat, None before the first reset.
+    rng : random.Random
+        The random number generator of the environment.
+    done : bool
+        Whether the current combat is over.
+    """
+
+    MAX_PLAYERS = 4
+    MAX_ENEMIES = 4
+    MAX_TURNS = 500
+
+    ACTION_COUNT = Action.count(MAX_PLAYERS)
+    INVALID_ACTION_REWARD = -0.01
+
+    PLAYER_FEATURES = (
+        "health_points", "max_health_points", "defense_points", "max_defense_points",
+        "attack_points", "speed_points", "magic_points", "luck"
+        )
+    ENEMY_FEATURES = (
+        "health_points", "max_health_points", "defense_points", "max_defense_points",
+        "attack_points", "speed_points", "luck"
+        )
+    EFFECT_TYPES = (SkillEffects.Invincible, SkillEffects.ReflectiveShield)
+
+    # features plus the alive and active flags
+    PLAYER_SLOT_SIZE = len(PLAYER_FEATURES) + 2 + len(EFFECT_TYPES)
+    ENEMY_SLOT_SIZE = len(ENEMY_FEATURES) + 2
+
+    OBSERVATION_SIZE = MAX_PLAYERS * PLAYER_SLOT_SIZE + MAX_ENEMIES * ENEMY_SLOT_SIZE + 1
+
+    def __init__(self):
+        """Initializes a CombatEnv instance, `reset` has to be called before `step`."""
+
+        self.battle: Optional[Battle] = None
+        self.rng = random.Random()
+        self.done = True
+
+        self._team: Tuple[str, ...] = ()
+        self._enemy_names: Tuple[str, ...] = ()
+
+        # total health point fractions of both teams after the latest step
+        self._player_health = 0.0
+        self._enemy_health = 0.0
+
+    def reset(
+        self,
+        team: Sequence[str] = None,
+        enemies: Sequence[str] = None,
+        seed: int = None
+        ) -> array:
+        """Start a new combat.
+
+        Parameters
+        ----------
+        team : Sequence[str]
+            The job class of each player character, e.g. ("Tank", "Healer").
+            Defaults to the team of the previous combat.
+        enemies : Sequence[str]
+            The name of each enemy. Defaults to the enemies of the previous combat.
+        seed : int
+            The seed of the combat. Defaults to None, a random seed.
+
+        Returns
+        -------
+        array : The observation of the first player turn.
+        """
+
+        self.start(team, enemies, seed)
+        return self.observation()
+
+    def start(
+        self,
+        team: Sequence[str] = None,
+        enemies: Sequence[str] = None,
+        seed: int = None
+        ):
+        """Start a new combat without building an observation, see `reset`.
+
+        Parameters
+        ----------
+        team : Sequence[str]
+            The job class of each player character. Defaults to the team of the previous
+            combat.
+        enemies : Sequence[str]
+            The name of each enemy. Defaults to the enemies of the previous combat.
+        seed : int
+            The seed of the combat. Defaults to None, a random seed.
+        """
+
+        if team is not None:
+            if not 0 < len(team) <= self.MAX_PLAYERS:
+                raise ValueError(f"A team needs 1 to {self.MAX_PLAYERS} player characters.")
+
+            self._team = tuple(team)
+
+        if enemies is not None:
+            if not 0 < len(enemies) <= self.MAX_ENEMIES:
+                raise ValueError(f"A combat needs 1 to {self.MAX_ENEMIES} enemies.")
+
+            self._enemy_names = tuple(enemies)
+
+        if not self._team or not self._enemy_names:
+            raise ValueError("The first reset needs a team and enemies.")
+
+        self.rng.seed(seed)
+        self._release_characters()
+
+        # characters start from their templates, named after their job class
+        player_characters = [
+            character_pool.acquire(job_classes[job_class], job_class) for job_class in self._team
+            ]
+        enemy_characters = [
+            character_pool.acquire(EnemyCharacter, name) for name in self._enemy_names
+            ]
+
+        if self.battle is None:
+            self.battle = Battle(player_characters, enemy_characters, self.rng)
+
+        else:
+            self.battle.reset(player_characters, enemy_characters, self.rng)
+
+        self.done = False
+        self._play_enemy_turns()
+
+        self._player_health, self._enemy_health = self._health_fractions()
+
+    def step(self, action: int) -> Tuple[array, float, bool]:
+        """Take an action with the active player character.
+
+        Parameters
+        ----------
+        action : int
+            One of the `Action` values.
+
+        Returns
+        -------
+        observation : array
+            The observation of the next player turn, or of the end of the combat.
+        reward : float
+            The health point fraction the enemies lost minus the fraction the player
+            characters lost, plus 1 for a win or minus 1 for a loss.
+        done : bool
+            Whether the combat is over.
+        """
+
+        reward, done = self.act(action)
+        return self.observation(), reward, done
+
+    def act(self, action: int) -> Tuple[float, bool]:
+        """Take an action without building an observation, see `step`.
+
+        The environment is never reset here, a done combat has to be started again with
+        `reset` or `start`.
+
+        Parameters
+        ----------
+        action : int
+            One of the `Action` values.
+
+        Returns
+        -------
+        reward : float
+            The reward of the action, see `step`.
+        done : bool
+            Whether the combat is over.
+        """
+
+        if self.done:
+            raise RuntimeError("The combat is over, reset the environment.")
+
+        battle = self.battle
+
+        if action not in battle.available_actions():
+            return self.INVALID_ACTION_REWARD, False
+
+        player = battle.active_player_character
+        enemy = battle.active_enemy_character
+
+        battle.take_player_turn(action)
+        battle.end_turn(player, enemy)
+        self._play_enemy_turns()
+
+        # reward the change in the health balance of both teams
+        player_health, enemy_health = self._health_fractions()
+        reward = (self._enemy_health - enemy_health) - (self._player_health - player_health)
+        self._player_health, self._enemy_health = player_health, enemy_health
+
+        if battle.is_game_over():
+            reward += 1.0 if battle.player_won() else -1.0
+            self.done = True
+
+        # combats that don't end are stopped as a loss
+        elif battle.turn_count >= self.MAX_TURNS:
+            reward -= 1.0
+            self.done = True
+
+        return reward, self.done
+
+    def legal_actions(self) -> List[int]:
+        """Get the actions the active player character can take.
+
+        Returns
+        -------
+        List[int] : The `Action` values that take a turn.
+        """
+
+        if self.done:
+            return []
+
+        return self.battle.available_actions()
+
+    def observation(self) -> array:
+        """Get the observation of the current state of the combat.
+
+        Returns
+        -------
+        array : The `OBSERVATION_SIZE` floats of the observation.
+        """
+
+        observation = array("d", bytes(8 * self.OBSERVATION_SIZE))
+        self.write_observation(observation, 0)
+        return observation
+
+    def write_observation(self, out: array, offset: int):
+        """Write the observation of the current state of the combat into an array.
+
+        Parameters
+        ----------
+        out : array
+            The array to write into.
+        offset : int
+            The index of the first float of the observation in `out`.
+        """
+
+        battle = self.battle
+        position = offset
+
+        for slot in range(self.MAX_PLAYERS):
+            character = battle.player_characters[slot] \
+                if slot < len(battle.player_characters) else None
+
+            position = self._write_slot(
+                out, position, character, self.PLAYER_FEATURES, self.PLAYER_SLOT_SIZE,
+                battle.player_roster, battle.active_player_character
+                )
+
+        for slot in range(self.MAX_ENEMIES):
+            character = battle.enemies[slot] if slot < len(battle.enemies) else None
+
+            position = self._write_slot(
+                out, position, character, self.ENEMY_FEATURES, self.ENEMY_SLOT_SIZE,
+                battle.enemy_roster, battle.active_enemy_character
+                )
+
+        out[position] = battle.turn_count
+
+    def close(self):
+        """Return the characters of the current combat to the character pool."""
+
+        self._release_characters()
+        self.battle = None
+        self.done = True
+
+    def _write_slot(
+        self, out: array, position: int, character: Optional[BaseCharacter],
+        features: Tuple[str, ...], slot_size: int, roster, active: BaseCharacter
+        ) -> int:
+        # write the features of a character, or zeros for an unused slot
+        if character is None:
+            for index in range(position, position + slot_size):
+                out[index] = 0.0
+
+            return position + slot_size
+
+        for feature in features:
+            out[position] = getattr(character, feature)
+            position += 1
+
+        out[position] = roster.is_alive(roster.index(character))
+        out[position + 1] = character is active
+        position += 2
+
+        # enemies have no active effects
+        if slot_size > len(features) + 2:
+            active_effects = character.active_effects
+
+            for effect_type in self.EFFECT_TYPES:
+                effect = active_effects.get(effect_type) if effect_type in active_effects \
+                    else None
+                out[position] = effect.use_count if effect is not None else 0
+                position += 1
+
+        return position
+
+    def _play_enemy_turns(self):
+        # play turns until it's the player's turn or the combat is over
+        battle = self.battle
+
+        while not battle.is_game_over() and battle.turn_count < self.MAX_TURNS:
+            if battle.start_turn() is battle.active_player_character:
+                return
+
+            player = battle.active_player_character
+            enemy = battle.active_enemy_character
+
+            battle.take_enemy_turn()
+            battle.end_turn(player, enemy)
+
+        self.done = True
+
+    def _health_fractions(self) -> Tuple[float, float]:
+        # the total health points of each team as a fraction of its max health points
+        battle = self.battle
+        fractions = []
+
+        for team in (battle.player_characters, battle.enemies):
+            max_health = sum(character.max_health_points for character in team)
+            health = sum(max(character.health_points, 0) for character in team)
+            fractions.append(health / max_health if max_health else 0.0)
+
+        return fractions[0], fractions[1]
+
+    def _release_characters(self):
+        # return the characters of the previous combat to the pool
+        if self.battle is not None:
+            character_pool.release(*self.battle.player_characters, *self.battle.enemies)
+
+
+class VectorCombatEnv:
+    """Steps many CombatEnvs with one call.
+
+    Observations of every environment are written into one flat array, environment `i`
+    starting at `i * CombatEnv.OBSERVATION_SIZE`. Environments whose combat is over are
+    reset right away with the next seed, so the returned observation of a done
+    environment is the first observation of its next combat.
+
+    Attributes
+    ----------
+    envs : List[CombatEnv]
+        The environments.
+    observations : array
+        The flat observations of every environment.
+    rewards : array
+        The reward of every environment in the latest step.
+    dones : array
+        1 if the combat of the environment ended in the latest step, 0 otherwise.
+    """
+
+    def __init__(self, num_envs: int, team: Sequence[str], enemies: Sequence[str]):
+        """Initializes a VectorCombatEnv instance.
+
+        Parameters
+        ----------
+        num_envs : int
+            The amount of environments.
+        team : Sequence[str]
+            The job class of each player character.
+        enemies : Sequence[str]
+            The name of each enemy.
+        """
+
+        self.envs = [CombatEnv() for _ in range(num_envs)]
+        self.team = tuple(team)
+        self.enemy_names = tuple(enemies)
+
+        self.observations = array("d", bytes(8 * num_envs * CombatEnv.OBSERVATION_SIZE))
+        self.rewards = array("d", bytes(8 * num_envs))
+        self.dones = array("b", bytes(num_envs))
+
+        self._next_seed = None
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self, seed: int = None) -> array:
+        """Start a new combat in every environment.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the first environment, the others use the following seeds.
+            Defaults to None, random seeds.
+
+        Returns
+        -------
+        array : The flat observations of every environment.
+        """
+
+        self._next_seed = seed
+
+        for index in range(len(self.envs)):
+            self._reset_env(index)
+
+        return self.observations
+
+    def step(self, actions: Sequence[int]) -> Tuple[array, array, array]:
+        """Take an action in every environment.
+
+        Parameters
+        ----------
+        actions : Sequence[int]
+            The action of each environment.
+
+        Returns
+        -------
+        observations : array
+            The flat observations of every environment.
+        rewards : array
+            The reward of every environment.
+        dones : array
+            1 if the combat of the environment ended, 0 otherwise.
+        """
+
+        size = CombatEnv.OBSERVATION_SIZE
+
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            # a combat can end in its enemy turns before the first player turn
+            reward, done = env.act(action) if not env.done else (0.0, True)
+            self.rewards[index] = reward
+            self.dones[index] = done
+
+            if done:
+                self._reset_env(index)
+
+            else:
+                env.write_observation(self.observations, index * size)
+
+        return self.observations, self.rewards, self.dones
+
+    def legal_actions(self) -> List[List[int]]:
+        """Get the legal actions of every environment.
+
+        Returns
+        -------
+        List[List[int]] : The `Action` values each environment can take.
+        """
+
+        return [env.legal_actions() for env in self.envs]
+
+    def close(self):
+        """Return the characters of every environment to the character pool."""
+
+        for env in self.envs:
+            env.close()
+
+    def _reset_env(self, index: int):
+        # reset an environment with the next seed and write its observation
+        seed = self._next_seed
+
+        if seed is not None:
+            self._next_seed += 1
+
+        env = self.envs[index]
+        env.start(self.team, self.enemy_names, seed)
+        env.write_observation(self.observations, index * CombatEnv.OBSERVATION_SIZE)
+
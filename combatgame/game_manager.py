@@ -1,20 +1,25 @@
 """Module for managing the whole gameplay, turns, and win/lose conditions of the game."""
-from typing import List, Union
-import random
 import time
 from datetime import datetime
-from functools import partial
-from collections import deque
+from typing import Optional
 
-from .characters import BaseCharacter, Tank, MirrorMage, Healer, Assassin
+from .battle import Action, Battle
+from .characters import job_classes
+from .director import DifficultyDirector
 from .enemies import EnemyCharacter
+from .policies import GreedyPolicy, Policy
+from .raid import RaidBattle
+from .solver import load_odds
 from .ui import Ui
 
 
-class GameManager:
+class GameManager(Battle):
     """Game Manager class responsible for managing the combat gameplay and interactions between
     player characters and enemies during a combat.
 
+    The rules of the combat are implemented by `Battle`, the GameManager adds the menus and
+    screens for playing it in the terminal.
+
     Attributes
     ----------
     player_characters List[Union[Tank, MirrorMage, Healer, Assassin]]
@@ -28,40 +33,39 @@ class GameManager:
 
     active_enemy_character : BaseCharacter
         The active enemy character.
-    """
 
-    def __init__(
-        self,
-        player_characters: List[Union[Tank, MirrorMage, Healer, Assassin]],
-        enemies: List[EnemyCharacter],
-    ):
-        """Initializes a GameManager instance.
+    player_roster : AliveRoster
+        Alive bookkeeping of the player characters.
 
-    Parameters
-    ----------
-    player_characters : List[Union[Tank, MirrorMage, Healer, Assassin]]
-        A list of player characters participating in the game.
-        Each player character can be an instance of Tank, MirrorMage, Healer, or Assassin class.
+    enemy_roster : AliveRoster
+        Alive bookkeeping of the enemies.
 
-    enemies : List[EnemyCharacter]
-        A list of enemy characters participating in the game. Each enemy character is an instance
-        of the EnemyCharacter class.
-        """
+    player_policy : Policy
+        Chooses the player actions instead of the action menu, None to let the user choose.
 
-        self.player_characters = player_characters
-        self.enemies = enemies
+    director : DifficultyDirector
+        Nudges the enemies between turns towards a target win rate, None to leave them.
+    """
+
+    player_policy: Optional[Policy] = None
+    director: Optional[DifficultyDirector] = None
 
-        # assign first character in player_characters as the active character
-        self.active_player_character = player_characters[0]
+    # the job class, enemy and policy of the latest odds looked up, and the odds
+    _odds_key: Optional[tuple] = None
+    _odds: Optional[float] = None
 
-        # assign first character in enemies as the active character
-        self.active_enemy_character = enemies[0]
+    def log(self, log: str):
+        """Add a log with the current time to the battle log.
 
-        # assign turn character
-        self.turn_character = self.determine_turn_order()
+        Parameters
+        ----------
+        log : str
+            The log to add.
+        """
 
-        # battle log (limits to 5 items only)
-        self.battle_log = deque(maxlen=5)
+        # get current time
+        current_time = datetime.now().strftime("%H:%M:%S - ")
+        self.battle_log.append(current_time + log)
 
     def start_combat(self):
         """Start the combat.
@@ -72,6 +76,10 @@ class GameManager:
             True if player_won, False otherwise.
         """
 
+        # the changes of the director are per combat
+        if self.director is not None:
+            self.director.reset()
+
         while not self.is_game_over():
             self.run_battle_logic()
 
@@ -90,6 +98,47 @@ class GameManager:
         input("Press enter to continue...")
         return player_won
 
+    def start_raid_combat(self):
+        """Start a raid combat, where every alive combatant of both teams acts each turn.
+
+        Meant for battles with hundreds of combatants, the stats are resolved by a RaidBattle
+        on columns of stats and a summary of both teams is displayed instead of the combat
+        screen.
+
+        Returns
+        -------
+        player_won : bool
+            True if player_won, False otherwise.
+        """
+
+        raid = RaidBattle(self.player_characters, self.enemies)
+
+        # available raid actions for the player characters
+        raid_options = {
+            "Attack": "attack",
+            f"Area Attack ({RaidBattle.AREA_ATTACK_MAGIC_POINTS_COST} MP each)": "area attack"
+        }
+
+        while not raid.is_over():
+            Ui.clear_terminal()
+            Ui.display_raid_screen(raid.turn, raid.summary(), raid.battle_log)
+
+            # let user select the action of the whole team
+            raid_menu = Ui.Menu("Choose a Raid Action", raid_options.copy())
+            raid.run_turn(raid_menu.select_option())
+
+        # copy the raid results back to the characters
+        raid.write_back()
+
+        Ui.clear_terminal()
+        Ui.display_raid_screen(raid.turn, raid.summary(), raid.battle_log)
+
+        player_won = raid.player_won()
+        print("You won!" if player_won else "You lost...")
+
+        input("Press enter to continue...")
+        return player_won
+
     def run_battle_logic(self, flag: bool = False):
         """The logic implementation for the combat battle.
 
@@ -105,122 +154,112 @@ class GameManager:
         # turn character doesnt change if flag is True
         if not flag:
             # set the turn order character
-            self.turn_character = self.determine_turn_order()
+            self.start_turn()
 
         Ui.clear_terminal()
-        Ui.display_combat_screen(player, enemy, self.battle_log)
+        Ui.display_combat_screen(player, enemy, self.battle_log, self.matchup_odds())
 
         if player is self.turn_character:
             # lets player know its their turn
             print("\nIt's your turn!")
 
+            # the policy plays the turn instead of the user
+            if self.player_policy is not None:
+                turn_taken, _ = self.take_player_turn(
+                    self.player_policy.select_action(self.state_view())
+                    )
+
+                # an action that can't be taken is replaced by a basic attack
+                if not turn_taken:
+                    self.take_player_turn(Action.ATTACK)
+
+                time.sleep(1)
+                self.end_turn(player, enemy)
+                self.adjust_difficulty()
+                return None
+
             # define dictionary of available player options for Menu
             available_player_options = {
-                "Attack": partial(player.basic_attack, enemy),
-                "Heal": player.heal
+                "Attack": Action.ATTACK,
+                "Heal": Action.HEAL
             }
 
             # add skills options to available_player_options dict
             for index, skill in enumerate(player.skills):
-                available_player_options[f"{skill.name} (skill)"] = partial(
-                    player.use_skill,
-                    index,
-                    enemy
-                    )
+                available_player_options[f"{skill.name} (skill)"] = Action.SKILL + index
 
             # add the option to switch active characters
-            available_player_options["Switch characters"] = self.switch_active_player_characters
+            available_player_options["Switch characters"] = self.select_switch_action
 
             # create the menu and let user select their action
             select_action_menu = Ui.Menu("Choose an Action", available_player_options)
             selected_action = select_action_menu.select_option(
                 invalid_handler=self.invalid_option_handler
                 )
-            # get current time
-            current_time = datetime.now().strftime("%H:%M:%S - ")
 
-            # success and combat log
-            log = selected_action()
+            # the switch menu is opened after being selected
+            if callable(selected_action):
+                selected_action = selected_action()
 
-            # tuple is returned only when there's an error using skill
-            if isinstance(log, tuple):
-                self.battle_log.append(log[1])
-                return self.run_battle_logic(flag=True)
+            turn_taken, _ = self.take_player_turn(selected_action)
 
-            self.battle_log.append(current_time + log)
-
-            if selected_action != available_player_options["Switch characters"]:
-                # update idle character's stat (enemy)
-                self.update_idle_character_stats(enemy)
+            # not enough points to use the skill, choose again
+            if not turn_taken:
+                return self.run_battle_logic(flag=True)
 
         else:
             # lets player know its enemy's turn
             print(f"\nIt's {enemy.name} turn.")
-            enemy_action = enemy.select_action(player)
-
-            # get current time
-            current_time = datetime.now().strftime("%H:%M:%S - ")
-            self.battle_log.append(current_time + enemy_action())
+            self.take_enemy_turn()
 
             time.sleep(2)
 
-            # update idle character's stat (player)
-            self.update_idle_character_stats(player)
-
-        if not player.is_alive():
-            self.handle_defeated_character(player, enemy)
-
-        elif not enemy.is_alive():
-            self.handle_defeated_character(enemy, player)
+        self.end_turn(player, enemy)
+        self.adjust_difficulty()
 
         return None
 
-    def handle_defeated_character(self, character: BaseCharacter, opponent: BaseCharacter):
-        """Handles the logic when a character is defeated.
+    def adjust_difficulty(self):
+        """Let the director nudge the enemies between turns, if there is one."""
 
-        Parameters
-        ----------
-        character : BaseCharacter
-            The character that is defeated.
-        opponent : BaseCharacter
-            The defeated character's opponent.
-        """
+        if self.director is not None:
+            self.director.adjust(self)
 
-        current_time = datetime.now().strftime("%H:%M:%S - ")
+    def matchup_odds(self) -> Optional[float]:
+        """Get the odds of the active player character's job class beating the active enemy
+        alone from full stats, if they have been solved by `python -m combatgame.solver`.
 
-        character.health_points = 0
-        self.battle_log.append(
-                current_time + f"{character.name} has been defeated by {opponent.name}!"
-                )
+        The odds follow the player policy, or the greedy policy if the user plays or the
+        policy can't be solved. They are only looked up again when the active player
+        character, active enemy or policy changes, a matchup that hasn't been solved
+        included.
 
-        if not self.is_game_over():
-            # checks if its a player or enemy character that is defeated
-            if isinstance(character, EnemyCharacter):
-                self.active_enemy_character = next(
-                    character for character in self.enemies if character.is_alive()
-                )
-                return
+        Returns
+        -------
+        float : The win probability, None if the matchup hasn't been solved.
+        """
 
-            self.active_player_character = next(
-                    character for character in self.player_characters if character.is_alive()
-                )
+        player = self.active_player_character
+        enemy = self.active_enemy_character
+        key = (player.job_class, enemy.name, self.player_policy)
 
-    @staticmethod
-    def update_idle_character_stats(idle_character: BaseCharacter):
-        """Update the stats for characters when its not their turn.
+        if key == self._odds_key:
+            return self._odds
 
-        Parameters
-        ----------
-        idle_character : BaseCharacter
-            The character that is idle.
-        """
+        policy = self.player_policy
 
-        idle_character.speed_points += 1
+        if policy is None or not policy.markov:
+            policy = GreedyPolicy()
 
-        idle_character.defense_points = max(idle_character.defense_points, 0)
+        # only cached odds are shown, solving can take seconds
+        odds = load_odds(
+            job_classes[player.job_class](player.name), EnemyCharacter(enemy.name), policy
+            )
 
-        if not isinstance(idle_character, EnemyCharacter):
-            idle_character.magic_points += 1
+        self._odds_key = key
+        self._odds = odds.win_probability if odds is not None else None
+
+        return self._odds
 
     def invalid_option_handler(self):
         """Handler for invalid option input for menus.
@@ -230,16 +269,16 @@ class GameManager:
         time.sleep(1)
         Ui.clear_terminal()
         Ui.display_combat_screen(
-            self.active_player_character, self.active_enemy_character, self.battle_log
+            self.active_player_character, self.active_enemy_character, self.battle_log,
+            self.matchup_odds()
             )
 
-    def switch_active_player_characters(self):
-        """switch active player characters.
+    def select_switch_action(self) -> int:
+        """Let the user select the player character to switch to.
 
         Returns
         -------
-        log : str
-            The log to display.
+        int : The switch `Action` for the chosen character.
         """
 
         def create_available_characters_dict():
@@ -249,7 +288,7 @@ class GameManager:
             result = {}
 
             # loops through every selected player characters
-            for character in self.player_characters:
+            for index, character in enumerate(self.player_characters):
                 # the display string in the menu
                 display_str = f"{character.name} - {character.job_class}"
 
@@ -261,7 +300,7 @@ class GameManager:
                     # shows player the current active character
                     display_str += " (defeated)"
 
-                result[display_str] = character
+                result[display_str] = Action.SWITCH + index
 
             return result
 
@@ -273,72 +312,10 @@ class GameManager:
         # create menu for character switch options
         character_switch_menu = Ui.Menu("Switch Active Characters", available_characters_dict)
 
-        # old active character
-        old_active_character = self.active_player_character
-
         # get chosen character
-        chosen_character = character_switch_menu.select_option(
-            invalid_handler=partial(
-                GameManager.invalid_option_handler,
-                self.active_player_character,
-                self.active_enemy_character
-                )
-            )
-
-        # makes sure selected character is alive
-        if chosen_character.is_alive():
-            self.active_player_character = chosen_character
-            log = f"Active character switched from {old_active_character.name} to " \
-                f"{self.active_player_character.name}."
-
-        else:
-            log = f"{chosen_character.name} is defeated and can't be chosen!"
-
-        return log
-
-    def determine_turn_order(self) -> BaseCharacter:
-        """Determine who's turn it is based on speed points.
-
-        Returns
-        -------
-        BaseCharacter : The BaseCharacter with higher speed points.
-
-        Notes
-        -----
-        The function returns a random active character if both active
-        characters have same speed points
-        """
-
-        # stores active player and enemy characters in a list
-        active_characters = [self.active_enemy_character,
-                             self.active_player_character]
-
-        # sorts active_characters by speed points in descending order
-        # if both active characters have the same speed_points,
-        # randomize the sort order
-        sorted_entities = sorted(
-            active_characters,
-            key=lambda entity: (entity.speed_points, random.random()),
-            reverse=True,
-        )
-
-        # returns the character for the turn
-        return sorted_entities[0]
-
-    def is_game_over(self) -> bool:
-        """Check the win/lose conditions of the game.
-
-        Returns
-        -------
-        game_ended : bool
-            True if the game has been won or lost, False otherwise.
-        """
-
-        # returns True if all player or enemy characters are defeated, False otherwise.
-        return not any(character.is_alive() for character in self.player_characters) \
-            or not any(character.is_alive() for character in self.enemies)
+        return character_switch_menu.select_option(invalid_handler=self.invalid_option_handler)
 
-    def player_won(self):
+    def player_won(self) -> bool:
         """Returns True if game ended and player won, False otherwise.
 
         Returns
@@ -355,6 +332,4 @@ class GameManager:
             print("Game not over yet.")
             return False
 
-        # checks if all enemies are dead and at least one character is alive
-        return any(character.is_alive() for character in self.player_characters) \
-            and not any(character.is_alive() for character in self.enemies)
+        return super().player_won()
@@ -0,0 +1,655 @@
+"""Procedural encounters, generated enemy groups tuned to a target win rate of a team.
+
+Every encounter is a group of enemies with random stat proportions and one shared
+difficulty scale. The scale is found by bisection with the simulator in the loop, every
+step playing the same seeds so the win rate falls smoothly as the scale grows, then the
+encounter is validated on fresh seeds and kept only if its win rate is close to the target.
+
+Usage:
+    python -m combatgame.generator --team Tank,Healer --target 0.6 --count 200 \
+        --csv generated_enemies.csv
+"""
+from __future__ import annotations
+import argparse
+import csv
+import io
+import math
+import multiprocessing
+import random
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .balance import StatCell, override_stats
+from .characters import job_classes
+from .enemies import enemy_index, enemy_names
+from .resources.ascii_art import ascii_arts
+from .simulation import MAX_TURNS, Matchup, simulate_matchup
+
+
+# the range of each stat of a generated enemy, a little wider than the hand-made enemies
+stat_bounds: Dict[str, Tuple[int, int]] = {
+    "HP": (30, 240),
+    "AP": (4, 40),
+    "DP": (0, 30),
+    "SP": (1, 12),
+    "Luck": (5, 50),
+}
+
+# the words put in front of the name of the enemy a generated enemy looks like
+epithets = (
+    "Ashen", "Blighted", "Brooding", "Cinder", "Dire", "Feral", "Frost", "Gilded", "Hollow",
+    "Iron", "Lesser", "Pale", "Rabid", "Shadow", "Storm", "Thorned", "Venom", "Wild",
+)
+
+# the max difficulty scale, at 1 a stat with an average proportion is at its max
+MAX_SCALE = 2.0
+
+# the default max amount of candidates of each wanted encounter, before the generator gives up
+CANDIDATES_PER_ENCOUNTER = 50
+
+
+def parse_target(spec: str) -> float:
+    """Parse a target win rate given on the command line, the type of `--target`.
+
+    Parameters
+    ----------
+    spec : str
+        The target win rate, e.g. "0.6".
+
+    Returns
+    -------
+    float : The target win rate.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the target isn't a number strictly between 0 and 1, no scale reaches it.
+    """
+
+    try:
+        target = float(spec)
+
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"A target is a win rate, got '{spec}'.") from None
+
+    if not 0 < target < 1:
+        raise argparse.ArgumentTypeError(
+            f"A target win rate is strictly between 0 and 1, got '{spec}'."
+            )
+
+    return target
+
+
+def fit_scale(
+    points: Sequence[Tuple[float, int, int]], target: float, default: float
+    ) -> float:
+    """Estimate the difficulty scale of a target win rate from simulated scales.
+
+    A logistic curve of the win rate over the scale is fitted to the points by weighted
+    least squares on the logits, a cheap surrogate of the simulator that uses the battles
+    of every point rather than only those of the last one. Points without losses or wins
+    are left out.
+
+    Parameters
+    ----------
+    points : Sequence[Tuple[float, int, int]]
+        The scale, battles won and battles played of every simulated point.
+    target : float
+        The target win rate.
+    default : float
+        The scale used if the points don't show the win rate falling as the scale grows.
+
+    Returns
+    -------
+    float : The estimated scale, within 0 and MAX_SCALE.
+
+    Raises
+    ------
+    ValueError
+        If the target isn't strictly between 0 and 1, its logit is infinite.
+    """
+
+    if not 0 < target < 1:
+        raise ValueError(f"The target win rate must be strictly between 0 and 1, got {target}.")
+
+    samples = []
+
+    for scale, wins, battles in points:
+        # points the team always won or always lost only bound the scale, the curve is
+        # too steep for their logits to say by how much
+        if wins in (0, battles):
+            continue
+
+        win_rate = wins / battles
+        samples.append(
+            (scale, math.log(win_rate / (1 - win_rate)), battles * win_rate * (1 - win_rate))
+            )
+
+    if len({scale for scale, _, _ in samples}) < 2:
+        return default
+
+    total_weight = sum(weight for _, _, weight in samples)
+    mean_scale = sum(scale * weight for scale, _, weight in samples) / total_weight
+    mean_logit = sum(logit * weight for _, logit, weight in samples) / total_weight
+    variance = sum(weight * (scale - mean_scale) ** 2 for scale, _, weight in samples)
+    covariance = sum(
+        weight * (scale - mean_scale) * (logit - mean_logit) for scale, logit, weight in samples
+        )
+
+    if covariance >= 0:
+        return default
+
+    slope = covariance / variance
+    scale = mean_scale + (math.log(target / (1 - target)) - mean_logit) / slope
+
+    return min(max(scale, 0.0), MAX_SCALE)
+
+
+class GeneratedEnemy(NamedTuple):
+    """An enemy of a generated encounter.
+
+    Attributes
+    ----------
+    name : str
+        The name of the enemy.
+    base : str
+        The hand-made enemy it looks like, whose ASCII art it uses.
+    stats : Dict[str, int]
+        The value of every stat column of enemy_attributes.csv.
+    """
+
+    name: str
+    base: str
+    stats: Dict[str, int]
+
+
+class GeneratedEncounter(NamedTuple):
+    """A validated generated encounter.
+
+    Attributes
+    ----------
+    enemies : Tuple[GeneratedEnemy, ...]
+        The enemies of the group.
+    scale : float
+        The difficulty scale of the stats.
+    wins : int
+        The amount of validation battles won by the team.
+    battles : int
+        The amount of validation battles.
+    """
+
+    enemies: Tuple[GeneratedEnemy, ...]
+    scale: float
+    wins: int
+    battles: int
+
+    @property
+    def win_rate(self) -> float:
+        """The win rate of the team in the validation battles."""
+
+        return self.wins / self.battles
+
+
+def scaled_stats(proportions: Dict[str, float], scale: float) -> Dict[str, int]:
+    """Get the stats of an enemy at a difficulty scale.
+
+    Parameters
+    ----------
+    proportions : Dict[str, float]
+        How strong each stat is compared to the others, around 1.
+    scale : float
+        The difficulty scale, 0 for every stat at its min.
+
+    Returns
+    -------
+    Dict[str, int] : The value of each stat, within `stat_bounds`.
+    """
+
+    return {
+        stat: round(low + (high - low) * min(proportions[stat] * scale, 1.0))
+        for stat, (low, high) in stat_bounds.items()
+    }
+
+
+class EncounterGenerator:
+    """Generates enemy groups a team wins against at about a target win rate.
+
+    The candidates are simulated in the rows of the hand-made enemies they look like, so
+    they need no ASCII art or table rows of their own while they're tuned. The hand-made
+    enemies can be narrowed down to those with tags of `enemy_index`, like "tier:2", so the
+    encounters of a part of the story look like its enemies.
+
+    Attributes
+    ----------
+    team : Tuple[str, ...]
+        The job class of each character of the team.
+    target : float
+        The target win rate of the team.
+    tolerance : float
+        How far the validated win rate can be from the target.
+    max_group : int
+        The max amount of enemies of an encounter.
+    policy : str
+        The name of the policy playing the team.
+    search_battles : int
+        The amount of battles of every bisection step.
+    steps : int
+        The amount of bisection steps.
+    battles : int
+        The amount of validation battles of a scale.
+    attempts : int
+        The amount of scales validated before the group is given up.
+    max_turns : int
+        The max amount of turns of a battle.
+    tags : Tuple[str, ...]
+        The tags of the hand-made enemies the generated enemies can look like.
+    bases : List[str]
+        The hand-made enemies the generated enemies look like.
+    """
+
+    def __init__(
+        self,
+        team: Sequence[str],
+        target: float,
+        tolerance: float = 0.05,
+        max_group: int = 2,
+        policy: str = "greedy",
+        search_battles: int = 64,
+        steps: int = 6,
+        battles: int = 400,
+        attempts: int = 2,
+        max_turns: int = MAX_TURNS,
+        tags: Sequence[str] = ()
+        ):
+        """Initializes an EncounterGenerator instance.
+
+        Parameters
+        ----------
+        team : Sequence[str]
+            The job class of each character of the team.
+        target : float
+            The target win rate of the team.
+        tolerance : float
+            How far the validated win rate can be from the target. Defaults to 0.05.
+        max_group : int
+            The max amount of enemies of an encounter. Defaults to 2.
+        policy : str
+            The name of the policy playing the team. Defaults to "greedy".
+        search_battles : int
+            The amount of battles of every bisection step. Defaults to 64.
+        steps : int
+            The amount of bisection steps. Defaults to 6.
+        battles : int
+            The amount of validation battles. Defaults to 400.
+        attempts : int
+            The amount of scales validated before the group is given up. Defaults to 2.
+        max_turns : int
+            The max amount of turns of a battle. Defaults to MAX_TURNS.
+        tags : Sequence[str]
+            The tags of the hand-made enemies the generated enemies can look like. Defaults
+            to none, any of them.
+
+        Raises
+        ------
+        ValueError
+            If the target isn't strictly between 0 and 1, or no hand-made enemy has the tags.
+        """
+
+        if not 0 < target < 1:
+            raise ValueError(
+                f"The target win rate must be strictly between 0 and 1, got {target}."
+                )
+
+        self.team = tuple(team)
+        self.target = target
+        self.tolerance = tolerance
+        self.policy = policy
+        self.search_battles = search_battles
+        self.steps = steps
+        self.battles = battles
+        self.attempts = attempts
+        self.max_turns = max_turns
+        self.tags = tuple(tags)
+
+        # in the order of the table, so a seed picks the same bases as without tags
+        tagged = set(enemy_index.select(tags=self.tags))
+        self.bases = [name for name in enemy_names if name in tagged and name in ascii_arts]
+
+        if not self.bases:
+            raise ValueError(
+                f"No enemy with ASCII art has the tags {', '.join(self.tags)}, the tags are "
+                f"{', '.join(enemy_index.tags())}."
+                )
+
+        # every enemy of a group is simulated in the row of a different hand-made enemy
+        self.max_group = min(max_group, len(self.bases))
+
+    def win_rate(
+        self,
+        bases: Sequence[str],
+        proportions: Sequence[Dict[str, float]],
+        scale: float,
+        seeds: Sequence[int]
+        ) -> Tuple[int, int]:
+        """Simulate a candidate group at a difficulty scale.
+
+        Parameters
+        ----------
+        bases : Sequence[str]
+            The hand-made enemy rows the enemies are simulated in.
+        proportions : Sequence[Dict[str, float]]
+            The stat proportions of each enemy.
+        scale : float
+            The difficulty scale.
+        seeds : Sequence[int]
+            The seed of each battle.
+
+        Returns
+        -------
+        Tuple[int, int] : The amount of battles won and played.
+        """
+
+        cells = []
+        values = []
+
+        for base, enemy_proportions in zip(bases, proportions):
+            for stat, value in scaled_stats(enemy_proportions, scale).items():
+                low, high = stat_bounds[stat]
+                cells.append(StatCell("enemy", base, stat, low, high))
+                values.append(value)
+
+        with override_stats(cells, values):
+            aggregate = simulate_matchup(
+                Matchup(self.team, tuple(bases), self.policy, self.max_turns), seeds
+                )
+
+        return aggregate.wins, aggregate.battles
+
+    def generate(self, seed: int) -> Optional[GeneratedEncounter]:
+        """Generate one encounter.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the random group, its search and validation battles.
+
+        Returns
+        -------
+        GeneratedEncounter : The encounter, None if no scale of the group came close
+            enough to the target.
+        """
+
+        rng = random.Random(seed)
+        bases = rng.sample(self.bases, rng.randint(1, self.max_group))
+        proportions = [
+            {stat: rng.uniform(0.5, 1.5) for stat in stat_bounds} for _ in bases
+        ]
+
+        # the search battles of every step share seeds, the validation ones are fresh
+        first_seed = rng.getrandbits(32)
+        search_seeds = range(first_seed, first_seed + self.search_battles)
+        low, high = 0.0, MAX_SCALE
+        points = []
+
+        for _ in range(self.steps):
+            middle = (low + high) / 2
+            wins, battles = self.win_rate(bases, proportions, middle, search_seeds)
+            points.append((middle, wins, battles))
+
+            if wins / battles > self.target:
+                low = middle
+
+            else:
+                high = middle
+
+        scale = fit_scale(points, self.target, (low + high) / 2)
+        next_seed = search_seeds.stop
+
+        for _ in range(self.attempts):
+            validation_seeds = range(next_seed, next_seed + self.battles)
+            next_seed = validation_seeds.stop
+            wins, battles = self.win_rate(bases, proportions, scale, validation_seeds)
+
+            if abs(wins / battles - self.target) <= self.tolerance:
+                break
+
+            # the validation battles are the best point of the curve, fit it again with
+            # them and validate the new scale on fresh seeds
+            points.append((scale, wins, battles))
+            scale = fit_scale(points, self.target, scale)
+
+        else:
+            return None
+
+        enemies = tuple(
+            GeneratedEnemy(f"{rng.choice(epithets)} {base}", base,
+                           scaled_stats(enemy_proportions, scale))
+            for base, enemy_proportions in zip(bases, proportions)
+            )
+
+        return GeneratedEncounter(enemies, scale, wins, battles)
+
+    def generate_many(
+        self,
+        count: int,
+        seed: int = 0,
+        processes: Optional[int] = None,
+        max_candidates: Optional[int] = None
+        ) -> Iterator[GeneratedEncounter]:
+        """Generate validated encounters until there are enough of them or the candidates
+        run out.
+
+        Parameters
+        ----------
+        count : int
+            The amount of encounters.
+        seed : int
+            The seed of the first candidate, every candidate uses the next seed. Defaults
+            to 0.
+        processes : int
+            The amount of worker processes. Defaults to None, one for each CPU.
+        max_candidates : int
+            The max amount of candidates generated, so a target the team can't be tuned to
+            ends. Defaults to None, CANDIDATES_PER_ENCOUNTER for each encounter.
+
+        Yields
+        ------
+        GeneratedEncounter : The encounters as they're validated, fewer than `count` if
+            the candidates ran out.
+        """
+
+        processes = processes or multiprocessing.cpu_count()
+        generated = 0
+
+        if max_candidates is None:
+            max_candidates = CANDIDATES_PER_ENCOUNTER * count
+
+        # the pool only takes the candidate seeds it needs
+        candidates = range(seed, seed + max_candidates)
+        pool = multiprocessing.Pool(processes) if processes > 1 else None
+
+        try:
+            results = (
+                pool.imap(self.generate, candidates, chunksize=4) if pool
+                else map(self.generate, candidates)
+                )
+
+            for encounter in results:
+                if encounter is None:
+                    continue
+
+                yield encounter
+                generated += 1
+
+                if generated >= count:
+                    break
+
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+
+def unique_names(encounters: Sequence[GeneratedEncounter]) -> List[GeneratedEncounter]:
+    """Give every enemy of the encounters a name no other enemy has.
+
+    Parameters
+    ----------
+    encounters : Sequence[GeneratedEncounter]
+        The encounters.
+
+    Returns
+    -------
+    List[GeneratedEncounter] : The encounters, a repeated name gets a number.
+    """
+
+    counts: Dict[str, int] = {}
+    renamed = []
+
+    for encounter in encounters:
+        enemies = []
+
+        for enemy in encounter.enemies:
+            counts[enemy.name] = counts.get(enemy.name, 0) + 1
+
+            if counts[enemy.name] > 1 or enemy.name in enemy_names:
+                enemy = enemy._replace(name=f"{enemy.name} {counts[enemy.name]}")
+
+            enemies.append(enemy)
+
+        renamed.append(encounter._replace(enemies=tuple(enemies)))
+
+    return renamed
+
+
+def csv_rows(encounters: Sequence[GeneratedEncounter]) -> str:
+    """Write the enemies of encounters as rows of enemy_attributes.csv.
+
+    Parameters
+    ----------
+    encounters : Sequence[GeneratedEncounter]
+        The encounters.
+
+    Returns
+    -------
+    str : The CSV text, with the header of enemy_attributes.csv.
+    """
+
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(["name", *stat_bounds])
+
+    for encounter in encounters:
+        for enemy in encounter.enemies:
+            writer.writerow([enemy.name, *enemy.stats.values()])
+
+    return text.getvalue()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the encounter generator.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Generate enemy groups a team wins against at a target win rate."
+        )
+    parser.add_argument(
+        "--team", type=lambda team: tuple(team.split(",")), default=("Tank",),
+        help="the job classes of the team, comma separated"
+        )
+    parser.add_argument(
+        "--target", type=parse_target, default=0.6, help="the target win rate, within 0 and 1"
+        )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05,
+        help="how far the validated win rate can be from the target"
+        )
+    parser.add_argument("--count", type=int, default=100, help="the amount of encounters")
+    parser.add_argument(
+        "--max-group", type=int, default=2, help="the max amount of enemies of an encounter"
+        )
+    parser.add_argument("--policy", default="greedy", help="the policy playing the team")
+    parser.add_argument(
+        "--search-battles", type=int, default=64, help="the battles of every search step"
+        )
+    parser.add_argument(
+        "--battles", type=int, default=400, help="the validation battles of an encounter"
+        )
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first candidate")
+    parser.add_argument(
+        "--max-candidates", type=int, default=None,
+        help="the max amount of candidates before giving up, defaults to "
+        f"{CANDIDATES_PER_ENCOUNTER} for each encounter"
+        )
+    parser.add_argument(
+        "--tag", action="append", default=[],
+        help="a tag the enemies the encounters look like must have, e.g. tier:2, repeatable"
+        )
+    parser.add_argument(
+        "--csv", default=None, help="write the enemies as rows of enemy_attributes.csv here"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Generate encounters from the command line and print them.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    for job_class in args.team:
+        if job_class not in job_classes:
+            parser.error(f"Unknown job class '{job_class}', pick from {', '.join(job_classes)}.")
+
+    try:
+        generator = EncounterGenerator(
+            args.team, args.target, args.tolerance, args.max_group, args.policy,
+            args.search_battles, battles=args.battles, tags=args.tag
+            )
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    encounters = unique_names(
+        list(generator.generate_many(args.count, args.seed, args.processes, args.max_candidates))
+        )
+    seconds = time.perf_counter() - start
+
+    for encounter in encounters:
+        enemies = ", ".join(
+            f"{enemy.name} ({' '.join(f'{stat} {value}' for stat, value in enemy.stats.items())})"
+            for enemy in encounter.enemies
+            )
+        print(f"{encounter.win_rate:6.1%}  scale {encounter.scale:.2f}  {enemies}")
+
+    print(
+        f"{len(encounters)} encounters in {seconds:.1f}s, "
+        f"{len(encounters) / seconds * 60:.0f} per minute"
+        )
+
+    if len(encounters) < args.count:
+        print(
+            f"Gave up after the max amount of candidates, {args.count - len(encounters)} "
+            "encounters short, try a wider tolerance or another target."
+            )
+
+    if args.csv is not None:
+        with open(args.csv, "w", encoding="utf-8", newline="") as file:
+            file.write(csv_rows(encounters))
+
+
+if __name__ == "__main__":
+    main()
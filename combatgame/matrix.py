@@ -0,0 +1,422 @@
+"""Matchup matrix of teams against enemies, recomputed incrementally as the data files change.
+
+Every cell remembers the hash of the data rows it depends on: the job class rows of its
+team, the skill rows of those job classes and the row of its enemy. When the data changes
+only the cells whose rows changed are simulated again, the others keep their results, so
+tweaking one enemy redoes one column of the matrix rather than all of it.
+
+Usage:
+    python -m combatgame.matrix --battles 500 --state matrix.json
+    python -m combatgame.matrix --max-size 1 --watch
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .battle import ENGINE_VERSION
+from .cache import results_cache
+from .characters import job_classes
+from .enemies import enemy_names
+from .simulation import Aggregate, Matchup, simulate_matchup
+from .skills import skill_attributes
+from .tables import data_tables, reload_tables
+from .tournament import all_teams
+from .utils.utils import write_json_atomic
+
+# the version of the state file, states of other versions are ignored
+STATE_VERSION = 1
+
+
+class MatrixCell(NamedTuple):
+    """A simulated cell of the matchup matrix.
+
+    Attributes
+    ----------
+    dependencies : str
+        The hash of the data rows the cell was simulated with.
+    aggregate : Aggregate
+        The totals of its battles.
+    """
+
+    dependencies: str
+    aggregate: Aggregate
+
+
+def cell_dependencies(team: Sequence[str], enemy: str) -> List[Tuple[str, str]]:
+    """Get the data rows a cell of the matrix depends on.
+
+    Parameters
+    ----------
+    team : Sequence[str]
+        The job class of each character of the team.
+    enemy : str
+        The name of the enemy.
+
+    Returns
+    -------
+    List[Tuple[str, str]] : The table and key of every row, sorted.
+    """
+
+    rows = {("job", job_class) for job_class in team}
+    rows.add(("enemy", enemy))
+
+    # the skills are found through the current table, so a skill moved to another job
+    # class changes the rows of both
+    rows.update(
+        ("skill", skill)
+        for skill, attributes in skill_attributes.items()
+        if attributes["belongs_to"] in team
+        )
+
+    return sorted(rows)
+
+
+def dependency_hash(rows: Sequence[Tuple[str, str]]) -> str:
+    """Get the hash of the current contents of data rows.
+
+    Parameters
+    ----------
+    rows : Sequence[Tuple[str, str]]
+        The table and key of every row.
+
+    Returns
+    -------
+    str : The hex digest of the rows and the engine version, a removed row hashes as null.
+    """
+
+    contents = [
+        (table, key, data_tables[table][0].get(key)) for table, key in rows
+    ]
+
+    return hashlib.sha256(
+        json.dumps([ENGINE_VERSION, contents], sort_keys=True).encode()
+        ).hexdigest()
+
+
+def _simulate_cell(task: tuple) -> Aggregate:
+    # simulate the battles of a cell, runs in the worker processes
+    matchup, seeds, cache = task
+
+    return simulate_matchup(matchup, seeds, results_cache if cache else None)
+
+
+class MatchupMatrix:
+    """The win rates of teams against every enemy, kept up to date incrementally.
+
+    Attributes
+    ----------
+    teams : List[Tuple[str, ...]]
+        The teams of the rows.
+    policy : str
+        The name of the policy playing the teams.
+    battles : int
+        The amount of battles of each cell.
+    processes : int
+        The amount of worker processes, 1 to simulate in this process.
+    seed : int
+        The seed of the first battle of each cell.
+    state_path : Optional[str]
+        The JSON file the cells are kept in between runs, None to keep them in memory.
+    cache : bool
+        Whether to reuse the results in `results_cache`, so a stale cell whose data was
+        simulated before, like after an edit is undone, is read rather than simulated.
+    cells : Dict[Tuple[Tuple[str, ...], str], MatrixCell]
+        The simulated cells, by team and enemy.
+    """
+
+    def __init__(
+        self,
+        teams: Sequence[Tuple[str, ...]],
+        policy: str = "greedy",
+        battles: int = 500,
+        processes: Optional[int] = None,
+        seed: int = 0,
+        state_path: Optional[str] = None,
+        cache: bool = True
+        ):
+        """Initializes a MatchupMatrix instance, loading the cells of the state file.
+
+        Parameters
+        ----------
+        teams : Sequence[Tuple[str, ...]]
+            The teams of the rows.
+        policy : str
+            The name of the policy playing the teams. Defaults to "greedy".
+        battles : int
+            The amount of battles of each cell. Defaults to 500.
+        processes : int
+            The amount of worker processes. Defaults to None, one for each CPU.
+        seed : int
+            The seed of the first battle of each cell. Defaults to 0.
+        state_path : str
+            The JSON file the cells are kept in. Defaults to None, in memory.
+        cache : bool
+            Whether to reuse the results in `results_cache`. Defaults to True.
+        """
+
+        self.teams = [tuple(team) for team in teams]
+        self.policy = policy
+        self.battles = battles
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+        self.state_path = state_path
+        self.cache = cache
+        self.cells: Dict[Tuple[Tuple[str, ...], str], MatrixCell] = {}
+
+        if state_path is not None:
+            self.load()
+
+    @property
+    def enemies(self) -> List[str]:
+        """The enemies of the columns, every enemy of the current data."""
+
+        return list(enemy_names)
+
+    def _settings(self) -> list:
+        # everything besides the data rows that the results of the cells depend on
+        return [self.policy, self.battles, self.seed]
+
+    def load(self):
+        """Load the cells of the state file, if it was written with the same settings."""
+
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+
+        except (OSError, ValueError):
+            return
+
+        if state.get("version") != STATE_VERSION or state.get("settings") != self._settings():
+            return
+
+        for team, enemy, dependencies, aggregate in state["cells"]:
+            self.cells[tuple(team), enemy] = MatrixCell(dependencies, Aggregate(*aggregate))
+
+    def save(self):
+        """Write the cells to the state file."""
+
+        write_json_atomic(self.state_path, {
+            "version": STATE_VERSION,
+            "settings": self._settings(),
+            "cells": [
+                [team, enemy, cell.dependencies, cell.aggregate]
+                for (team, enemy), cell in self.cells.items()
+            ],
+        })
+
+    def stale_cells(self) -> List[Tuple[Tuple[str, ...], str]]:
+        """Get the cells whose data rows changed since they were simulated.
+
+        Returns
+        -------
+        List[Tuple[Tuple[str, ...], str]] : The team and enemy of every stale cell, cells
+            never simulated included.
+        """
+
+        return [
+            (team, enemy)
+            for team in self.teams
+            for enemy in self.enemies
+            if (team, enemy) not in self.cells
+            or self.cells[team, enemy].dependencies
+            != dependency_hash(cell_dependencies(team, enemy))
+        ]
+
+    def update(self) -> int:
+        """Simulate the stale cells again and forget the cells of removed enemies.
+
+        Returns
+        -------
+        int : The amount of cells simulated.
+        """
+
+        stale = self.stale_cells()
+        seeds = range(self.seed, self.seed + self.battles)
+        tasks = [
+            (Matchup(team, (enemy,), self.policy), seeds, self.cache) for team, enemy in stale
+        ]
+
+        # a new pool each update, so forked workers see the reloaded tables
+        if self.processes > 1 and len(tasks) > 1:
+            with multiprocessing.Pool(min(self.processes, len(tasks))) as pool:
+                aggregates = pool.map(_simulate_cell, tasks)
+
+        else:
+            aggregates = list(map(_simulate_cell, tasks))
+
+        for (team, enemy), aggregate in zip(stale, aggregates):
+            self.cells[team, enemy] = MatrixCell(
+                dependency_hash(cell_dependencies(team, enemy)), aggregate
+                )
+
+        enemies = set(self.enemies)
+        self.cells = {
+            (team, enemy): cell
+            for (team, enemy), cell in self.cells.items()
+            if team in self.teams and enemy in enemies
+        }
+
+        if self.state_path is not None and stale:
+            self.save()
+
+        return len(stale)
+
+    def format_matrix(self) -> str:
+        """Describe the matrix of win rates.
+
+        Returns
+        -------
+        str : One row per team with its win rate against every enemy.
+        """
+
+        enemies = self.enemies
+        width = max(len(enemy) for enemy in enemies) + 2
+        team_width = max(len(" ".join(team)) for team in self.teams) + 2
+        lines = [f"{'team':<{team_width}}" + "".join(f"{enemy:>{width}}" for enemy in enemies)]
+
+        for team in self.teams:
+            lines.append(
+                f"{' '.join(team):<{team_width}}"
+                + "".join(
+                    f"{self.cells[team, enemy].aggregate.win_rate:>{width}.1%}"
+                    for enemy in enemies
+                    )
+                )
+
+        return "\n".join(lines)
+
+
+def watch(matrix: MatchupMatrix, interval: float = 1.0):
+    """Keep the matrix up to date, simulating the affected cells whenever a data file changes.
+
+    Parameters
+    ----------
+    matrix : MatchupMatrix
+        The matrix, printed after every update.
+    interval : float
+        The seconds between checks of the data files. Defaults to 1.
+    """
+
+    def modified_times() -> Dict[str, float]:
+        times = {}
+
+        for name, (_, path, _) in data_tables.items():
+            try:
+                times[name] = os.path.getmtime(path)
+
+            except OSError:
+                # a file being replaced by an editor, checked again next time
+                times[name] = None
+
+        return times
+
+    times = modified_times()
+
+    while True:
+        time.sleep(interval)
+        new_times = modified_times()
+        changed = [
+            name for name in data_tables
+            if new_times[name] != times[name] and new_times[name] is not None
+        ]
+
+        if not changed:
+            continue
+
+        times = new_times
+
+        try:
+            reload_tables(changed)
+
+        except (OSError, ValueError, KeyError) as error:
+            # a half written file, its next save triggers another reload
+            print(f"Could not load {', '.join(changed)}: {error}")
+            continue
+
+        start = time.perf_counter()
+        simulated = matrix.update()
+
+        print(matrix.format_matrix())
+        print(
+            f"{', '.join(changed)} changed, simulated {simulated} of {len(matrix.cells)} "
+            f"cells in {time.perf_counter() - start:.1f}s"
+            )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the matchup matrix.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Simulate every team against every enemy, redoing only the cells whose "
+        "data changed."
+        )
+    parser.add_argument(
+        "--max-size", type=int, default=3, help="the max amount of characters in a team"
+        )
+    parser.add_argument("--policy", default="greedy", help="the policy playing the teams")
+    parser.add_argument("--battles", type=int, default=500, help="the battles of each cell")
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument(
+        "--state", default=None,
+        help="a JSON file keeping the cells between runs, so a run only simulates the cells "
+        "whose data changed since the last one"
+        )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="keep running and update the matrix whenever a data file is saved"
+        )
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="the seconds between checks of the files"
+        )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="simulate even if the results are cached"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Compute the matchup matrix from the command line and print it.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    args = build_parser().parse_args(argv)
+    matrix = MatchupMatrix(
+        all_teams(tuple(job_classes), args.max_size), args.policy, args.battles,
+        args.processes, args.seed, args.state, not args.no_cache
+        )
+
+    start = time.perf_counter()
+    simulated = matrix.update()
+
+    print(matrix.format_matrix())
+    print(
+        f"simulated {simulated} of {len(matrix.cells)} cells in "
+        f"{time.perf_counter() - start:.1f}s"
+        )
+
+    if args.watch:
+        try:
+            watch(matrix, args.interval)
+
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Policies that choose the actions of the player characters in headless battles."""
+from __future__ import annotations
+import random
+from typing import Dict, Sequence, Tuple, Type
+
+from .battle import Action, CharacterView, StateView
+from .skills import BaseSkill
+
+
+# the name of each action used by scripts, skills and switches are numbered from 1
+action_names: Dict[str, int] = {
+    "attack": Action.ATTACK,
+    "heal": Action.HEAL,
+    **{f"skill{number}": Action.SKILL + number - 1 for number in range(1, Action.SKILL_COUNT + 1)},
+    **{f"switch{number}": Action.SWITCH + number - 1 for number in range(1, 5)},
+}
+
+
+def parse_action(name: str) -> int:
+    """Get the action of a name in `action_names`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the action, e.g. "attack" or "skill2".
+
+    Returns
+    -------
+    int : The `Action` value.
+    """
+
+    try:
+        return action_names[name.strip().lower()]
+
+    except KeyError:
+        raise ValueError(
+            f"Unknown action '{name}', choose from {', '.join(action_names)}."
+            ) from None
+
+
+def attack_damage(attacker: CharacterView, target: CharacterView) -> float:
+    """Get the expected damage of a basic attack.
+
+    Parameters
+    ----------
+    attacker : CharacterView
+        The attacking character.
+    target : CharacterView
+        The attacked character.
+
+    Returns
+    -------
+    float : The expected damage.
+    """
+
+    # same rolls as BaseCharacter.basic_attack
+    critical_chance = min(max(attacker.luck, 0), 100) / 100
+    normal_damage = max(attacker.attack_points - target.defense_points, 0)
+
+    return critical_chance * 2 * attacker.attack_points + (1 - critical_chance) * normal_damage
+
+
+def skill_damage(skill: BaseSkill, target: CharacterView) -> float:
+    """Get the expected health point damage of a skill.
+
+    Parameters
+    ----------
+    skill : BaseSkill
+        The skill.
+    target : CharacterView
+        The target of the skill.
+
+    Returns
+    -------
+    float : The expected damage, 0 for skills that don't deal damage.
+    """
+
+    action = getattr(skill, "action", "")
+    min_amount = getattr(skill, "min_amount", 0)
+    max_amount = getattr(skill, "max_amount", 0)
+
+    if action == "pierce":
+        return (min_amount + max_amount) / 2
+
+    if action == "break_defense":
+        # only the amount above the target's defense points is dealt as damage
+        defense = target.defense_points
+        amounts = range(min_amount, max_amount + 1)
+        return sum(amount - defense for amount in amounts if amount > defense) / len(amounts)
+
+    return 0.0
+
+
+class Policy:
+    """Chooses the action of the active player character on a player turn.
+
+    Attributes
+    ----------
+    name : str
+        The name of the policy in `policy_classes`.
+    rng : random.Random
+        The random number generator of the policy.
+    markov : bool
+        Whether the chosen action only depends on the state of the battle, which exact
+        solvers need to follow the policy.
+    """
+
+    name = ""
+    markov = True
+
+    def __init__(self, rng: random.Random = None):
+        """Initializes a Policy instance.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The random number generator of the policy. Defaults to the random module.
+        """
+
+        self.rng = rng or random
+
+    def reset(self, rng: random.Random = None):
+        """Prepare the policy for a new battle.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The random number generator for the battle. Defaults to keeping the current one.
+        """
+
+        if rng is not None:
+            self.rng = rng
+
+    def select_action(self, state: StateView) -> int:
+        """Choose an action.
+
+        Parameters
+        ----------
+        state : StateView
+            The state of the battle.
+
+        Returns
+        -------
+        int : One of the legal `Action` values in `state`.
+        """
+
+        raise NotImplementedError("Subclasses must implement the select_action method")
+
+    def action_probabilities(self, state: StateView) -> Tuple[Tuple[float, int], ...]:
+        """Get the chance of choosing each action, used by exact solvers.
+
+        Parameters
+        ----------
+        state : StateView
+            The state of the battle.
+
+        Returns
+        -------
+        Tuple[Tuple[float, int], ...] : The probability and `Action` value of each action
+            that can be chosen.
+        """
+
+        return ((1.0, self.select_action(state)),)
+
+
+class RandomPolicy(Policy):
+    """Chooses a random legal action."""
+
+    name = "random"
+
+    def select_action(self, state: StateView) -> int:
+        return self.rng.choice(state.legal_actions)
+
+    def action_probabilities(self, state: StateView) -> Tuple[Tuple[float, int], ...]:
+        probability = 1 / len(state.legal_actions)
+        return tuple((probability, action) for action in state.legal_actions)
+
+
+class GreedyPolicy(Policy):
+    """Chooses the legal action with the highest expected damage on the active enemy.
+
+    Switching deals no damage, so it's never chosen. Ties go to the lowest action.
+    """
+
+    name = "greedy"
+
+    def select_action(self, state: StateView) -> int:
+        player = state.player
+        enemy = state.enemy
+
+        best_action = Action.ATTACK
+        best_damage = attack_damage(player, enemy)
+
+        for action in state.legal_actions:
+            if Action.SKILL <= action < Action.SWITCH:
+                damage = skill_damage(state.skills[action - Action.SKILL], enemy)
+
+                if damage > best_damage:
+                    best_action, best_damage = action, damage
+
+        return best_action
+
+
+class ScriptedPolicy(Policy):
+    """Plays a fixed script of actions in order, starting over at the end.
+
+    A scripted action that can't be taken is replaced by a basic attack.
+
+    Attributes
+    ----------
+    script : Tuple[int, ...]
+        The `Action` values of the script.
+    """
+
+    name = "scripted"
+
+    # the action depends on the position in the script
+    markov = False
+
+    def __init__(self, script: Sequence[int] = (Action.ATTACK,), rng: random.Random = None):
+        """Initializes a ScriptedPolicy instance.
+
+        Parameters
+        ----------
+        script : Sequence[int]
+            The `Action` values of the script. Defaults to only attacking.
+        rng : random.Random
+            Not used, scripts have no random choices.
+        """
+
+        super().__init__(rng)
+
+        if not script:
+            raise ValueError("A script needs at least one action.")
+
+        self.script = tuple(script)
+        self._position = 0
+
+    def reset(self, rng: random.Random = None):
+        super().reset(rng)
+        self._position = 0
+
+    def select_action(self, state: StateView) -> int:
+        action = self.script[self._position]
+        self._position = (self._position + 1) % len(self.script)
+
+        return action if action in state.legal_actions else Action.ATTACK
+
+
+class MirrorEnemyPolicy(Policy):
+    """Follows the same rules as `EnemyCharacter.select_action`.
+
+    Player characters can't defend, so the first skill that raises their defense points
+    is used instead, or a basic attack if there isn't one.
+    """
+
+    name = "mirror"
+
+    def select_action(self, state: StateView) -> int:
+        player = state.player
+        enemy = state.enemy
+
+        # attack when the enemy can be defeated
+        if enemy.health_points + enemy.defense_points < player.attack_points:
+            return Action.ATTACK
+
+        if player.health_points < 0.2 * player.max_health_points:
+            return Action.HEAL
+
+        if player.defense_points < 0.5 * player.max_defense_points:
+            for action in state.legal_actions:
+                if not Action.SKILL <= action < Action.SWITCH:
+                    continue
+
+                if getattr(state.skills[action - Action.SKILL], "stat", "") == "defense_points":
+                    return action
+
+        return Action.ATTACK
+
+
+# the policy class of each policy name
+policy_classes: Dict[str, Type[Policy]] = {
+    policy_class.name: policy_class
+    for policy_class in (RandomPolicy, GreedyPolicy, ScriptedPolicy, MirrorEnemyPolicy)
+}
+
+
+def create_policy(spec: str, rng: random.Random = None) -> Policy:
+    """Create a policy from its name, as given on the command line.
+
+    Parameters
+    ----------
+    spec : str
+        The name of the policy in `policy_classes`. A scripted policy takes its actions
+        after a colon, e.g. "scripted:skill1,attack,attack".
+    rng : random.Random
+        The random number generator of the policy. Defaults to the random module.
+
+    Returns
+    -------
+    Policy : The created policy.
+    """
+
+    name, _, arguments = spec.partition(":")
+    policy_class = policy_classes.get(name.strip().lower())
+
+    if policy_class is None:
+        raise ValueError(f"Unknown policy '{name}', choose from {', '.join(policy_classes)}.")
+
+    if policy_class is ScriptedPolicy and arguments:
+        return ScriptedPolicy([parse_action(action) for action in arguments.split(",")], rng)
+
+    return policy_class(rng=rng)
@@ -0,0 +1,240 @@
+"""Object pools for reusing characters and game managers in long-running hosts."""
+import gc
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Set, Tuple, Type
+
+from .characters import BaseCharacter
+
+
+class ObjectPool:
+    """A pool of resettable objects.
+
+    Released objects are kept in a free list and reset when they are acquired again,
+    so steady state play doesn't allocate new objects.
+
+    Attributes
+    ----------
+    factory : Callable
+        Creates a new object when the free list is empty.
+    max_free : int
+        The max amount of released objects kept in the free list.
+    created : int
+        The amount of objects created by the pool.
+    reused : int
+        The amount of times a released object was reused.
+
+    Notes
+    -----
+    Objects in the pool must have a `reset` method that takes the same arguments as
+    `factory`. Releasing an object that is already in the free list raises a ValueError,
+    since it would be handed out twice.
+    """
+
+    def __init__(self, factory: Callable, max_free: int = 64):
+        """Initializes an ObjectPool instance.
+
+        Parameters
+        ----------
+        factory : Callable
+            Creates a new object when the free list is empty.
+        max_free : int
+            The max amount of released objects kept in the free list. Defaults to 64.
+        """
+
+        self.factory = factory
+        self.max_free = max_free
+        self.created = 0
+        self.reused = 0
+
+        # released objects waiting to be reused, and their ids to catch double releases
+        self._free: List[Any] = []
+        self._pooled: Set[int] = set()
+
+    def acquire(self, *args):
+        """Get an object from the pool, creating one if none is free.
+
+        Parameters
+        ----------
+        *args
+            The arguments passed to the object's `reset` method or to `factory`.
+
+        Returns
+        -------
+        Any : The acquired object.
+        """
+
+        if self._free:
+            obj = self._free.pop()
+            self._pooled.discard(id(obj))
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+
+        self.created += 1
+        return self.factory(*args)
+
+    def release(self, *objects):
+        """Return objects to the pool so they can be reused.
+
+        Parameters
+        ----------
+        *objects
+            The objects to release. They shouldn't be used after being released.
+
+        Raises
+        ------
+        ValueError
+            If an object was already released and not acquired since.
+        """
+
+        for obj in objects:
+            if id(obj) in self._pooled:
+                raise ValueError(f"{obj!r} was released to the pool twice.")
+
+            if len(self._free) < self.max_free:
+                self._free.append(obj)
+                self._pooled.add(id(obj))
+
+    @property
+    def free(self) -> int:
+        """The amount of released objects waiting to be reused."""
+
+        return len(self._free)
+
+
+class CharacterPool:
+    """Pools of player and enemy characters, one pool for each class and name.
+
+    Characters are reset from the precompiled job class and enemy templates when reused.
+    """
+
+    def __init__(self, max_free: int = 64):
+        """Initializes a CharacterPool instance.
+
+        Parameters
+        ----------
+        max_free : int
+            The max amount of released characters kept for each class and name.
+            Defaults to 64.
+        """
+
+        self.max_free = max_free
+        self.pools: Dict[Tuple[Type[BaseCharacter], str], ObjectPool] = {}
+
+    def acquire(self, character_class: Type[BaseCharacter], name: str) -> BaseCharacter:
+        """Get a character in its starting state.
+
+        Parameters
+        ----------
+        character_class : Type[BaseCharacter]
+            The class of the character, e.g. Tank or EnemyCharacter.
+        name : str
+            The name of the character.
+
+        Returns
+        -------
+        BaseCharacter : The acquired character.
+        """
+
+        key = (character_class, name)
+        pool = self.pools.get(key)
+
+        if pool is None:
+            pool = self.pools[key] = ObjectPool(partial(character_class, name), self.max_free)
+
+        return pool.acquire()
+
+    def release(self, *characters: BaseCharacter):
+        """Return characters to the pool so they can be reused.
+
+        Parameters
+        ----------
+        *characters : BaseCharacter
+            The characters to release.
+        """
+
+        for character in characters:
+            pool = self.pools.get((character.__class__, character.name))
+
+            # characters not created by the pool are left to the garbage collector
+            if pool is not None:
+                pool.release(character)
+
+    def clear(self):
+        """Drop every pool and its released characters.
+
+        Used when the data the characters are created from changes, so no character of the
+        old data is reused.
+        """
+
+        self.pools.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the amount of characters created and reused by the pools.
+
+        Returns
+        -------
+        Dict[str, int] : The created, reused and free counts.
+        """
+
+        return {
+            "created": sum(pool.created for pool in self.pools.values()),
+            "reused": sum(pool.reused for pool in self.pools.values()),
+            "free": sum(pool.free for pool in self.pools.values()),
+        }
+
+
+class GcMonitor:
+    """Counts garbage collections and the time spent in them.
+
+    Attributes
+    ----------
+    collections : List[int]
+        The amount of collections of each generation since the monitor started.
+    pause_seconds : float
+        The total time spent collecting.
+    """
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.pause_seconds = 0.0
+        self._started_at = 0.0
+
+    def start(self):
+        """Start counting garbage collections."""
+
+        if self._callback not in gc.callbacks:
+            gc.callbacks.append(self._callback)
+
+    def stop(self):
+        """Stop counting garbage collections."""
+
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the garbage collection counts.
+
+        Returns
+        -------
+        Dict[str, Any] : The collections of each generation and the total pause time.
+        """
+
+        return {"collections": tuple(self.collections), "pause_seconds": self.pause_seconds}
+
+    def _callback(self, phase: str, info: dict):
+        # called by the garbage collector at the start and stop of every collection
+        if phase == "start":
+            self._started_at = time.perf_counter()
+            return
+
+        self.collections[info["generation"]] += 1
+        self.pause_seconds += time.perf_counter() - self._started_at
+
+
+# shared pool of characters
+character_pool = CharacterPool()
+
+# shared garbage collection counter
+gc_monitor = GcMonitor()
@@ -0,0 +1,491 @@
+"""Raid battles with hundreds of combatants, stored as columns of stats.
+
+The columns are `array` objects updated by plain Python loops and comprehensions, the game
+has no numpy dependency, so a turn costs time linear in the combatants, every one of them
+acting once. Time it with `python -m combatgame.benchmark --raid COPIES`.
+"""
+from __future__ import annotations
+import random
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+from .scheduler import InitiativeScheduler
+from .stats import critical_chance
+
+if TYPE_CHECKING:
+    from .characters import BaseCharacter
+    from .enemies import EnemyCharacter
+
+
+class RaidTeam:
+    """The stats of a team stored in one array per stat.
+
+    Attributes
+    ----------
+    COLUMNS : tuple of str
+        The attribute names of the stats stored as columns.
+    characters : List[BaseCharacter]
+        The characters of the team.
+    alive : array
+        1 if the character at that index is alive, 0 otherwise.
+    alive_count : int
+        The amount of characters that are alive.
+
+    Notes
+    -----
+    Every name in `COLUMNS` is also an attribute holding an `array` of that stat.
+    """
+
+    COLUMNS = (
+        "health_points", "max_health_points", "defense_points", "max_defense_points",
+        "attack_points", "speed_points", "magic_points", "luck"
+        )
+
+    def __init__(self, characters: Iterable["BaseCharacter"]):
+        """Initializes a RaidTeam instance.
+
+        Parameters
+        ----------
+        characters : Iterable[BaseCharacter]
+            The characters of the team.
+        """
+
+        self.characters: List["BaseCharacter"] = list(characters)
+
+        # copy every stat into its own column, enemies have no magic points
+        for column in self.COLUMNS:
+            setattr(
+                self, column,
+                array("l", (getattr(character, column, 0) for character in self.characters))
+                )
+
+        self.alive = array("b", (character.is_alive() for character in self.characters))
+        self.alive_count = sum(self.alive)
+
+    def __len__(self):
+        return len(self.characters)
+
+    def alive_indexes(self) -> List[int]:
+        """Get the indexes of the alive characters.
+
+        Returns
+        -------
+        List[int] : The indexes of the alive characters.
+        """
+
+        return [index for index, alive in enumerate(self.alive) if alive]
+
+    def regenerate(self, restore_magic: bool):
+        """Update the stats of the whole team for a turn it spent idle.
+
+        Same as `GameManager.update_idle_character_stats` for every character at once.
+
+        Parameters
+        ----------
+        restore_magic : bool
+            Whether the team gains magic points, only player characters do.
+        """
+
+        self.speed_points = array("l", [speed + 1 for speed in self.speed_points])
+        self.defense_points = array("l", [max(defense, 0) for defense in self.defense_points])
+
+        if restore_magic:
+            self.magic_points = array("l", [magic + 1 for magic in self.magic_points])
+
+    def update_defeated(self) -> int:
+        """Mark characters with no health points left as defeated.
+
+        Returns
+        -------
+        int : The amount of characters defeated since the last update.
+        """
+
+        health_points = self.health_points
+        alive = self.alive
+        defeated = 0
+
+        for index, health in enumerate(health_points):
+            if alive[index] and health <= 0:
+                alive[index] = 0
+                health_points[index] = 0
+                defeated += 1
+
+        self.alive_count -= defeated
+        return defeated
+
+    def write_back(self):
+        """Copy the stats in the columns back onto the characters."""
+
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+
+            for character, value in zip(self.characters, values):
+                # enemies have no magic points
+                if hasattr(character, column):
+                    setattr(character, column, value)
+
+        for character in self.characters:
+            character.critical_chance = critical_chance(character.luck)
+
+    def summary(self) -> Dict[str, int]:
+        """Get the totals of the team's stats.
+
+        Returns
+        -------
+        Dict[str, int] : The alive count, team size and total health points of the team.
+        """
+
+        return {
+            "alive": self.alive_count,
+            "total": len(self.characters),
+            "health_points": sum(self.health_points),
+            "max_health_points": sum(self.max_health_points),
+            "defense_points": sum(self.defense_points),
+            "magic_points": sum(self.magic_points),
+        }
+
+
+class RaidCombatant:
+    """A combatant of a raid, seen through the columns of its team.
+
+    Gives the `InitiativeScheduler` the speed and alive flag of a row of a `RaidTeam`.
+
+    Attributes
+    ----------
+    team : RaidTeam
+        The team of the combatant.
+    index : int
+        The index of the combatant in its team.
+    """
+
+    __slots__ = ("team", "index")
+
+    def __init__(self, team: RaidTeam, index: int):
+        self.team = team
+        self.index = index
+
+    @property
+    def speed_points(self) -> int:
+        """The current speed points of the combatant."""
+
+        return self.team.speed_points[self.index]
+
+    def is_alive(self) -> bool:
+        """Check if the combatant is alive.
+
+        Returns
+        -------
+        bool : True if the combatant is alive, False otherwise.
+        """
+
+        return bool(self.team.alive[self.index])
+
+
+class RaidBattle:
+    """A battle where every alive combatant of both teams acts about once each turn.
+
+    The order of the actions comes from an `InitiativeScheduler` over every combatant,
+    so faster combatants act earlier and more often. Consecutive actions of one team are
+    run together in one loop over its columns: basic attacks spread over the alive targets
+    and area attacks hit every alive enemy. Both teams regenerate once at the end
+    of every turn. Active effects and single target skills are not used in raids.
+
+    Attributes
+    ----------
+    AREA_ATTACK_MAGIC_POINTS_COST : int
+        The magic points each player character spends on an area attack.
+    AREA_ATTACK_DAMAGE_RATIO : float
+        The ratio of the casters' total attack points spread evenly over every enemy.
+    players : RaidTeam
+        The player characters.
+    enemies : RaidTeam
+        The enemy characters.
+    turn : int
+        The amount of turns taken.
+    battle_log : deque
+        The latest logs of the raid.
+    scheduler : InitiativeScheduler
+        The initiative order of the combatants of both teams.
+    """
+
+    AREA_ATTACK_MAGIC_POINTS_COST = 10
+    AREA_ATTACK_DAMAGE_RATIO = 1.5
+
+    def __init__(
+        self,
+        player_characters: Iterable["BaseCharacter"],
+        enemies: Iterable["EnemyCharacter"],
+        rng: random.Random = None
+        ):
+        """Initializes a RaidBattle instance.
+
+        Parameters
+        ----------
+        player_characters : Iterable[BaseCharacter]
+            The player characters in the raid.
+        enemies : Iterable[EnemyCharacter]
+            The enemies in the raid.
+        rng : random.Random
+            The random number generator. Defaults to the random module.
+        """
+
+        self.players = RaidTeam(player_characters)
+        self.enemies = RaidTeam(enemies)
+        self.rng = rng or random
+        self.turn = 0
+        self.battle_log = deque(maxlen=5)
+
+        # the initiative order of every combatant of both teams
+        self.scheduler = InitiativeScheduler(
+            [
+                RaidCombatant(team, index)
+                for team in (self.players, self.enemies) for index in range(len(team))
+            ],
+            self.rng
+            )
+
+    def is_over(self) -> bool:
+        """Check if either team is defeated.
+
+        Returns
+        -------
+        bool : True if the raid is over, False otherwise.
+        """
+
+        return not self.players.alive_count or not self.enemies.alive_count
+
+    def player_won(self) -> bool:
+        """Check if the players defeated every enemy.
+
+        Returns
+        -------
+        bool : True if the players won, False otherwise.
+        """
+
+        return self.players.alive_count > 0 and not self.enemies.alive_count
+
+    def run_turn(self, player_action: str = "attack") -> List[str]:
+        """Run a turn of as many actions as there are alive combatants.
+
+        Parameters
+        ----------
+        player_action : str
+            The action of the player characters, "attack" or "area attack".
+            Defaults to "attack".
+
+        Returns
+        -------
+        List[str] : The logs of the turn, one for each run of actions of a team.
+        """
+
+        self.turn += 1
+        logs = []
+        remaining = self.players.alive_count + self.enemies.alive_count
+        next_actor = None
+
+        while remaining and not self.is_over():
+            actor = next_actor or self.scheduler.next_turn()
+            next_actor = None
+
+            if actor is None:
+                break
+
+            # gather the actions of the team until the other team's turn comes up
+            team = actor.team
+            indexes = [actor.index]
+            remaining -= 1
+
+            while remaining:
+                actor = self.scheduler.next_turn()
+
+                if actor is None:
+                    break
+
+                if actor.team is not team:
+                    next_actor = actor
+                    break
+
+                indexes.append(actor.index)
+                remaining -= 1
+
+            # the run of the other team may have defeated some of the actors
+            indexes = [index for index in indexes if team.alive[index]]
+
+            if not indexes:
+                continue
+
+            if team is self.enemies:
+                logs.append(self._enemy_actions(indexes))
+
+            elif player_action == "area attack":
+                logs.append(self._area_attack(self.players, self.enemies, indexes))
+
+            else:
+                logs.append(self._basic_attacks(self.players, self.enemies, "players", indexes))
+
+        if not self.is_over():
+            self.players.regenerate(restore_magic=True)
+            self.enemies.regenerate(restore_magic=False)
+
+        self.battle_log.extend(logs)
+        return logs
+
+    def write_back(self):
+        """Copy the raid stats back onto the characters."""
+
+        self.players.write_back()
+        self.enemies.write_back()
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Get the summarized state of the raid.
+
+        Returns
+        -------
+        Dict[str, Dict[str, int]] : The summary of each team.
+        """
+
+        return {"Players": self.players.summary(), "Enemies": self.enemies.summary()}
+
+    def _basic_attacks(
+        self, attackers: RaidTeam, defenders: RaidTeam, team_name: str, indexes: List[int]
+        ) -> str:
+        # every acting attacker uses a basic attack, spreading over the alive defenders
+        targets = defenders.alive_indexes()
+        randint = self.rng.randint
+        total_damage = 0
+        attacks = 0
+
+        health_points = defenders.health_points
+        defense_points = defenders.defense_points
+        luck = attackers.luck
+        attack_points = attackers.attack_points
+        speed_points = attackers.speed_points
+
+        for index in indexes:
+            if not targets:
+                break
+
+            target_slot = attacks % len(targets)
+            target = targets[target_slot]
+            attacks += 1
+            speed_points[index] -= 1
+
+            # same damage as BaseCharacter.basic_attack
+            if randint(1, 100) <= luck[index]:
+                damage = 2 * attack_points[index]
+
+            else:
+                damage = max(attack_points[index] - defense_points[target], 0)
+
+            health_points[target] -= damage
+            defense_points[target] -= 1
+            total_damage += damage
+
+            # stop targeting defeated defenders
+            if health_points[target] <= 0:
+                targets[target_slot] = targets[-1]
+                targets.pop()
+
+        defeated = defenders.update_defeated()
+
+        return f"The {team_name} attacked {attacks} times, dealing {total_damage}HP " \
+            f"and defeating {defeated}."
+
+    def _area_attack(self, casters: RaidTeam, defenders: RaidTeam, indexes: List[int]) -> str:
+        # acting casters with enough magic points combine their attack points into a hit
+        # spread evenly over every alive defender
+        cost = self.AREA_ATTACK_MAGIC_POINTS_COST
+        magic_points = casters.magic_points
+        caster_indexes = []
+
+        # a caster acting twice in the run pays twice
+        for index in indexes:
+            if magic_points[index] >= cost:
+                magic_points[index] -= cost
+                casters.speed_points[index] -= 1
+                caster_indexes.append(index)
+
+        if not caster_indexes:
+            return "Not enough magic points for an area attack."
+
+        power = int(
+            sum(casters.attack_points[index] for index in caster_indexes)
+            * self.AREA_ATTACK_DAMAGE_RATIO / max(defenders.alive_count, 1)
+            )
+
+        # the same damage on every alive defender, in one pass over the columns
+        defender_alive = defenders.alive
+        damages = [
+            max(power - defense, 0) if defender_alive[index] else 0
+            for index, defense in enumerate(defenders.defense_points)
+            ]
+        defenders.health_points = array(
+            "l", [health - damage for health, damage in zip(defenders.health_points, damages)]
+            )
+        defenders.defense_points = array(
+            "l", [
+                defense - 1 if defender_alive[index] else defense
+                for index, defense in enumerate(defenders.defense_points)
+                ]
+            )
+
+        defeated = defenders.update_defeated()
+
+        return f"{len(caster_indexes)} casters hit every enemy for {power} power, dealing " \
+            f"{sum(damages)}HP and defeating {defeated}."
+
+    def _enemy_actions(self, indexes: List[int]) -> str:
+        # every acting enemy follows the rules of EnemyCharacter.select_action against the
+        # player it faces
+        players = self.players
+        enemies = self.enemies
+        targets = players.alive_indexes()
+        randint = self.rng.randint
+
+        attacks = heals = defends = 0
+
+        for count, index in enumerate(indexes):
+            if not targets:
+                break
+
+            target_slot = count % len(targets)
+            target = targets[target_slot]
+            health = enemies.health_points[index]
+            defense = enemies.defense_points[index]
+            attack = enemies.attack_points[index]
+
+            can_defeat = players.health_points[target] + players.defense_points[target] < attack
+
+            if not can_defeat and health < 0.2 * enemies.max_health_points[index]:
+                enemies.health_points[index] += randint(1, 10)
+                enemies.speed_points[index] -= 1
+                heals += 1
+                continue
+
+            if not can_defeat and defense < 0.5 * enemies.max_defense_points[index]:
+                enemies.defense_points[index] = enemies.max_defense_points[index]
+                defends += 1
+                continue
+
+            enemies.speed_points[index] -= 1
+
+            if randint(1, 100) <= enemies.luck[index]:
+                damage = 2 * attack
+
+            else:
+                damage = max(attack - players.defense_points[target], 0)
+
+            players.health_points[target] -= damage
+            players.defense_points[target] -= 1
+            attacks += 1
+
+            # stop targeting defeated players
+            if players.health_points[target] <= 0:
+                targets[target_slot] = targets[-1]
+                targets.pop()
+
+        defeated = players.update_defeated()
+
+        return f"The enemies attacked {attacks} times, healed {heals} times and defended " \
+            f"{defends} times, defeating {defeated}."
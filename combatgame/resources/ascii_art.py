@@ -123,3 +123,14 @@ ascii_arts = {
 }
 
 
+
+# the art of enemies without their own art or a hand-made enemy in their name
+fallback_enemy_art = [
+    r"      /\_____/\ ",
+    r"     /  ?   ?  \ ",
+    r"    (  ==  ^  == )",
+    r"     )         (",
+    r"    (           )",
+    r"   ( (  )   (  ) )",
+    r"  (__(__)___(__)__)"
+]
@@ -0,0 +1,69 @@
+"""Message templates displayed when skills are used.
+
+Use {character} for the name of the character using the skill and {target} for the name of
+its target.
+"""
+skill_messages = {
+    "WhiskerGuard": [
+        "With a swift movement, {character} activates Whisker Guard, shielding itself from "
+        "harm.",
+        "{character} activates Whisker Guard, increasing their own defense.",
+        "By focusing their inner cat instincts, {character} empowers their defense with Whisker"
+        " Guard, ready to withstand any attack.",
+    ],
+
+    "ClawSwipe": [
+        "The sound of claws tearing through flesh fills the air as {character} delivers a "
+        "devastating clawswipe, leaving {target} defenseless!",
+        "A flurry of razor-sharp claws slices through the air as {character} executes a "
+        "powerful clawswipe, removing {target}'s defenses!",
+        "{target} is caught off guard as {character} launches a surprise attack with a "
+        "ferocious clawswipe, rendering {target}'s defenses useless!",
+    ],
+
+    "IllusionaryAura": [
+        "{character} casts Illusionary Aura, creating a captivating aura around themselves.",
+        "The mesmerizing aura of {character}'s Illusionary Aura confuses the enemy, causing "
+        "them to miss their attack!",
+        "The enemy's attack goes astray as they are bewildered by the illusionary aura "
+        "surrounding {character}.",
+    ],
+
+    "ReflectiveShield": [
+        "A shimmering shield envelops {character}, ready to reflect incoming physical damage "
+        "from {target}.",
+        "{character} channels their magic, creating a barrier of reflection to counter "
+        "{target}'s assault.",
+        "{character}'s Reflective Shield sparkles with energy, poised to send {target}'s "
+        "strength back at them.",
+    ],
+
+    "HealingPurr": [
+        "{character} emits a gentle purr, enveloping themselves in healing energy.",
+        "The soothing purrs of {character} resonate, restoring their health points.",
+        "{character}'s healing purr fills the air, bringing comfort and replenishing their "
+        "vitality.",
+    ],
+
+    "LuckyCharm": [
+        "The air around {character} shimmers with luck as the lucky charm takes effect.",
+        "The lucky charm envelops {character}, infusing them with a heightened sense of "
+        "favorable outcomes.",
+        "With the lucky charm activated, {character} feels a surge of good luck coursing "
+        "through their veins.",
+    ],
+
+    "PurrfectStrike": [
+        "With lightning speed, {character} lunges at {target}, aiming for a critical hit.",
+        "The sound of a fierce, focused purr fills the air as {character} delivers a "
+        "devastating blow at {target}.",
+        "{target} reels from {character}'s Purrfect Strike, unable to withstand the precise "
+        "attack.",
+    ],
+
+    "CripplingStrike": [
+        "{target}'s agility is hindered by {character}'s crippling strike!",
+        "With a calculated strike, {character} impairs {target}'s mobility!",
+        "{character}'s crippling strike disrupts {target}'s flow, hampering their movement!",
+    ],
+}
@@ -1,17 +1,59 @@
 """Module to store scenes"""
 import time
-from typing import List
-from functools import partial
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from .ui import Ui
 from .game_manager import GameManager
+from .campaign import StoryPlayer, story_graph, walk_story
 from .characters import BaseCharacter, Tank, MirrorMage, Healer, Assassin
+from .director import DifficultyDirector
 from .enemies import EnemyCharacter
+from .policies import Policy
+from .pooling import ObjectPool, character_pool, gc_monitor
 from .resources import lore
+from .search import MonteCarloAI
 
 
-class SceneManager:
-    """This class stores all the scenes as functions.
+class SceneLore(NamedTuple):
+    """The lore of a scene of the story graph.
+
+    Attributes
+    ----------
+    start : str
+        The lore shown when the scene starts.
+    steps : Tuple[Tuple[str, ...], ...]
+        The lore shown after each step of the scene, in order.
+    """
+
+    start: str
+    steps: Tuple[Tuple[str, ...], ...] = ()
+
+
+# the lore of every scene of `story_graph`, the lore after a lost combat is PLAYER_LOST
+scene_lore: Dict[str, SceneLore] = {
+    "scene_one": SceneLore(lore.SCENE_ONE[0], ((lore.SCENE_ONE[1],),)),
+    "scene_two": SceneLore(lore.SCENE_TWO),
+    "scene_two_option_one": SceneLore(
+        lore.SCENE_TWO_OPTION_ONE[0],
+        ((lore.SCENE_TWO_OPTION_ONE[1],),
+         (lore.SECOND_COMBAT_WIN, lore.SCENE_TWO_OPTION_ONE[2]))
+        ),
+    "scene_two_option_two": SceneLore(
+        lore.SCENE_TWO_OPTION_TWO[0], ((lore.SCENE_TWO_OPTION_TWO[1],),)
+        ),
+    "scene_two_option_three": SceneLore(
+        lore.SCENE_TWO_OPTION_THREE[0],
+        ((lore.SCENE_TWO_OPTION_THREE[1],),
+         (lore.SECOND_COMBAT_WIN, lore.SCENE_TWO_OPTION_THREE[2]))
+        ),
+}
+
+# the steps followed by the thunderstorm animation, the storm of The Enchanted Meadows
+thunderstorm_steps = {("scene_two_option_three", 0)}
+
+
+class SceneManager(StoryPlayer):
+    """This class runs the scenes of the story graph, showing their lore.
 
     Attributes
     ----------
@@ -19,16 +61,56 @@ class SceneManager:
         The characters player have selected to play.
     show_lore : bool
         Whether to display lore or skip it
+    game_manager_pool : ObjectPool
+        The pool of GameManager objects reused between combats.
+    player_policy : Policy
+        Chooses the player actions in combats, None to let the user choose.
+    director : DifficultyDirector
+        Nudges the enemies of combats towards a target win rate, None to leave them.
+    enemy_ai : MonteCarloAI
+        Selects the actions of the enemies of combats, None to use the enemy rules.
+    flash : bool
+        Whether to flash lightning during thunderstorm animation.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        player_policy: Optional[Policy] = None,
+        director: Optional[DifficultyDirector] = None,
+        enemy_ai: Optional[MonteCarloAI] = None
+        ):
         self.selected_characters: List[BaseCharacter] = []
+        self.player_policy = player_policy
+        self.director = director
+        self.enemy_ai = enemy_ai
+        self.flash = True
+        self.game_manager_pool = ObjectPool(GameManager)
 
     def reset(self):
         """Resets the class variables to default values."""
 
+        # release the selected characters so the next run can reuse them
+        character_pool.release(*self.selected_characters)
+
         self.selected_characters: List[BaseCharacter] = []
 
+    def pool_stats(self) -> dict:
+        """Get the allocation and garbage collection counts of the scenes.
+
+        Returns
+        -------
+        dict : The character pool, GameManager pool and garbage collection counts.
+        """
+
+        return {
+            "characters": character_pool.stats(),
+            "game_managers": {
+                "created": self.game_manager_pool.created,
+                "reused": self.game_manager_pool.reused
+            },
+            "gc": gc_monitor.stats()
+        }
+
     def run_combat(self, enemies: List[EnemyCharacter]):
         """Runs a combat scene.
         
@@ -46,40 +128,23 @@ class SceneManager:
         # displays the start of combat
         Ui.Animation.display_combat_start(self.selected_characters, enemies)
 
-        # initialize a GameManager object to handle the combat logic
-        combat_manager = GameManager(self.selected_characters, enemies)
+        for enemy in enemies:
+            enemy.ai = self.enemy_ai
+
+        # get a GameManager object from the pool to handle the combat logic
+        combat_manager = self.game_manager_pool.acquire(self.selected_characters, enemies)
+        combat_manager.player_policy = self.player_policy
+        combat_manager.director = self.director
 
         # start the combat and assign the return value to player_won
         player_won = combat_manager.start_combat()
 
-        return player_won
-
-
-    def restore_all_character_stats(self):
-        """restore stats for alive player characters"""
-
-        for character in self.selected_characters:
-            if character.is_alive():
-                character.restore_stats()
+        # the combat is over, release the GameManager and the enemies
+        self.game_manager_pool.release(combat_manager)
+        character_pool.release(*enemies)
 
-    def add_points_to_all_characters(self, stat: str, amount: int):
-        """Add stats points to all alive player characters
-
-        Parameters
-        ----------
-        stat : str
-            The attribute name of a stat.
-        amount : int
-            The amount to add.
-        """
-
-        for character in self.selected_characters:
-            if character.is_alive():
-                # get the current value of that stat
-                current_value = getattr(character, stat, 0)
+        return player_won
 
-                # increase the value of that stat by `amount`
-                setattr(character, stat, current_value + amount)
 
     def start_scene(self):
         """Start of the game flow.
@@ -104,10 +169,18 @@ class SceneManager:
 
         # options dictionary for menu
         characters = {
-            "Whiskerwall (Tank)": ["Whiskerwall (Tank)", Tank("Whiskerwall")],
-            "Purrception (MirrorMage)": ["Purrception (MirrorMage)", MirrorMage("Purrception")],
-            "Meowdicine (Healer)": ["Meowdicine (Healer)", Healer("Meowdicine")],
-            "Shadowpaw (Assassin)": ["Shadowpaw (Assassin)", Assassin("Shadowpaw")]
+            "Whiskerwall (Tank)": [
+                "Whiskerwall (Tank)", character_pool.acquire(Tank, "Whiskerwall")
+                ],
+            "Purrception (MirrorMage)": [
+                "Purrception (MirrorMage)", character_pool.acquire(MirrorMage, "Purrception")
+                ],
+            "Meowdicine (Healer)": [
+                "Meowdicine (Healer)", character_pool.acquire(Healer, "Meowdicine")
+                ],
+            "Shadowpaw (Assassin)": [
+                "Shadowpaw (Assassin)", character_pool.acquire(Assassin, "Shadowpaw")
+                ]
             }
 
         # let user select their characters
@@ -128,163 +201,75 @@ class SceneManager:
             # prevents player from choosing the same character again
             characters.pop(selected_character[0])
 
-        return False
+        # release the characters that weren't chosen
+        character_pool.release(*(option[1] for option in characters.values()))
 
-    def scene_one(self):
-        """First scene of the game flow.
-        
-        Returns
-        -------
-        game_over : bool
-            True if game is over, False otherwise.
-        """
-
-        # Create the list of EnemyCharacter objects met in the first scene
-        encountered_enemies = [EnemyCharacter("Viperstrike")]
-
-        # display lore
-        Ui.execute_lore(lore.SCENE_ONE[0])
-
-        # starts the combat and assign the return value to player_won
-        player_won = self.run_combat(encountered_enemies)
-
-        time.sleep(2)
-
-        if not player_won:
-            Ui.execute_lore(lore.PLAYER_LOST)
-            return True
-
-        Ui.execute_lore(lore.SCENE_ONE[1])
         return False
 
-    def scene_two(self, flash=True):
-        """Second scene of the game flow.
-        
-        Parameters
-        ----------
-        flash : bool
-            Whether to have flash effects for thunderstorm. Defaults to True.
+    def enter_scene(self, scene: str):
+        """Show the lore of a scene of the story graph, see `StoryPlayer.enter_scene`."""
 
-        Returns
-        -------
-        game_over : bool
-            True if game is over, False otherwise.
+        Ui.execute_lore(scene_lore[scene].start)
 
-        Notes
-        -----
-        FLASH WARNING!!
-        """
+    def after_step(self, scene: str, index: int, step: tuple):
+        """Show the lore following a step, see `StoryPlayer.after_step`."""
 
-        Ui.execute_lore(lore.SCENE_TWO)
+        if (scene, index) in thunderstorm_steps:
+            Ui.Animation.display_thunderstorm(flash=self.flash)
 
-        scene_two_options_dict = {
-            "The Whispering Caverns": self.scene_two_option_one,
-            "The Misty Peaks": self.scene_two_option_two,
-            "The Enchanted Meadows": partial(self.scene_two_option_three, flash)
-        }
+        for text in scene_lore[scene].steps[index]:
+            Ui.execute_lore(text)
 
-        options_menu = Ui.Menu("Choose a Path", scene_two_options_dict)
-        selected_option = options_menu.select_option()
+    def fight(self, scene: str, enemy_names: Tuple[str, ...]) -> bool:
+        """Run the combat of a scene, see `StoryPlayer.fight`."""
 
-        # run the selected option scene and return result
-        return selected_option()
-
-    def doomshroud_combat_scene(self):
-        """Doomshroud combat scene."""
-
-        # enemy involved in second combat scene
-        encountered_enemies = [EnemyCharacter("Doomshroud")]
-
-        # starts the combat and assign the return value to player_won
-        player_won = self.run_combat(encountered_enemies)
-
-        if player_won:
-            Ui.execute_lore(lore.SECOND_COMBAT_WIN)
-
-        return player_won
-
-    def scene_two_option_one(self):
-        """Second scene option one: The Whispering Caverns."""
-
-        option_one_lore = lore.SCENE_TWO_OPTION_ONE
-        Ui.execute_lore(option_one_lore[0])
-
-        # restore all character stats
-        self.restore_all_character_stats()
-
-        Ui.execute_lore(option_one_lore[1])
+        player_won = self.run_combat(
+            [character_pool.acquire(EnemyCharacter, name) for name in enemy_names]
+            )
 
-        player_won = self.doomshroud_combat_scene()
+        time.sleep(2)
 
         if not player_won:
-            # returns game_over = True, if player lost
-            return True
-
-        Ui.execute_lore(option_one_lore[2])
-
-        return self.scene_two_option_two()
-
-    def scene_two_option_two(self):
-        """Second scene option one: The Misty Peaks."""
-
-        Ui.execute_lore(lore.SCENE_TWO_OPTION_TWO[0])
+            Ui.execute_lore(lore.PLAYER_LOST)
 
-        # enemies encountered in option Misty Peaks
-        encountered_enemies = [EnemyCharacter("Mistwalker")]
+        return player_won
 
-        # starts the combat and assign the return value to player_won
-        player_won = self.run_combat(encountered_enemies)
+    def choose_branch(self, scene: str, branches: Tuple[str, ...]) -> Optional[str]:
+        """Let the player choose the next scene, see `StoryPlayer.choose_branch`."""
 
-        Ui.execute_lore(lore.SCENE_TWO_OPTION_TWO[1])
+        options_menu = Ui.Menu(
+            "Choose a Path", {story_graph[branch].title: branch for branch in branches}
+            )
 
-        return player_won
+        return options_menu.select_option()
 
-    def scene_two_option_three(self, flash):
-        """Second scene option one: The Enchanted Meadows.
+    def run_scenes(self, flash):
+        """Run the character selection, then the scenes of the story graph.
         
         Parameters
         ----------
         flash : bool
-            Whether to flash lightning during thunderstorm.
+            Whether to flash lightning during thunderstorm animation.
 
         Notes
         -----
-        Flash Warning!!
+        FLASH WARNING!!
         """
 
-        option_three_lore = lore.SCENE_TWO_OPTION_THREE
-        Ui.execute_lore(option_three_lore[0])
-
-        # add 10 magic points to alive player characters
-        self.add_points_to_all_characters("magic_points", 10)
-
-        Ui.Animation.display_thunderstorm(flash=flash)
-        Ui.execute_lore(option_three_lore[1])
+        self.flash = flash
 
-        player_won = self.doomshroud_combat_scene()
+        # count garbage collections only while the scenes are running
+        gc_monitor.start()
 
-        if not player_won:
-            # return game_over = True, if player lost.
-            return True
+        try:
+            self.start_scene()
+            walk_story(self, self.selected_characters)
 
-        Ui.execute_lore(option_three_lore[2])
-        return self.scene_two_option_two()
+            # the story ends with the first lost combat or after the last scene
+            Ui.Animation.display_game_over()
+            time.sleep(2)
 
-    def run_scenes(self, flash):
-        """Run the scenes in order.
-        
-        Parameters
-        ----------
-        flash : bool
-            Whether to flash lightning during thunderstorm animation.
-        """
-        scenes_order = [self.start_scene, self.scene_one, partial(self.scene_two, flash)]
-        for scene in scenes_order:
-            game_over = scene()
-            if game_over:
-                # resets class variables
-                self.reset()
-
-                Ui.Animation.display_game_over()
-                time.sleep(2)
-                return
+        finally:
+            # resets class variables so the next run starts with new characters
+            self.reset()
+            gc_monitor.stop()
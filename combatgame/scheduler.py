@@ -0,0 +1,294 @@
+"""Turn scheduling and alive bookkeeping for battles with many combatants.
+
+`AliveRoster` keeps the alive characters of both teams of every battle. The
+`InitiativeScheduler` drives the turn order of raids only, where every combatant of both
+sides acts. A `Battle` has a single active character per side, so its turn order compares
+their speed points, see `Battle.determine_turn_order`.
+"""
+from __future__ import annotations
+import heapq
+import random
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .characters import BaseCharacter
+
+
+class AliveRoster:
+    """Keeps count of which characters of a team are alive.
+
+    Defeated characters have to be reported with `mark_defeated`, after which checking
+    if the team is defeated is O(1) and finding the first alive character is O(log n).
+
+    Attributes
+    ----------
+    characters : List[BaseCharacter]
+        The characters of the team.
+    alive_count : int
+        The amount of characters that are alive.
+    """
+
+    def __init__(self, characters: Iterable["BaseCharacter"]):
+        """Initializes an AliveRoster instance.
+
+        Parameters
+        ----------
+        characters : Iterable[BaseCharacter]
+            The characters of the team.
+        """
+
+        self.characters: List["BaseCharacter"] = list(characters)
+
+        # index of each character in the team
+        self._indexes: Dict[int, int] = {
+            id(character): index for index, character in enumerate(self.characters)
+            }
+
+        # alive flag of each character
+        self._alive = [character.is_alive() for character in self.characters]
+        self.alive_count = sum(self._alive)
+
+        # min heap of alive indexes, defeated indexes are dropped when they reach the top
+        self._alive_indexes = [index for index, alive in enumerate(self._alive) if alive]
+
+    def __len__(self):
+        return len(self.characters)
+
+    def index(self, character: "BaseCharacter") -> int:
+        """Get the index of a character in the team.
+
+        Parameters
+        ----------
+        character : BaseCharacter
+            The character in the team.
+
+        Returns
+        -------
+        int : The index of the character.
+        """
+
+        return self._indexes[id(character)]
+
+    def is_alive(self, index: int) -> bool:
+        """Check if the character at an index is alive.
+
+        Parameters
+        ----------
+        index : int
+            The index of the character.
+
+        Returns
+        -------
+        bool : True if the character hasn't been marked as defeated, False otherwise.
+        """
+
+        return self._alive[index]
+
+    def mark_defeated(self, character: "BaseCharacter"):
+        """Record that a character has been defeated.
+
+        Parameters
+        ----------
+        character : BaseCharacter
+            The defeated character.
+        """
+
+        index = self._indexes[id(character)]
+
+        if self._alive[index]:
+            self._alive[index] = False
+            self.alive_count -= 1
+
+    def snapshot(self) -> Tuple[bool, ...]:
+        """Capture which characters are alive, see `restore`.
+
+        Returns
+        -------
+        Tuple[bool, ...] : The alive flag of each character.
+        """
+
+        return tuple(self._alive)
+
+    def restore(self, snapshot: Tuple[bool, ...]):
+        """Restore the alive flags captured by `snapshot` in place.
+
+        Parameters
+        ----------
+        snapshot : Tuple[bool, ...]
+            The alive flag of each character.
+        """
+
+        # nothing to rebuild if the same characters are alive
+        if tuple(self._alive) == snapshot:
+            return
+
+        self._alive[:] = snapshot
+        self.alive_count = sum(snapshot)
+
+        # an ascending list is a valid min heap
+        self._alive_indexes = [index for index, alive in enumerate(snapshot) if alive]
+
+    def first_alive(self) -> Optional["BaseCharacter"]:
+        """Get the alive character with the lowest index.
+
+        Returns
+        -------
+        BaseCharacter : The first alive character, None if every character is defeated.
+        """
+
+        alive_indexes = self._alive_indexes
+
+        # drop defeated indexes from the top of the heap
+        while alive_indexes and not self._alive[alive_indexes[0]]:
+            heapq.heappop(alive_indexes)
+
+        if not alive_indexes:
+            return None
+
+        return self.characters[alive_indexes[0]]
+
+    def any_alive(self) -> bool:
+        """Check if any character of the team is alive.
+
+        Returns
+        -------
+        bool : True if at least one character is alive, False otherwise.
+        """
+
+        return self.alive_count > 0
+
+
+class InitiativeScheduler:
+    """A timeline that decides which combatant acts next based on speed.
+
+    Every combatant has a time for its next action. After acting, a combatant is
+    rescheduled `TIMELINE_STEP / speed_points` later, so faster combatants act more
+    often. Each turn is a heap pop and push, O(log n) in the number of combatants.
+
+    Removed combatants stay in the heap until they reach the top, but aren't counted in
+    the length. Defeated ones are only noticed at the top, so the length counts them until
+    their turn comes.
+
+    Attributes
+    ----------
+    TIMELINE_STEP : float
+        The time a combatant with 1 speed point waits between actions.
+    current_time : float
+        The time of the latest action.
+    """
+
+    TIMELINE_STEP = 100.0
+
+    def __init__(
+        self,
+        combatants: Iterable["BaseCharacter"] = (),
+        rng: random.Random = None
+        ):
+        """Initializes an InitiativeScheduler instance.
+
+        Parameters
+        ----------
+        combatants : Iterable[BaseCharacter]
+            The combatants in the battle.
+        rng : random.Random
+            The random number generator for breaking ties. Defaults to the random module.
+        """
+
+        self.current_time = 0.0
+        self._rng = rng or random
+
+        # heap of (next action time, -speed, tie break, sequence, combatant)
+        self._timeline = []
+        self._sequence = 0
+
+        # ids of the combatants in the timeline
+        self._members = set()
+
+        # ids of removed combatants still in the heap, dropped when they reach the top
+        self._removed = set()
+
+        for combatant in combatants:
+            self.add(combatant)
+
+    def __len__(self):
+        return len(self._members)
+
+    def add(self, combatant: "BaseCharacter"):
+        """Add a combatant to the timeline.
+
+        Parameters
+        ----------
+        combatant : BaseCharacter
+            The combatant to add.
+        """
+
+        key = id(combatant)
+
+        if key in self._members:
+            return
+
+        self._members.add(key)
+
+        # a removed combatant that is still in the heap keeps its place
+        if key in self._removed:
+            self._removed.discard(key)
+            return
+
+        self._schedule(combatant)
+
+    def remove(self, combatant: "BaseCharacter"):
+        """Remove a combatant from the timeline, combatants not in it are ignored.
+
+        Parameters
+        ----------
+        combatant : BaseCharacter
+            The combatant to remove.
+        """
+
+        key = id(combatant)
+
+        if key in self._members:
+            self._members.discard(key)
+            self._removed.add(key)
+
+    def next_turn(self) -> Optional["BaseCharacter"]:
+        """Get the combatant that acts next and schedule its following action.
+
+        Defeated and removed combatants are dropped from the timeline.
+
+        Returns
+        -------
+        BaseCharacter : The combatant whose turn it is, None if the timeline is empty.
+        """
+
+        timeline = self._timeline
+
+        while timeline:
+            action_time, _, _, _, combatant = heapq.heappop(timeline)
+
+            # drop removed and defeated combatants
+            if id(combatant) in self._removed:
+                self._removed.discard(id(combatant))
+                continue
+
+            if not combatant.is_alive():
+                self._members.discard(id(combatant))
+                continue
+
+            self.current_time = action_time
+            self._schedule(combatant)
+            return combatant
+
+        return None
+
+    def _schedule(self, combatant: "BaseCharacter"):
+        # schedule the next action of a combatant based on its current speed
+        speed = max(combatant.speed_points, 1)
+        action_time = self.current_time + self.TIMELINE_STEP / speed
+
+        # faster combatants act first on the same time, random order if speed is also the same
+        self._sequence += 1
+        heapq.heappush(
+            self._timeline,
+            (action_time, -speed, self._rng.random(), self._sequence, combatant)
+            )
@@ -0,0 +1,502 @@
+"""Search based enemy AI with a wall-clock budget per decision."""
+from __future__ import annotations
+import math
+import random
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .skills import SkillEffects
+
+if TYPE_CHECKING:
+    from .characters import BaseCharacter
+    from .enemies import EnemyCharacter
+
+
+# indexes of the search state tuple
+FIGHTER, PLAYER_HEALTH, PLAYER_DEFENSE, PLAYER_SPEED, PLAYER_MAGIC, INVINCIBLE, \
+    REFLECTIVE_SHIELD, ENEMY_HEALTH, ENEMY_DEFENSE, ENEMY_SPEED = range(10)
+
+# indexes of the stats of a player character in the search
+ATTACK, CRITICAL_CHANCE, MAX_HEALTH, DAMAGE_SKILLS, START = range(5)
+
+# the actions of an enemy
+ENEMY_ACTIONS = ("attack", "heal", "defend")
+
+# the skill actions that deal damage
+DAMAGE_ACTIONS = ("pierce", "break_defense")
+
+
+class MonteCarloAI:
+    """Chooses the action of an enemy with a Monte Carlo tree search of the rest of the
+    battle.
+
+    The battle is copied into a tuple of the stats that change in a turn (health, defense
+    and speed points of the active characters, the player's magic points and the uses of
+    its Invincible and Reflective Shield effects) and the index of the fighting player
+    character. The tuple is the key of the enemy's turns in the transposition table, so
+    turns reached in different orders share their statistics. The stats that don't change
+    during the battle pick the table, so tables are kept between turns and each decision
+    reuses the tree grown by the previous ones.
+
+    Each iteration picks the enemy's actions with UCB1, rolls the random outcomes, expects
+    the player to take the action with the highest expected damage like `GreedyPolicy`,
+    and plays out new turns with the rules of `EnemyCharacter.select_rule_action`. A
+    defeated player character is replaced by the next alive one. Iterations run until the
+    wall-clock budget runs out or the search is interrupted, then the most played action
+    is taken. If no iteration finished, the rules are used.
+
+    Attributes
+    ----------
+    budget : float
+        The wall-clock budget of a decision in seconds.
+    max_iterations : int
+        The max amount of iterations of a decision, None for no limit.
+    max_entries : int
+        The max amount of enemy turns kept in the transposition tables.
+    rng : random.Random
+        The random number generator of the search.
+    decisions : int
+        The amount of decisions made.
+    iterations : int
+        The amount of iterations run.
+    EXPLORATION : float
+        The exploration constant of UCB1.
+    ROLLOUT_TURNS : int
+        The max amount of enemy turns played out, the rest of the battle is estimated.
+    """
+
+    EXPLORATION = 1.0
+    ROLLOUT_TURNS = 60
+
+    def __init__(
+        self,
+        budget: float = 0.005,
+        max_iterations: Optional[int] = None,
+        max_entries: int = 100_000,
+        rng: random.Random = None
+        ):
+        """Initializes a MonteCarloAI instance.
+
+        Parameters
+        ----------
+        budget : float
+            The wall-clock budget of a decision in seconds. Defaults to 5 milliseconds.
+        max_iterations : int
+            The max amount of iterations of a decision. Defaults to None, no limit. A limit
+            with a large budget makes the decisions repeatable.
+        max_entries : int
+            The max amount of enemy turns kept in the transposition tables. Defaults to
+            100,000.
+        rng : random.Random
+            The random number generator of the search. Defaults to a new random.Random.
+        """
+
+        self.budget = budget
+        self.max_iterations = max_iterations
+        self.max_entries = max_entries
+        self.rng = rng or random.Random()
+
+        self.decisions = 0
+        self.iterations = 0
+
+        # the plays and total value of each action of each enemy turn, by battle
+        self._tables: Dict[tuple, Dict[tuple, Tuple[List[int], List[float]]]] = {}
+        self._entries = 0
+        self._interrupted = False
+
+        # the stats that don't change in the battle being searched
+        self._enemy: tuple = ()
+        self._fighters: Tuple[tuple, ...] = ()
+        self._table: Dict[tuple, Tuple[List[int], List[float]]] = {}
+
+    def interrupt(self):
+        """Stop the running search, the most played action so far is taken."""
+
+        self._interrupted = True
+
+    def stats(self) -> Dict[str, float]:
+        """Get the amount of searching done.
+
+        Returns
+        -------
+        Dict[str, float] : The decisions, iterations and transposition table entries.
+        """
+
+        return {
+            "decisions": self.decisions,
+            "iterations": self.iterations,
+            "mean_iterations": self.iterations / self.decisions if self.decisions else 0.0,
+            "entries": self._entries,
+        }
+
+    def select_action(
+        self,
+        enemy: "EnemyCharacter",
+        active_player: "BaseCharacter",
+        player_characters: Sequence["BaseCharacter"] = ()
+        ) -> Callable:
+        """Select the action of the enemy.
+
+        Parameters
+        ----------
+        enemy : EnemyCharacter
+            The enemy whose turn it is.
+        active_player : BaseCharacter
+            The active player character.
+        player_characters : Sequence[BaseCharacter]
+            Every player character, the alive ones take the place of the active player
+            character when it's defeated. Defaults to only the active player character.
+
+        Returns
+        -------
+        Callable : The action, same as `EnemyCharacter.select_action`.
+        """
+
+        self.decisions += 1
+        deadline = time.perf_counter() + self.budget
+        self._interrupted = False
+
+        root = self._copy_state(enemy, active_player, player_characters)
+        max_iterations = self.max_iterations
+        iterations = 0
+
+        # the clock is checked after every iteration, which takes microseconds
+        while not self._interrupted and time.perf_counter() < deadline:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+
+            self._iterate(root)
+            iterations += 1
+
+        self.iterations += iterations
+        node = self._table.get(root)
+
+        if node is None or not any(node[0]):
+            return enemy.select_rule_action(active_player)
+
+        plays = node[0]
+        action = ENEMY_ACTIONS[max(range(len(ENEMY_ACTIONS)), key=plays.__getitem__)]
+
+        if action == "heal":
+            return enemy.heal
+
+        if action == "defend":
+            return enemy.defend
+
+        return partial(enemy.basic_attack, active_player)
+
+    def _copy_state(
+        self,
+        enemy: "EnemyCharacter",
+        active_player: "BaseCharacter",
+        player_characters: Sequence["BaseCharacter"]
+        ) -> tuple:
+        # copy the battle into a state tuple and pick the table of the stats that don't change
+        waiting = tuple(
+            character for character in player_characters
+            if character is not active_player and character.is_alive()
+            )
+
+        self._fighters = tuple(
+            self._copy_player(character) for character in (active_player, *waiting)
+            )
+        self._enemy = (
+            enemy.attack_points, enemy.critical_chance / 100, enemy.max_health_points,
+            enemy.max_defense_points
+            )
+
+        # start over when the tables are full
+        if self._entries > self.max_entries:
+            self._tables.clear()
+            self._entries = 0
+
+        # the stats of the waiting player characters don't change until they fight
+        table_key = (self._enemy, self._fighters[0][:START], self._fighters[1:])
+        self._table = self._tables.setdefault(table_key, {})
+
+        return (0, *self._fighters[0][START], enemy.health_points, enemy.defense_points,
+                enemy.speed_points)
+
+    @staticmethod
+    def _copy_player(character: "BaseCharacter") -> tuple:
+        # the stats of a player character and the stats it starts fighting with
+        invincible = character.get_active_effect(SkillEffects.Invincible)
+        reflective_shield = character.get_active_effect(SkillEffects.ReflectiveShield)
+
+        return (
+            character.attack_points, character.critical_chance / 100,
+            character.max_health_points,
+            tuple(
+                (skill.action, skill.min_amount, skill.max_amount, skill.magic_points_cost,
+                 skill.speed_points_cost)
+                for skill in character.skills
+                if getattr(skill, "action", "") in DAMAGE_ACTIONS
+                ),
+            (
+                character.health_points, character.defense_points, character.speed_points,
+                character.magic_points, invincible.use_count if invincible else 0,
+                reflective_shield.use_count if reflective_shield else 0
+                )
+            )
+
+    def _iterate(self, root: tuple):
+        # grow the tree from the enemy turn at the root by one iteration
+        table = self._table
+        path = []
+        state = root
+
+        while True:
+            node = table.get(state)
+
+            # a new enemy turn is added to the tree and played out
+            if node is None:
+                table[state] = ([0] * len(ENEMY_ACTIONS), [0.0] * len(ENEMY_ACTIONS))
+                self._entries += 1
+                value = self._rollout(state)
+                break
+
+            action = self._select(node)
+            path.append((node, action))
+
+            state = self._next_enemy_turn(
+                self._sample(self._enemy_outcomes(state, ENEMY_ACTIONS[action]))
+                )
+
+            if not isinstance(state, tuple):
+                value = state
+                break
+
+        # every action on the path gets the value of the battle for the enemy
+        for (plays, values), action in path:
+            plays[action] += 1
+            values[action] += value
+
+    def _select(self, node: Tuple[List[int], List[float]]) -> int:
+        # pick the action with the highest UCB1 score, unplayed actions first
+        plays, values = node
+        total = sum(plays)
+
+        if total < len(plays) and 0 in plays:
+            return plays.index(0)
+
+        log_total = math.log(total)
+        exploration = self.EXPLORATION
+
+        return max(
+            range(len(plays)),
+            key=lambda action: values[action] / plays[action] +
+            exploration * math.sqrt(log_total / plays[action])
+            )
+
+    def _next_enemy_turn(self, state: tuple):
+        # play the player turns until it's the enemy's turn, returns the state of the enemy
+        # turn, or the value of the battle for the enemy if it ended
+        while True:
+            if state[ENEMY_HEALTH] <= 0:
+                return -1.0
+
+            # the next waiting player character takes the place of a defeated one
+            if state[PLAYER_HEALTH] <= 0:
+                fighter = state[FIGHTER] + 1
+
+                if fighter == len(self._fighters):
+                    return 1.0
+
+                state = (fighter, *self._fighters[fighter][START], *state[ENEMY_HEALTH:])
+
+            enemy_speed = state[ENEMY_SPEED]
+            player_speed = state[PLAYER_SPEED]
+
+            # the faster character acts, a tie is a coin flip
+            if enemy_speed > player_speed or (
+                    enemy_speed == player_speed and self.rng.random() < 0.5):
+                return state
+
+            state = self._sample(self._player_outcomes(state))
+
+    def _rollout(self, state: tuple) -> float:
+        # play out the battle with the enemy rules, estimating it after ROLLOUT_TURNS
+        for _ in range(self.ROLLOUT_TURNS):
+            state = self._next_enemy_turn(
+                self._sample(self._enemy_outcomes(state, self._rule_action(state)))
+                )
+
+            if not isinstance(state, tuple):
+                return state
+
+        return self._evaluate(state)
+
+    def _rule_action(self, state: tuple) -> str:
+        # the rules of EnemyCharacter.select_rule_action
+        enemy_attack, _, enemy_max_health, enemy_max_defense = self._enemy
+
+        if state[PLAYER_HEALTH] + state[PLAYER_DEFENSE] < enemy_attack:
+            return "attack"
+
+        if state[ENEMY_HEALTH] < 0.2 * enemy_max_health:
+            return "heal"
+
+        if state[ENEMY_DEFENSE] < 0.5 * enemy_max_defense:
+            return "defend"
+
+        return "attack"
+
+    def _evaluate(self, state: tuple) -> float:
+        # estimate the battle by racing the turns each side needs to defeat the other with
+        # basic attacks, from -1 (enemy defeated) to 1 (player characters defeated)
+        enemy_attack, enemy_critical_chance = self._enemy[:2]
+        fighter = self._fighters[state[FIGHTER]]
+
+        player_damage = fighter[CRITICAL_CHANCE] * 2 * fighter[ATTACK] + \
+            (1 - fighter[CRITICAL_CHANCE]) * max(fighter[ATTACK] - state[ENEMY_DEFENSE], 0)
+        enemy_turns = state[ENEMY_HEALTH] / max(player_damage, 0.1)
+
+        # the fighting player character, then the waiting ones
+        starts = [state[PLAYER_HEALTH:REFLECTIVE_SHIELD + 1]]
+        starts.extend(waiting[START] for waiting in self._fighters[state[FIGHTER] + 1:])
+
+        player_turns = 0.0
+
+        for health, defense, _, _, invincible, reflective_shield in starts:
+            enemy_damage = enemy_critical_chance * 2 * enemy_attack + \
+                (1 - enemy_critical_chance) * max(enemy_attack - defense, 0)
+
+            # blocked and reflected attacks add turns
+            player_turns += health / max(enemy_damage, 0.1) + invincible + reflective_shield
+
+        return (enemy_turns - player_turns) / (player_turns + enemy_turns)
+
+    def _sample(self, outcomes: Sequence[Tuple[float, tuple]]) -> tuple:
+        # roll one of the (probability, state) outcomes
+        roll = self.rng.random()
+
+        for probability, state in outcomes:
+            roll -= probability
+
+            if roll < 0:
+                return state
+
+        return outcomes[-1][1]
+
+    def _enemy_outcomes(self, state: tuple, action: str) -> Tuple[Tuple[float, tuple], ...]:
+        # the (probability, state) outcomes of an enemy action, same rules as the characters
+        enemy_attack, enemy_critical_chance, _, enemy_max_defense = self._enemy
+
+        fighter, player_health, player_defense, player_speed, player_magic, invincible, \
+            reflective_shield, enemy_health, enemy_defense, enemy_speed = state
+
+        # the idle player character regenerates after the enemy acts
+        idle_defense = max(player_defense, 0)
+        idle_speed = player_speed + 1
+        idle_magic = player_magic + 1
+
+        if action == "defend":
+            return ((1.0, (
+                fighter, player_health, idle_defense, idle_speed, idle_magic, invincible,
+                reflective_shield, enemy_health, enemy_max_defense, enemy_speed
+                )),)
+
+        if action == "heal":
+            return tuple(
+                (0.1, (
+                    fighter, player_health, idle_defense, idle_speed, idle_magic, invincible,
+                    reflective_shield, enemy_health + amount, enemy_defense, enemy_speed - 1
+                    ))
+                for amount in range(1, 11)
+                )
+
+        # the attack is blocked by Invincible, or else reflected by Reflective Shield
+        if invincible:
+            return ((1.0, (
+                fighter, player_health, idle_defense, idle_speed, idle_magic, invincible - 1,
+                reflective_shield, enemy_health, enemy_defense, enemy_speed - 1
+                )),)
+
+        if reflective_shield:
+            return ((1.0, (
+                fighter, player_health, idle_defense, idle_speed, idle_magic, invincible,
+                reflective_shield - 1, enemy_health - max(enemy_attack - enemy_defense, 0),
+                enemy_defense - min(enemy_attack, enemy_defense), enemy_speed - 1
+                )),)
+
+        hit_defense = max(player_defense - 1, 0)
+
+        critical_state = (
+            fighter, player_health - 2 * enemy_attack, hit_defense, idle_speed, idle_magic,
+            invincible, reflective_shield, enemy_health, enemy_defense, enemy_speed - 1
+            )
+        normal_state = (
+            fighter, player_health - max(enemy_attack - player_defense, 0), hit_defense,
+            idle_speed, idle_magic, invincible, reflective_shield, enemy_health,
+            enemy_defense, enemy_speed - 1
+            )
+
+        return (
+            (enemy_critical_chance, critical_state),
+            (1 - enemy_critical_chance, normal_state)
+            )
+
+    def _player_outcomes(self, state: tuple) -> Tuple[Tuple[float, tuple], ...]:
+        # the (probability, state) outcomes of the player's action with the highest expected
+        # damage, same rules as the characters and GreedyPolicy
+        fighter, player_health, player_defense, player_speed, player_magic, invincible, \
+            reflective_shield, enemy_health, enemy_defense, enemy_speed = state
+
+        player_attack, player_critical_chance, _, damage_skills, _ = self._fighters[fighter]
+
+        normal_damage = max(player_attack - enemy_defense, 0)
+        best_damage = player_critical_chance * 2 * player_attack + \
+            (1 - player_critical_chance) * normal_damage
+        best_skill = None
+
+        for skill in damage_skills:
+            action, min_amount, max_amount, magic_cost, speed_cost = skill
+
+            if player_magic < magic_cost or player_speed < speed_cost:
+                continue
+
+            if action == "pierce":
+                damage = (min_amount + max_amount) / 2
+
+            else:
+                amounts = range(min_amount, max_amount + 1)
+                damage = sum(
+                    amount - enemy_defense for amount in amounts if amount > enemy_defense
+                    ) / len(amounts)
+
+            if damage > best_damage:
+                best_skill, best_damage = skill, damage
+
+        # the idle enemy regenerates after the player acts
+        idle_speed = enemy_speed + 1
+
+        if best_skill is None:
+            hit_defense = max(enemy_defense - 1, 0)
+
+            return (
+                (player_critical_chance, (
+                    fighter, player_health, player_defense, player_speed - 1, player_magic,
+                    invincible, reflective_shield, enemy_health - 2 * player_attack,
+                    hit_defense, idle_speed
+                    )),
+                (1 - player_critical_chance, (
+                    fighter, player_health, player_defense, player_speed - 1, player_magic,
+                    invincible, reflective_shield, enemy_health - normal_damage,
+                    hit_defense, idle_speed
+                    ))
+                )
+
+        # both damage skills leave the enemy without defense points
+        action, min_amount, max_amount, magic_cost, speed_cost = best_skill
+        probability = 1 / (max_amount - min_amount + 1)
+        defense = 0 if action == "pierce" else enemy_defense
+
+        return tuple(
+            (probability, (
+                fighter, player_health, player_defense, player_speed - speed_cost,
+                player_magic - magic_cost, invincible, reflective_shield,
+                enemy_health - max(amount - defense, 0), 0, idle_speed
+                ))
+            for amount in range(min_amount, max_amount + 1)
+            )
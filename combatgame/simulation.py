@@ -0,0 +1,552 @@
+"""Headless battle simulation for batch runs.
+
+Usage:
+    python -m combatgame.simulation --team Tank Healer --enemies Viperstrike --policy greedy
+    python -m combatgame.simulation --team Tank Assassin --enemies Doomshroud --raid 100 \
+        --raid-action "area attack"
+"""
+from __future__ import annotations
+import argparse
+import random
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from .battle import Action, Battle
+from .cache import ResultsCache, results_cache
+from .characters import BaseCharacter, job_classes
+from .enemies import EnemyCharacter, enemy_names
+from .policies import Policy, create_policy, policy_classes
+from .pooling import character_pool
+from .raid import RaidBattle
+from .search import MonteCarloAI
+from .stats import StatModifiers
+
+if TYPE_CHECKING:
+    from .director import DifficultyDirector
+
+
+# combats that take longer are stopped as a loss
+MAX_TURNS = 500
+
+# the actions the player characters of a raid can take
+RAID_ACTIONS = ("attack", "area attack")
+
+
+class BattleResult(NamedTuple):
+    """The result of a simulated battle."""
+
+    seed: int
+    player_won: bool
+    turns: int
+
+
+def policy_rng(seed: int) -> random.Random:
+    """Get the random number generator of the policy for a battle.
+
+    The policy has its own generator so its choices don't shift the rolls of the battle.
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the battle.
+
+    Returns
+    -------
+    random.Random : The random number generator.
+    """
+
+    return random.Random(f"policy-{seed}")
+
+
+def add_points(characters: Sequence[BaseCharacter], stat: str, amount: int):
+    """Add points to a stat of the alive characters, like the boosts of the scenes.
+
+    Parameters
+    ----------
+    characters : Sequence[BaseCharacter]
+        The characters.
+    stat : str
+        The attribute name of the stat.
+    amount : int
+        The amount to add.
+    """
+
+    for character in characters:
+        if not character.is_alive():
+            continue
+
+        # stats with modifier stacks get a modifier so it's dropped on restore
+        if stat in StatModifiers.STATS:
+            character.stat_modifiers.add(stat, amount, "scene")
+
+        else:
+            setattr(character, stat, getattr(character, stat, 0) + amount)
+
+
+def play_battle(
+    battle: Battle,
+    policy: Policy,
+    max_turns: int = MAX_TURNS,
+    director: Optional["DifficultyDirector"] = None
+    ) -> bool:
+    """Play a battle to the end, with the policy choosing the player actions.
+
+    Parameters
+    ----------
+    battle : Battle
+        The battle to play.
+    policy : Policy
+        The policy of the player.
+    max_turns : int
+        The amount of turns before the battle is stopped as a loss. Defaults to MAX_TURNS.
+    director : DifficultyDirector
+        Adjusts the enemies between turns. Defaults to None.
+
+    Returns
+    -------
+    bool : True if the player won, False otherwise.
+    """
+
+    while not battle.is_game_over() and battle.turn_count < max_turns:
+        player = battle.active_player_character
+        enemy = battle.active_enemy_character
+
+        if battle.start_turn() is player:
+            turn_taken, _ = battle.take_player_turn(policy.select_action(battle.state_view()))
+
+            # an action that can't be taken is replaced by a basic attack
+            if not turn_taken:
+                battle.take_player_turn(Action.ATTACK)
+
+        else:
+            battle.take_enemy_turn()
+
+        battle.end_turn(player, enemy)
+
+        if director is not None:
+            director.adjust(battle)
+
+    return battle.player_won()
+
+
+def simulate(
+    team: Sequence[str],
+    enemies: Sequence[str],
+    policy: Policy,
+    seeds: Sequence[int],
+    max_turns: int = MAX_TURNS,
+    enemy_ai: Optional[MonteCarloAI] = None,
+    boosts: Optional[Dict[str, int]] = None,
+    rng_class: Type[random.Random] = random.Random,
+    director: Optional["DifficultyDirector"] = None
+    ) -> List[BattleResult]:
+    """Simulate a battle for every seed.
+
+    Parameters
+    ----------
+    team : Sequence[str]
+        The job class of each player character.
+    enemies : Sequence[str]
+        The name of each enemy.
+    policy : Policy
+        The policy of the player.
+    seeds : Sequence[int]
+        The seed of each battle.
+    max_turns : int
+        The amount of turns before a battle is stopped as a loss. Defaults to MAX_TURNS.
+    enemy_ai : MonteCarloAI
+        Selects the actions of the enemies. Defaults to None, the enemy rules.
+    boosts : Dict[str, int]
+        The points added to a stat of every player character before the battle, like the
+        boosts of the scenes. Defaults to None.
+    rng_class : Type[random.Random]
+        The class of the random number generator of the battles, seeded with the seed of
+        each battle. Defaults to random.Random.
+    director : DifficultyDirector
+        Adjusts the enemies between turns, reset before every battle. Defaults to None.
+
+    Returns
+    -------
+    List[BattleResult] : The result of each battle.
+    """
+
+    results = []
+    battle: Optional[Battle] = None
+
+    for seed in seeds:
+        # characters start from their templates, named after their job class
+        player_characters = [
+            character_pool.acquire(job_classes[job_class], job_class) for job_class in team
+            ]
+        enemy_characters = [character_pool.acquire(EnemyCharacter, name) for name in enemies]
+        rng = rng_class(seed)
+
+        for enemy in enemy_characters:
+            enemy.ai = enemy_ai
+
+        for stat, amount in (boosts or {}).items():
+            add_points(player_characters, stat, amount)
+
+        if battle is None:
+            battle = Battle(player_characters, enemy_characters, rng)
+
+        else:
+            battle.reset(player_characters, enemy_characters, rng)
+
+        policy.reset(policy_rng(seed))
+
+        if director is not None:
+            director.reset()
+
+        player_won = play_battle(battle, policy, max_turns, director)
+        results.append(BattleResult(seed, player_won, battle.turn_count))
+
+        character_pool.release(*player_characters, *enemy_characters)
+
+    return results
+
+
+def simulate_raid(
+    team: Sequence[str],
+    enemies: Sequence[str],
+    copies: int,
+    player_action: str,
+    seeds: Sequence[int],
+    max_turns: int = MAX_TURNS
+    ) -> List[BattleResult]:
+    """Simulate a raid for every seed, see `RaidBattle`.
+
+    Parameters
+    ----------
+    team : Sequence[str]
+        The job class of each player character, repeated `copies` times.
+    enemies : Sequence[str]
+        The name of each enemy, repeated `copies` times.
+    copies : int
+        The amount of copies of the team and of the enemies in the raid.
+    player_action : str
+        The action of the player characters every turn, one of `RAID_ACTIONS`.
+    seeds : Sequence[int]
+        The seed of each raid.
+    max_turns : int
+        The amount of turns before a raid is stopped as a loss. Defaults to MAX_TURNS.
+
+    Returns
+    -------
+    List[BattleResult] : The result of each raid.
+    """
+
+    results = []
+
+    for seed in seeds:
+        # the raid plays on columns copied from the characters, which it leaves untouched
+        player_characters = [
+            character_pool.acquire(job_classes[job_class], job_class)
+            for _ in range(copies) for job_class in team
+            ]
+        enemy_characters = [
+            character_pool.acquire(EnemyCharacter, name) for _ in range(copies) for name in enemies
+            ]
+        raid = RaidBattle(player_characters, enemy_characters, random.Random(seed))
+
+        while not raid.is_over() and raid.turn < max_turns:
+            raid.run_turn(player_action)
+
+        results.append(BattleResult(seed, raid.player_won(), raid.turn))
+
+        character_pool.release(*player_characters, *enemy_characters)
+
+    return results
+
+
+class Matchup(NamedTuple):
+    """A team, its enemies and how the battles are played, as simulated in batches.
+
+    Attributes
+    ----------
+    team : Tuple[str, ...]
+        The job class of each player character.
+    enemies : Tuple[str, ...]
+        The name of each enemy.
+    policy : str
+        The player policy, as given to `create_policy`.
+    max_turns : int
+        The amount of turns before a battle is stopped as a loss.
+    """
+
+    team: Tuple[str, ...]
+    enemies: Tuple[str, ...]
+    policy: str = "greedy"
+    max_turns: int = MAX_TURNS
+
+    def __str__(self):
+        return f"{' '.join(self.team)} vs {' '.join(self.enemies)} ({self.policy})"
+
+
+def parse_matchup(spec: str) -> Matchup:
+    """Parse a matchup given on the command line.
+
+    Parameters
+    ----------
+    spec : str
+        The matchup as "team:enemies[:policy]" with comma separated job classes and enemy
+        names, e.g. "Tank,Healer:Viperstrike:greedy".
+
+    Returns
+    -------
+    Matchup : The parsed matchup.
+    """
+
+    parts = spec.split(":", 2)
+
+    if len(parts) < 2:
+        raise ValueError(f"A matchup is written as team:enemies[:policy], got '{spec}'.")
+
+    team, enemies = (tuple(name.strip() for name in part.split(",")) for part in parts[:2])
+
+    for job_class in team:
+        if job_class not in job_classes:
+            raise ValueError(f"Unknown job class '{job_class}'.")
+
+    for name in enemies:
+        if name not in enemy_names:
+            raise ValueError(f"Unknown enemy '{name}'.")
+
+    policy = parts[2] if len(parts) > 2 else "greedy"
+    create_policy(policy)
+
+    return Matchup(team, enemies, policy)
+
+
+class Aggregate(NamedTuple):
+    """The totals of a batch of simulated battles, which can be combined across batches.
+
+    Attributes
+    ----------
+    battles : int
+        The amount of battles.
+    wins : int
+        The amount of battles the player won.
+    turns : int
+        The total amount of turns of the battles.
+    """
+
+    battles: int = 0
+    wins: int = 0
+    turns: int = 0
+
+    def combine(self, other: "Aggregate") -> "Aggregate":
+        """Add the totals of another batch.
+
+        Parameters
+        ----------
+        other : Aggregate
+            The totals of the other batch.
+
+        Returns
+        -------
+        Aggregate : The totals of both batches.
+        """
+
+        return Aggregate(
+            self.battles + other.battles, self.wins + other.wins, self.turns + other.turns
+            )
+
+    @property
+    def win_rate(self) -> float:
+        """The share of the battles the player won, 0 without battles."""
+
+        return self.wins / self.battles if self.battles else 0.0
+
+    @property
+    def mean_turns(self) -> float:
+        """The mean amount of turns of a battle, 0 without battles."""
+
+        return self.turns / self.battles if self.battles else 0.0
+
+
+def simulate_matchup(
+    matchup: Matchup, seeds: Sequence[int], cache: Optional[ResultsCache] = None
+    ) -> Aggregate:
+    """Simulate a matchup for every seed and total the results.
+
+    Parameters
+    ----------
+    matchup : Matchup
+        The matchup.
+    seeds : Sequence[int]
+        The seed of each battle.
+    cache : ResultsCache
+        Where the totals are looked up before simulating and stored after. Defaults to
+        None, always simulate.
+
+    Returns
+    -------
+    Aggregate : The totals of the battles.
+    """
+
+    key = None
+
+    if cache is not None:
+        # a range is keyed by its bounds, so long ranges make short keys
+        seeds_key = (
+            [seeds.start, seeds.stop, seeds.step] if isinstance(seeds, range) else list(seeds)
+            )
+        key = cache.key("matchup", list(matchup), seeds_key)
+        cached = cache.get(key)
+
+        if cached is not None:
+            return Aggregate(*cached)
+
+    results = simulate(
+        matchup.team, matchup.enemies, create_policy(matchup.policy), seeds, matchup.max_turns
+        )
+    aggregate = Aggregate(
+        len(results),
+        sum(result.player_won for result in results),
+        sum(result.turns for result in results)
+        )
+
+    if key is not None:
+        cache.put(key, aggregate)
+
+    return aggregate
+
+
+def summarize(results: Sequence[BattleResult]) -> Dict[str, float]:
+    """Get the win rate and mean turns of simulated battles.
+
+    Parameters
+    ----------
+    results : Sequence[BattleResult]
+        The results of the battles.
+
+    Returns
+    -------
+    Dict[str, float] : The amount of battles, wins, win rate and mean turns.
+    """
+
+    battles = len(results)
+    wins = sum(result.player_won for result in results)
+
+    return {
+        "battles": battles,
+        "wins": wins,
+        "win_rate": wins / battles if battles else 0.0,
+        "mean_turns": sum(result.turns for result in results) / battles if battles else 0.0,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the simulation.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Simulate battles without the UI.")
+    parser.add_argument(
+        "--team", nargs="+", default=["Tank", "MirrorMage", "Healer"],
+        choices=sorted(job_classes), help="the job class of each player character"
+        )
+    parser.add_argument(
+        "--enemies", nargs="+", default=["Viperstrike"], choices=sorted(enemy_names),
+        help="the name of each enemy"
+        )
+    parser.add_argument(
+        "--policy", default="greedy",
+        help=f"the player policy: {', '.join(policy_classes)} "
+        "(scripted takes actions, e.g. scripted:skill1,attack)"
+        )
+    parser.add_argument(
+        "--enemy-ai", choices=("rules", "search"), default="rules",
+        help="how the enemies select their actions"
+        )
+    parser.add_argument(
+        "--search-budget", type=float, default=5.0,
+        help="the milliseconds the search enemy AI has for each decision"
+        )
+    parser.add_argument("--battles", type=int, default=1000, help="the amount of battles")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument(
+        "--max-turns", type=int, default=MAX_TURNS,
+        help="the amount of turns before a battle is stopped as a loss"
+        )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="simulate even if the results are cached"
+        )
+    parser.add_argument(
+        "--raid", type=int, metavar="COPIES",
+        help="play raids of COPIES copies of the team against COPIES copies of the enemies, "
+        "where every combatant acts each turn (the policy is not used)"
+        )
+    parser.add_argument(
+        "--raid-action", choices=RAID_ACTIONS, default="attack",
+        help="the action of the player characters in raids"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the simulation from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        policy = create_policy(args.policy)
+
+    except ValueError as error:
+        parser.error(str(error))
+    seeds = range(args.seed, args.seed + args.battles)
+
+    if args.raid is not None:
+        if args.raid < 1:
+            parser.error("--raid needs at least 1 copy.")
+
+        # raids are only simulated from the command line, so their results aren't cached
+        summary = summarize(simulate_raid(
+            args.team, args.enemies, args.raid, args.raid_action, seeds, args.max_turns
+            ))
+        title = f"{args.raid}x {' '.join(args.team)} vs {args.raid}x " \
+            f"{' '.join(args.enemies)} (raid, {args.raid_action})"
+
+    elif args.enemy_ai == "search":
+        title = f"{' '.join(args.team)} vs {' '.join(args.enemies)} ({args.policy} policy, " \
+            "search enemy AI)"
+
+        # the search is bound by time rather than seeds, so its results aren't cached
+        summary = summarize(simulate(
+            args.team, args.enemies, policy, seeds, args.max_turns,
+            MonteCarloAI(args.search_budget / 1000)
+            ))
+
+    else:
+        title = f"{' '.join(args.team)} vs {' '.join(args.enemies)} ({args.policy} policy, " \
+            "rules enemy AI)"
+        aggregate = simulate_matchup(
+            Matchup(tuple(args.team), tuple(args.enemies), args.policy, args.max_turns), seeds,
+            None if args.no_cache else results_cache
+            )
+        summary = {
+            "battles": aggregate.battles,
+            "wins": aggregate.wins,
+            "win_rate": aggregate.win_rate,
+            "mean_turns": aggregate.mean_turns,
+        }
+
+    print(title)
+    print(
+        f"Won {summary['wins']}/{summary['battles']} battles ({summary['win_rate']:.1%}), "
+        f"{summary['mean_turns']:.1f} turns on average."
+        )
+
+if __name__ == "__main__":
+    main()
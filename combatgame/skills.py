@@ -1,9 +1,11 @@
 """Classes implemenetation for skills"""
 
 import os
-import random
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Dict, Tuple
 
+from .effects import BaseEffect, Stacking
+from .resources.skill_messages import skill_messages
+from .stats import StatModifiers
 from .utils.utils import csv_to_dict
 
 # import only for type hinting
@@ -42,8 +44,8 @@ class BaseSkill:
     require_target : bool
         True if skill affects an enemy, False otherwise.
 
-    message_displays : list of str
-        A list of message displays when skill is used.
+    message_displays : tuple of str
+        The message displays when skill is used.
 
     belongs_to : str
         The character the skill belongs to.
@@ -54,7 +56,7 @@ class BaseSkill:
     magic_points_cost: int = 0
     speed_points_cost: int = 0
     require_target: bool = False
-    message_displays: list[str] = []
+    message_displays: Tuple[str, ...] = ()
     belongs_to: str = ""
 
     def __init__(self, skill_class_name: str):
@@ -77,12 +79,28 @@ class BaseSkill:
         """
         attr = skill_attributes[skill_class_name]
         self.name: str = str(attr["name"])
+        self.description: str = str(attr["description"])
+        self.message_displays: Tuple[str, ...] = tuple(skill_messages[skill_class_name])
         self.magic_points_cost: int = int(attr["mp_cost"])
         self.speed_points_cost: int = int(attr["sp_cost"])
         require_target_attr = str(attr["require_target"]).lower()
         self.require_target: bool = require_target_attr == "yes"
         self.belongs_to: str = str(attr["belongs_to"])
 
+    def __setattr__(self, name, value):
+        # shared skill definitions can't be changed once frozen by the SkillRegistry
+        if self.__dict__.get("_frozen", False):
+            raise AttributeError(
+                f"{self.__class__.__name__} is shared between characters and can't be modified."
+                )
+
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """Make the skill immutable so it can be shared safely between characters."""
+
+        self._frozen = True
+
     def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
         """Use the skill.
         
@@ -105,7 +123,7 @@ class SkillEffects:
     It provides a centralized location to access and manage the different skills effects.
     """
 
-    class Invincible:
+    class Invincible(BaseEffect):
         """Data class for invincible effect.
         
         Attributes
@@ -119,23 +137,67 @@ class SkillEffects:
         belongs_to : BaseSkill
             The skill the effect belong to.
         """
-        def __init__(self):
+
+        # resolved before any other effect and stacks the amount of attacks blocked
+        priority = 0
+        stacking = Stacking.STACK
+
+        def __init__(self, use_count: int = 1, duration: int = None):
+            super().__init__(use_count, duration)
             self.name = "Invincible"
             self.description = "Blocks any incoming attacks."
-            self.use_count = 1
             self.belongs_to = "Illusionary Aura"
 
-        def __str__(self):
-            return self.name
+        def on_hit(self, attacker: "BaseCharacter", target: "BaseCharacter"):
+            """Block the incoming attack.
+
+            Parameters
+            ----------
+            attacker : BaseCharacter
+                The attacker that tried to attack.
+            target : BaseCharacter
+                The character with this effect.
 
-    class ReflectiveShield:
+            Returns
+            -------
+            log : str
+                The battle log.
+            """
+
+            return f"{attacker.name}'s attack was REJECTED due to {target.name}'s" + \
+                f" {self.belongs_to}."
+
+    class ReflectiveShield(BaseEffect):
         """Data class for reflective shield effect."""
-        def __init__(self):
+
+        # resolved after Invincible and stacks the amount of attacks reflected
+        priority = 1
+        stacking = Stacking.STACK
+
+        def __init__(self, use_count: int = 1, duration: int = None):
+            super().__init__(use_count, duration)
             self.name = "Reflective Shield"
             self.description = "Reflects any incoming attacks back to the enemies."
-            self.use_count = 1
             self.belongs_to = "Reflective Shield"
 
+        def on_hit(self, attacker: "BaseCharacter", target: "BaseCharacter"):
+            """Reflect the incoming attack back to the attacker.
+
+            Parameters
+            ----------
+            attacker : BaseCharacter
+                The attacker that tried to attack.
+            target : BaseCharacter
+                The character with this effect.
+
+            Returns
+            -------
+            log : str
+                The battle log.
+            """
+
+            return self.take_effect(attacker, attacker.attack_points)
+
         def take_effect(self, attacker: "BaseCharacter", damage: int):
             """Use the effect.
             
@@ -167,549 +229,291 @@ class SkillEffects:
 
             return log
 
-        def __str__(self):
-            return self.name
-
-
-class Skills:
-    """A container class for storing skill classes.
-
-    This class serves as a container for all the skills in the game.
-    It provides a centralized location to access and manage the different skills.
-    """
-
-    # Tank job class skill (WhiskerGuard, ClawSwipe)
-    class WhiskerGuard(BaseSkill):
-        """Represents WhiskerGuard skill.
-
-        Attributes
-        ----------
-        name : str
-            The name of the skill.
-
-        description : str
-            The description of the skill.
 
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
-
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
-
-        message_displays : list of str
-            A list of message displays when skill is used.
-        """
-
-        def __init__(self):
-            self.description = "Increases the character's defense by a random amount with " \
-                "cat-like reflexes."
-            self.message_displays = [
-                "With a swift movement, {character} activates Whisker Guard, shielding itself "
-                "from harm.",
-                "{character} activates Whisker Guard, increasing their own defense.",
-                "By focusing their inner cat instincts, {character} empowers their defense with "
-                "Whisker Guard, ready to withstand any attack."
-            ]
-
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
-
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the WhiskerGuard skill.
-            Increases defense point by 5 to 15 points.
-
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
+# skill compilers
+# each compiler turns a row of skill_attributes.csv into a specialized `use` function, with
+# every value the skill needs bound in its closure so using a skill does no extra lookups
+# random rolls use the random number generator of the character using the skill
 
-            Target : EnemyCharacter
-                The enemy to use the skill on.
 
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
+def _compile_raise_stat(attr: dict, message_displays: Tuple[str, ...]) -> Callable:
+    # raises a stat of the character using the skill by a random amount
+    stat = attr["stat"]
+    min_amount = int(attr["min_amount"])
+    max_amount = int(attr["max_amount"])
+    source = attr["name"]
+    result = "\n" + attr["result"]
 
-            # amount of defense points to increase by
-            defense_points_increase = random.randint(5, 15)
+    # stats with modifier stacks are raised with a modifier
+    is_modifiable = stat in StatModifiers.STATS
 
-            # increase character's defense points
-            character.defense_points += defense_points_increase
+    def use(character: "BaseCharacter", target: "EnemyCharacter" = None):
+        rng = character.rng
 
-            # choose a random display message
-            message_display = random.choice(self.message_displays)
+        # a fixed amount doesn't need a roll
+        amount = min_amount if min_amount == max_amount else rng.randint(min_amount, max_amount)
 
-            # returns log
-            return message_display.format(character=character.name) + \
-                f"\n(+{defense_points_increase} Defense Points)"
+        if is_modifiable:
+            character.stat_modifiers.add(stat, amount, source)
 
-    class ClawSwipe(BaseSkill):
-        """Represents ClawSwipe skill.
+        else:
+            setattr(character, stat, getattr(character, stat) + amount)
 
-        Attributes
-        ----------
-        name : str
-            The name of the skill.
+        return rng.choice(message_displays).format(
+            character=character.name, target=getattr(target, "name", "")
+            ) + result.format(amount=amount)
 
-        description : str
-            The description of the skill.
+    return use
 
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
 
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
+def _compile_lower_stat(attr: dict, message_displays: Tuple[str, ...]) -> Callable:
+    # lowers a stat of the target by a random amount, to a minimum of 0
+    stat = attr["stat"]
+    min_amount = int(attr["min_amount"])
+    max_amount = int(attr["max_amount"])
+    result = "\n" + attr["result"]
 
-        message_displays : list of str
-            A list of message displays when skill is used.
-        """
+    def use(character: "BaseCharacter", target: "EnemyCharacter" = None):
+        rng = character.rng
+        amount = rng.randint(min_amount, max_amount)
+        setattr(target, stat, max(0, getattr(target, stat) - amount))
 
-        def __init__(self):
-            self.description = "Unleash a flurry of razor-sharp claws, striking enemies and " \
-                "removing their defense."
-            self.message_displays = [
-                "The sound of claws tearing through flesh fills the air as {character} "
-                "delivers a devastating clawswipe, leaving {target} defenseless!",
-                "A flurry of razor-sharp claws slices through the air as {character} "
-                "executes a powerful clawswipe, removing {target}'s defenses!",
-                "{target} is caught off guard as {character} launches a surprise attack "
-                "with a ferocious clawswipe, rendering {target}'s defenses useless!"
-            ]
-
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
-
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the ClawSwipe skill.
-            Removes target defense and deals remaining damage on target's health.
+        return rng.choice(message_displays).format(character=character.name, target=target.name) + \
+            result.format(target=target.name, amount=amount)
 
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
+    return use
 
-            Target : EnemyCharacter
-                The enemy to use the skill on.
 
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
+def _compile_break_defense(attr: dict, message_displays: Tuple[str, ...]) -> Callable:
+    # deals random damage to the target's defense first, then to its health, and removes
+    # its defense regardless of the damage dealt
+    min_amount = int(attr["min_amount"])
+    max_amount = int(attr["max_amount"])
+    result = "\n" + attr["result"]
+    no_damage_result = "\n" + attr["no_damage_result"]
 
-            # overall effect
-            battle_log = f"(removed {target.name} defense)"
+    def use(character: "BaseCharacter", target: "EnemyCharacter" = None):
+        rng = character.rng
+        damage_dealt = rng.randint(min_amount, max_amount)
+        log = no_damage_result.format(target=target.name)
 
-            # amount of damage to deal
-            damage_dealt = random.randint(25, 35)
+        # deal remaining damage to target's health if damage_dealt > target's defense points
+        if damage_dealt > target.defense_points:
+            net_damage = damage_dealt - target.defense_points
+            target.health_points -= net_damage
+            log = result.format(target=target.name, amount=net_damage)
 
-            # deal remaining damage to target's health if damage_dealt > target's defense points
-            if damage_dealt > target.defense_points:
+        target.defense_points = 0
 
-                # calculate net damage to target's health
-                net_damage = damage_dealt - target.defense_points
+        return rng.choice(message_displays).format(character=character.name, target=target.name) + \
+            log
 
-                # decrease target's health by net_damage
-                target.health_points -= net_damage
+    return use
 
-                # update battle log
-                battle_log = f"(removed {target.name} defense and dealt {net_damage}HP)"
 
-            # remove target's defense regardless of damage dealt
-            target.defense_points = 0
+def _compile_pierce(attr: dict, message_displays: Tuple[str, ...]) -> Callable:
+    # removes the target's defense and deals random damage straight to its health
+    min_amount = int(attr["min_amount"])
+    max_amount = int(attr["max_amount"])
+    result = "\n" + attr["result"]
 
-            # choose a random display message
-            message_display = random.choice(self.message_displays)
+    def use(character: "BaseCharacter", target: "EnemyCharacter" = None):
+        rng = character.rng
+        target.defense_points = 0
 
-            # return display message
-            return message_display.format(character=character.name, target=target.name) + \
-                "\n" + battle_log
+        damage_dealt = rng.randint(min_amount, max_amount)
+        target.health_points -= damage_dealt
 
-    # MirrorMage job class skill (IllusionaryAura, ReflectiveShield)
-    class IllusionaryAura(BaseSkill):
-        """Represents IllusionaryAura skill.
+        return rng.choice(message_displays).format(character=character.name, target=target.name) + \
+            result.format(target=target.name, amount=damage_dealt)
 
-        Attributes
-        ----------
-        name : str
-            The name of the skill.
+    return use
 
-        description : str
-            The description of the skill.
 
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
+def _compile_apply_effect(attr: dict, message_displays: Tuple[str, ...]) -> Callable:
+    # activates an effect on the character using the skill
+    effect_type = getattr(SkillEffects, attr["effect"])
+    result = "\n" + attr["result"]
 
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
+    def use(character: "BaseCharacter", target: "EnemyCharacter" = None):
+        effect = character.active_effects.add(effect_type())
 
-        message_displays : list of str
-            A list of message displays when skill is used.
-        """
+        return character.rng.choice(message_displays).format(
+            character=character.name, target=getattr(target, "name", "")
+            ) + result.format(effect=effect)
 
-        def __init__(self):
-            self.description = "Creates a mesmerizing aura that confuses enemies, causing them " \
-                "to miss their attacks."
-            self.message_displays = [
-                "{character} casts Illusionary Aura, creating a captivating aura around "
-                "themselves.",
-                "The mesmerizing aura of {character}'s Illusionary Aura confuses the enemy, "
-                "causing them to miss their attack!",
-                "The enemy's attack goes astray as they are bewildered by the illusionary aura "
-                "surrounding {character}."
-            ]
-
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
-
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the MirrorImage skill.
-            Creates a mesmerizing aura that confuses enemies, causing them to miss their attacks.
+    return use
 
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
 
-            Target : EnemyCharacter
-                The enemy to use the skill on.
+# the compiler for each action in skill_attributes.csv
+skill_compilers: Dict[str, Callable] = {
+    "raise_stat": _compile_raise_stat,
+    "lower_stat": _compile_lower_stat,
+    "break_defense": _compile_break_defense,
+    "pierce": _compile_pierce,
+    "apply_effect": _compile_apply_effect,
+}
 
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
 
-            # set invincible skill effect to character
-            invincible = SkillEffects.Invincible()
-            character.active_effects.append(invincible)
+class Skill(BaseSkill):
+    """Represents a skill defined by a row of skill_attributes.csv.
 
-            # choose a random message display
-            message_display = random.choice(self.message_displays)
+    The skill's action is compiled once when the skill is built, so using the skill
+    only runs its specialized `use` function.
 
-            # return message display
-            return message_display.format(character=character.name) + \
-                f"\n({str(invincible)} Effect Activated)"
+    Attributes
+    ----------
+    action : str
+        The action of the skill, one of the keys of `skill_compilers`.
+    target : str
+        Who the action affects, either "self" or "enemy".
+    stat : str
+        The stat changed by the action, empty if the action doesn't change a stat.
+    min_amount : int
+        The min amount rolled by the action, 0 if the action doesn't roll an amount.
+    max_amount : int
+        The max amount rolled by the action, 0 if the action doesn't roll an amount.
+    effect : str
+        The name of the effect in `SkillEffects` activated by the action, empty if none.
+    """
 
-    class ReflectiveShield(BaseSkill):
-        """Represents ReflectiveShield skill.
+    def __init__(self, skill_class_name: str):
+        """Initialize a skill instance.
 
-        Attributes
+        Parameters
         ----------
-        name : str
-            The name of the skill.
-
-        description : str
-            The description of the skill.
-
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
-
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
-
-        message_displays : list of str
-            A list of message displays when skill is used.
+        skill_class_name : str
+            The name of the class of the skill in skill_attributes.csv.
         """
 
-        def __init__(self):
-            self.description = "Creates a magical barrier that reflects a portion of the next " \
-                "incoming spell back at the enemy."
-            self.message_displays = [
-                "A shimmering shield envelops {character}, ready to reflect incoming physical "
-                "damage from {target}.",
-                "{character} channels their magic, creating a barrier of reflection to counter "
-                "{target}'s assault.",
-                "{character}'s Reflective Shield sparkles with energy, poised to send "
-                "{target}'s strength back at them."
-            ]
-
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
-
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the ReflectiveShield skill.
-            Creates a magical barrier that reflects the next incoming attack back at the enemy.
+        # initialize attributes of BaseSkill class
+        super().__init__(skill_class_name)
 
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
-
-            Target : EnemyCharacter
-                The enemy to use the skill on.
-
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
-
-            # set reflective skill effect to active effects
-            reflective_shield = SkillEffects.ReflectiveShield()
-            character.active_effects.append(reflective_shield)
-
-            # choose a random message display
-            message_display = random.choice(self.message_displays)
+        attr = skill_attributes[skill_class_name]
+        self.action: str = attr["action"]
+        self.target: str = attr["target"]
+        self.stat: str = attr["stat"]
+        self.min_amount: int = int(attr["min_amount"] or 0)
+        self.max_amount: int = int(attr["max_amount"] or 0)
+        self.effect: str = attr["effect"]
 
-            # return message display
-            return message_display.format(character=character.name, target=target.name) + \
-                "\n(reflective shield effect activated)"
+        # compile the skill's action
+        self._use = skill_compilers[self.action](attr, self.message_displays)
 
-    # Healer job class skill (HealingPurr, LuckyAura)
-    class HealingPurr(BaseSkill):
-        """Represents HealingPurr skill.
+    def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
+        """Use the skill.
 
-        Attributes
+        Parameters
         ----------
-        name : str
-            The name of the skill.
-
-        description : str
-            The description of the skill.
+        character : BaseCharacter
+            The character thats using the skill.
 
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
+        Target : EnemyCharacter
+            The enemy to use the skill on.
 
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
-
-        message_displays : list of str
-            A list of message displays when skill is used.
+        Returns
+        -------
+        log : str
+            The log for using this skill.
         """
 
-        def __init__(self):
-            self.description = "Restores health points and brings comfort through the power of " \
-                "purrs."
-            self.message_displays = [
-                "{character} emits a gentle purr, enveloping themselves in healing energy.",
-                "The soothing purrs of {character} resonate, restoring their health points.",
-                "{character}'s healing purr fills the air, bringing comfort and replenishing " 
-                "their vitality."
-            ]
+        return self._use(character, target)
 
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
 
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the HealingPurr skill.
-            Increases its health points by 5 to 15 points.
+class SkillRegistry:
+    """Builds every skill definition once and shares it across all characters.
 
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
+    Skills do not hold any per-character state, so a single frozen instance of each
+    skill is shared by every character that has it. Any per-character state (such as
+    the points spent on a skill) lives on the character itself.
 
-            Target : EnemyCharacter
-                The enemy to use the skill on.
-
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
-
-            # increase character's health points by 5 to 15 points
-            health_points_increase = random.randint(5, 15)
-            character.health_points += health_points_increase
+    Attributes
+    ----------
+    skills : Dict[str, BaseSkill]
+        The built skills with the skill class name as the key.
+    """
 
-            # choose a random message display
-            message_display = random.choice(self.message_displays)
+    def __init__(self):
+        self.skills: Dict[str, BaseSkill] = {}
 
-            # return message display
-            return message_display.format(character=character.name) + \
-                f"\n(+{health_points_increase} health points)"
+        # shared tuple of skills for each job class
+        self._job_class_skills: Dict[str, Tuple[BaseSkill, ...]] = {}
 
-    class LuckyCharm(BaseSkill):
-        """Represents LuckyCharm skill.
+    def get(self, skill_class_name: str) -> BaseSkill:
+        """Get the shared instance of a skill, building it on first use.
 
-        Attributes
+        Parameters
         ----------
-        name : str
-            The name of the skill.
-
-        description : str
-            The description of the skill.
-
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
-
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
+        skill_class_name : str
+            The name of the class of the skill.
 
-        message_displays : list of str
-            A list of message displays when skill is used.
+        Returns
+        -------
+        BaseSkill : The shared skill instance.
         """
 
-        def __init__(self):
-            self.description = "Channel inner luck to create a protective charm, increasing its " \
-                "luck and favoring positive outcomes."
-            self.message_displays = [
-                "The air around {character} shimmers with luck as the lucky charm takes effect.",
-                "The lucky charm envelops {character}, infusing them with a heightened sense of "
-                "favorable outcomes.",
-                "With the lucky charm activated, {character} feels a surge of good luck "
-                "coursing through their veins."
-            ]
+        skill = self.skills.get(skill_class_name)
 
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
+        # build and freeze the skill only once
+        if skill is None:
+            skill = Skill(skill_class_name)
+            skill.freeze()
+            self.skills[skill_class_name] = skill
 
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the LuckyCharm skill.
-            Increases luck by 5%
+        return skill
 
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
-
-            Target : EnemyCharacter
-                The enemy to use the skill on.
+    def get_job_class_skills(self, job_class: str) -> Tuple[BaseSkill, ...]:
+        """Get the shared skills of a job class in the order of skill_attributes.csv.
 
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
-
-            luck_increase = 5
-            character.luck += luck_increase
-
-            # choose a random display message
-            message_display = random.choice(self.message_displays)
-
-            # return display message
-            return message_display.format(character=character.name) + f"\n(+{luck_increase}% luck)"
-
-    # Assassin job class skill (PurrfectStrike, CripplingStrike)
-    class PurrfectStrike(BaseSkill):
-        """Represents PurrfectStrike skill.
-
-        Attributes
+        Parameters
         ----------
-        name : str
-            The name of the skill.
-
-        description : str
-            The description of the skill.
-
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
+        job_class : str
+            The name of the job class.
 
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
-
-        message_displays : list of str
-            A list of message displays when skill is used.
+        Returns
+        -------
+        Tuple[BaseSkill, ...] : The skills that belongs to the job class.
         """
 
-        def __init__(self):
-            self.description = " Unleash a swift and precise strike, targeting the enemy's weak " \
-                "spot with deadly accuracy, dealing high damage."
-            self.message_displays = [
-                "With lightning speed, {character} lunges at {target}, aiming for a critical hit.",
-                "The sound of a fierce, focused purr fills the air as {character} delivers a "
-                "devastating blow at {target}.",
-                "{target} reels from {character}'s Purrfect Strike, unable to withstand the "
-                "precise attack."
-            ]
-
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
-
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the PurrfectStrike skill.
-            Removes target's defense and deals additional 15 to 25 damage to target's health
-
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
-
-            Target : EnemyCharacter
-                The enemy to use the skill on.
-
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
-
-            # removes target's defense
-            target.defense_points = 0
-
-            # deal damage to target's health points
-            damage_dealt = random.randint(15, 25)
-            target.health_points -= damage_dealt
-
-            # choose a random display message
-            message_display = random.choice(self.message_displays)
-
-            # returns message display
-            return message_display.format(character=character.name, target=target.name) + \
-                f"\n(removed {target.name}'s defense and dealt {damage_dealt}HP)"
-
-    class CripplingStrike(BaseSkill):
-        """Represents CripplingStrike skill.
-
-        Attributes
-        ----------
-        name : str
-            The name of the skill.
+        skills = self._job_class_skills.get(job_class)
 
-        description : str
-            The description of the skill.
+        if skills is None:
+            skills = tuple(
+                self.get(skill_class_name)
+                for skill_class_name, attr in skill_attributes.items()
+                if attr["belongs_to"] == job_class
+                )
+            self._job_class_skills[job_class] = skills
 
-        magic_points_cost : int
-            The amount of magic points cost to use this skill.
+        return skills
 
-        speed_points_cost : int
-            The amount of speed points cost to use this skill.
+    def all_skills(self) -> Tuple[BaseSkill, ...]:
+        """Get every skill in the order of skill_attributes.csv.
 
-        message_displays : list of str
-            A list of message displays when skill is used.
+        Returns
+        -------
+        Tuple[BaseSkill, ...] : All the shared skill instances.
         """
 
-        def __init__(self):
-            self.description = "Deliver a precise strike that cripples the target, slowing " \
-                "their movements."
-            self.message_displays = [
-                "{target}'s agility is hindered by {character}'s crippling strike!",
-                "With a calculated strike, {character} impairs {target}'s mobility!",
-                "{character}'s crippling strike disrupts {target}'s flow, hampering their movement!"
-            ]
+        return tuple(self.get(skill_class_name) for skill_class_name in skill_attributes)
 
-            # initialize attributes of BaseSkill class
-            super().__init__(self.__class__.__name__)
+    def clear(self):
+        """Drop every built skill so they are rebuilt from skill_attributes on next use."""
 
-        def use(self, character: "BaseCharacter", target: "EnemyCharacter" = None):
-            """Use the CripplingStrike skill.
-            Reduce target's speed points by 5 to 15 points
+        self.skills.clear()
+        self._job_class_skills.clear()
 
-            Parameters
-            ----------
-            character : BaseCharacter
-                The character thats using the skill.
+    def reload(self):
+        """Reload skill_attributes.csv and rebuild skills from it on next use.
 
-            Target : EnemyCharacter
-                The enemy to use the skill on.
+        Characters created before the reload keep the skills they were created with.
+        """
 
-            Returns
-            -------
-            log : str
-                The log for using this skill.
-            """
+        # imported here, the tables module imports the skills
+        from .tables import reload_tables  # pylint: disable=import-outside-toplevel
 
-            # reduce target's speed points
-            speed_reduction = random.randint(5, 15)
-            target.speed_points = max(0, target.speed_points - speed_reduction)
+        reload_tables(["skill"])
 
-            # choose a random message display
-            message_display = random.choice(self.message_displays)
 
-            # return message display
-            return message_display.format(character=character.name, target=target.name) + \
-                f"\n(Reduced {target.name} speed points by {speed_reduction})"
+# shared registry of skills used by every character
+skill_registry = SkillRegistry()
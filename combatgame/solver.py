@@ -0,0 +1,758 @@
+"""Exact win probabilities of 1v1 battles, solved as a Markov chain without sampling.
+
+Battles whose chain grows past `MAX_STATES` states are simulated instead, so every
+matchup gets odds in bounded time.
+
+Usage:
+    python -m combatgame.solver --job Tank --enemy Viperstrike --policy greedy
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import random
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .battle import Action, Battle, CharacterView, StateView
+from .characters import job_classes
+from .enemies import EnemyCharacter, enemy_names
+from .policies import Policy, create_policy, policy_classes
+from .simulation import MAX_TURNS, play_battle, policy_rng
+from .skills import SkillEffects
+from .utils.utils import write_json_atomic
+
+if TYPE_CHECKING:
+    from .characters import BaseCharacter
+
+
+# bump when the rules of the chain change, so cached odds are solved again
+SOLVER_VERSION = 2
+
+# the directory of the cached odds, COMBATGAME_CACHE overrides the parent directory
+odds_cache_dir = os.path.join(
+    os.environ.get(
+        "COMBATGAME_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "combatgame")
+        ),
+    "odds"
+    )
+
+# states less likely than this are dropped by default, the dropped chance is reported
+PRUNE = 1e-12
+
+# chains that reach more states than this are simulated instead, about a second of solving
+MAX_STATES = 50_000
+
+# the amount of battles simulated for a chain with too many states
+SIMULATED_BATTLES = 4000
+
+# odds read from or written to the cache, by key
+_loaded_odds: Dict[str, "Odds"] = {}
+
+# indexes of the state tuple
+PLAYER_HEALTH, PLAYER_DEFENSE, PLAYER_SPEED, PLAYER_MAGIC, PLAYER_LUCK, INVINCIBLE, \
+    REFLECTIVE_SHIELD, ENEMY_HEALTH, ENEMY_DEFENSE, ENEMY_SPEED = range(10)
+
+# the state index of each stat skills can change
+player_stat_indexes = {
+    "health_points": PLAYER_HEALTH,
+    "defense_points": PLAYER_DEFENSE,
+    "speed_points": PLAYER_SPEED,
+    "magic_points": PLAYER_MAGIC,
+    "luck": PLAYER_LUCK,
+}
+enemy_stat_indexes = {
+    "health_points": ENEMY_HEALTH,
+    "defense_points": ENEMY_DEFENSE,
+    "speed_points": ENEMY_SPEED,
+}
+
+# the state index of each effect skills can activate
+effect_indexes = {
+    "Invincible": INVINCIBLE,
+    "ReflectiveShield": REFLECTIVE_SHIELD,
+}
+
+
+class Odds(NamedTuple):
+    """The solved odds of a battle.
+
+    Attributes
+    ----------
+    win_probability : float
+        The chance of the player winning before the turn limit.
+    expected_turns : float
+        The expected amount of turns, battles that reach the turn limit count its turns.
+    timeout_probability : float
+        The chance of the battle reaching the turn limit, which counts as a loss.
+    pruned_probability : float
+        The chance of the states dropped for being too unlikely, the error bound of the
+        other probabilities.
+    states : int
+        The amount of reachable states solved, 0 if the battle was simulated.
+    simulated : int
+        The amount of battles simulated because the chain had too many states, 0 if the
+        odds are solved.
+    """
+
+    win_probability: float
+    expected_turns: float
+    timeout_probability: float
+    pruned_probability: float
+    states: int
+    simulated: int = 0
+
+
+class BattleChain:
+    """The Markov chain of a battle between a player character and an enemy.
+
+    A state holds every stat that changes in combat. The chance of every state after each
+    turn is computed from the states of the previous turn, following the same rules as the
+    characters, the enemy rules and the player policy. Identical states reached by
+    different rolls are merged, and only states reachable from the start are visited.
+
+    Long battles and policies that mix many actions, like `RandomPolicy`, reach many more
+    states. Pruning the unlikely ones keeps some of them solvable, the others are stopped
+    once they reach `max_states` states.
+
+    Attributes
+    ----------
+    player : BaseCharacter
+        The player character.
+    enemy : EnemyCharacter
+        The enemy, it follows `EnemyCharacter.select_rule_action` even if it has an AI.
+    policy : Policy
+        The player policy, its `action_probabilities` are followed.
+    skill_rules : Tuple[tuple, ...]
+        The action, changed state index, rolled amounts, magic and speed point costs and max
+        effect stacks of each skill of the player character.
+    """
+
+    def __init__(self, player: "BaseCharacter", enemy: EnemyCharacter, policy: Policy):
+        """Initializes a BattleChain instance.
+
+        Parameters
+        ----------
+        player : BaseCharacter
+            The player character, its current stats are the start of the chain.
+        enemy : EnemyCharacter
+            The enemy, its current stats are the start of the chain.
+        policy : Policy
+            The player policy.
+
+        Raises
+        ------
+        ValueError
+            If the policy or a skill of the player character can't be solved exactly.
+        """
+
+        if not policy.markov:
+            raise ValueError(f"The {policy.name} policy doesn't only depend on the state.")
+
+        self.player = player
+        self.enemy = enemy
+        self.policy = policy
+
+        # the rules of each skill, checked once
+        self.skill_rules = tuple(self._compile_skill(skill) for skill in player.skills)
+
+        # the stats that don't change, given to the policy
+        self._player_view = (player.max_health_points, player.max_defense_points)
+        self._enemy_view = (
+            enemy.max_health_points, enemy.max_defense_points, enemy.attack_points
+            )
+
+    @staticmethod
+    def _compile_skill(skill) -> tuple:
+        # the action, state index, amounts, costs and max stacks of a skill
+        action = getattr(skill, "action", "")
+
+        if action == "raise_stat":
+            index = player_stat_indexes.get(skill.stat)
+
+        elif action == "lower_stat":
+            index = enemy_stat_indexes.get(skill.stat)
+
+        elif action == "apply_effect":
+            index = effect_indexes.get(skill.effect)
+
+        else:
+            index = ENEMY_HEALTH if action in ("break_defense", "pierce") else None
+
+        if index is None:
+            raise ValueError(f"The {skill.name} skill can't be solved exactly.")
+
+        max_stacks = getattr(SkillEffects, skill.effect).max_stacks if skill.effect else 0
+        amounts = tuple(range(skill.min_amount, skill.max_amount + 1)) or (0,)
+
+        return (
+            action, index, amounts, skill.magic_points_cost, skill.speed_points_cost,
+            max_stacks
+            )
+
+    def start_state(self) -> tuple:
+        """Get the state of the characters' current stats.
+
+        Returns
+        -------
+        tuple : The state.
+        """
+
+        player = self.player
+        enemy = self.enemy
+        invincible = player.get_active_effect(SkillEffects.Invincible)
+        reflective_shield = player.get_active_effect(SkillEffects.ReflectiveShield)
+
+        return (
+            player.health_points, player.defense_points, player.speed_points,
+            player.magic_points, player.luck, invincible.use_count if invincible else 0,
+            reflective_shield.use_count if reflective_shield else 0, enemy.health_points,
+            enemy.defense_points, enemy.speed_points
+            )
+
+    def solve(
+        self,
+        max_turns: int = MAX_TURNS,
+        prune: float = PRUNE,
+        start: Optional[tuple] = None,
+        max_states: Optional[int] = MAX_STATES
+        ) -> Optional[Odds]:
+        """Solve the odds of the battle.
+
+        Parameters
+        ----------
+        max_turns : int
+            The amount of turns before the battle is stopped as a loss. Defaults to
+            MAX_TURNS, same as the simulation.
+        prune : float
+            States less likely than this are dropped. Defaults to PRUNE, 0 is exact.
+        start : tuple
+            The state to start from. Defaults to the characters' current stats.
+        max_states : int
+            The amount of states to give up after. Defaults to MAX_STATES, None for no
+            limit.
+
+        Returns
+        -------
+        Odds : The solved odds, None if the chain reached `max_states` states.
+        """
+
+        state = self.start_state() if start is None else start
+
+        # a battle that is already over
+        if state[PLAYER_HEALTH] <= 0 or state[ENEMY_HEALTH] <= 0:
+            return Odds(float(state[PLAYER_HEALTH] > 0), 0.0, 0.0, 0.0, 1)
+
+        states = {state: 1.0}
+        solved = 1
+
+        win_probability = 0.0
+        expected_turns = 0.0
+        pruned_probability = 0.0
+
+        for turn in range(max_turns):
+            next_states: Dict[tuple, float] = defaultdict(float)
+
+            for state, probability in states.items():
+                if probability < prune:
+                    pruned_probability += probability
+                    continue
+
+                for outcome_probability, next_state in self._turn_outcomes(state, turn):
+                    next_probability = probability * outcome_probability
+
+                    # the defeated character is checked in the same order as Battle.end_turn
+                    if next_state[PLAYER_HEALTH] <= 0:
+                        expected_turns += (turn + 1) * next_probability
+
+                    elif next_state[ENEMY_HEALTH] <= 0:
+                        win_probability += next_probability
+                        expected_turns += (turn + 1) * next_probability
+
+                    else:
+                        next_states[next_state] += next_probability
+
+            states = next_states
+            solved += len(states)
+
+            if not states:
+                break
+
+            if max_states is not None and solved > max_states:
+                return None
+
+        # the battles still going at the turn limit are stopped
+        timeout_probability = sum(states.values())
+        expected_turns += max_turns * timeout_probability
+
+        return Odds(
+            win_probability, expected_turns, timeout_probability, pruned_probability, solved
+            )
+
+    def _turn_outcomes(self, state: tuple, turn: int) -> List[Tuple[float, tuple]]:
+        # the (probability, state) outcomes of a turn, same order as Battle.determine_turn_order
+        enemy_speed = state[ENEMY_SPEED]
+        player_speed = state[PLAYER_SPEED]
+
+        if enemy_speed > player_speed:
+            return self._enemy_outcomes(state)
+
+        if enemy_speed < player_speed:
+            return self._player_outcomes(state, turn)
+
+        # a tie is a coin flip
+        return [
+            (probability / 2, outcome)
+            for outcomes in (self._enemy_outcomes(state), self._player_outcomes(state, turn))
+            for probability, outcome in outcomes
+            ]
+
+    def _state_view(self, state: tuple, turn: int) -> StateView:
+        # the state given to the policy, same as Battle.state_view
+        max_health, max_defense = self._player_view
+        enemy_max_health, enemy_max_defense, enemy_attack = self._enemy_view
+        player = self.player
+
+        player_view = CharacterView(
+            state[PLAYER_HEALTH], max_health, state[PLAYER_DEFENSE], max_defense,
+            player.attack_points, state[PLAYER_SPEED], state[PLAYER_MAGIC],
+            state[PLAYER_LUCK], True
+            )
+        enemy_view = CharacterView(
+            state[ENEMY_HEALTH], enemy_max_health, state[ENEMY_DEFENSE], enemy_max_defense,
+            enemy_attack, state[ENEMY_SPEED], 0, self.enemy.luck, True
+            )
+
+        legal_actions = [Action.ATTACK, Action.HEAL]
+
+        for index, skill in enumerate(self.skill_rules):
+            if state[PLAYER_SPEED] >= skill[4] and state[PLAYER_MAGIC] >= skill[3]:
+                legal_actions.append(Action.SKILL + index)
+
+        return StateView(
+            player_view, enemy_view, (player_view,), 0, player.skills, tuple(legal_actions),
+            turn
+            )
+
+    def _player_outcomes(self, state: tuple, turn: int) -> List[Tuple[float, tuple]]:
+        # the outcomes of the player's turn, following the policy
+        outcomes = []
+
+        for action_probability, action in self.policy.action_probabilities(
+                self._state_view(state, turn)):
+            for probability, outcome in self._player_action_outcomes(state, action):
+                outcomes.append((action_probability * probability, outcome))
+
+        return outcomes
+
+    def _player_action_outcomes(self, state: tuple, action: int) -> List[Tuple[float, tuple]]:
+        # the outcomes of a player action, same rules as Battle.take_player_turn
+        player = self.player
+
+        # switching to the same character takes the turn without changing any stat
+        if action >= Action.SWITCH:
+            return [(1.0, state)]
+
+        skill = None
+
+        if action >= Action.SKILL:
+            skill = self.skill_rules[action - Action.SKILL]
+
+            # a skill that can't be used is replaced by a basic attack
+            if state[PLAYER_SPEED] < skill[4] or state[PLAYER_MAGIC] < skill[3]:
+                skill = None
+                action = Action.ATTACK
+
+        outcomes = []
+
+        if action == Action.ATTACK:
+            attack = player.attack_points
+            critical_chance = min(max(state[PLAYER_LUCK], 0), 100) / 100
+            normal_damage = max(attack - state[ENEMY_DEFENSE], 0)
+
+            for probability, damage in (
+                    (critical_chance, 2 * attack), (1 - critical_chance, normal_damage)):
+                if probability:
+                    next_state = list(state)
+                    next_state[PLAYER_SPEED] -= 1
+                    next_state[ENEMY_HEALTH] -= damage
+                    next_state[ENEMY_DEFENSE] -= 1
+                    outcomes.append((probability, next_state))
+
+        elif action == Action.HEAL:
+            for amount in range(1, 11):
+                next_state = list(state)
+                next_state[PLAYER_SPEED] -= 1
+                next_state[PLAYER_HEALTH] += amount
+                outcomes.append((0.1, next_state))
+
+        else:
+            skill_action, index, amounts, magic_cost, speed_cost, max_stacks = skill
+            probability = 1 / len(amounts)
+
+            for amount in amounts:
+                next_state = list(state)
+                next_state[PLAYER_SPEED] -= speed_cost
+                next_state[PLAYER_MAGIC] -= magic_cost
+
+                if skill_action == "raise_stat":
+                    next_state[index] += amount
+
+                elif skill_action == "lower_stat":
+                    next_state[index] = max(0, next_state[index] - amount)
+
+                elif skill_action == "apply_effect":
+                    next_state[index] = min(next_state[index] + 1, max_stacks)
+
+                elif skill_action == "break_defense":
+                    if amount > next_state[ENEMY_DEFENSE]:
+                        next_state[ENEMY_HEALTH] -= amount - next_state[ENEMY_DEFENSE]
+
+                    next_state[ENEMY_DEFENSE] = 0
+
+                # pierce
+                else:
+                    next_state[ENEMY_DEFENSE] = 0
+                    next_state[ENEMY_HEALTH] -= amount
+
+                outcomes.append((probability, next_state))
+
+        # the idle enemy regenerates
+        for _, next_state in outcomes:
+            next_state[ENEMY_SPEED] += 1
+            next_state[ENEMY_DEFENSE] = max(next_state[ENEMY_DEFENSE], 0)
+
+        return [(probability, tuple(next_state)) for probability, next_state in outcomes]
+
+    def _enemy_outcomes(self, state: tuple) -> List[Tuple[float, tuple]]:
+        # the outcomes of the enemy's turn, same rules as EnemyCharacter.select_rule_action
+        enemy = self.enemy
+        attack = enemy.attack_points
+        outcomes = []
+
+        if state[PLAYER_HEALTH] + state[PLAYER_DEFENSE] < attack:
+            action = "attack"
+
+        elif state[ENEMY_HEALTH] < 0.2 * enemy.max_health_points:
+            action = "heal"
+
+        elif state[ENEMY_DEFENSE] < 0.5 * enemy.max_defense_points:
+            action = "defend"
+
+        else:
+            action = "attack"
+
+        if action == "heal":
+            for amount in range(1, 11):
+                next_state = list(state)
+                next_state[ENEMY_SPEED] -= 1
+                next_state[ENEMY_HEALTH] += amount
+                outcomes.append((0.1, next_state))
+
+        elif action == "defend":
+            next_state = list(state)
+            next_state[ENEMY_DEFENSE] = enemy.max_defense_points
+            outcomes.append((1.0, next_state))
+
+        # the attack is blocked by Invincible, or else reflected by Reflective Shield
+        elif state[INVINCIBLE]:
+            next_state = list(state)
+            next_state[ENEMY_SPEED] -= 1
+            next_state[INVINCIBLE] -= 1
+            outcomes.append((1.0, next_state))
+
+        elif state[REFLECTIVE_SHIELD]:
+            next_state = list(state)
+            defense = next_state[ENEMY_DEFENSE]
+            next_state[ENEMY_SPEED] -= 1
+            next_state[REFLECTIVE_SHIELD] -= 1
+            next_state[ENEMY_DEFENSE] -= min(attack, defense)
+            next_state[ENEMY_HEALTH] -= max(0, attack - defense)
+            outcomes.append((1.0, next_state))
+
+        else:
+            critical_chance = enemy.critical_chance / 100
+            normal_damage = max(attack - state[PLAYER_DEFENSE], 0)
+
+            for probability, damage in (
+                    (critical_chance, 2 * attack), (1 - critical_chance, normal_damage)):
+                if probability:
+                    next_state = list(state)
+                    next_state[ENEMY_SPEED] -= 1
+                    next_state[PLAYER_HEALTH] -= damage
+                    next_state[PLAYER_DEFENSE] -= 1
+                    outcomes.append((probability, next_state))
+
+        # the idle player character regenerates
+        for _, next_state in outcomes:
+            next_state[PLAYER_SPEED] += 1
+            next_state[PLAYER_DEFENSE] = max(next_state[PLAYER_DEFENSE], 0)
+            next_state[PLAYER_MAGIC] += 1
+
+        return [(probability, tuple(next_state)) for probability, next_state in outcomes]
+
+
+def simulate_odds(
+    player: "BaseCharacter",
+    enemy: EnemyCharacter,
+    policy: Policy,
+    max_turns: int = MAX_TURNS,
+    battles: int = SIMULATED_BATTLES
+    ) -> Odds:
+    """Estimate the odds of a battle from the characters' current stats by simulating it.
+
+    Used for the battles whose chain has too many states. The characters are put back to
+    their current stats afterwards.
+
+    Parameters
+    ----------
+    player : BaseCharacter
+        The player character.
+    enemy : EnemyCharacter
+        The enemy, it follows the enemy rules like in the chain.
+    policy : Policy
+        The player policy.
+    max_turns : int
+        The amount of turns before a battle is stopped as a loss. Defaults to MAX_TURNS.
+    battles : int
+        The amount of battles, seeded 0 to `battles` - 1. Defaults to SIMULATED_BATTLES.
+
+    Returns
+    -------
+    Odds : The win and timeout rates and mean turns of the battles.
+    """
+
+    rngs = (player.rng, enemy.rng)
+    ai, enemy.ai = enemy.ai, None
+    rng = random.Random()
+    battle = Battle([player], [enemy], rng)
+    snapshot = battle.snapshot()
+    wins = timeouts = turns = 0
+
+    for seed in range(battles):
+        rng.seed(seed)
+        policy.reset(policy_rng(seed))
+
+        wins += play_battle(battle, policy, max_turns)
+        timeouts += not battle.is_game_over()
+        turns += battle.turn_count
+
+        battle.restore(snapshot)
+
+    player.rng, enemy.rng = rngs
+    enemy.ai = ai
+
+    return Odds(wins / battles, turns / battles, timeouts / battles, 0.0, 0, battles)
+
+
+def odds_cache_key(
+    player: "BaseCharacter",
+    enemy: EnemyCharacter,
+    policy: Policy,
+    max_turns: int = MAX_TURNS,
+    prune: float = PRUNE
+    ) -> str:
+    """Get the key of the cached odds of a battle.
+
+    The key covers every input of the chain: the stats and skills of both characters, the
+    policy, the turn limit, the state limit and the solver version.
+
+    Parameters
+    ----------
+    player : BaseCharacter
+        The player character.
+    enemy : EnemyCharacter
+        The enemy.
+    policy : Policy
+        The player policy.
+    max_turns : int
+        The amount of turns before the battle is stopped as a loss. Defaults to MAX_TURNS.
+    prune : float
+        States less likely than this are dropped. Defaults to PRUNE.
+
+    Returns
+    -------
+    str : The hex digest of the inputs.
+    """
+
+    chain = BattleChain(player, enemy, policy)
+    inputs = (
+        SOLVER_VERSION, chain.start_state(), player.attack_points, player.max_health_points,
+        player.max_defense_points, chain.skill_rules, enemy.attack_points, enemy.luck,
+        enemy.max_health_points, enemy.max_defense_points, policy.name, max_turns, prune,
+        MAX_STATES, SIMULATED_BATTLES
+        )
+
+    return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+
+def load_odds(
+    player: "BaseCharacter",
+    enemy: EnemyCharacter,
+    policy: Policy,
+    max_turns: int = MAX_TURNS,
+    prune: float = PRUNE
+    ) -> Optional[Odds]:
+    """Get the cached odds of a battle without solving it, see `solve`.
+
+    Parameters
+    ----------
+    player : BaseCharacter
+        The player character.
+    enemy : EnemyCharacter
+        The enemy.
+    policy : Policy
+        The player policy.
+    max_turns : int
+        The amount of turns before the battle is stopped as a loss. Defaults to MAX_TURNS.
+    prune : float
+        States less likely than this are dropped. Defaults to PRUNE.
+
+    Returns
+    -------
+    Odds : The cached odds, None if the battle hasn't been solved.
+    """
+
+    key = odds_cache_key(player, enemy, policy, max_turns, prune)
+    odds = _loaded_odds.get(key)
+
+    if odds is not None:
+        return odds
+
+    try:
+        with open(os.path.join(odds_cache_dir, f"{key}.json"), "r", encoding="utf-8") as file:
+            odds = _loaded_odds[key] = Odds(**json.load(file))
+
+    # not solved yet, or the file is unreadable
+    except (OSError, ValueError, TypeError):
+        return None
+
+    return odds
+
+
+def solve(
+    player: "BaseCharacter",
+    enemy: EnemyCharacter,
+    policy: Policy,
+    max_turns: int = MAX_TURNS,
+    prune: float = PRUNE,
+    cache: bool = True
+    ) -> Odds:
+    """Solve the odds of a player character winning against an enemy from their current
+    stats.
+
+    Solved odds are cached in `odds_cache_dir`, so a battle is only solved once. Battles
+    whose chain reaches `MAX_STATES` states are simulated instead, see `simulate_odds`.
+
+    Parameters
+    ----------
+    player : BaseCharacter
+        The player character.
+    enemy : EnemyCharacter
+        The enemy, it follows the enemy rules.
+    policy : Policy
+        The player policy.
+    max_turns : int
+        The amount of turns before the battle is stopped as a loss. Defaults to MAX_TURNS.
+    prune : float
+        States less likely than this are dropped. Defaults to PRUNE, 0 is exact.
+    cache : bool
+        Whether to read and write the cached odds. Defaults to True.
+
+    Returns
+    -------
+    Odds : The solved odds.
+    """
+
+    if cache:
+        odds = load_odds(player, enemy, policy, max_turns, prune)
+
+        if odds is not None:
+            return odds
+
+    odds = BattleChain(player, enemy, policy).solve(max_turns, prune, max_states=MAX_STATES)
+
+    if odds is None:
+        odds = simulate_odds(player, enemy, policy, max_turns, SIMULATED_BATTLES)
+
+    if not cache:
+        return odds
+
+    key = odds_cache_key(player, enemy, policy, max_turns, prune)
+    _loaded_odds[key] = odds
+
+    write_json_atomic(os.path.join(odds_cache_dir, f"{key}.json"), odds._asdict())
+
+    return odds
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the solver.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(description="Solve the exact odds of 1v1 battles.")
+    parser.add_argument(
+        "--job", nargs="+", default=sorted(job_classes), choices=sorted(job_classes),
+        help="the job classes of the player character"
+        )
+    parser.add_argument(
+        "--enemy", nargs="+", default=sorted(enemy_names), choices=sorted(enemy_names),
+        help="the names of the enemy"
+        )
+    parser.add_argument(
+        "--policy", default="greedy",
+        help=f"the player policy: {', '.join(policy_classes)}"
+        )
+    parser.add_argument(
+        "--max-turns", type=int, default=MAX_TURNS,
+        help="the amount of turns before a battle is stopped as a loss"
+        )
+    parser.add_argument(
+        "--prune", type=float, default=PRUNE,
+        help="drop states less likely than this, 0 to solve exactly"
+        )
+    parser.add_argument("--no-cache", action="store_true", help="don't use the cached odds")
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Solve and print the odds of every matchup from the command line.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        policy = create_policy(args.policy)
+
+        for job_class in args.job:
+            for enemy_name in args.enemy:
+                odds = solve(
+                    job_classes[job_class](job_class), EnemyCharacter(enemy_name), policy,
+                    args.max_turns, args.prune, not args.no_cache
+                    )
+
+                method = f"{odds.simulated} battles simulated" if odds.simulated else \
+                    f"{odds.states} states"
+                print(
+                    f"{job_class} vs {enemy_name}: {odds.win_probability:.2%} win, "
+                    f"{odds.expected_turns:.1f} turns on average ({method})"
+                    )
+
+    except ValueError as error:
+        parser.error(str(error))
+
+
+if __name__ == "__main__":
+    main()
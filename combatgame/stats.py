@@ -0,0 +1,285 @@
+"""Stat modifier stacks on top of the base stats of characters."""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .characters import BaseCharacter
+
+
+def critical_chance(luck: int) -> int:
+    """Get the chance of landing a critical hit from luck.
+
+    Parameters
+    ----------
+    luck : int
+        The luck of the character.
+
+    Returns
+    -------
+    int : The chance in percent.
+    """
+
+    return min(max(luck, 0), 100)
+
+
+class StatModifier:
+    """Represents a temporary change to a stat.
+
+    Attributes
+    ----------
+    stat : str
+        The attribute name of the stat.
+    amount : int
+        The amount added to the stat.
+    source : str
+        What applied the modifier, usually a skill name.
+    duration : int
+        The amount of turns before the modifier expires, None if it lasts until removed.
+    """
+
+    __slots__ = ("stat", "amount", "source", "duration")
+
+    def __init__(self, stat: str, amount: int, source: str, duration: Optional[int] = None):
+        self.stat = stat
+        self.amount = amount
+        self.source = source
+        self.duration = duration
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.stat!r}, {self.amount}, {self.source!r})"
+
+
+class StatModifiers:
+    """The modifier stacks of a character.
+
+    The character's stat attributes always hold the effective value (base + modifiers),
+    so combat code and the UI read them directly. The total of each stack is cached
+    and only recomputed when a modifier of that stat is added, removed or expires,
+    at which point the difference is applied to the character's attribute, along with
+    the critical chance derived from luck.
+
+    Points that are spent in combat can be lower than the modifier that raised them, so
+    taking a modifier off them never drops them below zero.
+
+    Attributes
+    ----------
+    STATS : tuple of str
+        The attribute names of the stats that can be modified.
+    SPENDABLE_STATS : tuple of str
+        The stats that are spent in combat.
+    """
+
+    STATS = ("attack_points", "defense_points", "speed_points", "magic_points", "luck")
+    SPENDABLE_STATS = ("defense_points", "speed_points", "magic_points")
+
+    __slots__ = ("character", "_stacks", "_totals", "_dirty")
+
+    def __init__(self, character: "BaseCharacter"):
+        """Initializes the modifier stacks of a character.
+
+        Parameters
+        ----------
+        character : BaseCharacter
+            The character the modifiers apply to.
+        """
+
+        self.character = character
+
+        # modifier stack and cached total for every stat
+        self._stacks: Dict[str, List[StatModifier]] = {stat: [] for stat in self.STATS}
+        self._totals: Dict[str, int] = dict.fromkeys(self.STATS, 0)
+
+        # stats whose stack changed since the totals were computed
+        self._dirty = set()
+
+    def __bool__(self):
+        return any(self._stacks.values())
+
+    def add(
+        self, stat: str, amount: int, source: str, duration: Optional[int] = None
+        ) -> StatModifier:
+        """Add a modifier to a stat.
+
+        Parameters
+        ----------
+        stat : str
+            The attribute name of the stat.
+        amount : int
+            The amount to add to the stat.
+        source : str
+            What applied the modifier.
+        duration : int
+            The amount of turns the modifier lasts. Defaults to None.
+
+        Returns
+        -------
+        StatModifier : The added modifier.
+        """
+
+        modifier = StatModifier(stat, amount, source, duration)
+        self._stacks[stat].append(modifier)
+        self._dirty.add(stat)
+        self._refresh()
+
+        return modifier
+
+    def remove(self, source: str):
+        """Remove every modifier applied by a source.
+
+        Parameters
+        ----------
+        source : str
+            What applied the modifiers.
+        """
+
+        for stat, stack in self._stacks.items():
+            kept = [modifier for modifier in stack if modifier.source != source]
+
+            if len(kept) != len(stack):
+                self._stacks[stat] = kept
+                self._dirty.add(stat)
+
+        self._refresh()
+
+    def tick(self):
+        """Count down the duration of timed modifiers and remove the expired ones.
+
+        Should be called once per turn.
+        """
+
+        for stat, stack in self._stacks.items():
+            expired = False
+
+            for modifier in stack:
+                if modifier.duration is None:
+                    continue
+
+                modifier.duration -= 1
+                expired = expired or modifier.duration <= 0
+
+            if expired:
+                self._stacks[stat] = [
+                    modifier for modifier in stack
+                    if modifier.duration is None or modifier.duration > 0
+                    ]
+                self._dirty.add(stat)
+
+        self._refresh()
+
+    def reset(self):
+        """Drop every modifier without changing the character's attributes.
+
+        Used when the character's attributes are reassigned to their base values.
+        """
+
+        for stack in self._stacks.values():
+            stack.clear()
+
+        self._totals = dict.fromkeys(self.STATS, 0)
+        self._dirty.clear()
+
+    def snapshot(self) -> Optional[tuple]:
+        """Capture the modifier stacks, see `restore`.
+
+        The modifiers are shared with the snapshot, only their duration changes while they
+        are in a stack, so only that is copied.
+
+        Returns
+        -------
+        tuple : The modifiers and durations of each stack and the cached totals, None if
+            there are no modifiers.
+        """
+
+        if not self:
+            return None
+
+        return (
+            tuple(
+                tuple((modifier, modifier.duration) for modifier in self._stacks[stat])
+                for stat in self.STATS
+                ),
+            tuple(self._totals[stat] for stat in self.STATS)
+            )
+
+    def restore(self, snapshot: Optional[tuple]):
+        """Restore the modifier stacks captured by `snapshot` in place.
+
+        The character's attributes are not changed, they are restored with the snapshot of
+        the character.
+
+        Parameters
+        ----------
+        snapshot : tuple
+            The snapshot of the modifier stacks.
+        """
+
+        if snapshot is None:
+            if self:
+                self.reset()
+
+            return
+
+        stacks, totals = snapshot
+
+        for stat, stack, total in zip(self.STATS, stacks, totals):
+            for modifier, duration in stack:
+                modifier.duration = duration
+
+            self._stacks[stat] = [modifier for modifier, _ in stack]
+            self._totals[stat] = total
+
+        self._dirty.clear()
+
+    def total(self, stat: str) -> int:
+        """Get the cached total of every modifier on a stat.
+
+        Parameters
+        ----------
+        stat : str
+            The attribute name of the stat.
+
+        Returns
+        -------
+        int : The total amount the stat is modified by.
+        """
+
+        return self._totals[stat]
+
+    def base(self, stat: str) -> int:
+        """Get the value of a stat without its modifiers.
+
+        Parameters
+        ----------
+        stat : str
+            The attribute name of the stat.
+
+        Returns
+        -------
+        int : The base value of the stat.
+        """
+
+        return getattr(self.character, stat) - self._totals[stat]
+
+    def _refresh(self):
+        # recompute the totals of changed stacks and apply the difference to the character
+        character = self.character
+
+        for stat in self._dirty:
+            new_total = sum(modifier.amount for modifier in self._stacks[stat])
+            difference = new_total - self._totals[stat]
+
+            if difference:
+                value = getattr(character, stat) + difference
+
+                # points spent while the modifier was on can't be taken below zero again
+                if difference < 0 and stat in self.SPENDABLE_STATS:
+                    value = max(value, min(getattr(character, stat), 0))
+
+                setattr(character, stat, value)
+
+                if stat == "luck":
+                    character.critical_chance = critical_chance(value)
+
+            self._totals[stat] = new_total
+
+        self._dirty.clear()
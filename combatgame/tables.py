@@ -0,0 +1,84 @@
+"""The loaded data tables, and the helpers every change to them goes through.
+
+Everything built from the job class, enemy and skill tables is kept until the tables
+change: the job class and enemy templates, the skills, the pooled characters, the enemy
+index and the data fingerprint keying the results cache. The helpers change the tables
+in place and drop all of it, so it's built again from the new data and no cached result of
+the old data is read under the new one.
+"""
+from typing import Dict, Iterable, Sequence, Tuple
+
+from . import characters, enemies, skills
+from .cache import clear_data_fingerprint
+from .pooling import character_pool
+from .utils.utils import csv_to_dict
+
+
+# the rows, data file and key column of every data table
+data_tables: Dict[str, Tuple[Dict[str, dict], str, str]] = {
+    "job": (characters.job_class_attributes, characters.job_class_attributes_path, "job"),
+    "enemy": (enemies.enemy_attributes, enemies.enemy_attributes_path, "name"),
+    "skill": (skills.skill_attributes, skills.skill_attributes_path, "skill"),
+}
+
+
+def clear_built_data():
+    """Drop everything built from the data tables, it's built again from them on next use.
+
+    Called by the other helpers after every change. Code changing the rows some other way,
+    like a test patching them, must call it too.
+    """
+
+    characters.job_class_templates.clear()
+    enemies.enemy_templates.clear()
+    enemies.enemy_index.clear()
+    skills.skill_registry.clear()
+    character_pool.clear()
+    clear_data_fingerprint()
+
+
+def replace_rows(name: str, rows: Dict[str, dict]):
+    """Replace every row of a table, in place.
+
+    Parameters
+    ----------
+    name : str
+        The name of the table, a key of `data_tables`.
+    rows : Dict[str, dict]
+        The new rows, by key.
+    """
+
+    table = data_tables[name][0]
+    table.clear()
+    table.update(rows)
+
+    clear_built_data()
+
+
+def reload_tables(names: Sequence[str]):
+    """Load data tables again from their files, in place.
+
+    Parameters
+    ----------
+    names : Sequence[str]
+        The names of the tables, keys of `data_tables`.
+    """
+
+    for name in names:
+        _, path, key_column = data_tables[name]
+        replace_rows(name, csv_to_dict(path, key_column))
+
+
+def set_cells(cells: Iterable[Tuple[str, str, str, str]]):
+    """Set cells of the tables, in place.
+
+    Parameters
+    ----------
+    cells : Iterable[Tuple[str, str, str, str]]
+        The table name, row key, column and new value of every cell.
+    """
+
+    for name, row, column, value in cells:
+        data_tables[name][0][row][column] = value
+
+    clear_built_data()
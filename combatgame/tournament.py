@@ -0,0 +1,412 @@
+"""Tournament of every team composition against every encounter of the story.
+
+Usage:
+    python -m combatgame.tournament --battles 1000 --processes 4
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import math
+import multiprocessing
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .balance import wilson_interval
+from .cache import results_cache
+from .characters import job_classes
+from .enemies import enemy_names
+from .policies import create_policy, policy_classes
+from .simulation import MAX_TURNS, simulate
+
+
+class Encounter(NamedTuple):
+    """A battle of the story a team is evaluated against.
+
+    Attributes
+    ----------
+    name : str
+        The name of the encounter.
+    enemies : Tuple[str, ...]
+        The name of each enemy.
+    boosts : Dict[str, int]
+        The points added to the stats of the team before the battle.
+    """
+
+    name: str
+    enemies: Tuple[str, ...]
+    boosts: Dict[str, int] = {}
+
+
+# every enemy from full stats, which is also how The Whispering Caverns (stats restored)
+# and The Misty Peaks branches meet them, and The Enchanted Meadows branch that adds
+# 10 magic points before Doomshroud
+story_encounters: List[Encounter] = [
+    *(Encounter(name, (name,)) for name in enemy_names),
+    Encounter("Meadows Doomshroud", ("Doomshroud",), {"magic_points": 10}),
+]
+
+
+def all_teams(
+    job_class_names: Sequence[str] = tuple(job_classes), max_size: int = 3
+    ) -> List[Tuple[str, ...]]:
+    """Get every team the player can pick, in every order.
+
+    The order matters as the first character is the one that starts the battle.
+
+    Parameters
+    ----------
+    job_class_names : Sequence[str]
+        The job classes to pick from. Defaults to every job class.
+    max_size : int
+        The max amount of characters in a team. Defaults to 3.
+
+    Returns
+    -------
+    List[Tuple[str, ...]] : The job class of each character of every team.
+    """
+
+    return [
+        team
+        for size in range(1, max_size + 1)
+        for team in itertools.permutations(job_class_names, size)
+    ]
+
+
+class TournamentCell(NamedTuple):
+    """The result of a team against an encounter.
+
+    Attributes
+    ----------
+    wins : int
+        The amount of battles won.
+    battles : int
+        The amount of battles simulated.
+    pruned : bool
+        Whether the team was dropped from the encounter as clearly worse than the best team.
+    """
+
+    wins: int
+    battles: int
+    pruned: bool = False
+
+    @property
+    def win_rate(self) -> float:
+        """The win rate of the team, 0 without battles."""
+
+        return self.wins / self.battles if self.battles else 0.0
+
+
+def _count_wins(task: tuple) -> int:
+    # simulate a chunk of battles of a cell, runs in the worker processes
+    team, encounter, policy_spec, seeds, max_turns, cache = task
+    key = None
+
+    if cache:
+        key = results_cache.key(
+            "tournament", list(team), list(encounter.enemies), encounter.boosts, policy_spec,
+            [seeds.start, seeds.stop, seeds.step], max_turns
+            )
+        cached = results_cache.get(key)
+
+        if cached is not None:
+            return cached[0]
+
+    results = simulate(
+        team, encounter.enemies, create_policy(policy_spec), seeds, max_turns,
+        boosts=encounter.boosts
+        )
+    wins = sum(result.player_won for result in results)
+
+    if key is not None:
+        results_cache.put(key, [wins])
+
+    return wins
+
+
+class Tournament:
+    """Simulates every team against every encounter.
+
+    The battles are played in rounds. After each round the teams of an encounter whose win
+    rate interval lies entirely below the interval of the best team are pruned, so the
+    remaining battles go to the teams that are still in contention. Every cell plays the
+    same seeds, so the teams are compared on the same rolls.
+
+    Attributes
+    ----------
+    teams : List[Tuple[str, ...]]
+        The job class of each character of every team.
+    encounters : List[Encounter]
+        The encounters of the teams.
+    policy : str
+        The player policy, as given to `create_policy`.
+    battles : int
+        The max amount of battles of a team against an encounter.
+    round_battles : int
+        The amount of battles of each cell in a round.
+    processes : int
+        The amount of worker processes, 1 to simulate in this process.
+    seed : int
+        The seed of the first battle.
+    z : float
+        The z score of the intervals used for pruning.
+    max_turns : int
+        The amount of turns before a battle is stopped as a loss.
+    cache : bool
+        Whether to reuse the results in `results_cache`, including those of earlier runs.
+    cells : Dict[Tuple[Tuple[str, ...], str], TournamentCell]
+        The result of every team and encounter name.
+    """
+
+    def __init__(
+        self,
+        teams: Sequence[Tuple[str, ...]] = None,
+        encounters: Sequence[Encounter] = None,
+        policy: str = "greedy",
+        battles: int = 1000,
+        round_battles: int = 100,
+        processes: Optional[int] = None,
+        seed: int = 0,
+        z: float = 3.0,
+        max_turns: int = MAX_TURNS,
+        cache: bool = True
+        ):
+        """Initializes a Tournament instance.
+
+        Parameters
+        ----------
+        teams : Sequence[Tuple[str, ...]]
+            The teams. Defaults to None, every team from `all_teams`.
+        encounters : Sequence[Encounter]
+            The encounters. Defaults to None, `story_encounters`.
+        policy : str
+            The player policy. Defaults to "greedy".
+        battles : int
+            The max amount of battles of a team against an encounter. Defaults to 1000.
+        round_battles : int
+            The amount of battles of each cell in a round. Defaults to 100.
+        processes : int
+            The amount of worker processes. Defaults to None, one for each CPU.
+        seed : int
+            The seed of the first battle. Defaults to 0.
+        z : float
+            The z score of the pruning intervals. Defaults to 3.0, wide enough that looking
+            at the intervals after every round rarely prunes a team by chance.
+        max_turns : int
+            The amount of turns before a battle is stopped as a loss. Defaults to MAX_TURNS.
+        cache : bool
+            Whether to reuse the results in `results_cache`. Defaults to True.
+        """
+
+        self.teams = list(teams or all_teams())
+        self.encounters = list(encounters or story_encounters)
+        self.policy = policy
+        self.battles = battles
+        self.round_battles = round_battles
+        self.processes = processes or multiprocessing.cpu_count()
+        self.seed = seed
+        self.z = z
+        self.max_turns = max_turns
+        self.cache = cache
+        self.cells: Dict[Tuple[Tuple[str, ...], str], TournamentCell] = {
+            (team, encounter.name): TournamentCell(0, 0)
+            for team in self.teams for encounter in self.encounters
+        }
+
+    def run(self) -> Dict[Tuple[Tuple[str, ...], str], TournamentCell]:
+        """Play the rounds until every cell is pruned or has played its battles.
+
+        Returns
+        -------
+        Dict[Tuple[Tuple[str, ...], str], TournamentCell] : The result of every cell.
+        """
+
+        pool = multiprocessing.Pool(self.processes) if self.processes > 1 else None
+
+        try:
+            for start in range(0, self.battles, self.round_battles):
+                seeds = range(
+                    self.seed + start, self.seed + min(start + self.round_battles, self.battles)
+                    )
+
+                if not self._play_round(seeds, pool):
+                    break
+
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return self.cells
+
+    def _play_round(self, seeds: range, pool) -> bool:
+        # play the seeds in every cell that is still in contention
+        keys = [
+            (team, encounter)
+            for encounter in self.encounters for team in self.teams
+            if not self.cells[team, encounter.name].pruned
+        ]
+
+        if not keys:
+            return False
+
+        # one task per cell, split further when there are fewer cells than processes
+        chunks = max(math.ceil(self.processes / len(keys)), 1)
+        chunk_size = max(math.ceil(len(seeds) / chunks), 1)
+        tasks = [
+            (team, encounter, self.policy, seeds[index:index + chunk_size], self.max_turns,
+             self.cache)
+            for team, encounter in keys
+            for index in range(0, len(seeds), chunk_size)
+        ]
+
+        task_wins = pool.map(_count_wins, tasks) if pool else [_count_wins(task) for task in tasks]
+
+        for (team, encounter, _, task_seeds, _, _), wins in zip(tasks, task_wins):
+            cell = self.cells[team, encounter.name]
+            self.cells[team, encounter.name] = TournamentCell(
+                cell.wins + wins, cell.battles + len(task_seeds)
+                )
+
+        for encounter in self.encounters:
+            self._prune(encounter.name)
+
+        return True
+
+    def _prune(self, encounter_name: str):
+        # prune the teams whose upper bound is below the lower bound of the best team
+        intervals = {
+            team: wilson_interval(cell.wins, cell.battles, self.z)
+            for team in self.teams
+            for cell in (self.cells[team, encounter_name],)
+            if not cell.pruned
+        }
+
+        if not intervals:
+            return
+
+        best_low = max(low for low, _ in intervals.values())
+
+        for team, (_, high) in intervals.items():
+            if high < best_low:
+                self.cells[team, encounter_name] = self.cells[team, encounter_name]._replace(
+                    pruned=True
+                    )
+
+    def ranking(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """Rank the teams by their mean win rate over the encounters.
+
+        Returns
+        -------
+        List[Tuple[Tuple[str, ...], float]] : Every team and its mean win rate, best first.
+        """
+
+        mean_win_rates = {
+            team: sum(
+                self.cells[team, encounter.name].win_rate for encounter in self.encounters
+                ) / len(self.encounters)
+            for team in self.teams
+        }
+
+        return sorted(mean_win_rates.items(), key=lambda item: item[1], reverse=True)
+
+    def format_matrix(self) -> str:
+        """Describe the ranked matrix of win rates.
+
+        Returns
+        -------
+        str : One row per team, best first, with its win rate against every encounter. Pruned
+            cells are marked with a "*".
+        """
+
+        width = max(len(encounter.name) for encounter in self.encounters) + 2
+        team_width = max(len(" ".join(team)) for team in self.teams) + 2
+        lines = [
+            f"{'rank':<6}{'team':<{team_width}}{'mean':>8}"
+            + "".join(f"{encounter.name:>{width}}" for encounter in self.encounters)
+        ]
+
+        for rank, (team, mean_win_rate) in enumerate(self.ranking(), 1):
+            row = f"{rank:<6}{' '.join(team):<{team_width}}{mean_win_rate:>8.1%}"
+
+            for encounter in self.encounters:
+                cell = self.cells[team, encounter.name]
+                row += f"{cell.win_rate:.1%}{'*' if cell.pruned else ' '}".rjust(width)
+
+            lines.append(row)
+
+        battles = sum(cell.battles for cell in self.cells.values())
+        lines.append(
+            f"{battles} battles, {battles / (len(self.cells) * self.battles):.0%} of the "
+            f"unpruned sweep, * = pruned as clearly worse than the best team"
+            )
+
+        return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser of the tournament.
+
+    Returns
+    -------
+    argparse.ArgumentParser : The parser.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Rank every team composition against every encounter."
+        )
+    parser.add_argument(
+        "--job-classes", nargs="+", default=sorted(job_classes), choices=sorted(job_classes),
+        help="the job classes the teams are picked from"
+        )
+    parser.add_argument(
+        "--max-size", type=int, default=3, help="the max amount of characters in a team"
+        )
+    parser.add_argument(
+        "--policy", default="greedy", help=f"the player policy: {', '.join(policy_classes)}"
+        )
+    parser.add_argument(
+        "--battles", type=int, default=1000, help="the max battles of a team per encounter"
+        )
+    parser.add_argument(
+        "--round-battles", type=int, default=100, help="the battles of each cell in a round"
+        )
+    parser.add_argument("--processes", type=int, default=None, help="the worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first battle")
+    parser.add_argument(
+        "--z", type=float, default=3.0, help="the z score of the pruning intervals"
+        )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="simulate even if the results are cached"
+        )
+
+    return parser
+
+
+def main(argv: Sequence[str] = None):
+    """Run the tournament from the command line and print the ranked matrix.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The command line arguments. Defaults to sys.argv.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        create_policy(args.policy)
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    tournament = Tournament(
+        all_teams(args.job_classes, args.max_size), story_encounters, args.policy, args.battles,
+        args.round_battles, args.processes, args.seed, args.z, cache=not args.no_cache
+        )
+    tournament.run()
+
+    print(tournament.format_matrix())
+
+
+if __name__ == "__main__":
+    main()
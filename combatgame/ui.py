@@ -14,7 +14,7 @@ import random
 import threading
 import textwrap
 import winsound
-from typing import AnyStr, Dict, TYPE_CHECKING, Callable, List
+from typing import AnyStr, Dict, TYPE_CHECKING, Callable, List, Optional
 
 if TYPE_CHECKING:
     from .characters import BaseCharacter
@@ -248,6 +248,29 @@ class Ui:
         # print the bottom line
         print(f'╚{"═" * (max_width + 2)}╝')
 
+    @staticmethod
+    def format_modifier(character: "BaseCharacter", stat: str) -> str:
+        """Format the total stat modifier of a character's stat.
+
+        Parameters
+        ----------
+        character : BaseCharacter
+            The character object.
+        stat : str
+            The attribute name of the stat.
+
+        Returns
+        -------
+        str : The total modifier in brackets, or an empty string if the stat isn't modified.
+        """
+
+        modifier_total = character.stat_modifiers.total(stat)
+
+        if not modifier_total:
+            return ""
+
+        return f" ({modifier_total:+})"
+
     @staticmethod
     def display_combat_stats(
         character_one: "BaseCharacter",
@@ -294,9 +317,11 @@ class Ui:
                 character.max_defense_points
                 ),
 
-                "Attack": f"{character.attack_points} Points",
-                "Speed": f"{character.speed_points} Points",
-                "Luck": f"{character.luck} Points"
+                "Attack": f"{character.attack_points} Points" +
+                    Ui.format_modifier(character, "attack_points"),
+                "Speed": f"{character.speed_points} Points" +
+                    Ui.format_modifier(character, "speed_points"),
+                "Luck": f"{character.luck} Points" + Ui.format_modifier(character, "luck")
             }
 
             # list of stats line
@@ -326,7 +351,8 @@ class Ui:
                 # add magic points stats
                 stats_line.append(
                     Ui.place_string(
-                        f"Magic: {character.magic_points} Points",
+                        f"Magic: {character.magic_points} Points" +
+                        Ui.format_modifier(character, "magic_points"),
                         character.starting_column_position
                     )
                 )
@@ -384,7 +410,8 @@ class Ui:
     def display_combat_screen(
         player_character: "BaseCharacter",
         enemy_character: "EnemyCharacter",
-        battle_log: List[str]
+        battle_log: List[str],
+        win_probability: Optional[float] = None
         ):
         """Displays the whole combat screen.
         
@@ -396,6 +423,8 @@ class Ui:
             The enemy character object.
         battle_log : list of str
             The battle logs.
+        win_probability : float
+            The odds of the player character beating the enemy alone, not shown if None.
         """
         # define the seperator between character and enemy
         seperator = " " * 20
@@ -417,12 +446,52 @@ class Ui:
 
         print()
 
+        # display the solved odds of the matchup
+        if win_probability is not None:
+            print(f"Odds of {player_character.name} winning 1v1: {win_probability:.0%}")
+            print()
+
         # display's battle log
         print("COMBAT LOG")
         print("==========")
         print("\n".join(battle_log))
         print("==========")
 
+    @staticmethod
+    def display_raid_screen(
+        turn: int,
+        summary: Dict[str, Dict[str, int]],
+        battle_log: List[str]
+        ):
+        """Displays a summary of both teams of a raid.
+
+        Parameters
+        ----------
+        turn : int
+            The current turn of the raid.
+        summary : Dict[str, Dict[str, int]]
+            The summary of each team from RaidBattle.summary.
+        battle_log : list of str
+            The battle logs.
+        """
+
+        Ui.print_box(f"RAID - Turn {turn}")
+
+        for team_name, team in summary.items():
+            print(f"\n{team_name}: {team['alive']}/{team['total']} standing")
+            print("HP: " + Ui.create_percentage_bar(
+                team["health_points"], max(team["max_health_points"], 1), bar_length=40
+                ))
+            print(f"DP: {team['defense_points']} Points   Magic: {team['magic_points']} Points")
+
+        print()
+
+        # display's battle log
+        print("RAID LOG")
+        print("========")
+        print("\n".join(battle_log))
+        print("========")
+
     class Animation:
         """Container class for animation functions."""
 
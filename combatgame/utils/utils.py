@@ -1,5 +1,8 @@
 """Utility functions for project."""
 import csv
+import json
+import os
+import tempfile
 
 def csv_to_dict(file_path: str, key_column: str) -> dict:
     """Reads csv config file and store it in a dictionary.
@@ -26,3 +29,32 @@ def csv_to_dict(file_path: str, key_column: str) -> dict:
             result_dict[key] = row
 
     return result_dict
+
+
+def write_json_atomic(path: str, data):
+    """Write JSON to a file so readers never see a partial file.
+
+    The data is written to a temporary file in the same folder first, which then replaces
+    the file, so an interrupted write leaves the old file as it was.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    data : object
+        The JSON serializable data.
+    """
+
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        os.remove(temporary_path)
+        raise
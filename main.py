@@ -7,14 +7,19 @@ Author: Koh Cheng Xi
 Date: 
 
 Usage:
-    python main.py
+    python main.py [--policy POLICY] [--difficulty TARGET] [--enemy-ai {rules,search}]
 """
+import argparse
 from functools import partial
 
 from combatgame.ui import Ui
 from combatgame.scenes import SceneManager
 from combatgame.characters import Tank, MirrorMage, Healer, Assassin
-from combatgame.skills import Skills, BaseSkill
+from combatgame.director import DifficultyDirector, DirectorSettings
+from combatgame.policies import create_policy, policy_classes
+from combatgame.pooling import character_pool
+from combatgame.search import MonteCarloAI
+from combatgame.skills import BaseSkill, skill_registry
 
 def main():
     """Main game flow.
@@ -70,10 +75,10 @@ class HelpMenu:
 
         Ui.clear_terminal()
 
-        tank = Tank("Tank")
-        mirrormage = MirrorMage("MirrorMage")
-        healer = Healer("Healer")
-        assassin = Assassin("Assassin")
+        tank = character_pool.acquire(Tank, "Tank")
+        mirrormage = character_pool.acquire(MirrorMage, "MirrorMage")
+        healer = character_pool.acquire(Healer, "Healer")
+        assassin = character_pool.acquire(Assassin, "Assassin")
 
         seperator = " " * 10
 
@@ -113,11 +118,16 @@ class HelpMenu:
 
             input("\nPress enter to go back...")
 
+        def back():
+            # release the characters before going back
+            character_pool.release(tank, mirrormage, healer, assassin)
+            HelpMenu.main()
+
         # craete dictionary for menu
         job_classes_dict = {
             "Page 1": page_one,
             "Page 2": page_two,
-            "Back": HelpMenu.main
+            "Back": back
         }
 
         while True:
@@ -134,13 +144,8 @@ class HelpMenu:
     def skills():
         """Function for displaying skills info."""
 
-        # store all skills in a list
-        skills = [
-            Skills.WhiskerGuard(), Skills.ClawSwipe(),
-            Skills.IllusionaryAura(), Skills.ReflectiveShield(),
-            Skills.HealingPurr(), Skills.LuckyCharm(),
-            Skills.PurrfectStrike(), Skills.CripplingStrike()
-            ]
+        # get all the shared skills from the registry
+        skills = skill_registry.all_skills()
 
         def display_skill_info(skill: BaseSkill):
             # function to display skill info
@@ -197,8 +202,41 @@ class SettingsMenu:
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="CATastrophe Chronicles: The Wildcat Cafe")
+    parser.add_argument(
+        "--policy",
+        help=f"let a policy play the combats: {', '.join(policy_classes)} "
+        "(scripted takes actions, e.g. scripted:skill1,attack)"
+        )
+    parser.add_argument(
+        "--difficulty", type=float, metavar="TARGET",
+        help="nudge the enemies between turns towards a target win rate, e.g. 0.6"
+        )
+    parser.add_argument(
+        "--enemy-ai", choices=("rules", "search"), default="rules",
+        help="how the enemies select their actions"
+        )
+    parser.add_argument(
+        "--search-budget", type=float, default=5.0,
+        help="the milliseconds the search enemy AI has for each decision"
+        )
+    args = parser.parse_args()
+
+    try:
+        player_policy = create_policy(args.policy) if args.policy else None
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    director = (
+        DifficultyDirector(DirectorSettings(args.difficulty)) if args.difficulty is not None
+        else None
+        )
+
+    enemy_ai = MonteCarloAI(args.search_budget / 1000) if args.enemy_ai == "search" else None
+
     # initialize SceneManager and SettingsMenu
-    scenes = SceneManager()
+    scenes = SceneManager(player_policy, director, enemy_ai)
     settings = SettingsMenu()
 
     main()
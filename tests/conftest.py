@@ -0,0 +1,31 @@
+"""Shared fixtures of the tests."""
+import pytest
+
+from combatgame import enemies
+from combatgame.tables import clear_built_data
+
+
+# balanced stats of the enemies, the data file may hold stats edited for debugging
+REALISTIC_ENEMIES = {
+    "Mistwalker": {"name": "Mistwalker", "HP": "120", "AP": "20", "DP": "18", "SP": "3",
+                   "Luck": "25"},
+    "Gloomreaper": {"name": "Gloomreaper", "HP": "80", "AP": "15", "DP": "4", "SP": "6",
+                    "Luck": "30"},
+    "Viperstrike": {"name": "Viperstrike", "HP": "90", "AP": "10", "DP": "6", "SP": "4",
+                    "Luck": "20"},
+    "Doomshroud": {"name": "Doomshroud", "HP": "70", "AP": "25", "DP": "10", "SP": "8",
+                   "Luck": "40"},
+}
+
+
+@pytest.fixture
+def realistic_enemies(monkeypatch):
+    """Play the tests against the balanced enemy stats instead of the data file."""
+
+    for name, row in REALISTIC_ENEMIES.items():
+        monkeypatch.setitem(enemies.enemy_attributes, name, dict(row))
+
+    clear_built_data()
+    yield
+    monkeypatch.undo()
+    clear_built_data()
@@ -0,0 +1,40 @@
+"""Tests of the adaptive sampling of matchups."""
+from combatgame.adaptive import CHUNK_BATTLES, AdaptiveSampler
+from combatgame.simulation import Matchup
+
+
+def sample(matchup: Matchup, **settings):
+    return AdaptiveSampler([matchup], processes=1, cache=False, **settings).run()[0]
+
+
+def test_stops_on_precision(realistic_enemies):
+    sampled = sample(Matchup(("Tank",), ("Doomshroud",)), precision=0.05)
+    low, high = AdaptiveSampler([], z=2.576).interval(sampled)
+
+    assert sampled.stopped == "precision"
+    assert (high - low) / 2 <= 0.05
+    assert sampled.aggregate.battles % CHUNK_BATTLES == 0
+
+
+def test_stops_on_threshold(realistic_enemies):
+    sampled = sample(Matchup(("Tank",), ("Viperstrike",)), precision=0.0001, threshold=0.5)
+
+    assert sampled.stopped == "threshold"
+    assert sampled.aggregate.battles == 200
+
+
+def test_stops_on_the_exact_budget(realistic_enemies):
+    # the last chunk is cut short rather than running past the budget
+    sampled = sample(Matchup(("Tank",), ("Doomshroud",)), precision=0.0001, max_battles=250)
+
+    assert sampled.stopped == "budget"
+    assert sampled.aggregate.battles == 250
+
+
+def test_budget_below_the_min_battles(realistic_enemies):
+    sampled = sample(
+        Matchup(("Tank",), ("Doomshroud",)), precision=0.0001, min_battles=200, max_battles=150
+        )
+
+    assert sampled.stopped == "budget"
+    assert sampled.aggregate.battles == 150
@@ -0,0 +1,29 @@
+"""Tests of the balance optimizer command line."""
+import argparse
+
+import pytest
+
+from combatgame import balance
+from combatgame.balance import parse_target
+
+
+def test_targets_are_parsed():
+    assert parse_target("Doomshroud=0.6") == ("Doomshroud", 0.6)
+    assert parse_target("Doomshroud=0") == ("Doomshroud", 0.0)
+    assert parse_target("Doomshroud=1") == ("Doomshroud", 1.0)
+
+
+@pytest.mark.parametrize("spec", [
+    "Doomshroud=1.5", "Doomshroud=-0.1", "Doomshroud=nan", "Doomshroud=60",
+    "Doomshroud", "Doomshroud=high",
+])
+def test_invalid_targets_are_rejected(spec):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_target(spec)
+
+
+def test_command_line_rejects_out_of_range_targets(capsys):
+    with pytest.raises(SystemExit):
+        balance.main(["--target", "Doomshroud=60"])
+
+    assert "between 0 and 1" in capsys.readouterr().err
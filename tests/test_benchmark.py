@@ -0,0 +1,28 @@
+"""Tests of the benchmarks, run small so they only check the benchmarks work."""
+from combatgame import benchmark
+from combatgame.benchmark import benchmark_raid, benchmark_snapshots
+
+
+def test_snapshot_benchmark(realistic_enemies):
+    timings = benchmark_snapshots(("Tank", "Healer"), ("Doomshroud",), turns=4, number=10)
+
+    assert set(timings) == {
+        "snapshot", "restore", "snapshot_with_rng", "restore_with_rng"
+        }
+    assert all(microseconds > 0 for microseconds in timings.values())
+
+
+def test_raid_benchmark(realistic_enemies):
+    timings = benchmark_raid(("Tank", "Assassin"), ("Doomshroud",), 20, turns=3, repeats=2)
+
+    assert set(timings) == {"setup", "first_turn", "slowest_turn"}
+    assert 0 < timings["first_turn"] <= timings["slowest_turn"]
+
+
+def test_raid_benchmark_from_the_command_line(realistic_enemies, capsys):
+    benchmark.main(["--team", "Tank", "--enemies", "Mistwalker", "--raid", "10", "--turns", "2"])
+
+    lines = capsys.readouterr().out.splitlines()
+
+    assert lines[0] == "10x Tank vs 10x Mistwalker (20 combatants, attack)"
+    assert [line.split()[0] for line in lines[1:]] == ["setup", "first_turn", "slowest_turn"]
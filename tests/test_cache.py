@@ -0,0 +1,141 @@
+"""Tests of the on-disk cache of simulation results."""
+import os
+
+from combatgame import cache, campaign, enemies, matrix, tournament
+from combatgame.balance import StatCell, override_stats
+from combatgame.cache import ResultsCache, data_fingerprint
+from combatgame.tables import clear_built_data, set_cells
+
+
+def test_miss_then_hit(tmp_path):
+    results = ResultsCache(str(tmp_path))
+    key = results.key("matchup", ["Tank"], [0, 10])
+
+    assert results.get(key) is None
+
+    results.put(key, [10, 4, 37])
+
+    assert results.get(key) == [10, 4, 37]
+    assert (results.hits, results.misses) == (1, 1)
+
+
+def test_disabled_cache_misses(tmp_path):
+    results = ResultsCache(str(tmp_path))
+    results.put("key", [1])
+    results.enabled = False
+
+    assert results.get("key") is None
+
+    results.put("other", [2])
+
+    assert not os.path.exists(tmp_path / "other.json")
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    # every result of 30 numbers is written in 61 bytes
+    results = ResultsCache(str(tmp_path), max_bytes=250)
+
+    for index in range(3):
+        results.put(f"key{index}", [index] * 30)
+        # distinct modification times, the first result is the least recently used
+        os.utime(tmp_path / f"key{index}.json", (index, index))
+
+    # using the first result makes the second one the least recently used
+    assert results.get("key0") == [0] * 30
+
+    # 264 bytes, the least recently used results are removed until at most 225 bytes remain
+    results.put("key3", [3] * 40)
+
+    assert sorted(os.listdir(tmp_path)) == ["key0.json", "key2.json", "key3.json"]
+    assert results._total_bytes == 203
+    assert results.get("key1") is None
+
+
+def test_rewritten_result_is_counted_once(tmp_path):
+    results = ResultsCache(str(tmp_path))
+
+    for _ in range(3):
+        results.put("key", [1, 2, 3])
+
+    assert results._total_bytes == os.path.getsize(tmp_path / "key.json")
+
+
+def test_sizes_are_read_from_an_existing_directory(tmp_path):
+    ResultsCache(str(tmp_path)).put("key", [1, 2, 3])
+    results = ResultsCache(str(tmp_path))
+    results.put("other", [4])
+
+    assert results._total_bytes == sum(
+        os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)
+        )
+
+
+def test_fingerprint_follows_the_tables(monkeypatch):
+    fingerprint = data_fingerprint()
+
+    assert cache._fingerprint == {"tables": fingerprint}
+
+    cell = StatCell("enemy", "Doomshroud", "AP", 0, 100)
+
+    with override_stats([cell], [cell.value() + 1]):
+        changed = data_fingerprint()
+
+        assert changed != fingerprint
+
+    assert data_fingerprint() == fingerprint
+
+    monkeypatch.setitem(enemies.enemy_attributes, "Doomshroud", {"name": "Doomshroud"})
+    clear_built_data()
+
+    assert data_fingerprint() not in (fingerprint, changed)
+
+    monkeypatch.undo()
+    clear_built_data()
+
+    assert data_fingerprint() == fingerprint
+
+
+def test_set_cells_changes_the_fingerprint():
+    fingerprint = data_fingerprint()
+    old_value = enemies.enemy_attributes["Doomshroud"]["AP"]
+
+    set_cells([("enemy", "Doomshroud", "AP", "99")])
+
+    try:
+        assert data_fingerprint() != fingerprint
+
+    finally:
+        set_cells([("enemy", "Doomshroud", "AP", old_value)])
+
+    assert data_fingerprint() == fingerprint
+
+
+def test_balance_tools_reuse_cached_results(tmp_path, monkeypatch):
+    results = ResultsCache(str(tmp_path))
+
+    for module in (campaign, matrix, tournament):
+        monkeypatch.setattr(module, "results_cache", results)
+
+    def run_tools():
+        played = tournament.Tournament(
+            [("Tank",)], [tournament.Encounter("Doomshroud", ("Doomshroud",))],
+            battles=20, round_battles=20, processes=1
+            ).run()
+        summaries = campaign.simulate_campaigns([["Tank"]], campaigns=5, processes=1)
+        cells = matrix.MatchupMatrix([("Tank",)], battles=5, processes=1)
+        cells.update()
+
+        return played, summaries, cells.cells
+
+    first = run_tools()
+    misses = results.misses
+
+    assert results.hits == 0 and misses > 0
+    assert run_tools() == first
+    assert (results.hits, results.misses) == (misses, misses)
+
+    # the tools simulate again without the cache
+    assert campaign.simulate_campaigns(
+        [["Tank"]], campaigns=5, processes=1, cache=False
+        ) == first[1]
+    assert results.hits == misses
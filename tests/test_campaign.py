@@ -0,0 +1,105 @@
+"""Tests of the story graph and the campaign simulator."""
+import pytest
+
+from combatgame.campaign import (
+    CampaignSimulator, SceneNode, StoryPlayer, story_graph, story_paths, walk_story
+    )
+from combatgame.characters import Tank
+from combatgame.policies import GreedyPolicy
+
+
+class ScriptedPlayer(StoryPlayer):
+    """Wins or loses the combats as told and records the hooks."""
+
+    def __init__(self, branch: str, lost_combats=()):
+        self.branch = branch
+        self.lost_combats = set(lost_combats)
+        self.calls = []
+
+    def fight(self, scene, enemy_names):
+        self.calls.append(("fight", scene, enemy_names))
+
+        return scene not in self.lost_combats
+
+    def choose_branch(self, scene, branches):
+        self.calls.append(("choose", scene, branches))
+
+        return self.branch
+
+    def enter_scene(self, scene):
+        self.calls.append(("enter", scene))
+
+    def after_step(self, scene, index, step):
+        self.calls.append(("step", scene, index, step[0]))
+
+
+def test_every_path_of_the_story():
+    assert sorted(story_paths()) == [
+        ("scene_one", "scene_two", "scene_two_option_one", "scene_two_option_two"),
+        ("scene_one", "scene_two", "scene_two_option_three", "scene_two_option_two"),
+        ("scene_one", "scene_two", "scene_two_option_two"),
+    ]
+
+
+def test_walk_plays_the_steps_and_hooks_in_order():
+    player = ScriptedPlayer("scene_two_option_three")
+    tank = Tank("Tank")
+    magic_points = tank.magic_points
+
+    assert walk_story(player, [tank]) is None
+    assert player.calls == [
+        ("enter", "scene_one"),
+        ("fight", "scene_one", ("Viperstrike",)),
+        ("step", "scene_one", 0, "combat"),
+        ("enter", "scene_two"),
+        ("choose", "scene_two", story_graph["scene_two"].branches),
+        ("enter", "scene_two_option_three"),
+        ("step", "scene_two_option_three", 0, "boost"),
+        ("fight", "scene_two_option_three", ("Doomshroud",)),
+        ("step", "scene_two_option_three", 1, "combat"),
+        ("enter", "scene_two_option_two"),
+        ("fight", "scene_two_option_two", ("Mistwalker",)),
+        ("step", "scene_two_option_two", 0, "combat"),
+    ]
+    assert tank.magic_points == magic_points + 10
+
+
+def test_walk_stops_at_a_lost_combat():
+    player = ScriptedPlayer("scene_two_option_one", lost_combats=["scene_two_option_one"])
+
+    assert walk_story(player, [Tank("Tank")]) == "scene_two_option_one"
+    assert player.calls[-1] == ("fight", "scene_two_option_one", ("Doomshroud",))
+
+
+def test_unknown_step_is_rejected():
+    graph = {"start": SceneNode("Start", (("dance",),))}
+
+    with pytest.raises(ValueError, match="dance"):
+        walk_story(ScriptedPlayer(""), [Tank("Tank")], graph, "start")
+
+
+def test_campaigns_follow_their_path(realistic_enemies):
+    path = ("scene_one", "scene_two", "scene_two_option_one", "scene_two_option_two")
+    results = CampaignSimulator().play(("Tank", "Healer"), path, GreedyPolicy(), range(20))
+
+    assert results == CampaignSimulator().play(
+        ("Tank", "Healer"), path, GreedyPolicy(), range(20)
+        )
+    assert [result.seed for result in results] == list(range(20))
+    assert all(
+        result.completed == (result.lost_at is None) and result.lost_at in (None, *path)
+        for result in results
+        )
+
+
+def test_campaign_stops_where_its_path_ends(realistic_enemies):
+    # a path ending at the branch plays only the first combat, like a story of one scene
+    results = CampaignSimulator().play(
+        ("Tank",), ("scene_one", "scene_two"), GreedyPolicy(), range(5)
+        )
+    first_scene = {"scene_one": story_graph["scene_one"]._replace(branches=())}
+    first_combat = CampaignSimulator(first_scene).play(
+        ("Tank",), ("scene_one",), GreedyPolicy(), range(5)
+        )
+
+    assert results == first_combat
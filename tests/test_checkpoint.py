@@ -0,0 +1,71 @@
+"""Tests of the checkpointed simulation jobs."""
+import pytest
+
+from combatgame import checkpoint
+from combatgame.balance import StatCell, override_stats
+from combatgame.checkpoint import SimulationJob
+from combatgame.simulation import Matchup, simulate_matchup
+
+
+MATCHUPS = [Matchup(("Tank",), ("Doomshroud",)), Matchup(("Healer", "Assassin"), ("Mistwalker",))]
+
+
+def interrupt_after(monkeypatch, chunks: int):
+    # make the job raise KeyboardInterrupt instead of simulating its chunk after `chunks` chunks
+    calls = []
+
+    def interrupted(matchup, seeds):
+        if len(calls) == chunks:
+            raise KeyboardInterrupt
+
+        calls.append(seeds)
+
+        return simulate_matchup(matchup, seeds)
+
+    monkeypatch.setattr(checkpoint, "simulate_matchup", interrupted)
+
+
+@pytest.mark.parametrize("chunks", [1, 3, 5])
+def test_resumed_job_equals_uninterrupted_job(realistic_enemies, monkeypatch, tmp_path, chunks):
+    path = str(tmp_path / "job.json")
+    expected = SimulationJob(MATCHUPS, 60, seed=7, chunk_battles=20).run()
+
+    interrupt_after(monkeypatch, chunks)
+
+    interrupted = SimulationJob(MATCHUPS, 60, seed=7, chunk_battles=20, path=path)
+
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.run()
+
+    assert not interrupted.is_done()
+
+    monkeypatch.setattr(checkpoint, "simulate_matchup", simulate_matchup)
+
+    resumed = SimulationJob(MATCHUPS, 60, seed=7, chunk_battles=20, path=path)
+
+    assert resumed.run(resume=True) == expected
+    assert resumed.is_done()
+
+
+def test_checkpoint_of_another_job_is_rejected(realistic_enemies, tmp_path):
+    path = str(tmp_path / "job.json")
+    SimulationJob(MATCHUPS, 20, path=path).run()
+
+    with pytest.raises(ValueError):
+        SimulationJob(MATCHUPS, 40, path=path).run(resume=True)
+
+
+def test_checkpoint_of_other_data_is_rejected(realistic_enemies, monkeypatch, tmp_path):
+    path = str(tmp_path / "job.json")
+    SimulationJob(MATCHUPS, 20, path=path).run()
+
+    cell = StatCell("enemy", "Doomshroud", "AP", 0, 100)
+
+    with override_stats([cell], [cell.value() + 1]):
+        with pytest.raises(ValueError):
+            SimulationJob(MATCHUPS, 20, path=path).run(resume=True)
+
+    monkeypatch.setattr(checkpoint, "ENGINE_VERSION", checkpoint.ENGINE_VERSION + 1)
+
+    with pytest.raises(ValueError):
+        SimulationJob(MATCHUPS, 20, path=path).run(resume=True)
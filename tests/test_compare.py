@@ -0,0 +1,116 @@
+"""Tests of the A/B comparison on common random numbers."""
+import math
+import random
+import statistics
+
+import pytest
+
+from combatgame import compare
+from combatgame.balance import parse_cell
+from combatgame.compare import ABComparison, AntitheticRandom, PairedStats
+from combatgame.simulation import Matchup
+
+
+MATCHUPS = [Matchup(("Tank",), ("Doomshroud",)), Matchup(("Healer",), ("Viperstrike",)),
+            Matchup(("Assassin",), ("Mistwalker",))]
+
+
+def paired_stats(pairs):
+    stats = PairedStats()
+
+    for a, b in pairs:
+        stats = stats.add(a, b)
+
+    return stats
+
+
+def test_paired_and_unpaired_variances():
+    pairs = [(1, 1), (0, 0), (1, 0), (1, 1), (0, 1), (0, 0), (1, 1)]
+    stats = paired_stats(pairs)
+    a, b = zip(*pairs)
+
+    assert stats.mean_difference == pytest.approx(statistics.mean(b) - statistics.mean(a))
+    assert stats.paired_variance == pytest.approx(
+        statistics.variance([y - x for x, y in pairs])
+        )
+    assert stats.unpaired_variance == pytest.approx(
+        statistics.variance(a) + statistics.variance(b)
+        )
+
+
+def test_chunks_combine_like_one_chunk():
+    pairs = [(1, 0), (0.5, 1), (0, 0), (1, 1), (0.5, 0.5)]
+
+    assert paired_stats(pairs[:2]).combine(paired_stats(pairs[2:])) == paired_stats(pairs)
+
+
+def test_antithetic_rolls_mirror_the_rolls():
+    rolls = random.Random(11)
+    mirrored = AntitheticRandom(11)
+
+    for _ in range(100):
+        roll = rolls.random()
+
+        assert mirrored.random() == pytest.approx((1.0 - roll) % 1.0)
+
+    assert mirrored.getrandbits(16) == 0xFFFF ^ rolls.getrandbits(16)
+
+
+@pytest.mark.parametrize("battles", [3, 7, 100])
+def test_stratified_seeds_are_all_handed_out(battles):
+    strata = ABComparison(MATCHUPS, battles=battles, stratified=True, seed=5).strata_seeds()
+    sizes = [len(seeds) for seeds in strata]
+
+    assert sorted(seed for seeds in strata for seed in seeds) == list(range(5, 5 + battles))
+    assert max(sizes) - min(sizes) <= 1
+
+
+def test_drawn_seeds_are_all_handed_out():
+    strata = ABComparison(MATCHUPS, battles=50).strata_seeds()
+
+    assert sorted(seed for seeds in strata for seed in seeds) == list(range(50))
+
+
+def test_too_few_battles_are_rejected(capsys):
+    with pytest.raises(ValueError):
+        ABComparison(MATCHUPS, battles=2, stratified=True)
+
+    with pytest.raises(ValueError):
+        ABComparison(MATCHUPS, battles=0)
+
+    with pytest.raises(SystemExit):
+        compare.main([
+            "--change", "enemy:Doomshroud:AP=24", "--battles", "5", "--stratified",
+            "--processes", "1"
+            ])
+
+    assert "needs a battle for each" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("antithetic", [False, True])
+@pytest.mark.parametrize("stratified", [False, True])
+def test_unchanged_data_set_has_no_paired_error(realistic_enemies, antithetic, stratified):
+    cell = parse_cell("enemy:Doomshroud:AP")
+    comparison = ABComparison(
+        MATCHUPS, changes=[(cell, cell.value())], battles=40, antithetic=antithetic,
+        stratified=stratified, processes=1
+        ).run()
+
+    # every battle rolls the same numbers with both data sets
+    assert comparison.win_rate_a == comparison.win_rate_b
+    assert comparison.difference == 0
+    assert comparison.standard_error == 0
+    assert comparison.unpaired_standard_error > 0
+    assert math.isinf(comparison.variance_reduction)
+    assert comparison.battles == (80 if antithetic else 40)
+
+
+def test_change_is_measured_on_paired_battles(realistic_enemies):
+    cell = parse_cell("enemy:Doomshroud:AP")
+    comparison = ABComparison(
+        MATCHUPS[:1], changes=[(cell, cell.value() + 2)], battles=200, processes=1
+        ).run()
+
+    # a stronger enemy mostly wins the battles it won before, so the pairs cancel noise
+    assert comparison.difference < 0
+    assert 0 < comparison.standard_error < comparison.unpaired_standard_error
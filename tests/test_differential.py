@@ -0,0 +1,59 @@
+"""Tests of the differential testing of battle engines."""
+import pytest
+
+from combatgame.battle import Action
+from combatgame.differential import (
+    DifferentialHarness, ReferenceEngine, SnapshotEngine, load_engine_class
+    )
+
+
+class BrokenEngine(ReferenceEngine):
+    """The reference rules, except that every action but the basic attack hits for 1 more."""
+
+    name = "broken"
+
+    def play_turn(self, choose):
+        chosen = []
+
+        def remember() -> int:
+            choice = choose()
+            actions = self.battle.available_actions()
+            chosen.append(actions[choice % len(actions)])
+
+            return choice
+
+        super().play_turn(remember)
+
+        if chosen and chosen[0] != Action.ATTACK:
+            self.battle.enemies[0].health_points -= 1
+
+
+def test_snapshot_engine_agrees_with_the_reference(realistic_enemies):
+    harness = DifferentialHarness(
+        ReferenceEngine(), SnapshotEngine(), ("Tank", "Healer"), ("Doomshroud",)
+        )
+
+    assert harness.run(range(30)) == []
+    assert harness.turns > 30
+
+
+def test_broken_engine_is_caught_and_minimized(realistic_enemies):
+    harness = DifferentialHarness(ReferenceEngine(), BrokenEngine(), ("Tank",), ("Doomshroud",))
+    divergences = harness.run(range(5))
+
+    assert [divergence.seed for divergence in divergences] == list(range(5))
+
+    for divergence in divergences:
+        # a single choice of the second legal action reproduces it
+        assert divergence.choices == (1,)
+        (name, reference, broken), = divergence.fields
+        assert name == "Doomshroud.stats"
+        assert broken[0] == reference[0] - 1
+
+
+def test_engines_are_loaded_by_name_or_import():
+    assert load_engine_class("snapshot") is SnapshotEngine
+    assert load_engine_class("combatgame.differential:ReferenceEngine") is ReferenceEngine
+
+    with pytest.raises(ValueError):
+        load_engine_class("fast")
@@ -0,0 +1,68 @@
+"""Tests of the difficulty director."""
+import random
+
+from combatgame.battle import Battle
+from combatgame.characters import Tank
+from combatgame.director import DifficultyDirector, DirectorSettings, WinModel
+from combatgame.enemies import EnemyCharacter
+from combatgame.policies import GreedyPolicy
+from combatgame.simulation import simulate
+
+
+def test_nudges_stay_within_the_max_change(realistic_enemies):
+    enemy = EnemyCharacter("Doomshroud")
+    base = enemy.attack_points
+    director = DifficultyDirector(DirectorSettings(step=0.05, max_change=0.3))
+    limit = round(base * 0.3)
+
+    for _ in range(20):
+        director._nudge(enemy, 1)
+
+    assert enemy.attack_points == base + limit
+
+    for _ in range(40):
+        director._nudge(enemy, -1)
+
+    assert enemy.attack_points == base - limit
+
+    # only the nudges that changed the attack points count
+    assert director.nudges == limit + 2 * limit
+
+
+def test_restore_drops_the_nudges(realistic_enemies):
+    enemy = EnemyCharacter("Doomshroud")
+    base = enemy.attack_points
+    director = DifficultyDirector()
+
+    director._nudge(enemy, 1)
+
+    assert enemy.stat_modifiers.total("attack_points") == enemy.attack_points - base > 0
+
+    enemy.restore_stats()
+
+    assert enemy.attack_points == base
+    assert not enemy.stat_modifiers
+
+
+def test_losing_player_weakens_the_active_enemy(realistic_enemies):
+    enemy = EnemyCharacter("Doomshroud")
+    base = enemy.attack_points
+    battle = Battle([Tank("Tank")], [enemy], random.Random(0))
+
+    # a model sure the player loses, and one sure the player wins
+    DifficultyDirector(model=WinModel((-30.0, 0.0, 0.0))).adjust(battle)
+
+    assert enemy.attack_points < base
+
+    enemy.restore_stats()
+    DifficultyDirector(model=WinModel((30.0, 0.0, 0.0))).adjust(battle)
+
+    assert enemy.attack_points > base
+
+
+def test_adjusting_costs_well_under_a_millisecond_a_turn(realistic_enemies):
+    director = DifficultyDirector()
+    simulate(("Tank", "Healer"), ("Doomshroud",), GreedyPolicy(), range(50), director=director)
+
+    assert director.turns > 100
+    assert director.seconds / director.turns < 1e-3
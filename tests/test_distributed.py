@@ -0,0 +1,65 @@
+"""Tests of the distributed simulation, with the coordinator and workers on localhost."""
+import socket
+import threading
+
+import pytest
+
+from combatgame.distributed import Coordinator, receive_message, run_worker, send_message
+from combatgame.simulation import Matchup, simulate_matchup
+
+
+MATCHUP = Matchup(("Tank", "Healer"), ("Doomshroud",))
+
+
+@pytest.fixture
+def coordinator(realistic_enemies):
+    coordinator = Coordinator([MATCHUP], battles=40, unit_battles=10, lease_timeout=0.5)
+    coordinator.start("127.0.0.1", 0)
+    yield coordinator
+    coordinator.stop()
+
+
+def take_unit(coordinator: Coordinator):
+    # connect like a worker and lease a unit without ever sending its result
+    connection = socket.create_connection(coordinator.address)
+    stream = connection.makefile("rwb")
+    send_message(stream, {"type": "ready"})
+
+    assert receive_message(stream)["type"] == "work"
+
+    return connection, stream
+
+
+def finish(coordinator: Coordinator):
+    # collect every unit with a worker of this process
+    worker = threading.Thread(target=run_worker, args=coordinator.address, daemon=True)
+    worker.start()
+
+    assert coordinator.wait(30)
+
+    worker.join(5)
+
+
+def test_units_of_a_disconnected_worker_are_reissued(coordinator):
+    connection, stream = take_unit(coordinator)
+    stream.close()
+    connection.close()
+
+    finish(coordinator)
+
+    assert coordinator.progress().reissued == 1
+    assert coordinator.aggregates == [simulate_matchup(MATCHUP, range(40))]
+
+
+def test_units_of_a_silent_worker_are_reissued(coordinator):
+    connection, stream = take_unit(coordinator)
+
+    try:
+        finish(coordinator)
+
+    finally:
+        stream.close()
+        connection.close()
+
+    assert coordinator.progress().reissued == 1
+    assert coordinator.aggregates == [simulate_matchup(MATCHUP, range(40))]
@@ -0,0 +1,133 @@
+"""Tests of the stacking, resolve order and duration of active effects."""
+from combatgame.characters import Tank
+from combatgame.effects import ActiveEffects, BaseEffect, Stacking
+from combatgame.enemies import EnemyCharacter
+from combatgame.skills import SkillEffects
+
+
+class Replacing(BaseEffect):
+    stacking = Stacking.REPLACE
+
+
+class Ignored(BaseEffect):
+    stacking = Stacking.IGNORE
+
+
+class Refreshed(BaseEffect):
+    stacking = Stacking.REFRESH
+
+
+class Capped(BaseEffect):
+    stacking = Stacking.STACK
+    max_stacks = 3
+
+
+def test_every_effect_type_has_its_own_flag():
+    flags = [effect_type.flag for effect_type in (
+        Replacing, Ignored, Refreshed, Capped, SkillEffects.Invincible,
+        SkillEffects.ReflectiveShield
+        )]
+
+    assert all(flag and flag & (flag - 1) == 0 for flag in flags)
+    assert len(set(flags)) == len(flags)
+
+
+def test_replace_swaps_the_active_effect():
+    effects = ActiveEffects()
+    first = effects.add(Replacing(2))
+    second = effects.add(Replacing(1))
+
+    assert effects.get(Replacing) is second is not first
+    assert len(effects) == 1
+
+
+def test_ignore_keeps_the_active_effect():
+    effects = ActiveEffects()
+    first = effects.add(Ignored(2, duration=3))
+
+    assert effects.add(Ignored(5, duration=9)) is first
+    assert (first.use_count, first.duration) == (2, 3)
+
+
+def test_refresh_keeps_the_most_uses_and_newest_duration():
+    effects = ActiveEffects()
+    first = effects.add(Refreshed(3, duration=1))
+    effects.add(Refreshed(1, duration=4))
+
+    assert effects.get(Refreshed) is first
+    assert (first.use_count, first.duration) == (3, 4)
+
+
+def test_stack_adds_uses_up_to_max_stacks():
+    effects = ActiveEffects()
+    effect = effects.add(Capped(2))
+
+    effects.add(Capped(2))
+
+    assert effect.use_count == 3
+
+
+def test_flags_and_contains_follow_add_and_remove():
+    effects = ActiveEffects()
+    effects.add(Capped())
+    effects.add(Refreshed())
+
+    assert Capped in effects and Refreshed in effects
+    assert effects.flags == Capped.flag | Refreshed.flag
+
+    effects.remove(Capped)
+    effects.remove(Capped)
+
+    assert Capped not in effects
+    assert effects.flags == Refreshed.flag
+
+
+def test_tick_expires_timed_effects_only():
+    effects = ActiveEffects()
+    effects.add(Refreshed(duration=2))
+    effects.add(Capped())
+
+    effects.tick()
+    assert effects.get(Refreshed).duration == 1
+
+    effects.tick()
+    assert Refreshed not in effects
+    assert Capped in effects
+
+
+def test_invincible_resolves_before_reflective_shield():
+    tank = Tank("Tank")
+    enemy = EnemyCharacter("Viperstrike")
+    enemy.attack_points = 10
+    health_points = tank.health_points
+
+    tank.active_effects.add(SkillEffects.ReflectiveShield())
+    tank.active_effects.add(SkillEffects.Invincible(2))
+
+    assert "REJECTED" in tank.active_effects.resolve_hit(enemy, tank)
+    assert tank.get_active_effect(SkillEffects.Invincible).use_count == 1
+
+    tank.active_effects.resolve_hit(enemy, tank)
+    assert SkillEffects.Invincible not in tank.active_effects
+
+    # the shield takes the third hit and is used up by it
+    enemy_health_points = enemy.health_points + enemy.defense_points
+    assert "reflect" in tank.active_effects.resolve_hit(enemy, tank)
+    assert enemy.health_points + enemy.defense_points == enemy_health_points - 10
+    assert len(tank.active_effects) == 0
+    assert tank.health_points == health_points
+
+
+def test_snapshot_restores_uses_durations_and_slots():
+    effects = ActiveEffects()
+    effect = effects.add(Capped(1, duration=2))
+    snapshot = effects.snapshot()
+
+    effects.add(Capped(1))
+    effects.add(Refreshed())
+    effects.tick()
+    effects.restore(snapshot)
+
+    assert list(effects) == [effect]
+    assert (effect.use_count, effect.duration) == (1, 2)
+    assert effects.flags == Capped.flag
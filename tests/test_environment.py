@@ -0,0 +1,63 @@
+"""Tests of the step based combat environments."""
+import pytest
+
+from combatgame.battle import Action
+from combatgame.environment import CombatEnv, VectorCombatEnv
+
+
+def play(env, seed):
+    # attack with step until the combat is over
+    env.reset(("Tank", "Healer"), ("Viperstrike",), seed)
+    rewards = []
+
+    while not env.done:
+        rewards.append(env.step(Action.ATTACK)[1])
+
+    return rewards
+
+
+def test_act_matches_step(realistic_enemies):
+    env = CombatEnv()
+    rewards = play(env, 3)
+
+    env.start(("Tank", "Healer"), ("Viperstrike",), 3)
+    acted = []
+
+    while not env.done:
+        acted.append(env.act(Action.ATTACK)[0])
+
+    assert acted == rewards
+    env.close()
+
+
+def test_act_does_not_reset_a_done_combat(realistic_enemies):
+    env = CombatEnv()
+    play(env, 0)
+
+    with pytest.raises(RuntimeError):
+        env.act(Action.ATTACK)
+
+    assert env.legal_actions() == []
+    env.close()
+
+
+def test_vector_env_resets_done_envs_with_the_next_seed(realistic_enemies):
+    vector_env = VectorCombatEnv(2, ("Tank", "Healer"), ("Viperstrike",))
+    observations = vector_env.reset(seed=10)
+    first_observations = list(observations)
+    dones = 0
+
+    for _ in range(200):
+        _, _, done = vector_env.step([Action.ATTACK, Action.ATTACK])
+        dones += sum(done)
+
+    assert dones > 2
+    assert len(first_observations) == 2 * CombatEnv.OBSERVATION_SIZE
+
+    # the first combats are the same as single environments with the same seeds
+    single_env = CombatEnv()
+    single_env.reset(("Tank", "Healer"), ("Viperstrike",), 11)
+    assert list(single_env.observation()) == first_observations[CombatEnv.OBSERVATION_SIZE:]
+
+    vector_env.close()
+    single_env.close()
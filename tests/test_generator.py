@@ -0,0 +1,94 @@
+"""Tests of the procedural encounter generator."""
+import argparse
+import math
+
+import pytest
+
+from combatgame import generator
+from combatgame.generator import (
+    EncounterGenerator, fit_scale, parse_target, scaled_stats, stat_bounds
+    )
+
+
+def logistic_points(slope, middle, scales, battles=1000):
+    # exact points of a win rate falling as a logistic curve of the scale
+    return [
+        (scale, round(battles / (1 + math.exp(slope * (scale - middle)))), battles)
+        for scale in scales
+    ]
+
+
+def test_fit_scale_finds_the_target_of_a_logistic_curve():
+    points = logistic_points(4.0, 0.8, [0.4, 0.6, 0.9, 1.1])
+
+    # the win rate of the curve is 0.6 at 0.8 - logit(0.6) / 4
+    assert fit_scale(points, 0.6, 1.0) == pytest.approx(0.8 - math.log(1.5) / 4, abs=0.01)
+
+
+def test_fit_scale_without_a_falling_curve_is_the_default():
+    assert fit_scale([(0.5, 10, 10), (1.0, 0, 10)], 0.6, 0.7) == 0.7
+    assert fit_scale([(0.5, 3, 10), (1.0, 8, 10)], 0.6, 0.7) == 0.7
+
+
+@pytest.mark.parametrize("target", [0.0, 1.0, 1.5, -0.2])
+def test_fit_scale_rejects_unreachable_targets(target):
+    with pytest.raises(ValueError):
+        fit_scale([(0.5, 3, 10), (1.0, 1, 10)], target, 0.5)
+
+
+@pytest.mark.parametrize("spec", ["0", "1", "1.5", "-0.1", "nan", "high"])
+def test_command_line_rejects_unreachable_targets(spec):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_target(spec)
+
+    with pytest.raises(SystemExit):
+        generator.build_parser().parse_args(["--target", spec])
+
+
+def test_generator_rejects_unreachable_targets():
+    with pytest.raises(ValueError):
+        EncounterGenerator(("Tank",), 1.0)
+
+
+def test_bases_are_selected_by_tags(realistic_enemies):
+    # the strongest of the four enemies by (HP + DP) * AP is the only one of tier 4
+    assert EncounterGenerator(("Tank",), 0.5, tags=["tier:4"]).bases == ["Mistwalker"]
+    assert EncounterGenerator(("Tank",), 0.5, tags=["tier:4"]).max_group == 1
+
+    with pytest.raises(ValueError, match="tier:9"):
+        EncounterGenerator(("Tank",), 0.5, tags=["tier:9"])
+
+
+def test_scaled_stats_stay_within_bounds():
+    proportions = {stat: 1.5 for stat in stat_bounds}
+
+    assert scaled_stats(proportions, 0.0) == {stat: low for stat, (low, _) in stat_bounds.items()}
+    assert scaled_stats(proportions, 2.0) == {
+        stat: high for stat, (_, high) in stat_bounds.items()
+    }
+
+
+def test_generated_encounters_are_validated(realistic_enemies):
+    encounter_generator = EncounterGenerator(
+        ("Tank", "Healer"), 0.6, tolerance=0.15, search_battles=24, steps=4, battles=60
+        )
+    encounters = list(encounter_generator.generate_many(2, processes=1, max_candidates=20))
+
+    assert len(encounters) == 2
+
+    for encounter in encounters:
+        assert abs(encounter.win_rate - 0.6) <= 0.15
+        assert encounter.battles == 60
+
+
+def test_generator_gives_up_after_max_candidates(realistic_enemies, monkeypatch):
+    encounter_generator = EncounterGenerator(
+        ("Tank",), 0.6, search_battles=8, steps=2, battles=8, attempts=1
+        )
+    generated = []
+
+    # no candidate validates, like a target the team can't be tuned to
+    monkeypatch.setattr(encounter_generator, "generate", lambda seed: generated.append(seed))
+
+    assert not list(encounter_generator.generate_many(3, seed=10, processes=1))
+    assert generated == list(range(10, 10 + 3 * generator.CANDIDATES_PER_ENCOUNTER))
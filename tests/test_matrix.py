@@ -0,0 +1,65 @@
+"""Tests of the incremental matchup matrix."""
+from combatgame import matrix
+from combatgame.enemies import enemy_attributes
+from combatgame.matrix import MatchupMatrix
+from combatgame.tables import set_cells
+
+
+TEAMS = [("Tank",), ("Healer",)]
+
+
+def counted_cells(monkeypatch) -> list:
+    # record the team and enemy of every cell simulated
+    simulated = []
+    simulate_cell = matrix._simulate_cell
+
+    def record(task):
+        simulated.append((task[0].team, task[0].enemies[0]))
+
+        return simulate_cell(task)
+
+    monkeypatch.setattr(matrix, "_simulate_cell", record)
+
+    return simulated
+
+
+def test_editing_an_enemy_simulates_only_its_column(realistic_enemies, monkeypatch):
+    simulated = counted_cells(monkeypatch)
+    cells = MatchupMatrix(TEAMS, battles=20, processes=1, cache=False)
+
+    assert cells.update() == len(TEAMS) * len(cells.enemies)
+    assert not cells.stale_cells()
+
+    before = dict(cells.cells)
+    old_value = enemy_attributes["Doomshroud"]["AP"]
+    set_cells([("enemy", "Doomshroud", "AP", "40")])
+    simulated.clear()
+
+    try:
+        assert cells.update() == len(TEAMS)
+        assert sorted(simulated) == sorted((team, "Doomshroud") for team in TEAMS)
+        assert all(
+            cell == before[key] for key, cell in cells.cells.items() if key[1] != "Doomshroud"
+            )
+        assert all(
+            cells.cells[team, "Doomshroud"] != before[team, "Doomshroud"] for team in TEAMS
+            )
+
+    finally:
+        set_cells([("enemy", "Doomshroud", "AP", old_value)])
+
+    # putting the row back only simulates the column again, to its old results
+    assert cells.update() == len(TEAMS)
+    assert cells.cells == before
+
+
+def test_state_file_keeps_the_cells_between_runs(realistic_enemies, tmp_path):
+    state = str(tmp_path / "matrix.json")
+    MatchupMatrix(TEAMS, battles=10, processes=1, state_path=state, cache=False).update()
+    cells = MatchupMatrix(TEAMS, battles=10, processes=1, state_path=state, cache=False)
+
+    assert not cells.stale_cells()
+    assert cells.update() == 0
+
+    # other settings give other results, the state is ignored
+    assert MatchupMatrix(TEAMS, battles=20, processes=1, state_path=state).stale_cells()
@@ -0,0 +1,70 @@
+"""Tests of the object and character pools."""
+import gc
+
+import pytest
+
+from combatgame.characters import Tank
+from combatgame.pooling import CharacterPool, GcMonitor, ObjectPool
+
+
+class Counter:
+    def __init__(self, start=0):
+        self.value = start
+
+    def reset(self, start=0):
+        self.value = start
+
+
+def test_released_objects_are_reset_and_reused():
+    pool = ObjectPool(Counter)
+    counter = pool.acquire(5)
+    counter.value += 1
+    pool.release(counter)
+
+    assert pool.acquire(2) is counter
+    assert counter.value == 2
+    assert (pool.created, pool.reused, pool.free) == (1, 1, 0)
+
+
+def test_double_release_raises():
+    pool = ObjectPool(Counter)
+    counter = pool.acquire()
+    pool.release(counter)
+
+    with pytest.raises(ValueError):
+        pool.release(counter)
+
+    assert pool.free == 1
+
+    # acquiring it again makes it releasable again
+    pool.release(pool.acquire())
+    assert pool.free == 1
+
+
+def test_free_list_is_capped():
+    pool = ObjectPool(Counter, max_free=1)
+    pool.release(pool.acquire(), pool.acquire())
+
+    assert pool.free == 1
+
+
+def test_character_pool_restores_released_characters():
+    pool = CharacterPool()
+    tank = pool.acquire(Tank, "Tank")
+    tank.health_points = 1
+    pool.release(tank)
+
+    assert pool.acquire(Tank, "Tank") is tank
+    assert tank.health_points == tank.max_health_points
+
+
+def test_gc_monitor_only_counts_while_started():
+    monitor = GcMonitor()
+    monitor.start()
+    gc.collect()
+    monitor.stop()
+    collections = list(monitor.collections)
+    gc.collect()
+
+    assert collections[2] >= 1
+    assert monitor.collections == collections
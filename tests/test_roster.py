@@ -0,0 +1,97 @@
+"""Tests of the enemy roster queries against a scan of every enemy."""
+import random
+
+import pytest
+
+from combatgame.enemies import EnemyRoster
+
+
+STATS = EnemyRoster.STATS
+TAGS = ("undead", "beast", "flying", "boss")
+
+
+def random_attributes(rng: random.Random, size: int) -> dict:
+    # a table of enemies with few distinct values, so queries hit many ties
+    attributes = {}
+
+    for index in range(size):
+        name = f"enemy{index:04}"
+        attributes[name] = {"name": name, **{stat: str(rng.randint(0, 60)) for stat in STATS}}
+        attributes[name]["tags"] = ";".join(tag for tag in TAGS if rng.random() < 0.3)
+
+    return attributes
+
+
+def random_ranges(rng: random.Random) -> dict:
+    ranges = {}
+
+    for stat in rng.sample(STATS, rng.randint(0, 2)):
+        low = rng.randint(-5, 60)
+        ranges[stat] = (low, low + rng.randint(0, 40))
+
+    return ranges
+
+
+def matching(roster: EnemyRoster, attributes: dict, ranges: dict, tags: tuple) -> list:
+    # the enemies matching the filters, found by checking every one of them
+    return sorted(
+        name for name, attr in attributes.items()
+        if all(low <= int(attr[stat]) <= high for stat, (low, high) in ranges.items())
+        and all(name in roster.tagged(tag) for tag in tags)
+    )
+
+
+@pytest.fixture(params=[5, 300, 2000])
+def roster(request):
+    rng = random.Random(request.param)
+    attributes = random_attributes(rng, request.param)
+
+    return rng, attributes, EnemyRoster(attributes)
+
+
+def test_in_range_equals_scan(roster):
+    rng, attributes, index = roster
+
+    for _ in range(200):
+        stat = rng.choice(STATS)
+        low = rng.uniform(-5, 65)
+        high = low + rng.uniform(-5, 30)
+        found = index.in_range(stat, low, high)
+
+        assert sorted(found) == sorted(
+            name for name, attr in attributes.items() if low <= int(attr[stat]) <= high
+            )
+        assert [int(attributes[name][stat]) for name in found] == sorted(
+            int(attributes[name][stat]) for name in found
+            )
+
+
+def test_select_equals_scan(roster):
+    rng, attributes, index = roster
+
+    for _ in range(200):
+        ranges = random_ranges(rng)
+        tags = tuple(rng.sample(TAGS, rng.randint(0, 2)))
+
+        assert index.select(ranges, tags) == matching(
+            index, attributes, ranges, tags
+            )
+
+
+def test_nearest_equals_scan(roster):
+    rng, attributes, index = roster
+
+    for _ in range(300):
+        stat = rng.choice(STATS)
+        value = rng.uniform(-10, 70)
+        count = rng.choice([1, 3, 10, 400])
+        ranges = random_ranges(rng)
+        tags = tuple(rng.sample(TAGS, rng.randint(0, 2)))
+
+        found = index.nearest(stat, value, count, ranges, tags)
+        candidates = matching(index, attributes, ranges, tags)
+
+        # ties are broken by name, whether the candidates are ranked or walked
+        assert found == sorted(
+            candidates, key=lambda name: (abs(int(attributes[name][stat]) - value), name)
+            )[:count]
@@ -0,0 +1,120 @@
+"""Tests of the initiative scheduler and the raids it orders."""
+import random
+from collections import Counter
+
+from combatgame.characters import Assassin, Tank
+from combatgame.enemies import EnemyCharacter
+from combatgame.raid import RaidBattle
+from combatgame.scheduler import AliveRoster, InitiativeScheduler
+
+
+class Combatant:
+    def __init__(self, name, speed_points):
+        self.name = name
+        self.speed_points = speed_points
+        self.health_points = 1
+
+    def is_alive(self):
+        return self.health_points > 0
+
+
+def test_faster_combatants_act_more_often():
+    fast, slow = Combatant("fast", 10), Combatant("slow", 5)
+    scheduler = InitiativeScheduler([fast, slow], random.Random(0))
+    turns = Counter(scheduler.next_turn().name for _ in range(30))
+
+    assert turns == {"fast": 20, "slow": 10}
+
+
+def test_remove_is_idempotent():
+    first, second = Combatant("first", 5), Combatant("second", 5)
+    scheduler = InitiativeScheduler([first, second], random.Random(0))
+
+    scheduler.remove(first)
+    scheduler.remove(first)
+    scheduler.remove(Combatant("stranger", 5))
+
+    assert len(scheduler) == 1
+    assert {scheduler.next_turn().name for _ in range(3)} == {"second"}
+
+
+def test_removed_combatants_can_come_back():
+    first, second = Combatant("first", 5), Combatant("second", 5)
+    scheduler = InitiativeScheduler([first, second], random.Random(0))
+
+    # back before its entry is skipped, it keeps its place
+    scheduler.remove(first)
+    scheduler.add(first)
+    assert len(scheduler) == 2
+
+    # back after its entry was skipped, it is scheduled again
+    scheduler.remove(first)
+    scheduler.next_turn()
+    scheduler.next_turn()
+    scheduler.add(first)
+
+    assert len(scheduler) == 2
+    assert "first" in {scheduler.next_turn().name for _ in range(4)}
+
+
+def test_defeated_combatants_are_dropped():
+    first, second = Combatant("first", 5), Combatant("second", 5)
+    scheduler = InitiativeScheduler([first, second], random.Random(0))
+    first.health_points = 0
+
+    assert {scheduler.next_turn().name for _ in range(3)} == {"second"}
+    assert len(scheduler) == 1
+
+    second.health_points = 0
+    assert scheduler.next_turn() is None
+    assert len(scheduler) == 0
+
+
+def test_alive_roster_finds_first_alive():
+    characters = [Combatant(str(index), 1) for index in range(3)]
+    roster = AliveRoster(characters)
+    roster.mark_defeated(characters[0])
+    roster.mark_defeated(characters[0])
+
+    assert roster.alive_count == 2
+    assert roster.first_alive() is characters[1]
+
+
+def duel(player_speed, enemy_speed):
+    player = Assassin("Assassin")
+    player.speed_points = player_speed
+    player.attack_points = 1000
+    player.luck = 0
+
+    enemy = EnemyCharacter("Viperstrike")
+    enemy.speed_points = enemy_speed
+    enemy.attack_points = 1000
+    enemy.luck = 0
+    enemy.health_points = enemy.max_health_points = 100
+
+    return RaidBattle([player], [enemy], random.Random(0))
+
+
+def test_raid_order_follows_initiative(realistic_enemies):
+    faster_player = duel(10, 2)
+    faster_player.run_turn()
+    assert faster_player.player_won()
+
+    faster_enemy = duel(2, 10)
+    faster_enemy.run_turn()
+    assert faster_enemy.is_over() and not faster_enemy.player_won()
+
+
+def test_raid_turn_acts_once_per_alive_combatant(realistic_enemies):
+    players = [Tank(f"Tank {index}") for index in range(5)]
+    enemies = [EnemyCharacter("Mistwalker") for _ in range(5)]
+
+    for character in players + enemies:
+        character.speed_points = 4
+
+    raid = RaidBattle(players, enemies, random.Random(0))
+    logs = raid.run_turn()
+
+    # every action costs a speed point, then both teams regenerate one
+    assert sum(raid.players.speed_points) + sum(raid.enemies.speed_points) == 40
+    assert logs and raid.turn == 1
@@ -0,0 +1,117 @@
+"""Tests of the search based enemy AI."""
+import random
+import threading
+import time
+
+from combatgame.characters import Healer, Tank
+from combatgame.enemies import EnemyCharacter
+from combatgame.policies import create_policy
+from combatgame.pooling import character_pool
+from combatgame.search import MonteCarloAI
+from combatgame.simulation import simulate
+
+
+def new_fight():
+    enemy = EnemyCharacter("Doomshroud")
+    players = [Tank("Tank"), Healer("Healer")]
+
+    return enemy, players
+
+
+def action_name(action) -> str:
+    # the name of a bound method or of the method of a partial
+    return getattr(action, "func", action).__name__
+
+
+def root_plays(ai: MonteCarloAI, enemy, players) -> int:
+    # the amount of iterations that went through the turn being decided
+    root = ai._copy_state(enemy, players[0], players)
+
+    return sum(ai._table[root][0])
+
+
+def test_decision_stays_within_budget(realistic_enemies):
+    enemy, players = new_fight()
+    ai = MonteCarloAI(budget=0.02)
+
+    start = time.perf_counter()
+    ai.select_action(enemy, players[0], players)
+
+    assert time.perf_counter() - start < 0.02 + 0.05
+    assert ai.stats()["iterations"] > 0
+
+
+def test_interrupt_stops_the_search(realistic_enemies):
+    enemy, players = new_fight()
+    ai = MonteCarloAI(budget=10.0)
+    timer = threading.Timer(0.05, ai.interrupt)
+
+    start = time.perf_counter()
+    timer.start()
+    action = ai.select_action(enemy, players[0], players)
+
+    assert time.perf_counter() - start < 2.0
+    assert action_name(action) in ("basic_attack", "heal", "defend")
+
+
+def test_without_iterations_the_rules_are_used(realistic_enemies):
+    enemy, players = new_fight()
+    ai = MonteCarloAI(max_iterations=0)
+
+    assert action_name(ai.select_action(enemy, players[0], players)) == action_name(
+        enemy.select_rule_action(players[0])
+        )
+
+
+def test_max_iterations_make_decisions_repeatable(realistic_enemies):
+    decisions = []
+
+    for _ in range(2):
+        enemy, players = new_fight()
+        ai = MonteCarloAI(budget=10.0, max_iterations=300, rng=random.Random(3))
+        decisions.append(
+            (action_name(ai.select_action(enemy, players[0], players)), ai.stats())
+            )
+
+    assert decisions[0] == decisions[1]
+    assert decisions[0][1]["iterations"] == 300
+
+
+def test_tree_is_reused_between_decisions(realistic_enemies):
+    enemy, players = new_fight()
+    ai = MonteCarloAI(budget=10.0, max_iterations=200, rng=random.Random(5))
+
+    ai.select_action(enemy, players[0], players)
+    first = root_plays(ai, enemy, players)
+    entries = ai.stats()["entries"]
+
+    ai.select_action(enemy, players[0], players)
+
+    # the first iteration of a decision adds its turn, the following ones play through it
+    assert first == 199
+    assert root_plays(ai, enemy, players) == first + 200
+    assert ai.stats()["entries"] > entries
+
+
+def test_tables_are_cleared_when_full(realistic_enemies):
+    enemy, players = new_fight()
+    ai = MonteCarloAI(budget=10.0, max_iterations=200, max_entries=50, rng=random.Random(5))
+
+    for _ in range(3):
+        ai.select_action(enemy, players[0], players)
+
+    assert ai.stats()["entries"] <= 50 + 200
+
+
+def test_pooled_enemies_drop_the_search_ai(realistic_enemies):
+    ai = MonteCarloAI(budget=10.0, max_iterations=20)
+    simulate(("Tank",), ("Doomshroud",), create_policy("greedy"), range(2), enemy_ai=ai)
+
+    enemy = character_pool.acquire(EnemyCharacter, "Doomshroud")
+
+    try:
+        assert enemy.ai is None
+        assert ai.stats()["decisions"] > 0
+
+    finally:
+        character_pool.release(enemy)
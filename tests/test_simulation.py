@@ -0,0 +1,31 @@
+"""Tests of the headless simulation."""
+from combatgame import simulation
+from combatgame.simulation import simulate_raid
+
+
+def test_raids_are_reproducible(realistic_enemies):
+    results = simulate_raid(("Tank", "Assassin"), ("Doomshroud",), 10, "attack", range(3))
+
+    assert results == simulate_raid(
+        ("Tank", "Assassin"), ("Doomshroud",), 10, "attack", range(3)
+        )
+    assert [result.seed for result in results] == [0, 1, 2]
+    assert all(0 < result.turns <= simulation.MAX_TURNS for result in results)
+
+
+def test_raid_stops_at_max_turns(realistic_enemies):
+    results = simulate_raid(("Tank",), ("Mistwalker",), 3, "attack", range(2), max_turns=1)
+
+    assert all(result.turns == 1 and not result.player_won for result in results)
+
+
+def test_raid_from_the_command_line(realistic_enemies, capsys):
+    simulation.main([
+        "--team", "Tank", "MirrorMage", "--enemies", "Gloomreaper", "--raid", "5",
+        "--raid-action", "area attack", "--battles", "4"
+        ])
+
+    title, summary = capsys.readouterr().out.splitlines()
+
+    assert title == "5x Tank MirrorMage vs 5x Gloomreaper (raid, area attack)"
+    assert summary.startswith("Won ") and "/4 battles" in summary
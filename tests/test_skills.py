@@ -0,0 +1,137 @@
+"""Tests that the compiled skills behave like the hand-written skill classes they replaced.
+
+Each reference below is the `use` method of the removed `Skills.*` class, rolling with the
+given random number generator instead of the random module.
+"""
+import random
+
+import pytest
+
+from combatgame.characters import Assassin, Healer, MirrorMage, Tank
+from combatgame.enemies import EnemyCharacter
+from combatgame.skills import SkillEffects, skill_registry
+
+
+def whisker_guard(messages, character, target, rng):
+    defense_points_increase = rng.randint(5, 15)
+    character.defense_points += defense_points_increase
+
+    return rng.choice(messages).format(character=character.name) + \
+        f"\n(+{defense_points_increase} Defense Points)"
+
+
+def claw_swipe(messages, character, target, rng):
+    battle_log = f"(removed {target.name} defense)"
+    damage_dealt = rng.randint(25, 35)
+
+    if damage_dealt > target.defense_points:
+        net_damage = damage_dealt - target.defense_points
+        target.health_points -= net_damage
+        battle_log = f"(removed {target.name} defense and dealt {net_damage}HP)"
+
+    target.defense_points = 0
+
+    return rng.choice(messages).format(character=character.name, target=target.name) + \
+        "\n" + battle_log
+
+
+def illusionary_aura(messages, character, target, rng):
+    character.active_effects.add(SkillEffects.Invincible())
+
+    return rng.choice(messages).format(character=character.name) + \
+        "\n(Invincible Effect Activated)"
+
+
+def reflective_shield(messages, character, target, rng):
+    character.active_effects.add(SkillEffects.ReflectiveShield())
+
+    return rng.choice(messages).format(character=character.name, target=target.name) + \
+        "\n(reflective shield effect activated)"
+
+
+def healing_purr(messages, character, target, rng):
+    health_points_increase = rng.randint(5, 15)
+    character.health_points += health_points_increase
+
+    return rng.choice(messages).format(character=character.name) + \
+        f"\n(+{health_points_increase} health points)"
+
+
+def lucky_charm(messages, character, target, rng):
+    luck_increase = 5
+    character.luck += luck_increase
+
+    return rng.choice(messages).format(character=character.name) + f"\n(+{luck_increase}% luck)"
+
+
+def purrfect_strike(messages, character, target, rng):
+    target.defense_points = 0
+    damage_dealt = rng.randint(15, 25)
+    target.health_points -= damage_dealt
+
+    return rng.choice(messages).format(character=character.name, target=target.name) + \
+        f"\n(removed {target.name}'s defense and dealt {damage_dealt}HP)"
+
+
+def crippling_strike(messages, character, target, rng):
+    speed_reduction = rng.randint(5, 15)
+    target.speed_points = max(0, target.speed_points - speed_reduction)
+
+    return rng.choice(messages).format(character=character.name, target=target.name) + \
+        f"\n(Reduced {target.name} speed points by {speed_reduction})"
+
+
+REFERENCES = {
+    "WhiskerGuard": (Tank, whisker_guard),
+    "ClawSwipe": (Tank, claw_swipe),
+    "IllusionaryAura": (MirrorMage, illusionary_aura),
+    "ReflectiveShield": (MirrorMage, reflective_shield),
+    "HealingPurr": (Healer, healing_purr),
+    "LuckyCharm": (Healer, lucky_charm),
+    "PurrfectStrike": (Assassin, purrfect_strike),
+    "CripplingStrike": (Assassin, crippling_strike),
+}
+
+STATS = ("health_points", "defense_points", "speed_points", "attack_points", "luck")
+
+
+def state(character):
+    return [getattr(character, stat) for stat in STATS] + [
+        (effect.name, effect.use_count) for effect in getattr(character, "active_effects", ())
+        ]
+
+
+def fighters(character_class, seed, defense_points):
+    character = character_class("Cat")
+    character.rng = random.Random(seed)
+    target = EnemyCharacter("Viperstrike")
+    target.defense_points = defense_points
+
+    return character, target
+
+
+@pytest.mark.parametrize("skill_name", sorted(REFERENCES))
+def test_compiled_skill_matches_removed_class(realistic_enemies, skill_name):
+    character_class, reference = REFERENCES[skill_name]
+    skill = skill_registry.get(skill_name)
+
+    for seed in range(40):
+        # defenses on both sides of the damage rolls
+        defense_points = seed % 40
+        character, target = fighters(character_class, seed, defense_points)
+        expected_character, expected_target = fighters(character_class, seed, defense_points)
+
+        log = skill.use(character, target)
+        expected_log = reference(
+            skill.message_displays, expected_character, expected_target,
+            expected_character.rng
+            )
+
+        assert log == expected_log
+        assert state(character) == state(expected_character)
+        assert state(target) == state(expected_target)
+
+
+def test_job_classes_keep_their_skills():
+    assert [skill.name for skill in Tank("Cat").skills] == ["Whisker Guard", "Claw Swipe"]
+    assert [skill.name for skill in Healer("Cat").skills] == ["Healing Purr", "Luck Charm"]
@@ -0,0 +1,135 @@
+"""Tests that restoring a snapshot puts battles and characters back exactly."""
+import random
+
+from combatgame.battle import Battle
+from combatgame.characters import Healer, MirrorMage, Tank
+from combatgame.enemies import EnemyCharacter
+from combatgame.skills import SkillEffects
+from combatgame.stats import StatModifiers
+
+
+def new_battle(seed):
+    players = [Tank("Tank"), MirrorMage("MirrorMage"), Healer("Healer")]
+    enemies = [EnemyCharacter("Gloomreaper"), EnemyCharacter("Doomshroud")]
+
+    return Battle(players, enemies, random.Random(seed))
+
+
+def play_turns(battle, turns, choices):
+    # play turns with player actions picked by `choices`, and record every state on the way
+    states = []
+
+    for _ in range(turns):
+        if battle.is_game_over():
+            break
+
+        player = battle.active_player_character
+        enemy = battle.active_enemy_character
+
+        if battle.start_turn() is player:
+            actions = battle.available_actions()
+            battle.take_player_turn(actions[choices.randrange(len(actions))])
+
+        else:
+            battle.take_enemy_turn()
+
+        battle.end_turn(player, enemy)
+        states.append(full_state(battle))
+
+    return states
+
+
+def full_state(battle):
+    return (
+        battle.state_view(), battle.turn_count, battle.turn_character.name,
+        [
+            (
+                character.critical_chance,
+                [character.stat_modifiers.total(stat) for stat in StatModifiers.STATS],
+                [
+                    (effect.name, effect.use_count, effect.duration)
+                    for effect in getattr(character, "active_effects", ())
+                ]
+            )
+            for character in battle.player_characters + battle.enemies
+        ]
+    )
+
+
+def test_restore_replays_the_same_battle(realistic_enemies):
+    battle = new_battle(7)
+    play_turns(battle, 5, random.Random(0))
+
+    snapshot = battle.snapshot(include_rng=True)
+    before = full_state(battle)
+    states = play_turns(battle, 30, random.Random(1))
+
+    battle.restore(snapshot)
+
+    assert full_state(battle) == before
+    assert play_turns(battle, 30, random.Random(1)) == states
+
+
+def test_snapshot_skips_the_rng_unless_asked(realistic_enemies):
+    battle = new_battle(3)
+    play_turns(battle, 4, random.Random(0))
+
+    snapshot = battle.snapshot()
+    before = full_state(battle)
+    play_turns(battle, 20, random.Random(2))
+    battle.restore(snapshot)
+
+    assert snapshot.rng_state is None
+    assert full_state(battle) == before
+
+
+def test_character_snapshot_covers_modifiers_and_effects():
+    healer = Healer("Healer")
+    healer.stat_modifiers.add("luck", 5, "charm", duration=2)
+    healer.active_effects.add(SkillEffects.Invincible(2, duration=3))
+    snapshot = healer.snapshot()
+    luck = healer.luck
+
+    healer.health_points -= 10
+    healer.stat_modifiers.tick()
+    healer.stat_modifiers.tick()
+    healer.active_effects.tick()
+    healer.active_effects.clear()
+    healer.restore_snapshot(snapshot)
+
+    assert (healer.luck, healer.critical_chance) == (luck, luck)
+    assert healer.health_points == healer.max_health_points
+    assert healer.stat_modifiers.total("luck") == 5
+    assert healer.get_active_effect(SkillEffects.Invincible).duration == 3
+
+    # the restored modifier still expires on time
+    healer.stat_modifiers.tick()
+    healer.stat_modifiers.tick()
+    assert healer.luck == luck - 5
+
+
+def test_enemy_snapshot_round_trip(realistic_enemies):
+    enemy = EnemyCharacter("Viperstrike")
+    snapshot = enemy.snapshot()
+
+    enemy.health_points = 1
+    enemy.defense_points = 0
+    enemy.stat_modifiers.add("attack_points", 3, "rage")
+    enemy.restore_snapshot(snapshot)
+
+    assert enemy.snapshot() == snapshot
+    assert not enemy.stat_modifiers
+
+
+def test_a_finished_battle_can_be_restored(realistic_enemies):
+    battle = new_battle(11)
+    snapshot = battle.snapshot()
+    before = full_state(battle)
+    play_turns(battle, 500, random.Random(3))
+
+    assert battle.is_game_over()
+
+    battle.restore(snapshot)
+
+    assert not battle.is_game_over()
+    assert full_state(battle) == before
@@ -0,0 +1,105 @@
+"""Tests of the exact odds of 1v1 battles."""
+import json
+
+import pytest
+
+from combatgame import solver
+from combatgame.balance import wilson_interval
+from combatgame.characters import Assassin, Tank, job_classes
+from combatgame.enemies import EnemyCharacter
+from combatgame.policies import GreedyPolicy, RandomPolicy
+from combatgame.simulation import simulate
+
+
+# the simulated win rates are checked with 99.9% intervals, on fixed seeds
+Z_SCORE = 3.29
+
+
+@pytest.fixture
+def odds_cache(tmp_path, monkeypatch):
+    """Keep the cached odds of the test in a temporary directory."""
+
+    monkeypatch.setattr(solver, "odds_cache_dir", str(tmp_path))
+    monkeypatch.setattr(solver, "_loaded_odds", {})
+
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "job_class, enemy", [("Tank", "Gloomreaper"), ("Assassin", "Gloomreaper")]
+    )
+def test_solved_odds_match_the_simulation(realistic_enemies, job_class, enemy):
+    odds = solver.BattleChain(
+        job_classes[job_class](job_class), EnemyCharacter(enemy), GreedyPolicy()
+        ).solve()
+    results = simulate((job_class,), (enemy,), GreedyPolicy(), range(2000))
+    low, high = wilson_interval(
+        sum(result.player_won for result in results), len(results), Z_SCORE
+        )
+
+    assert odds.simulated == 0 and odds.states > 1
+    assert low <= odds.win_probability <= high
+
+
+def test_chain_gives_up_past_max_states(realistic_enemies):
+    chain = solver.BattleChain(Tank("Tank"), EnemyCharacter("Gloomreaper"), GreedyPolicy())
+
+    assert chain.solve(max_states=100) is None
+    assert chain.solve(max_states=None).states > 100
+
+
+def test_too_many_states_fall_back_to_simulation(realistic_enemies, odds_cache, monkeypatch):
+    monkeypatch.setattr(solver, "MAX_STATES", 100)
+    monkeypatch.setattr(solver, "SIMULATED_BATTLES", 1500)
+    player = Assassin("Assassin")
+    enemy = EnemyCharacter("Gloomreaper")
+    snapshots = (player.snapshot(), enemy.snapshot())
+
+    odds = solver.solve(player, enemy, GreedyPolicy())
+    exact = solver.BattleChain(player, enemy, GreedyPolicy()).solve(max_states=None)
+    low, high = wilson_interval(round(odds.win_probability * 1500), 1500, Z_SCORE)
+
+    assert (odds.states, odds.simulated) == (0, 1500)
+    assert low <= exact.win_probability <= high
+    assert (player.snapshot(), enemy.snapshot()) == snapshots
+
+    # the simulated odds are cached like solved ones
+    assert solver.load_odds(player, enemy, GreedyPolicy()) == odds
+
+
+def test_random_policy_finishes_in_bounded_states(realistic_enemies, odds_cache, monkeypatch):
+    monkeypatch.setattr(solver, "SIMULATED_BATTLES", 500)
+    tank = Tank("Tank")
+    enemy = EnemyCharacter("Viperstrike")
+    enemy.health_points = enemy.max_health_points = 90
+    enemy.attack_points = 18
+
+    odds = solver.solve(tank, enemy, RandomPolicy(), cache=False)
+
+    assert odds.simulated == solver.SIMULATED_BATTLES
+    assert 0 < odds.win_probability < 1
+
+
+def test_solved_odds_are_cached(realistic_enemies, odds_cache):
+    player = Tank("Tank")
+    enemy = EnemyCharacter("Gloomreaper")
+
+    assert solver.load_odds(player, enemy, GreedyPolicy()) is None
+
+    odds = solver.solve(player, enemy, GreedyPolicy())
+    solver._loaded_odds.clear()
+
+    assert len(list(odds_cache.glob("*.json"))) == 1
+    assert solver.load_odds(player, enemy, GreedyPolicy()) == odds
+
+
+def test_failed_odds_write_leaves_no_files(realistic_enemies, odds_cache, monkeypatch):
+    def fail(*_, **__):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", fail)
+
+    with pytest.raises(OSError):
+        solver.solve(Tank("Tank"), EnemyCharacter("Gloomreaper"), GreedyPolicy())
+
+    assert not list(odds_cache.iterdir())
@@ -0,0 +1,89 @@
+"""Tests of the stat modifier stacks."""
+from combatgame.characters import Assassin
+from combatgame.enemies import EnemyCharacter
+
+
+def test_add_and_remove_by_source():
+    assassin = Assassin("Assassin")
+    attack_points = assassin.attack_points
+
+    assassin.stat_modifiers.add("attack_points", 5, "rage")
+    assassin.stat_modifiers.add("attack_points", 3, "song")
+
+    assert assassin.attack_points == attack_points + 8
+    assert assassin.stat_modifiers.total("attack_points") == 8
+    assert assassin.stat_modifiers.base("attack_points") == attack_points
+
+    assassin.stat_modifiers.remove("rage")
+
+    assert assassin.attack_points == attack_points + 3
+    assert assassin.stat_modifiers.total("attack_points") == 3
+
+
+def test_timed_modifiers_expire_on_tick():
+    assassin = Assassin("Assassin")
+    speed_points = assassin.speed_points
+
+    assassin.stat_modifiers.add("speed_points", 4, "haste", duration=2)
+    assassin.stat_modifiers.add("speed_points", 1, "boots")
+
+    assassin.stat_modifiers.tick()
+    assert assassin.speed_points == speed_points + 5
+
+    assassin.stat_modifiers.tick()
+    assert assassin.speed_points == speed_points + 1
+    assert assassin.stat_modifiers
+
+
+def test_removal_never_takes_spent_points_below_zero():
+    assassin = Assassin("Assassin")
+    assassin.stat_modifiers.add("magic_points", 20, "potion")
+
+    # spend more than the base magic points while the modifier is on
+    assassin.magic_points = 5
+    assassin.stat_modifiers.remove("potion")
+
+    assert assassin.magic_points == 0
+
+
+def test_removal_keeps_unspent_points():
+    enemy = EnemyCharacter("Viperstrike")
+    defense_points = enemy.defense_points
+    enemy.stat_modifiers.add("defense_points", 4, "wall")
+
+    enemy.defense_points -= 1
+    enemy.stat_modifiers.remove("wall")
+
+    assert enemy.defense_points == defense_points - 1
+
+
+def test_attack_can_still_go_negative():
+    enemy = EnemyCharacter("Viperstrike")
+    enemy.attack_points = 0
+    enemy.stat_modifiers.add("attack_points", -3, "curse")
+
+    assert enemy.attack_points == -3
+
+
+def test_critical_chance_follows_luck_modifiers():
+    assassin = Assassin("Assassin")
+    luck = assassin.luck
+
+    assert assassin.critical_chance == luck
+
+    assassin.stat_modifiers.add("luck", 200, "charm")
+    assert assassin.critical_chance == 100
+
+    assassin.stat_modifiers.remove("charm")
+    assert assassin.critical_chance == luck
+
+
+def test_restore_stats_drops_modifiers():
+    assassin = Assassin("Assassin")
+    luck = assassin.luck
+
+    assassin.stat_modifiers.add("luck", 10, "charm")
+    assassin.restore_stats()
+
+    assert not assassin.stat_modifiers
+    assert (assassin.luck, assassin.critical_chance) == (luck, luck)